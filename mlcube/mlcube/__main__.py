@@ -1,19 +1,33 @@
 """This requires the MLCube 2.0 that's located somewhere in one of dev branches."""
+import glob
+import json
 import logging
 import os
 import shutil
+import sqlite3
 import sys
+import threading
+import time
 import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
 import click
 import coloredlogs
-from omegaconf import OmegaConf
+from omegaconf import DictConfig, OmegaConf
 
+from mlcube import hooks, metrics, storage
 from mlcube.cli import MLCubeCommand, MultiValueOption, Options, UsageExamples, parse_cli_args
-from mlcube.errors import ExecutionError, IllegalParameterValueError, MLCubeError
+from mlcube.config import TaskPolicy
+from mlcube.errors import ConfigurationError, ExecutionError, IllegalParameterValueError, MLCubeError
+from mlcube.executor import TaskExecutor
+from mlcube.history import RunHistory
 from mlcube.parser import CliParser
-from mlcube.shell import Shell
+from mlcube.runner import Runner
+from mlcube.shell import Interrupted, Shell
+from mlcube.store import ContentStore, StoreEntry, dataset_key, format_size, parse_size
+from mlcube.sweep import Sweep, SweepRun
 from mlcube.system_settings import SystemSettings
 
 logger = logging.getLogger(__name__)
@@ -140,13 +154,20 @@ def configure(mlcube: t.Optional[str], platform: str, p: t.Tuple[str]) -> None:
             resolve=True,
         )
         runner = runner_cls(mlcube_config, task=None)
-        runner.configure()
+        with Shell.interrupt_on_signals(), metrics.labels(platform=platform):
+            with metrics.timed(metrics.CONFIGURE_DURATION, step="configure"), hooks.stage("configure", mlcube_config):
+                runner.configure()
     except MLCubeError as err:
         exit_code = err.context.get("code", 1) if isinstance(err, ExecutionError) else 1
         print(f"Failed to configure MLCube with error code {exit_code}.")
         if isinstance(err, ExecutionError):
             logger.exception(err.describe())
         sys.exit(exit_code)
+    except Interrupted as err:
+        logger.warning("MLCube configure has been interrupted (signal=%d).", err.signum)
+        sys.exit(128 + err.signum)
+    finally:
+        metrics.write_textfile()
     logger.info(
         "MLCube (%s) has been successfully configured for `%s` platform.",
         os.path.abspath(mlcube),
@@ -176,6 +197,42 @@ def configure(mlcube: t.Optional[str], platform: str, p: t.Tuple[str]) -> None:
 @Options.cpu
 @Options.mount
 @Options.parameter
+@click.option(
+    "--sweep",
+    required=False,
+    type=str,
+    default=None,
+    metavar="FILE",
+    help="Path to a sweep file (YAML) that defines a grid and/or a list of MLCube (`-P`) and task parameter "
+    "overrides. Runs read inputs from the workspace, and write outputs to their own directories "
+    "`{WORKSPACE}/sweeps/{SWEEP_NAME}-{TIMESTAMP}/run-NNN`.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    type=int,
+    default=1,
+    help="Number of sweep runs to execute concurrently (used with --sweep).",
+)
+@click.option(
+    "--history",
+    required=False,
+    type=str,
+    default=None,
+    metavar="DB",
+    help="Run history database to record task runs in: `user` (default, `~/.mlcube/history.db` or "
+    "`MLCUBE_HISTORY_DB`), `workspace` (`{WORKSPACE}/.mlcube/history.db`), `off` or path to a database file.",
+)
+@click.option(
+    "--prefetch",
+    required=False,
+    type=click.IntRange(min=0),
+    default=0,
+    metavar="N",
+    help="Number of next tasks to prefetch (pull images, download inputs from storages) in background while the "
+    "current task runs (0 - do not prefetch).",
+)
 @Options.help
 @click.pass_context
 def run(
@@ -191,9 +248,16 @@ def run(
     cpu: str,
     mount: str,
     p: t.Tuple[str],
+    sweep: t.Optional[str] = None,
+    jobs: int = 1,
+    history: t.Optional[str] = None,
+    prefetch: int = 0,
 ) -> None:
     """Run MLCube task(s).
 
+    With `--sweep`, tasks run once for every combination of parameters defined in a sweep file, and a summary table
+    is printed when all runs complete.
+
     \f
     Args:
         ctx: Click context for unknown options
@@ -210,10 +274,14 @@ def run(
             mount options defined for individual parameters.
         p: Additional MLCube configuration parameters (these parameters are those parameters that normally start with
             `-P` prefix). Here, due to original implementation, we need to `unparse` by adding `-P` prefix.
+        sweep: Path to a sweep file.
+        jobs: Number of sweep runs to execute concurrently.
+        history: Run history database (`user`, `workspace`, `off` or path).
+        prefetch: Number of next tasks to prefetch while the current task runs.
     """
     logger.info(
         "run input_arg mlcube=%s, platform=%s, task=%s, workspace=%s, network=%s, security=%s, gpus=%s, "
-        "memory=%s, mount=%s, cpu=%s, p=%s",
+        "memory=%s, mount=%s, cpu=%s, p=%s, sweep=%s, jobs=%d, history=%s, prefetch=%d",
         mlcube,
         platform,
         task,
@@ -225,22 +293,24 @@ def run(
         cpu,
         mount,
         str(p),
+        sweep,
+        jobs,
+        history,
+        prefetch,
     )
-    runner_cls, mlcube_config = parse_cli_args(
-        unparsed_args=ctx.args + ["-P" + param for param in p],
-        parsed_args={
-            "mlcube": mlcube,
-            "platform": platform,
-            "workspace": workspace,
-            "network": network,
-            "security": security,
-            "gpus": gpus,
-            "memory": memory,
-            "cpu": cpu,
-            "mount": mount,
-        },
-        resolve=True,
-    )
+    unparsed_args: t.List[str] = ctx.args + ["-P" + param for param in p]
+    parsed_args: t.Dict[str, t.Any] = {
+        "mlcube": mlcube,
+        "platform": platform,
+        "workspace": workspace,
+        "network": network,
+        "security": security,
+        "gpus": gpus,
+        "memory": memory,
+        "cpu": cpu,
+        "mount": mount,
+    }
+    runner_cls, mlcube_config = parse_cli_args(unparsed_args=unparsed_args, parsed_args=parsed_args, resolve=True)
     mlcube_tasks: t.List[str] = list((mlcube_config.get("tasks", None) or {}).keys())  # Tasks in this MLCube.
     tasks: t.List[str] = CliParser.parse_list_arg(task, default=None)  # Requested tasks.
 
@@ -270,17 +340,112 @@ def run(
         exit(1)
 
     try:
-        # TODO: Sergey - Can we have one instance for all tasks?
-        for task in tasks:
-            logger.info("run task = %s", task)
-            runner = runner_cls(mlcube_config, task=task)
-            runner.run()
+        run_history = RunHistory.from_option(history, mlcube_config.runtime.workspace)
+    except MLCubeError as err:
+        logger.error("Invalid run history (%s): %s", history, str(err))
+        exit(1)
+
+    if sweep is not None:
+        try:
+            _run_sweep(
+                sweep, jobs, tasks, mlcube_config.runtime.workspace, unparsed_args, parsed_args, run_history, prefetch
+            )
+        finally:
+            # Sweep runs share runner resources (e.g., remote instances) that are released once all runs have ended.
+            TaskExecutor(runner_cls, mlcube_config).teardown_runner(tasks)
+            metrics.write_textfile()
+        return
+
+    try:
+        # SIGTERM (e.g., from a job scheduler) is handled like Ctrl-C: runners stop containers and delete remote jobs.
+        with Shell.interrupt_on_signals():
+            # Tasks run one by one honoring their timeouts and retry policies (`tasks.<name>.timeout/retries`).
+            TaskExecutor(
+                runner_cls, mlcube_config, history=run_history, platform=platform, prefetch=prefetch
+            ).run(tasks)
     except MLCubeError as err:
         exit_code = err.context.get("code", 1) if isinstance(err, ExecutionError) else 1
         print(f"run failed to run MLCube with error code {exit_code}.")
         if isinstance(err, ExecutionError):
             logger.exception(err.describe())
         sys.exit(exit_code)
+    except Interrupted as err:
+        logger.warning("MLCube run has been interrupted (signal=%d).", err.signum)
+        sys.exit(128 + err.signum)
+    finally:
+        # Metrics are added to a textfile-collector file if `MLCUBE_METRICS_FILE` is set.
+        metrics.write_textfile()
+
+
+def _run_sweep(
+    sweep_file: str,
+    jobs: int,
+    tasks: t.List[str],
+    workspace: str,
+    unparsed_args: t.List[str],
+    parsed_args: t.Dict[str, t.Any],
+    run_history: t.Optional[RunHistory] = None,
+    prefetch: int = 0,
+) -> None:
+    """Run MLCube tasks for all runs of a sweep (`mlcube run --sweep`) and print the summary table.
+
+    Each run has its own workspace for output parameters (`{workspace}/sweeps/{sweep_name}-{timestamp}/run-NNN`).
+    Input parameters with relative paths are resolved with respect to the MLCube workspace, so that all runs share
+    the same inputs (e.g., a dataset). Inputs that are outputs of requested tasks (or are inside them) are resolved with
+    respect to each run's workspace, so that tasks read outputs of previous tasks of the same run. Inputs in storages
+    (`storage:` URIs) are downloaded into each run's workspace.
+    """
+    try:
+        sweep = Sweep.load(sweep_file)
+    except (MLCubeError, OSError) as err:
+        print(f"run failed to load sweep file ({sweep_file}): {err}")
+        sys.exit(1)
+
+    sweep_dir = os.path.join(workspace, "sweeps", f"{sweep.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    cancelled = threading.Event()
+
+    def _run_fn(_run: SweepRun, _workspace: str) -> None:
+        _runner_cls, _mlcube_config = parse_cli_args(
+            unparsed_args=unparsed_args + _run.cli_args(),
+            parsed_args={**parsed_args, "workspace": _workspace},
+            resolve=True,
+        )
+        _outputs = [
+            os.path.normpath(_output.default)
+            for _task in tasks
+            for _output in _mlcube_config.tasks[_task].parameters.outputs.values()
+        ]
+        for _task in tasks:
+            for _input in _mlcube_config.tasks[_task].parameters.inputs.values():
+                if storage.is_storage_uri(_input.default):
+                    continue
+                _path = os.path.normpath(_input.default)
+                if any(_path == _output or _path.startswith(_output + os.sep) for _output in _outputs):
+                    continue
+                _input.default = Shell.get_host_path(workspace, _input.default)
+        TaskExecutor(
+            _runner_cls,
+            _mlcube_config,
+            cancelled=cancelled,
+            history=run_history,
+            platform=parsed_args["platform"],
+            prefetch=prefetch,
+            teardown=False,
+        ).run(tasks)
+
+    print(f"Running sweep {sweep.name} ({len(sweep.runs)} runs, jobs={jobs}) in {sweep_dir}.")
+    try:
+        with Shell.interrupt_on_signals():
+            results = sweep.execute(_run_fn, sweep_dir, jobs=jobs, cancelled=cancelled)
+    except Interrupted as err:
+        logger.warning("MLCube sweep has been interrupted (signal=%d).", err.signum)
+        sys.exit(128 + err.signum)
+
+    print(Sweep.summary(results))
+    num_failed = sum(1 for result in results if result.exit_code != 0)
+    if num_failed > 0:
+        print(f"run failed: {num_failed} of {len(results)} sweep runs failed (see {sweep_dir}/summary.json).")
+        sys.exit(1)
 
 
 @cli.command(
@@ -493,6 +658,72 @@ def create() -> None:
         print(f"\tMore details: {mlcube_cookiecutter_url}")
 
 
+def _expand_mlcube_paths(mlcube: t.Optional[str]) -> t.List[str]:
+    """Expand `--mlcube` argument (comma-separated list of paths and/or glob patterns) into a list of MLCube paths."""
+    paths: t.List[str] = []
+    for item in CliParser.parse_list_arg(mlcube, default=os.getcwd()):
+        if glob.has_magic(item):
+            matches = sorted(glob.glob(os.path.expanduser(item)))
+            if not matches:
+                logger.warning("inspect no MLCubes found matching pattern '%s'.", item)
+            paths.extend(matches)
+        else:
+            paths.append(item)
+    # Remove duplicates preserving order.
+    return list(dict.fromkeys(paths))
+
+
+_ParsedMLCube = t.Tuple[t.Type[Runner], DictConfig]
+
+
+def _preload_mlcubes(
+    mlcubes: t.List[str], platforms: t.List[str], params: t.Tuple[str, ...], executor: ThreadPoolExecutor
+) -> t.Dict[t.Tuple[str, str], _ParsedMLCube]:
+    """Parse configurations of multiple MLCubes, and fill runners' caches for all of them at once (`Runner.preload`).
+
+    Returns:
+        Runner classes and effective configurations keyed by MLCube paths and platforms. MLCubes that can't be parsed
+            are not included (they are parsed again, and report their errors, when they are inspected or prefetched).
+    """
+    futures = {
+        (path, name): executor.submit(
+            parse_cli_args,
+            unparsed_args=["-P" + param for param in params],
+            parsed_args={"mlcube": path, "platform": name},
+            resolve=True,
+        )
+        for path in mlcubes
+        for name in platforms
+    }
+    parsed: t.Dict[t.Tuple[str, str], _ParsedMLCube] = {}
+    for key, future in futures.items():
+        try:
+            parsed[key] = future.result()
+        except Exception as err:
+            logger.debug("preload_mlcubes failed to parse MLCube (%s) for %s platform: %s", key[0], key[1], str(err))
+    configs: t.Dict[t.Type[Runner], t.List[DictConfig]] = {}
+    for runner_cls, mlcube_config in parsed.values():
+        if runner_cls is not None:
+            configs.setdefault(runner_cls, []).append(mlcube_config)
+    for runner_cls, mlcube_configs in configs.items():
+        try:
+            runner_cls.preload(mlcube_configs)
+        except Exception as err:
+            logger.warning("preload_mlcubes failed to preload MLCubes (runner=%s): %s", runner_cls.__name__, str(err))
+    return parsed
+
+
+def _inspect_mlcube(mlcube: str, platform: str, force: bool, parsed: t.Optional[_ParsedMLCube] = None) -> t.Dict:
+    """Inspect one MLCube (`parsed` is its runner class and effective configuration if they are known)."""
+    runner_cls, mlcube_config = parsed or parse_cli_args(
+        parsed_args={"mlcube": mlcube, "platform": platform},
+        unparsed_args=[],
+        resolve=True,
+    )
+    runner = runner_cls(mlcube_config, task=None)
+    return runner.inspect(force=force)
+
+
 @cli.command(
     name="inspect",
     cls=MLCubeCommand,
@@ -500,7 +731,15 @@ def create() -> None:
     epilog=UsageExamples.inspect,
     context_settings={"max_content_width": _TERMINAL_WIDTH},
 )
-@Options.mlcube
+@click.option(
+    "--mlcube",
+    required=False,
+    type=str,
+    default=None,
+    metavar="PATHS",
+    help="Path to an MLCube project (directory or `mlcube.yaml` file), comma-separated list of paths, or glob "
+    "patterns (e.g., `'cubes/*'`). Default value is current directory.",
+)
 @Options.platform
 @click.option(
     "--force",
@@ -525,6 +764,14 @@ def create() -> None:
     default=None,
     help="File path to store the MLCube information. Defaults to print to STDOUT",
 )
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    type=int,
+    default=None,
+    help="Number of MLCubes to inspect concurrently. Default is the number of CPUs (but not more than 8).",
+)
 @Options.help
 def inspect(
     mlcube: t.Optional[str],
@@ -532,24 +779,54 @@ def inspect(
     force: bool = False,
     format_: str = "json",
     output_file: t.Optional[str] = None,
+    jobs: t.Optional[int] = None,
 ) -> None:
-    """Return low-level information on MLCube objects."""
-    runner_cls, mlcube_config = parse_cli_args(
-        parsed_args={"mlcube": mlcube, "platform": platform},
-        unparsed_args=[],
-        resolve=True,
-    )
+    """Return low-level information on MLCube objects.
+
+    When multiple MLCubes are inspected, they are inspected concurrently, and the result is one document that maps
+    MLCube paths to information on these MLCubes (or to errors if inspection failed).
+    """
+    mlcubes: t.List[str] = _expand_mlcube_paths(mlcube)
+    if not mlcubes:
+        print("MLCube inspect failed: no MLCubes found.")
+        exit(1)
+
+    failed = False
+    if len(mlcubes) == 1:
+        try:
+            info: t.Dict = _inspect_mlcube(mlcubes[0], platform, force)
+        except MLCubeError as err:
+            print("MLCube inspect failed")
+            logger.exception(err)
+            exit(1)
+    else:
+        # Inspecting is mostly waiting for external processes (docker), docker registries and disk I/O (computing
+        # hashes of SIF files releases GIL), so threads are sufficient here.
+        info = {}
+        jobs = max(1, jobs or min(8, os.cpu_count() or 1))
+        logger.info("inspect mlcubes=%s, jobs=%d", mlcubes, jobs)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            parsed = _preload_mlcubes(mlcubes, [platform], (), executor)
+            futures = {
+                path: executor.submit(_inspect_mlcube, path, platform, force, parsed.get((path, platform), None))
+                for path in mlcubes
+            }
+            for path, future in futures.items():
+                try:
+                    info[path] = future.result()
+                except Exception as err:
+                    failed = True
+                    logger.error("inspect failed to inspect MLCube (%s): %s", path, str(err))
+                    info[path] = {"error": str(err)}
+    logger.debug("inspect info=%s", info)
+
     if output_file is None:
         output_stream = sys.stdout
     else:
         dir_path = Path(output_file).resolve().parent
         dir_path.mkdir(parents=True, exist_ok=True)
         output_stream = open(output_file, "w")
-
     try:
-        runner = runner_cls(mlcube_config, task=None)
-        info: t.Dict = runner.inspect(force=force)
-        logger.debug("inspect info=%s", info)
         if format_ == "json":
             import json
 
@@ -560,11 +837,409 @@ def inspect(
             import yaml
 
             yaml.dump(info, output_stream)
-    except MLCubeError as err:
-        print("MLCube inspect failed")
-        logger.exception(err)
+    finally:
+        if output_stream != sys.stdout:
+            output_stream.close()
+    if failed:
         exit(1)
 
 
+def _prefetch_mlcube(
+    mlcube: str,
+    platform: str,
+    params: t.Tuple[str],
+    cancelled: threading.Event,
+    parsed: t.Optional[_ParsedMLCube] = None,
+) -> t.Dict:
+    """Pull or build images of one MLCube for one platform (see `Runner.prefetch`), and measure the duration."""
+    start = time.monotonic()
+    runner_cls, mlcube_config = parsed or parse_cli_args(
+        unparsed_args=["-P" + param for param in params],
+        parsed_args={"mlcube": mlcube, "platform": platform},
+        resolve=True,
+    )
+    with Shell.cancellation(cancelled), metrics.labels(platform=platform), hooks.stage("prefetch", mlcube_config):
+        info: t.Dict = runner_cls(mlcube_config, task=None).prefetch()
+    return {**info, "duration": time.monotonic() - start}
+
+
+@cli.command(
+    name="prefetch",
+    cls=MLCubeCommand,
+    add_help_option=False,
+    epilog=UsageExamples.prefetch,
+    context_settings={"max_content_width": _TERMINAL_WIDTH},
+)
+@click.option(
+    "--mlcube",
+    required=False,
+    type=str,
+    default=None,
+    metavar="PATHS",
+    help="Path to an MLCube project (directory or `mlcube.yaml` file), comma-separated list of paths, or glob "
+    "patterns (e.g., `'cubes/*'`). Default value is current directory.",
+)
+@click.option(
+    "--platform",
+    required=False,
+    type=str,
+    default="docker",
+    metavar="NAMES",
+    help="Comma-separated list of platforms to prefetch images for (e.g., `docker,singularity`).",
+)
+@Options.parameter
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    type=click.IntRange(min=1),
+    default=4,
+    help="Number of images to pull or build concurrently.",
+)
+@Options.help
+def prefetch(mlcube: t.Optional[str], platform: str, p: t.Tuple[str], jobs: int = 4) -> None:
+    """Pull or build images of MLCubes for one or more platforms (e.g., to warm up hosts before benchmarks).
+
+    Images that exist are not pulled or built again, so this command can be rerun safely. A table with image sizes
+    and durations is printed when all images are ready, and the command fails if at least one image could not be
+    pulled or built.
+
+    \f
+    Args:
+        mlcube: Comma-separated list of MLCube paths and/or glob patterns.
+        platform: Comma-separated list of platforms.
+        p: Additional MLCube configuration parameters (`-P` parameters) for all MLCubes.
+        jobs: Number of images to pull or build concurrently.
+    """
+    mlcubes: t.List[str] = _expand_mlcube_paths(mlcube)
+    platforms: t.List[str] = CliParser.parse_list_arg(platform, default="docker")
+    if not mlcubes:
+        print("MLCube prefetch failed: no MLCubes found.")
+        sys.exit(1)
+
+    # Pulling and building images is waiting for external processes (docker, singularity), so threads are sufficient.
+    logger.info("prefetch mlcubes=%s, platforms=%s, jobs=%d", mlcubes, platforms, jobs)
+    start = time.monotonic()
+    rows = [("MLCUBE", "PLATFORM", "STATUS", "SIZE", "TIME", "IMAGE")]
+    failed = 0
+    cancelled = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=jobs)
+    futures: t.Dict[t.Tuple[str, str], Future] = {}
+    try:
+        with Shell.interrupt_on_signals():
+            parsed = _preload_mlcubes(mlcubes, platforms, p, executor) if len(mlcubes) * len(platforms) > 1 else {}
+            futures = {
+                key: executor.submit(_prefetch_mlcube, key[0], key[1], p, cancelled, parsed.get(key, None))
+                for key in ((path, name) for path in mlcubes for name in platforms)
+            }
+            for (path, name), future in futures.items():
+                try:
+                    info = future.result()
+                except Exception as err:
+                    failed += 1
+                    logger.error("prefetch failed to prefetch MLCube (%s) for %s platform: %s", path, name, str(err))
+                    rows.append((path, name, "failed", "-", "-", "-"))
+                    continue
+                size = info.get("size", None)
+                rows.append((
+                    path,
+                    name,
+                    "fetched" if info.get("fetched", False) else "exists",
+                    format_size(size) if size is not None else "-",
+                    f"{info['duration']:.1f}s",
+                    info.get("image", "-"),
+                ))
+    except Interrupted as err:
+        logger.warning("MLCube prefetch has been interrupted (signal=%d).", err.signum)
+        sys.exit(128 + err.signum)
+    finally:
+        # Stop pulls and builds in progress (if interrupted), and do not start new ones.
+        cancelled.set()
+        for future in futures.values():
+            future.cancel()
+        executor.shutdown(wait=True)
+        metrics.write_textfile()
+
+    widths = [max(len(row[col]) for row in rows) for col in range(len(rows[0]) - 1)]
+    for row in rows:
+        print("  ".join(value.ljust(width) for value, width in zip(row, widths)) + "  " + row[-1])
+    print(f"Prefetched {len(rows) - 1 - failed} of {len(rows) - 1} images in {time.monotonic() - start:.1f}s.")
+    if failed:
+        sys.exit(1)
+
+
+def _content_stores(paths: t.Tuple[str]) -> t.List[t.Tuple[str, t.Optional[int]]]:
+    """Return content stores (path, max size) - either provided by users or configured in system settings."""
+    if paths:
+        return [(path, None) for path in paths]
+    stores: t.Dict[str, t.Optional[int]] = {}
+    settings = SystemSettings()
+    dataset_cache: t.Optional[ContentStore] = settings.dataset_cache
+    if dataset_cache is not None:
+        stores[dataset_cache.root.as_posix()] = dataset_cache.max_size
+    for platform_name, platform_config in settings.platforms.items():
+        path: t.Optional[str] = platform_config.get("image_store", None)
+        if path:
+            max_size = parse_size(platform_config.get("image_store_max_size", None))
+            logger.debug("cache platform=%s, image_store=%s, max_size=%s", platform_name, path, max_size)
+            # Several platforms may share one store - use the smallest configured max size.
+            sizes = [size for size in (stores.get(path, None), max_size) if size is not None]
+            stores[path] = min(sizes) if sizes else None
+    return list(stores.items())
+
+
+def _store_entry_matches(entry: StoreEntry, name: str) -> bool:
+    """Return true if a user-provided name (content key, object name or key prefix) refers to this store entry."""
+    return name == entry.name or dataset_key(name) == entry.key or (len(name) >= 8 and entry.key.startswith(name))
+
+
+@cli.command(
+    name="cache",
+    cls=MLCubeCommand,
+    add_help_option=False,
+    epilog=UsageExamples.cache,
+    context_settings={"max_content_width": _TERMINAL_WIDTH},
+)
+@click.option(
+    "--path",
+    "paths",
+    required=False,
+    type=str,
+    multiple=True,
+    help="Path to a content store. By default, the dataset cache and image stores configured in system settings are "
+    "used (the `cache` section and `image_store` of singularity platforms).",
+)
+@click.option("--prune", is_flag=True, help="Evict least recently used objects so that stores do not exceed max size.")
+@click.option(
+    "--max-size",
+    "--max_size",
+    required=False,
+    type=str,
+    default=None,
+    help="Maximal store size (e.g., 500M, 200G) for `--prune`. Defaults to max size configured in system settings. "
+    "Use 0 to remove all objects.",
+)
+@click.option(
+    "--pin",
+    "pins",
+    required=False,
+    type=str,
+    multiple=True,
+    help="Pin objects (content keys, names or key prefixes), so that they are never evicted.",
+)
+@click.option(
+    "--unpin", "unpins", required=False, type=str, multiple=True, help="Unpin objects (see `--pin`)."
+)
+@Options.help
+def cache(
+    paths: t.Tuple[str], prune: bool, max_size: t.Optional[str], pins: t.Tuple[str], unpins: t.Tuple[str]
+) -> None:
+    """List, prune, pin or unpin objects in host-wide content stores (dataset cache, singularity image stores).
+
+    Content stores keep large files (for instance, datasets and SIF images) shared by multiple workspaces. Workspaces
+    reference these files via hard links (these remain valid after eviction) or symbolic links.
+    """
+    stores = _content_stores(paths)
+    if not stores:
+        print(
+            "No content stores found. Configure one (e.g., the `cache` section of system settings, or `image_store` "
+            "for singularity platform) or use --path."
+        )
+        return
+    try:
+        for path, store_max_size in stores:
+            store = ContentStore(path, max_size=store_max_size)
+            for names, pinned in ((pins, True), (unpins, False)):
+                for entry in store.entries():
+                    if any(_store_entry_matches(entry, name) for name in names):
+                        store.pin(entry.key, pinned)
+                        print(f"Store {store.root}: {'pinned' if pinned else 'unpinned'} {entry.name or entry.key}.")
+            if prune:
+                limit: t.Optional[int] = parse_size(max_size) if max_size is not None else store_max_size
+                if limit is None:
+                    print(f"Store {store.root}: no max size configured, use --max-size to prune.")
+                    continue
+                evicted = store.evict(limit)
+                print(
+                    f"Store {store.root}: evicted {len(evicted)} objects "
+                    f"({format_size(sum(entry.size for entry in evicted))})."
+                )
+            entries = store.entries()
+            limit_str = format_size(store.max_size) if store.max_size is not None else "unlimited"
+            print(
+                f"Store {store.root}: {len(entries)} objects, "
+                f"{format_size(sum(entry.size for entry in entries))} (max size: {limit_str})."
+            )
+            for entry in entries:
+                last_used = datetime.fromtimestamp(entry.last_used).strftime("%Y-%m-%d %H:%M:%S")
+                pinned = "pinned" if entry.pinned else ""
+                print(f"  {entry.key[:16]}  {format_size(entry.size):>8}  {last_used}  {pinned:6}  {entry.name}")
+    except MLCubeError as err:
+        logger.error("Command failed, command = '%s' error = '%s'", " ".join(sys.argv), str(err))
+        sys.exit(1)
+
+
+@cli.command(
+    name="history",
+    cls=MLCubeCommand,
+    add_help_option=False,
+    epilog=UsageExamples.history,
+    context_settings={"max_content_width": _TERMINAL_WIDTH},
+)
+@click.option("--mlcube", required=False, type=str, default=None, help="MLCube name or path to MLCube directory.")
+@click.option("--task", required=False, type=str, default=None, help="Task name.")
+@click.option("--platform", required=False, type=str, default=None, metavar="NAME", help="Platform name.")
+@click.option("--status", required=False, type=click.Choice(["ok", "failed"]), default=None, help="Run status.")
+@click.option("--image", required=False, type=str, default=None, help="MLCube image hash (or its part).")
+@click.option("--config", "config_", required=False, type=str, default=None, help="Configuration hash (or its part).")
+@click.option(
+    "--since",
+    required=False,
+    type=str,
+    default=None,
+    help="Only show runs started within this period (e.g., `2h`, `7d`) or since this date (e.g., `2024-01-31`).",
+)
+@click.option("--limit", required=False, type=int, default=20, help="Maximal number of runs to show (0 - all runs).")
+@click.option(
+    "--db",
+    required=False,
+    type=str,
+    default=None,
+    help="Run history database: `user` (default), `workspace` (requires --workspace) or path to a database file.",
+)
+@click.option(
+    "--workspace",
+    required=False,
+    type=str,
+    default=None,
+    metavar="PATH",
+    help="Workspace directory whose run history database to use (with `--db=workspace`).",
+)
+@click.option(
+    "--format",
+    "format_",
+    required=False,
+    type=click.Choice(["table", "json"]),
+    default="table",
+    help="Output format.",
+)
+@click.option(
+    "--output-file",
+    "--output_file",
+    required=False,
+    type=str,
+    default=None,
+    help="File path to store the runs. Defaults to print to STDOUT",
+)
+@Options.help
+def history(
+    mlcube: t.Optional[str],
+    task: t.Optional[str],
+    platform: t.Optional[str],
+    status: t.Optional[str],
+    image: t.Optional[str],
+    config_: t.Optional[str],
+    since: t.Optional[str],
+    limit: int,
+    db: t.Optional[str],
+    workspace: t.Optional[str],
+    format_: str,
+    output_file: t.Optional[str],
+) -> None:
+    """Show MLCube task runs recorded by `mlcube run` (most recent first).
+
+    Runs are recorded with hashes of MLCube configurations and images, exit codes, durations, resource usage and
+    fingerprints of task outputs. Use `--format=json` to export all fields.
+    """
+    try:
+        run_history = RunHistory.from_option(db, workspace)
+        if run_history is None:
+            raise ConfigurationError("Run history is disabled (--db=off).")
+        since_time: t.Optional[float] = None
+        if since:
+            try:
+                since_time = datetime.fromisoformat(since).timestamp()
+            except ValueError:
+                since_time = time.time() - TaskPolicy.parse_duration(since, "since")
+        if not run_history.path.exists():
+            records = []
+        else:
+            records = run_history.query(
+                mlcube=mlcube,
+                task=task,
+                platform=platform,
+                status=status,
+                image=image,
+                config_hash=config_,
+                since=since_time,
+                limit=limit or None,
+            )
+    except (MLCubeError, sqlite3.Error) as err:
+        logger.error("Command failed, command = '%s' error = '%s'", " ".join(sys.argv), str(err))
+        sys.exit(1)
+
+    if format_ == "json":
+        output = json.dumps([record.to_dict() for record in records], indent=2)
+    else:
+        output = RunHistory.table(records) if records else f"No runs found ({run_history.path})."
+    if output_file:
+        with open(output_file, "w") as stream:
+            stream.write(output + "\n")
+    else:
+        print(output)
+
+
+@cli.command(
+    name="serve",
+    cls=MLCubeCommand,
+    add_help_option=False,
+    epilog=UsageExamples.serve,
+    context_settings={"max_content_width": _TERMINAL_WIDTH},
+)
+@click.option(
+    "--socket",
+    "socket_path",
+    required=False,
+    type=str,
+    default=None,
+    metavar="PATH",
+    help="Unix socket to listen on. Default is `MLCUBE_SERVER_SOCKET` environment variable or "
+    "`~/.mlcube/server.sock`.",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    required=False,
+    type=int,
+    default=None,
+    help="Maximal number of requests to execute concurrently. Default is the number of CPUs.",
+)
+@Options.help
+def serve(socket_path: t.Optional[str] = None, jobs: t.Optional[int] = None) -> None:
+    """Start MLCube server that executes run, configure and inspect requests received over a local Unix socket.
+
+    The server loads system settings and MLCube configurations once and reuses them across requests, avoiding
+    per-invocation startup costs. Use `mlcube.server.Client` or any HTTP client that supports Unix sockets (e.g.,
+    `curl --unix-socket`) to submit requests. The server runs until interrupted (Ctrl-C or SIGTERM).
+    """
+    from mlcube.server import MLCubeService, Server
+
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    try:
+        server = Server(socket_path or Server.default_socket(), MLCubeService(max_jobs=jobs))
+    except MLCubeError as err:
+        logger.error("serve failed to start MLCube server: %s", str(err))
+        sys.exit(1)
+    print(f"MLCube server is listening on {server.socket_path} (jobs={jobs}).")
+    try:
+        with Shell.interrupt_on_signals():
+            server.serve_forever()
+    except KeyboardInterrupt:
+        logger.warning("MLCube server has been interrupted, stopping running tasks.")
+        Shell.terminate_all()
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,261 @@
+"""Python API to configure, run and inspect MLCubes without the command line interface.
+
+```python
+from mlcube import api
+
+mnist = api.load("./mnist", platform="docker", params={"docker.build_strategy": "auto"})
+result = mnist.run(["download", "train"], workspace="/data/mnist", args={"parameters_file": "large.yaml"})
+if not result.ok:
+    print(result.exit_code, result.error)
+
+future = mnist.run_async(["train"], params={"docker.gpu_args": "--gpus=all"})
+print(future.result().duration)
+
+results = await asyncio.gather(*[mnist.arun("train", args={"lr": lr}) for lr in (0.1, 0.01)])
+```
+
+- `load`: Load MLCube for a given platform.
+- `MLCube`: MLCube loaded for a given platform.
+- `Result`: Outcome of configuring or running MLCube.
+
+This API uses the same machinery as the CLI (`MLCubeConfig.create_mlcube_config` to build effective MLCube
+configurations, runners to execute tasks and `TaskExecutor` to honor task timeouts and retries). Errors in MLCube
+configurations (e.g., unknown platforms, tasks or parameters) are raised as exceptions, while task failures are
+reported in `Result` objects.
+"""
+import logging
+import os
+import threading
+import time
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube.config import MLCubeConfig
+from mlcube.errors import ConfigurationError, ExecutionError, MLCubeError
+from mlcube.executor import TaskExecutor
+from mlcube.parser import CliParser
+from mlcube.platform import Platform
+from mlcube.runner import Runner
+from mlcube.system_settings import SystemSettings
+
+__all__ = ["Result", "MLCube", "load"]
+
+logger = logging.getLogger(__name__)
+
+_executor: t.Optional[ThreadPoolExecutor] = None
+"""Default executor for asynchronous runs (created on first use)."""
+
+_executor_lock = threading.Lock()
+
+
+def _default_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="mlcube")
+        return _executor
+
+
+class Result(t.NamedTuple):
+    """Outcome of configuring or running MLCube."""
+
+    tasks: t.List[str]
+    """Tasks that have been requested (empty for `configure`)."""
+
+    exit_code: int
+    """Zero on success, else exit code of a failed task (or 1 if not available)."""
+
+    duration: float
+    """Wall clock time in seconds."""
+
+    error: t.Optional[MLCubeError] = None
+    """Error if the operation failed."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class MLCube(object):
+    """MLCube loaded for a given platform.
+
+    Args:
+        path: Path to MLCube directory or `mlcube.yaml` file.
+        platform: Platform name from system settings (e.g., `docker`).
+        params: MLCube parameters common to all operations (same as `-Pname=value` on a command line).
+        workspace: Default workspace directory. Default is `{MLCUBE_ROOT}/workspace`.
+        system_settings: System settings. Default is to load them from the system settings file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        platform: str,
+        params: t.Optional[t.Dict[str, t.Any]] = None,
+        workspace: t.Optional[str] = None,
+        system_settings: t.Optional[SystemSettings] = None,
+    ) -> None:
+        self.path: str = CliParser.parse_mlcube_arg(path).uri()
+        if not os.path.isfile(self.path):
+            raise ConfigurationError(f"MLCube configuration file does not exist ({self.path}).")
+        self.platform = platform
+        self.params: t.Dict[str, t.Any] = dict(params or {})
+        self.workspace = workspace
+
+        system_settings = system_settings or SystemSettings()
+        self.runner_config: DictConfig = system_settings.get_platform(platform)
+        if not self.runner_config:
+            raise ConfigurationError(
+                f"Unknown platform ({platform}). Known platforms: {list(system_settings.platforms.keys())}."
+            )
+        self.runner_cls: t.Type[Runner] = Platform.get_runner(
+            system_settings.runners.get(self.runner_config.runner, None)
+        )
+        self.tasks: t.List[str] = list((self.config().get("tasks", None) or {}).keys())
+        """Tasks that this MLCube implements."""
+
+    def config(
+        self,
+        params: t.Optional[t.Dict[str, t.Any]] = None,
+        args: t.Optional[t.Dict[str, t.Any]] = None,
+        workspace: t.Optional[str] = None,
+    ) -> DictConfig:
+        """Return effective MLCube configuration.
+
+        Args:
+            params: MLCube parameters that override parameters of this instance (e.g., `{"docker.image": "..."}`).
+            args: Task parameters (same as `name=value` on a command line).
+            workspace: Workspace directory that overrides workspace of this instance.
+        """
+        mlcube_cli_args: DictConfig = OmegaConf.create({})
+        for name, value in {**self.params, **(params or {})}.items():
+            OmegaConf.update(mlcube_cli_args, name, value, merge=True)
+        return MLCubeConfig.create_mlcube_config(
+            self.path,
+            mlcube_cli_args,
+            {name: str(value) for name, value in (args or {}).items()},
+            self.runner_config,
+            workspace or self.workspace,
+            resolve=True,
+            runner_cls=self.runner_cls,
+        )
+
+    def _tasks(self, tasks: t.Optional[t.Union[str, t.List[str]]]) -> t.List[str]:
+        """Return list of tasks to run."""
+        tasks = [tasks] if isinstance(tasks, str) else list(tasks or [])
+        if not tasks:
+            if len(self.tasks) != 1:
+                raise ConfigurationError(f"Task name could not be automatically resolved (tasks={self.tasks}).")
+            tasks = list(self.tasks)
+        unknown_tasks = [name for name in tasks if name not in self.tasks]
+        if unknown_tasks:
+            raise ConfigurationError(
+                f"Unknown tasks have been requested (tasks={self.tasks}, unknown={unknown_tasks})."
+            )
+        return tasks
+
+    def _result(self, tasks: t.List[str], start: float, error: t.Optional[MLCubeError] = None) -> Result:
+        if error is None:
+            return Result(tasks, 0, time.monotonic() - start)
+        exit_code = error.context.get("code", 1) if isinstance(error, ExecutionError) else 1
+        logger.error("MLCube (%s) failed (tasks=%s): %s", self.path, tasks, str(error))
+        return Result(tasks, exit_code or 1, time.monotonic() - start, error)
+
+    def _execute(self, tasks: t.List[str], fn: t.Callable[[], None]) -> Result:
+        start = time.monotonic()
+        try:
+            fn()
+        except MLCubeError as err:
+            return self._result(tasks, start, err)
+        return self._result(tasks, start)
+
+    def configure(self, params: t.Optional[t.Dict[str, t.Any]] = None) -> Result:
+        """Configure MLCube (e.g., pull or build docker images).
+
+        Args:
+            params: MLCube parameters that override parameters of this instance.
+        """
+        mlcube_config = self.config(params)
+        return self._execute([], lambda: self.runner_cls(mlcube_config, task=None).configure())
+
+    def run(
+        self,
+        tasks: t.Optional[t.Union[str, t.List[str]]] = None,
+        params: t.Optional[t.Dict[str, t.Any]] = None,
+        args: t.Optional[t.Dict[str, t.Any]] = None,
+        workspace: t.Optional[str] = None,
+    ) -> Result:
+        """Run MLCube tasks one by one stopping at the first task that fails.
+
+        Args:
+            tasks: Task name or list of task names. Can be omitted when MLCube implements one task.
+            params: MLCube parameters that override parameters of this instance.
+            args: Task parameters (same as `name=value` on a command line).
+            workspace: Workspace directory that overrides workspace of this instance.
+        Raises:
+            ConfigurationError: If tasks are unknown or MLCube configuration is invalid.
+        """
+        tasks = self._tasks(tasks)
+        mlcube_config = self.config(params, args, workspace)
+        return self._execute(tasks, lambda: TaskExecutor(self.runner_cls, mlcube_config).run(tasks))
+
+    def run_async(
+        self,
+        tasks: t.Optional[t.Union[str, t.List[str]]] = None,
+        params: t.Optional[t.Dict[str, t.Any]] = None,
+        args: t.Optional[t.Dict[str, t.Any]] = None,
+        workspace: t.Optional[str] = None,
+        executor: t.Optional[ThreadPoolExecutor] = None,
+    ) -> "Future[Result]":
+        """Run MLCube tasks in a background thread (see `run` for arguments).
+
+        Args:
+            executor: Executor to run tasks with. Default is a shared executor with one thread per CPU.
+        Returns:
+            Future that resolves to `Result`, or raises `ConfigurationError` if tasks or configuration are invalid.
+        """
+        return (executor or _default_executor()).submit(self.run, tasks, params, args, workspace)
+
+    async def arun(
+        self,
+        tasks: t.Optional[t.Union[str, t.List[str]]] = None,
+        params: t.Optional[t.Dict[str, t.Any]] = None,
+        args: t.Optional[t.Dict[str, t.Any]] = None,
+        workspace: t.Optional[str] = None,
+    ) -> Result:
+        """Run MLCube tasks in the running event loop using asynchronous runners (see `run` and `Runner.arun`).
+
+        Many MLCube tasks can run concurrently in one thread, e.g., with `asyncio.gather`. Cancelling this coroutine
+        stops the running task.
+        """
+        tasks = self._tasks(tasks)
+        mlcube_config = self.config(params, args, workspace)
+        start = time.monotonic()
+        try:
+            await TaskExecutor(self.runner_cls, mlcube_config).arun(tasks)
+        except MLCubeError as err:
+            return self._result(tasks, start, err)
+        return self._result(tasks, start)
+
+    def inspect(self, force: bool = False) -> t.Dict:
+        """Return low-level information on this MLCube (e.g., docker image hash)."""
+        return self.runner_cls(self.config(), task=None).inspect(force=force)
+
+
+def load(
+    path: t.Optional[str] = None,
+    platform: str = "docker",
+    params: t.Optional[t.Dict[str, t.Any]] = None,
+    workspace: t.Optional[str] = None,
+) -> MLCube:
+    """Load MLCube.
+
+    Args:
+        path: Path to MLCube directory or `mlcube.yaml` file. Default is current directory.
+        platform: Platform name from system settings.
+        params: MLCube parameters common to all operations (same as `-Pname=value` on a command line).
+        workspace: Default workspace directory.
+    """
+    return MLCube(path or os.getcwd(), platform, params, workspace)
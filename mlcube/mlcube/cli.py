@@ -34,7 +34,10 @@ __all__ = [
 
 
 def parse_cli_args(
-    unparsed_args: t.List[str], parsed_args: t.Dict, resolve: bool
+    unparsed_args: t.List[str],
+    parsed_args: t.Dict,
+    resolve: bool,
+    system_settings: t.Optional[SystemSettings] = None,
 ) -> t.Tuple[t.Optional[t.Type[Runner]], DictConfig]:
     """Parse command line arguments.
 
@@ -46,6 +49,8 @@ def parse_cli_args(
             also include such arguments as `--platform`, `--mlcube` and others. Keys in this dictionary are argument
             names without `--` prefix.
         resolve: if True, compute values in MLCube configuration.
+        system_settings: System settings to use. If None, system settings are loaded from the system settings file
+            (long-running processes such as `mlcube serve` load them once).
     """
     parsed_args = copy.deepcopy(parsed_args)
 
@@ -57,7 +62,7 @@ def parse_cli_args(
     mlcube_cli_args, task_cli_args = CliParser.parse_extra_arg(unparsed_args, parsed_args)
 
     if parsed_args.get("platform", None) is not None:
-        system_settings = SystemSettings()
+        system_settings = system_settings or SystemSettings()
         runner_config: t.Optional[DictConfig] = system_settings.get_platform(parsed_args["platform"])
         runner_cls: t.Optional[t.Type[Runner]] = Platform.get_runner(
             system_settings.runners.get(runner_config.runner, None)
@@ -498,7 +503,15 @@ class UsageExamples:
             (
                 "Run MNIST MLCube project",
                 _mnist(["mlcube run --mlcube=mnist --platform=docker --task=download,train"]),
-            )
+            ),
+            (
+                "Run training for every combination of parameters in a sweep file, two runs at a time",
+                _mnist(["mlcube run --mlcube=mnist --platform=docker --task=train --sweep=sweep.yaml --jobs=2"]),
+            ),
+            (
+                "Run tasks one by one pulling images and downloading inputs of the next task while a task runs",
+                _mnist(["mlcube run --mlcube=mnist --platform=docker --task=download,train --prefetch=1"]),
+            ),
         ]
     )
     """Usage examples for `mlcube run` command."""
@@ -538,7 +551,71 @@ class UsageExamples:
             (
                 "Return low-level information on MLCube objects",
                 _mnist(["mlcube inspect --mlcube=mnist --platform=docker"]),
-            )
+            ),
+            (
+                "Inspect all MLCubes in a directory using 4 concurrent jobs and store results in a file",
+                _mnist(["mlcube inspect --mlcube='./*' --platform=docker --jobs=4 --output-file=mlcubes.json"]),
+            ),
         ]
     )
     """Usage examples for `mlcube inspect` command."""
+
+    prefetch = HelpEpilog(
+        [
+            ("Pull docker image of MNIST MLCube", _mnist(["mlcube prefetch --mlcube=mnist"])),
+            (
+                "Warm up a host: pull or build images of all MLCubes in a directory for two platforms, 8 at a time",
+                ["mlcube prefetch --mlcube='./cubes/*' --platform=docker,singularity --jobs=8"],
+            ),
+        ]
+    )
+    """Usage examples for `mlcube prefetch` command."""
+
+    cache = HelpEpilog(
+        [
+            ("List objects in content stores configured in system settings", ["mlcube cache"]),
+            (
+                "Evict least recently used objects so that a store does not exceed 100 GB",
+                ["mlcube cache --path ~/.mlcube/images --prune --max-size 100G"],
+            ),
+            (
+                "Pin a dataset in the dataset cache (`cache` section of system settings) so that it is never evicted",
+                ["mlcube cache --pin imagenet-2012-v1"],
+            ),
+        ]
+    )
+    """Usage examples for `mlcube cache` command."""
+
+    history = HelpEpilog(
+        [
+            ("Show last 20 task runs recorded in the per-user run history", ["mlcube history"]),
+            (
+                "Show failed runs of the `train` task of MNIST MLCube during the last week",
+                ["mlcube history --mlcube=mnist --task=train --status=failed --since=7d"],
+            ),
+            (
+                "Export all runs recorded in a workspace run history to a JSON file",
+                [
+                    "mlcube run --mlcube=mnist --task=train --workspace=/data/mnist --history=workspace",
+                    "mlcube history --db=workspace --workspace=/data/mnist --limit=0 --format=json "
+                    "--output-file=runs.json",
+                ],
+            ),
+        ]
+    )
+    """Usage examples for `mlcube history` command."""
+
+    serve = HelpEpilog(
+        [
+            ("Start MLCube server with default socket path", ["mlcube serve"]),
+            (
+                "Start MLCube server that executes up to 16 requests concurrently, and submit a run request",
+                [
+                    "mlcube serve --socket=/tmp/mlcube.sock --jobs=16 &",
+                    "curl --unix-socket /tmp/mlcube.sock -X POST http://localhost/run "
+                    "-d '{\"mlcube\": \"/cubes/mnist\", \"platform\": \"docker\", \"tasks\": [\"download\"]}'",
+                ],
+            ),
+        ]
+    )
+    """Usage examples for `mlcube serve` command."""
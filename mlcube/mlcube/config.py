@@ -2,19 +2,25 @@
 
 - `IOType`: Input/output type of MLCube task parameter.
 - `ParameterType`: Type of MLCube task parameter.
+- `TaskPolicy`: Execution policy (timeout and retries) of MLCube task.
+- `LogPolicy`: Capture of MLCube task output (log files and their rotation).
+- `MountPolicy`: Optimization of container mounts (deduplication and coalescing).
 - `MLCubeConfig`: Utilities to assemble effective MLCube configuration.
 """
 import logging
 import os
+import re
 import typing as t
 
 from omegaconf import DictConfig, OmegaConf
 
+from mlcube.errors import ConfigurationError, IllegalParameterValueError
 from mlcube.runner import Runner
+from mlcube.store import parse_size
 
 logger = logging.getLogger(__name__)
 
-__all__ = ["IOType", "ParameterType", "MountType", "MLCubeConfig"]
+__all__ = ["IOType", "ParameterType", "MountType", "TaskPolicy", "LogPolicy", "MountPolicy", "MLCubeConfig"]
 
 
 class IOType(object):
@@ -69,6 +75,174 @@ class MountType(object):
         return io in (MountType.RW, MountType.RO)
 
 
+class TaskPolicy(t.NamedTuple):
+    """Execution policy of MLCube task defined by optional task fields in MLCube configuration file.
+
+    ```yaml
+    tasks:
+      download:
+        timeout: 30m       # Seconds (number) or duration string (`90s`, `30m`, `2h`, `1d`).
+        retries: 3         # Number of times to retry failed task (default is 0).
+        retry_backoff: 10  # Delay (seconds or duration string) before the first retry, doubles after each retry.
+    ```
+    """
+
+    timeout: t.Optional[float] = None
+    """Maximal duration (seconds) of one task attempt. None means no timeout."""
+
+    retries: int = 0
+    """Number of times to retry failed task."""
+
+    retry_backoff: float = 5.0
+    """Delay in seconds before the first retry. Delays double after each retry (but never exceed 10 minutes)."""
+
+    @staticmethod
+    def parse_duration(value: t.Union[int, float, str, None], name: str = "timeout") -> t.Optional[float]:
+        """Parse duration (seconds or strings such as `90s`, `30m`, `2h` or `1d`).
+
+        Args:
+            value: Duration. None or empty string mean no value.
+            name: Parameter name used in error messages.
+        Returns:
+            Duration in seconds or None.
+        """
+        if value is None or value == "":
+            return None
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+            return float(value)
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*", str(value))
+        if not match:
+            raise IllegalParameterValueError(name, value, "non-negative number of seconds or duration like `30m`")
+        return float(match.group(1)) * {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}[match.group(2)]
+
+    @classmethod
+    def from_config(cls, task: t.Optional[t.Union[DictConfig, t.Dict]], name: str = "") -> "TaskPolicy":
+        """Create task policy from task configuration.
+
+        Args:
+            task: Task configuration (`tasks.<name>` section of MLCube configuration).
+            name: Task name used in error messages.
+        """
+        task = task or {}
+        namespace = f"tasks.{name}" if name else "tasks"
+        retries = task.get("retries", None)
+        if retries is None:
+            retries = 0
+        if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+            raise IllegalParameterValueError("retries", retries, "non-negative integer", namespace)
+        timeout = cls.parse_duration(task.get("timeout", None), f"{namespace}.timeout")
+        if timeout == 0:
+            timeout = None
+        retry_backoff = cls.parse_duration(task.get("retry_backoff", None), f"{namespace}.retry_backoff")
+        if retry_backoff is None:
+            retry_backoff = cls._field_defaults["retry_backoff"]
+        return cls(timeout, retries, retry_backoff)
+
+    def backoff(self, attempt: int) -> float:
+        """Return delay in seconds before the given retry attempt (1 - first retry, 2 - second retry, etc.)."""
+        return min(self.retry_backoff * 2 ** (attempt - 1), 600.0)
+
+
+class LogPolicy(t.NamedTuple):
+    """Capture of task output defined by optional `logs` section in MLCube configuration file.
+
+    Output of each task is written to `{workspace}/logs/{task}.log` (and to the terminal). Log files are rotated when
+    they exceed `max_size`, and the last `tail_lines` lines are reported with errors when tasks fail.
+
+    ```yaml
+    logs:
+      enabled: true     # Set to false to let tasks write directly to the terminal.
+      max_size: 64M     # Bytes (number) or size string (`512K`, `64M`, `1G`).
+      backups: 5        # Number of rotated log files to keep.
+      compress: true    # Compress rotated log files with gzip.
+      tail_lines: 100   # Number of last lines to keep in memory.
+    ```
+    """
+
+    enabled: bool = True
+    """If false, task output is not captured."""
+
+    max_size: int = 64 * 1024 ** 2
+    """Log file size in bytes that triggers rotation."""
+
+    backups: int = 5
+    """Number of rotated log files to keep (`{task}.log.1[.gz]`, `{task}.log.2[.gz]`, ...)."""
+
+    compress: bool = True
+    """If true, rotated log files are compressed with gzip."""
+
+    tail_lines: int = 100
+    """Number of last output lines to keep in memory and to report with errors."""
+
+    @classmethod
+    def from_config(cls, logs: t.Optional[t.Union[DictConfig, t.Dict]]) -> "LogPolicy":
+        """Create log policy from the `logs` section of MLCube configuration."""
+        logs = logs or {}
+        values = {}
+        for name in ("enabled", "compress"):
+            value = logs.get(name, None)
+            if value is not None:
+                if not isinstance(value, bool):
+                    raise IllegalParameterValueError(name, value, "boolean", "logs")
+                values[name] = value
+        for name in ("backups", "tail_lines"):
+            value = logs.get(name, None)
+            if value is not None:
+                if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+                    raise IllegalParameterValueError(name, value, "non-negative integer", "logs")
+                values[name] = value
+        max_size = logs.get("max_size", None)
+        if max_size is not None and max_size != "":
+            try:
+                values["max_size"] = None if isinstance(max_size, bool) else parse_size(max_size)
+            except ConfigurationError:
+                values["max_size"] = None
+            if not values["max_size"] or values["max_size"] < 0:
+                raise IllegalParameterValueError("max_size", max_size, "positive number of bytes or size like `64M`",
+                                                 "logs")
+        return cls(**values)
+
+
+class MountPolicy(t.NamedTuple):
+    """Optimization of container mounts defined by optional `mounts` section in MLCube configuration file.
+
+    ```yaml
+    mounts:
+      dedupe: true        # Do not mount directories that are inside other mounted directories with the same options.
+      coalesce: false     # Mount common workspace ancestor instead of many sibling directories with the same options.
+      conflicts: rw       # Directory requested as `ro` and `rw`: mount it as `rw` (with a warning), or `error`.
+    ```
+    """
+
+    dedupe: bool = True
+    """If true, directories inside other mounted directories with the same mount options are not mounted again."""
+
+    coalesce: bool = False
+    """If true, directories inside the workspace with the same mount options are mounted via their common ancestor
+    (unless the ancestor contains directories mounted with other options)."""
+
+    conflicts: str = "rw"
+    """How to resolve conflicting mount options: `rw` (mount as read-write) or `error` (raise an error)."""
+
+    @classmethod
+    def from_config(cls, mounts: t.Optional[t.Union[DictConfig, t.Dict]]) -> "MountPolicy":
+        """Create mount policy from the `mounts` section of MLCube configuration."""
+        mounts = mounts or {}
+        values = {}
+        for name in ("dedupe", "coalesce"):
+            value = mounts.get(name, None)
+            if value is not None:
+                if not isinstance(value, bool):
+                    raise IllegalParameterValueError(name, value, "boolean", "mounts")
+                values[name] = value
+        conflicts = mounts.get("conflicts", None)
+        if conflicts is not None:
+            if conflicts not in (MountType.RW, "error"):
+                raise IllegalParameterValueError("conflicts", conflicts, "['rw', 'error']", "mounts")
+            values["conflicts"] = conflicts
+        return cls(**values)
+
+
 class MLCubeConfig(object):
     """Utilities to assemble effective MLCube configuration."""
 
@@ -94,7 +268,7 @@ class MLCubeConfig(object):
     def get_uri(value: str) -> str:
         """Validate `value` is a valid URI."""
         if value.startswith("storage:"):
-            raise ValueError("Storage schema is not yet supported")
+            raise ValueError("Storage schema is not supported for workspaces (use it for task parameters instead).")
         return os.path.abspath(os.path.expanduser(value))
 
     @staticmethod
@@ -185,6 +359,8 @@ class MLCubeConfig(object):
                 )
                 raise
 
+        _ = LogPolicy.from_config(mlcube_config.get("logs", None))  # Fail early if log settings are invalid.
+        _ = MountPolicy.from_config(mlcube_config.get("mounts", None))
         for task_name in mlcube_config.tasks.keys():
             [task] = MLCubeConfig.ensure_values_exist(
                 mlcube_config.tasks, task_name, dict
@@ -196,6 +372,7 @@ class MLCubeConfig(object):
                     task_name,
                 )
                 task.pop("entrypoint")
+            _ = TaskPolicy.from_config(task, task_name)  # Fail early if timeout or retries are invalid.
             [parameters] = MLCubeConfig.ensure_values_exist(task, "parameters", dict)
             [inputs, outputs] = MLCubeConfig.ensure_values_exist(
                 parameters, ["inputs", "outputs"], dict
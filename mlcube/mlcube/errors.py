@@ -105,8 +105,11 @@ class ExecutionError(MLCubeError):
         msg = f"ERROR:\n\tmessage: {self.message}"
         if self.description:
             msg += f"\n\tdescription: {self.description}"
-        if self.context:
-            msg += f"\n\tcontext: {self.context}"
+        context = {name: value for name, value in self.context.items() if name != 'log_tail'}
+        if context:
+            msg += f"\n\tcontext: {context}"
+        if self.context.get('log_tail', None):
+            msg += '\n\tlast lines of output:\n' + '\n'.join(f'\t\t{line}' for line in self.context['log_tail'])
         return msg
 
     @classmethod
@@ -0,0 +1,347 @@
+"""Execution of MLCube tasks with MLCube runners.
+
+- `TaskExecutor`: Runs MLCube tasks one by one honoring their execution policies (timeouts and retries).
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import threading
+import time
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from omegaconf import DictConfig
+
+from mlcube import hooks, metrics
+from mlcube.config import LogPolicy, TaskPolicy
+from mlcube.errors import ExecutionError, MLCubeError
+from mlcube.history import RunHistory, RunRecorder
+from mlcube.logs import TaskLog
+from mlcube.runner import Runner
+from mlcube.shell import Shell
+
+__all__ = ["TaskExecutor"]
+
+logger = logging.getLogger(__name__)
+
+
+class TaskExecutor(object):
+    """Run MLCube tasks with a runner.
+
+    Each task attempt runs with a deadline (`Shell.deadline`) equal to task timeout, and failed attempts are retried
+    with exponential backoff. Runners that support timeouts and retries natively (`Runner.NATIVE_TASK_POLICY`) run each
+    task exactly once without a client-side deadline.
+
+    Output of commands that runners start with `Shell.run` is captured to per-task log files in the workspace (see
+    `LogPolicy` and `TaskLog`), and last lines of output are added to the context of execution errors (`log_tail`).
+    If run history is provided, one record per task is saved when the task completes or fails (see `RunRecorder`).
+    Task runs, durations and failures are counted in `mlcube.metrics` with `platform` and `task` labels, and active
+    hooks are called when tasks start and end (see `mlcube.hooks`).
+
+    When `prefetch` is positive, images and inputs of up to `prefetch` next tasks are fetched in background threads
+    (see `Runner.prefetch`) while the current task runs, and a task starts when its own prefetch has completed. Prefetch
+    errors are logged and do not fail tasks (tasks fetch what they need themselves). When a task fails, prefetches of
+    next tasks are cancelled.
+
+    Args:
+        runner_cls: Runner class.
+        mlcube: Effective MLCube configuration.
+        sleep: Function to wait between retries (tests use it to avoid waiting). Default waits on `cancelled`.
+        cancelled: Optional event that is set when tasks must not be started or retried anymore (e.g., parallel runs
+            have been interrupted).
+        history: Optional run history to record task runs in.
+        platform: Platform name recorded in run history and metrics (default is the runner name).
+        prefetch: Number of next tasks to prefetch while the current task runs (0 disables prefetching).
+        teardown: If true, `run` and `arun` call `Runner.teardown` once all tasks have completed or one has failed.
+            Callers that run tasks with several executors sharing runner resources (e.g., sweeps) disable it and call
+            `teardown_runner` themselves.
+    """
+
+    def __init__(
+        self,
+        runner_cls: t.Type[Runner],
+        mlcube: DictConfig,
+        sleep: t.Optional[t.Callable[[float], t.Any]] = None,
+        cancelled: t.Optional[threading.Event] = None,
+        history: t.Optional[RunHistory] = None,
+        platform: t.Optional[str] = None,
+        prefetch: int = 0,
+        teardown: bool = True,
+    ) -> None:
+        self.runner_cls = runner_cls
+        self.mlcube = mlcube
+        self.cancelled = cancelled or threading.Event()
+        self._sleep = sleep or self.cancelled.wait
+        self.history = history
+        self.platform = platform
+        self.prefetch = prefetch
+        self.teardown = teardown
+
+    def policy(self, task: str) -> TaskPolicy:
+        """Return execution policy of this task."""
+        return TaskPolicy.from_config(self.mlcube.tasks[task], task)
+
+    def run(self, tasks: t.Iterable[str]) -> None:
+        """Run tasks one by one stopping at the first task that fails."""
+        tasks = list(tasks)
+        try:
+            if self.prefetch <= 0:
+                for task in tasks:
+                    self.run_task(task)
+                return
+            with _Prefetcher(self, tasks) as prefetcher:
+                for index, task in enumerate(tasks):
+                    prefetcher.start(index)
+                    prefetcher.wait(index)
+                    self.run_task(task)
+        finally:
+            if self.teardown:
+                self.teardown_runner(tasks)
+
+    async def arun(self, tasks: t.Iterable[str]) -> None:
+        """Run tasks one by one stopping at the first task that fails (asyncio version of `run`)."""
+        tasks = list(tasks)
+        try:
+            if self.prefetch <= 0:
+                for task in tasks:
+                    await self.arun_task(task)
+                return
+            with _Prefetcher(self, tasks) as prefetcher:
+                for index, task in enumerate(tasks):
+                    prefetcher.start(index)
+                    await prefetcher.wait_async(index)
+                    await self.arun_task(task)
+        finally:
+            if self.teardown:
+                await Shell.in_thread(self.teardown_runner, tasks)
+
+    def teardown_runner(self, tasks: t.List[str]) -> None:
+        """Call `Runner.teardown` once after the last task (errors are logged, they must not hide task status)."""
+        if not tasks:
+            return
+        try:
+            self.runner_cls(self.mlcube, task=tasks[-1]).teardown()
+        except Exception as err:
+            logger.warning("Runner %s failed to tear down (%s).", self.runner_cls.__name__,
+                           str(err) or err.__class__.__name__)
+
+    def task_log(self, task: str) -> t.Optional[TaskLog]:
+        """Return log for this task (`{workspace}/logs/{task}.log`), or None if output must not be captured."""
+        policy = LogPolicy.from_config(self.mlcube.get("logs", None))
+        workspace: t.Optional[str] = (self.mlcube.get("runtime", None) or {}).get("workspace", None)
+        if not policy.enabled or not workspace:
+            return None
+        return TaskLog(os.path.join(workspace, "logs", f"{task}.log"), policy)
+
+    def run_task(self, task: str) -> None:
+        """Run one task according to its execution policy.
+
+        Raises:
+            MLCubeError: The last error if all attempts have failed. Task timeouts are reported as `ExecutionError` with
+                `timeout=True` in its context.
+        """
+        with self._task_context(task) as recorder:
+            self._run_task(task, recorder)
+
+    @contextlib.contextmanager
+    def _task_context(self, task: str) -> t.Iterator[t.Optional[RunRecorder]]:
+        """Capture task output, record the task run in run history, update task metrics and call hooks."""
+        log = self.task_log(task)
+        recorder = RunRecorder(self.history, self.mlcube, task, self.platform) if self.history else None
+        labels = dict(platform=self.platform or self.mlcube.get("runner", {}).get("runner", ""), task=task)
+        start_time = time.monotonic()
+        try:
+            with Shell.capture(log), metrics.labels(**labels), hooks.stage("task", self.mlcube, task):
+                yield recorder
+        except (MLCubeError, KeyboardInterrupt) as err:
+            self._failed(err, log, recorder)
+            metrics.TASKS.inc(status="failed", **labels)
+            metrics.TASK_DURATION.observe(time.monotonic() - start_time, status="failed", **labels)
+            metrics.TASK_FAILURES.inc(error=err.__class__.__name__, **labels)
+            raise
+        else:
+            if recorder is not None:
+                recorder.record(0)
+            metrics.TASKS.inc(status="ok", **labels)
+            metrics.TASK_DURATION.observe(time.monotonic() - start_time, status="ok", **labels)
+        finally:
+            if log is not None:
+                log.close()
+
+    @staticmethod
+    def _failed(
+        err: t.Union[MLCubeError, KeyboardInterrupt], log: t.Optional[TaskLog], recorder: t.Optional[RunRecorder]
+    ) -> None:
+        """Add task output to a task error and record the failed run."""
+        if isinstance(err, ExecutionError) and log is not None:
+            log.attach(err)
+        if recorder is not None:
+            if isinstance(err, KeyboardInterrupt):
+                exit_code = 128 + getattr(err, "signum", signal.SIGINT)
+            else:
+                exit_code = (err.context.get("code", 1) if isinstance(err, ExecutionError) else 1) or 1
+            recorder.record(exit_code, str(err) or err.__class__.__name__)
+
+    def _run_task(self, task: str, recorder: t.Optional[RunRecorder] = None) -> None:
+        policy = self.policy(task)
+        native = self.runner_cls.NATIVE_TASK_POLICY
+        attempt = 0
+        while True:
+            if self.cancelled.is_set():
+                raise ExecutionError.mlcube_run_error(
+                    self.runner_cls.__name__, f"Task has been cancelled (task={task}).", code=130, cancelled=True
+                )
+            logger.info(
+                "TaskExecutor.run_task task=%s, attempt=%d, policy=%s, native=%r", task, attempt, policy, native
+            )
+            runner = self.runner_cls(self.mlcube, task=task)
+            if recorder is not None:
+                recorder.attempts, recorder.runner = attempt + 1, runner
+            try:
+                if native:
+                    runner.run()
+                else:
+                    with Shell.deadline(policy.timeout):
+                        runner.run()
+                        # Runners that do not use `Shell` (or ignore its errors) do not raise timeout errors.
+                        remaining_time = Shell.remaining_time()
+                        if remaining_time is not None and remaining_time < 0:
+                            raise ExecutionError.mlcube_run_error(
+                                self.runner_cls.__name__,
+                                f"Task has not completed before the deadline (task={task}, timeout={policy.timeout}).",
+                                code=Shell.TIMEOUT_EXIT_CODE,
+                                timeout=True,
+                            )
+                return
+            except MLCubeError as err:
+                if native or attempt >= policy.retries or self.cancelled.is_set():
+                    raise
+                attempt += 1
+                delay = policy.backoff(attempt)
+                logger.warning(
+                    "Task %s failed (%s). Retrying in %.1f seconds (retry %d of %d).",
+                    task,
+                    str(err),
+                    delay,
+                    attempt,
+                    policy.retries,
+                )
+                self._sleep(delay)
+                if self.cancelled.is_set():
+                    raise
+
+    async def arun_task(self, task: str) -> None:
+        """Run one task according to its execution policy using `Runner.arun` (asyncio version of `run_task`).
+
+        Task timeouts cancel `Runner.arun`, and retries wait with `asyncio.sleep`.
+        """
+        with self._task_context(task) as recorder:
+            await self._arun_task(task, recorder)
+
+    async def _arun_task(self, task: str, recorder: t.Optional[RunRecorder] = None) -> None:
+        policy = self.policy(task)
+        native = self.runner_cls.NATIVE_TASK_POLICY
+        attempt = 0
+        while True:
+            if self.cancelled.is_set():
+                raise ExecutionError.mlcube_run_error(
+                    self.runner_cls.__name__, f"Task has been cancelled (task={task}).", code=130, cancelled=True
+                )
+            logger.info(
+                "TaskExecutor.arun_task task=%s, attempt=%d, policy=%s, native=%r", task, attempt, policy, native
+            )
+            runner = self.runner_cls(self.mlcube, task=task)
+            if recorder is not None:
+                recorder.attempts, recorder.runner = attempt + 1, runner
+            try:
+                if native:
+                    await runner.arun()
+                else:
+                    with Shell.deadline(policy.timeout):
+                        try:
+                            await asyncio.wait_for(runner.arun(), policy.timeout)
+                        except asyncio.TimeoutError:
+                            raise ExecutionError.mlcube_run_error(
+                                self.runner_cls.__name__,
+                                f"Task has not completed before the deadline (task={task}, timeout={policy.timeout}).",
+                                code=Shell.TIMEOUT_EXIT_CODE,
+                                timeout=True,
+                            )
+                return
+            except MLCubeError as err:
+                if native or attempt >= policy.retries or self.cancelled.is_set():
+                    raise
+                attempt += 1
+                delay = policy.backoff(attempt)
+                logger.warning(
+                    "Task %s failed (%s). Retrying in %.1f seconds (retry %d of %d).",
+                    task,
+                    str(err),
+                    delay,
+                    attempt,
+                    policy.retries,
+                )
+                await asyncio.sleep(delay)
+
+
+class _Prefetcher(object):
+    """Prefetch next tasks of `TaskExecutor` in a bounded thread pool (see `Runner.prefetch`).
+
+    Args:
+        executor: Task executor that runs `tasks`.
+        tasks: Tasks in the order they run.
+    """
+
+    def __init__(self, executor: TaskExecutor, tasks: t.List[str]) -> None:
+        self.executor = executor
+        self.tasks = tasks
+        self.cancelled = threading.Event()
+        self._futures: t.Dict[int, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=executor.prefetch, thread_name_prefix="mlcube-prefetch")
+
+    def __enter__(self) -> "_Prefetcher":
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        # All prefetches that a successful run needs have completed, so any remaining ones belong to tasks that will
+        # not run (a task has failed or the run has been interrupted).
+        self.cancelled.set()
+        for future in self._futures.values():
+            future.cancel()
+        self._pool.shutdown(wait=True)
+
+    def start(self, index: int) -> None:
+        """Start prefetching tasks that follow the `index` task (at most `TaskExecutor.prefetch` tasks ahead)."""
+        for next_index in range(index + 1, min(index + 1 + self.executor.prefetch, len(self.tasks))):
+            if next_index not in self._futures:
+                self._futures[next_index] = self._pool.submit(self._prefetch, self.tasks[next_index])
+
+    def wait(self, index: int) -> None:
+        """Wait until the `index` task has been prefetched (if it is being prefetched)."""
+        future = self._futures.pop(index, None)
+        if future is not None:
+            future.result()
+
+    async def wait_async(self, index: int) -> None:
+        """Wait for the `index` task without blocking the event loop (asyncio version of `wait`)."""
+        future = self._futures.pop(index, None)
+        if future is not None:
+            await asyncio.wrap_future(future)
+
+    def _prefetch(self, task: str) -> None:
+        if self.cancelled.is_set() or self.executor.cancelled.is_set():
+            return
+        logger.info("TaskExecutor.prefetch task=%s", task)
+        mlcube = self.executor.mlcube
+        platform = self.executor.platform or mlcube.get("runner", {}).get("runner", "")
+        try:
+            with Shell.cancellation(self.cancelled), metrics.labels(platform=platform, task=task):
+                with hooks.stage("prefetch", mlcube, task):
+                    self.executor.runner_cls(mlcube, task=task).prefetch()
+        except Exception as err:
+            # Prefetching is an optimization: tasks fetch their images and inputs themselves when they run.
+            if not self.cancelled.is_set():
+                logger.warning("Prefetching task %s failed (%s). The task will fetch its inputs when it starts.",
+                               task, str(err) or err.__class__.__name__)
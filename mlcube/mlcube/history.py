@@ -0,0 +1,391 @@
+"""Run history: SQLite database that records MLCube task runs.
+
+- `RunRecord`: One task run (one row in the database).
+- `RunHistory`: Database of task runs (per user by default, or per workspace).
+- `RunRecorder`: Collects information on one task run and saves it to run history.
+- `config_hash`: Hash of effective MLCube configuration.
+- `fingerprint`: Fingerprint of a task output (file or directory).
+
+`mlcube run` records one row per task: MLCube, task and platform, hashes of the effective MLCube configuration and of
+the MLCube image (as reported by `Runner.inspect`), start and end times, exit code, number of attempts, resource usage
+of child processes and fingerprints of task outputs. The `mlcube history` command queries this database.
+
+The database is opened for each operation, uses write-ahead logging and waits for locks, so that concurrent MLCube
+processes (and threads running sweeps) can write to the same database.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import typing as t
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube.errors import ConfigurationError, MLCubeError
+from mlcube.runner import Runner
+from mlcube.shell import Shell
+
+__all__ = ["RunRecord", "RunHistory", "RunRecorder", "config_hash", "fingerprint"]
+
+logger = logging.getLogger(__name__)
+
+
+def config_hash(mlcube: DictConfig) -> str:
+    """Return sha256 hash of effective MLCube configuration (resolved and with sorted keys)."""
+    config = OmegaConf.to_container(mlcube, resolve=True)
+    return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def fingerprint(path: str) -> t.Optional[str]:
+    """Return fingerprint of a task output.
+
+    Outputs are fingerprinted by metadata to avoid reading large models and data sets after each task: files by their
+    sizes and modification times, directories by relative paths, sizes and modification times of their files.
+
+    Args:
+        path: Path to a file or directory.
+    Returns:
+        Fingerprint (sha256 hex string), or None if the path does not exist.
+    """
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return hashlib.sha256(f"{stat.st_size}\0{stat.st_mtime_ns}\n".encode()).hexdigest()
+    if not os.path.isdir(path):
+        return None
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(file_path, path)}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def _children_usage() -> t.Dict[str, float]:
+    """Return resource usage of terminated child processes of this process."""
+    if resource is None:
+        return {}
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {"user_time": usage.ru_utime, "system_time": usage.ru_stime, "max_rss_kb": float(usage.ru_maxrss)}
+
+
+class RunRecord(t.NamedTuple):
+    """One MLCube task run."""
+
+    id: t.Optional[int]
+    """Row ID (None for records that have not been saved yet)."""
+
+    mlcube: str
+    """MLCube root directory."""
+
+    name: str
+    """MLCube name."""
+
+    task: str
+    """Task name."""
+
+    platform: str
+    """Platform name (or runner name if platform is not known)."""
+
+    workspace: str
+    """Workspace directory."""
+
+    config_hash: str
+    """Hash of effective MLCube configuration (see `config_hash`)."""
+
+    image: t.Optional[str]
+    """Hash of MLCube image (`hash` reported by `Runner.inspect`), or None if not available."""
+
+    start_time: float
+    """Start time (seconds since epoch)."""
+
+    end_time: float
+    """End time (seconds since epoch)."""
+
+    exit_code: int
+    """Exit code (0 means success)."""
+
+    attempts: int
+    """Number of attempts (more than one if the task has been retried)."""
+
+    error: t.Optional[str] = None
+    """Error message if the task has failed."""
+
+    resources: t.Dict[str, float] = {}
+    """Resource usage of child processes (`user_time` and `system_time` in seconds, `max_rss_kb`).
+
+    Only processes started by MLCube itself are accounted (e.g., docker CLI, not the container processes).
+    """
+
+    outputs: t.Dict[str, t.Optional[str]] = {}
+    """Fingerprints of task outputs (see `fingerprint`)."""
+
+    @property
+    def status(self) -> str:
+        return "ok" if self.exit_code == 0 else "failed"
+
+    @property
+    def duration(self) -> float:
+        return self.end_time - self.start_time
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        return {**self._asdict(), "status": self.status, "duration": self.duration}
+
+
+class RunHistory(object):
+    """Database of MLCube task runs.
+
+    Args:
+        path: Path to the SQLite database file (created if it does not exist).
+    """
+
+    SCHEMA_VERSION: int = 1
+
+    def __init__(self, path: t.Union[str, Path]) -> None:
+        self.path = Path(path).expanduser().resolve()
+
+    @staticmethod
+    def default_path() -> Path:
+        """Return path to the per-user database.
+
+        The default location is `${HOME}/.mlcube/history.db`, but can be overridden with `MLCUBE_HISTORY_DB`
+        environment variable.
+        """
+        return Path(os.environ.get("MLCUBE_HISTORY_DB", None) or Path.home() / ".mlcube" / "history.db").expanduser()
+
+    @staticmethod
+    def workspace_path(workspace: str) -> Path:
+        """Return path to the per-workspace database (`{workspace}/.mlcube/history.db`)."""
+        return Path(workspace) / ".mlcube" / "history.db"
+
+    @classmethod
+    def from_option(cls, value: t.Optional[str], workspace: t.Optional[str] = None) -> t.Optional["RunHistory"]:
+        """Create run history from a command line option value.
+
+        Args:
+            value: `user` (or None, per-user database), `workspace` (per-workspace database), `off` (no history) or
+                path to a database file.
+            workspace: Workspace directory (required for `workspace`).
+        """
+        if value is None or value == "user":
+            return cls(cls.default_path())
+        if value == "off":
+            return None
+        if value == "workspace":
+            if not workspace:
+                raise ConfigurationError("Workspace-level run history requires workspace directory.")
+            return cls(cls.workspace_path(workspace))
+        return cls(value)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path.as_posix(), timeout=30)
+        conn.row_factory = sqlite3.Row
+        if conn.execute("PRAGMA user_version").fetchone()[0] < RunHistory.SCHEMA_VERSION:
+            with conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS runs ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, mlcube TEXT NOT NULL, name TEXT NOT NULL, "
+                    "task TEXT NOT NULL, platform TEXT NOT NULL, workspace TEXT NOT NULL, config_hash TEXT NOT NULL, "
+                    "image TEXT, start_time REAL NOT NULL, end_time REAL NOT NULL, exit_code INTEGER NOT NULL, "
+                    "attempts INTEGER NOT NULL, error TEXT, resources TEXT NOT NULL, outputs TEXT NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS runs_task ON runs (mlcube, task, start_time)")
+                conn.execute(f"PRAGMA user_version = {RunHistory.SCHEMA_VERSION}")
+        return conn
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> RunRecord:
+        values = dict(row)
+        values["resources"] = json.loads(values["resources"])
+        values["outputs"] = json.loads(values["outputs"])
+        return RunRecord(**values)
+
+    def add(self, record: RunRecord) -> RunRecord:
+        """Save a record and return it with its row ID."""
+        values = record._asdict()
+        values.pop("id")
+        values["resources"] = json.dumps(record.resources, sort_keys=True)
+        values["outputs"] = json.dumps(record.outputs, sort_keys=True)
+        conn = self._connect()
+        try:
+            with conn:
+                cursor = conn.execute(
+                    f"INSERT INTO runs ({', '.join(values)}) VALUES ({', '.join('?' * len(values))})",
+                    tuple(values.values()),
+                )
+            return record._replace(id=cursor.lastrowid)
+        finally:
+            conn.close()
+
+    def query(
+        self,
+        mlcube: t.Optional[str] = None,
+        task: t.Optional[str] = None,
+        platform: t.Optional[str] = None,
+        status: t.Optional[str] = None,
+        image: t.Optional[str] = None,
+        config_hash: t.Optional[str] = None,
+        since: t.Optional[float] = None,
+        limit: t.Optional[int] = None,
+    ) -> t.List[RunRecord]:
+        """Return records matching all filters, most recent first.
+
+        Args:
+            mlcube: MLCube name or root directory.
+            task: Task name.
+            platform: Platform name.
+            status: `ok` or `failed`.
+            image: Image hash or its part (e.g., a prefix without `sha256:`).
+            config_hash: Configuration hash or its part.
+            since: Return runs started at this time (seconds since epoch) or later.
+            limit: Maximal number of records.
+        """
+        conditions: t.List[str] = []
+        params: t.List[t.Any] = []
+        if mlcube:
+            conditions.append("(name = ? OR mlcube = ?)")
+            params.extend([mlcube, os.path.abspath(mlcube)])
+        for column, value in (("task", task), ("platform", platform)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        for column, value in (("image", image), ("config_hash", config_hash)):
+            if value:
+                conditions.append(f"{column} LIKE ?")
+                params.append("%" + value.replace("%", "").replace("_", "") + "%")
+        if status is not None:
+            if status not in ("ok", "failed"):
+                raise ConfigurationError(f"Invalid run status ({status}). Expecting `ok` or `failed`.")
+            conditions.append("exit_code = 0" if status == "ok" else "exit_code != 0")
+        if since is not None:
+            conditions.append("start_time >= ?")
+            params.append(since)
+        sql = "SELECT * FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY start_time DESC, id DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        conn = self._connect()
+        try:
+            return [self._record(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.close()
+
+    def last_successful(self, mlcube: str, task: str, config_hash: t.Optional[str] = None) -> t.Optional[RunRecord]:
+        """Return the most recent successful run of a task (with the same configuration hash if provided)."""
+        records = self.query(mlcube=mlcube, task=task, status="ok", config_hash=config_hash, limit=1)
+        return records[0] if records else None
+
+    @staticmethod
+    def table(records: t.List[RunRecord]) -> str:
+        """Return records formatted as a table (one line per record)."""
+        header = ("ID", "START", "MLCUBE", "TASK", "PLATFORM", "STATUS", "EXIT", "DURATION", "IMAGE", "CONFIG")
+        rows = [header] + [
+            (
+                str(record.id),
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.start_time)),
+                record.name,
+                record.task,
+                record.platform,
+                record.status,
+                str(record.exit_code),
+                f"{record.duration:.1f}s",
+                (record.image or "-").split(":")[-1][:12],
+                record.config_hash[:12],
+            )
+            for record in records
+        ]
+        widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+
+class RunRecorder(object):
+    """Collect information on one task run and save it to run history (used by `TaskExecutor`).
+
+    Args:
+        history: Run history.
+        mlcube: Effective MLCube configuration.
+        task: Task name.
+        platform: Platform name. Default is runner name.
+    """
+
+    def __init__(self, history: RunHistory, mlcube: DictConfig, task: str, platform: t.Optional[str] = None) -> None:
+        self.history = history
+        self.mlcube = mlcube
+        self.task = task
+        self.platform = platform or str((mlcube.get("runner", None) or {}).get("runner", ""))
+        self.attempts = 0
+        """Number of task attempts (updated by the executor)."""
+        self.runner: t.Optional[Runner] = None
+        """Runner of the last attempt (updated by the executor) used to get image hash."""
+        self.start_time = time.time()
+        self._usage = _children_usage()
+
+    def _image(self) -> t.Optional[str]:
+        if self.runner is None:
+            return None
+        try:
+            return self.runner.inspect(force=False).get("hash", None)
+        except (MLCubeError, OSError) as err:
+            logger.debug("RunRecorder can't inspect MLCube (task=%s): %s", self.task, err)
+            return None
+
+    def record(self, exit_code: int, error: t.Optional[str] = None) -> t.Optional[RunRecord]:
+        """Save the record. Errors are logged and ignored: run history must not fail tasks.
+
+        Args:
+            exit_code: Exit code of the task (0 means success).
+            error: Error message if the task has failed.
+        Returns:
+            Saved record or None if it could not be saved.
+        """
+        end_time = time.time()
+        usage = _children_usage()
+        resources = {name: value - self._usage[name] for name, value in usage.items() if name != "max_rss_kb"}
+        if "max_rss_kb" in usage:
+            resources["max_rss_kb"] = usage["max_rss_kb"]
+        try:
+            workspace: str = self.mlcube.runtime.workspace
+            outputs: t.Dict[str, t.Optional[str]] = {}
+            if exit_code == 0:
+                for name, output in self.mlcube.tasks[self.task].parameters.outputs.items():
+                    outputs[name] = fingerprint(Shell.get_host_path(workspace, output.default))
+            record = self.history.add(
+                RunRecord(
+                    id=None,
+                    mlcube=str(self.mlcube.runtime.root),
+                    name=str(self.mlcube.get("name", None) or os.path.basename(self.mlcube.runtime.root)),
+                    task=self.task,
+                    platform=self.platform,
+                    workspace=workspace,
+                    config_hash=config_hash(self.mlcube),
+                    image=self._image(),
+                    start_time=self.start_time,
+                    end_time=end_time,
+                    exit_code=exit_code,
+                    attempts=self.attempts,
+                    error=error,
+                    resources=resources,
+                    outputs=outputs,
+                )
+            )
+        except (sqlite3.Error, OSError) as err:
+            logger.warning("RunRecorder.record can't save run history (db=%s): %s", self.history.path, err)
+            return None
+        logger.debug("RunRecorder.record saved run (id=%d, db=%s).", record.id, self.history.path)
+        return record
@@ -0,0 +1,340 @@
+"""Hooks that are called before and after stages of the MLCube runner lifecycle.
+
+Hooks let users measure and trace what MLCube does (e.g., profile the MLCube process, or record host load) without
+patching MLCube or runners. MLCube calls `Hook.before` when a stage starts and `Hook.after` when it ends (successfully
+or not). Stages:
+- `configure`: Configuring MLCube (`mlcube configure` and `POST /configure` requests of `mlcube serve`).
+- `task`: Running one task including retries (`Hook.after` is called when the task ends).
+- `sync_workspace`: Copying task inputs from the internal workspace to a user workspace, and downloading inputs from
+  storages (`data["bytes"]` is the number of copied and downloaded bytes, `data["downloaded_bytes"]` is the number of
+  downloaded bytes).
+- `generate_mounts_and_args`: Generating container mounts and task arguments (`data["mounts"]` is the number of
+  mounts).
+- `container`: Running a task container (`Hook.before` is called right before the container starts, `data["command"]`
+  is the container command or specification).
+- `upload_outputs`: Uploading task outputs to storages when tasks succeed (`data["bytes"]` is the number of uploaded
+  bytes).
+- `prefetch`: Prefetching images and inputs of a next task while the current task runs (`mlcube run --prefetch`), or
+  images of MLCubes (`mlcube prefetch`). This stage runs in background threads, so it can overlap with other stages.
+
+Hooks are enabled with the `MLCUBE_HOOKS` environment variable (comma-separated list of hook names). Names are:
+- Built-in hooks: `profile` (`ProfileHook`) and `host_load` (`HostLoadHook`).
+- Names of entry points in the `mlcube.hooks` group. Entry points refer to hook classes, e.g., in `setup.py`:
+  `entry_points={"mlcube.hooks": ["trace = my_package.hooks:TraceHook"]}`.
+- Python modules that provide the `get_hook_class` function (similar to `get_runner_class` of runner packages).
+Hooks that can't be loaded (e.g., unknown names, or the `pyinstrument` profiler is not installed) are logged once and
+skipped, so that they do not fail MLCube stages.
+
+- `Hook`: Base class for hooks.
+- `HookEvent`: Context and timing of one stage passed to hooks.
+- `ProfileHook`: Dumps profiles (cProfile or pyinstrument) of the MLCube process for configure and task stages.
+- `HostLoadHook`: Records host load when stages start and end.
+- `stage`: Context manager that calls active hooks around a stage.
+- `active_hooks`: Returns hooks enabled with `MLCUBE_HOOKS`.
+"""
+import contextlib
+import cProfile
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+import typing as t
+from pathlib import Path
+
+from omegaconf import DictConfig
+
+from mlcube import metrics
+from mlcube.errors import ConfigurationError
+
+try:
+    from importlib.metadata import entry_points
+except ImportError:  # Python < 3.8
+    entry_points = None
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+__all__ = ["Hook", "HookEvent", "ProfileHook", "HostLoadHook", "stage", "active_hooks", "load_hook"]
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "mlcube.hooks"
+"""Entry point group of third-party hooks."""
+
+
+class HookEvent(t.NamedTuple):
+    """Context and timing of one stage.
+
+    Args:
+        stage: Stage name (`configure`, `task`, `sync_workspace`, `generate_mounts_and_args`, `container`,
+            `upload_outputs` or `prefetch`).
+        platform: Platform name, if known.
+        task: Task name, if known.
+        mlcube: Effective MLCube configuration, if known.
+        start_time: Time when this stage has started (seconds since the epoch).
+        duration: Stage duration in seconds (None in `Hook.before`).
+        error: Error that this stage has raised (only in `Hook.after`).
+        data: Stage-specific data (see module docstring). MLCube can add data to this dictionary while stage runs.
+    """
+
+    stage: str
+    platform: t.Optional[str]
+    task: t.Optional[str]
+    mlcube: t.Optional[DictConfig]
+    start_time: float
+    duration: t.Optional[float] = None
+    error: t.Optional[BaseException] = None
+    data: t.Dict[str, t.Any] = {}
+
+    @property
+    def workspace(self) -> t.Optional[str]:
+        """Return MLCube workspace directory, if known."""
+        if self.mlcube is None:
+            return None
+        return (self.mlcube.get("runtime", None) or {}).get("workspace", None)
+
+    def output_path(self, env_var: str, name: str) -> Path:
+        """Return path of a hook output file: `${env_var}`, `{workspace}/.mlcube/{name}` or `~/.mlcube/{name}`."""
+        if os.environ.get(env_var, None):
+            return Path(os.environ[env_var]).expanduser().resolve()
+        base_dir = Path(self.workspace) if self.workspace else Path.home()
+        return (base_dir / ".mlcube" / name).resolve()
+
+
+class Hook(object):
+    """Base class for hooks. Hooks are created once per process, and can be called concurrently from many threads.
+
+    Errors that hooks raise (including errors creating hooks) are logged, and do not fail MLCube stages.
+    """
+
+    def before(self, event: HookEvent) -> None:
+        """Called when a stage starts."""
+        pass
+
+    def after(self, event: HookEvent) -> None:
+        """Called when a stage ends (`event.error` is set if it has failed)."""
+        pass
+
+
+class ProfileHook(Hook):
+    """Dump profiles of the MLCube process for `configure` and `task` stages.
+
+    Profiles are written to `MLCUBE_PROFILE_DIR` directory (default is `{workspace}/.mlcube/profiles`). The profiler
+    is selected with the `MLCUBE_PROFILER` environment variable:
+    - `cprofile` (default): Files are `{stage}-{task}-{timestamp}-{pid}.prof` (use `python -m pstats FILE` or
+      `snakeviz FILE` to view them).
+    - `pyinstrument`: Files are HTML reports (requires the `pyinstrument` package).
+
+    Only the thread that runs a stage is profiled (e.g., cProfile does not see threads that pump task output).
+    """
+
+    STAGES = ("configure", "task")
+
+    def __init__(self) -> None:
+        self.profiler = os.environ.get("MLCUBE_PROFILER", "cprofile")
+        if self.profiler not in ("cprofile", "pyinstrument"):
+            raise ConfigurationError(
+                f"Unknown profiler (MLCUBE_PROFILER={self.profiler}). Use cprofile or pyinstrument."
+            )
+        if self.profiler == "pyinstrument" and pyinstrument is None:
+            raise ConfigurationError("The pyinstrument profiler is not installed (pip install pyinstrument).")
+        self._profiles: t.Dict[t.Tuple[int, str, t.Optional[str]], t.Any] = {}
+        self._lock = threading.Lock()
+
+    def before(self, event: HookEvent) -> None:
+        if event.stage not in self.STAGES:
+            return
+        if self.profiler == "pyinstrument":
+            profile = pyinstrument.Profiler()
+            profile.start()
+        else:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as err:  # Another profiler is active in this thread (e.g., nested stages).
+                logger.warning("ProfileHook can't profile stage=%s, task=%s: %s", event.stage, event.task, str(err))
+                return
+        with self._lock:
+            self._profiles[(threading.get_ident(), event.stage, event.task)] = profile
+
+    def after(self, event: HookEvent) -> None:
+        with self._lock:
+            profile = self._profiles.pop((threading.get_ident(), event.stage, event.task), None)
+        if profile is None:
+            return
+        profile_dir = event.output_path("MLCUBE_PROFILE_DIR", "profiles")
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(event.start_time))
+        file_name = f"{event.stage}-{event.task or 'mlcube'}-{timestamp}-{os.getpid()}"
+        if self.profiler == "pyinstrument":
+            profile.stop()
+            profile_file = profile_dir / f"{file_name}.html"
+            profile_file.write_text(profile.output_html())
+        else:
+            profile.disable()
+            profile_file = profile_dir / f"{file_name}.prof"
+            profile.dump_stats(profile_file.as_posix())
+        event.data["profile"] = profile_file.as_posix()
+        logger.info("ProfileHook stage=%s, task=%s, profile=%s", event.stage, event.task, profile_file)
+
+
+class HostLoadHook(Hook):
+    """Record host load when stages start and end.
+
+    Records are JSON lines appended to `MLCUBE_HOST_LOAD_FILE` (default is `{workspace}/.mlcube/host_load.jsonl`).
+    Each record contains stage, platform, task, event (`before` or `after`), time, stage duration, load averages,
+    number of CPUs, available memory (Linux) and peak memory of the MLCube process.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_load() -> t.Dict[str, t.Any]:
+        """Return current host load."""
+        load: t.Dict[str, t.Any] = {"cpu_count": os.cpu_count()}
+        if hasattr(os, "getloadavg"):
+            load["load_avg"] = list(os.getloadavg())
+        try:
+            with open("/proc/meminfo", "r") as stream:
+                for line in stream:
+                    if line.startswith("MemAvailable:"):
+                        load["memory_available"] = int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            pass
+        if resource is not None:
+            load["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return load
+
+    def _record(self, event: HookEvent, name: str) -> None:
+        record = {
+            "stage": event.stage,
+            "platform": event.platform,
+            "task": event.task,
+            "event": name,
+            "time": time.time(),
+            "duration": event.duration,
+            "failed": event.error is not None,
+            **self.host_load(),
+        }
+        path = event.output_path("MLCUBE_HOST_LOAD_FILE", "host_load.jsonl")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(path, "a") as stream:
+            stream.write(json.dumps(record) + "\n")
+
+    def before(self, event: HookEvent) -> None:
+        self._record(event, "before")
+
+    def after(self, event: HookEvent) -> None:
+        self._record(event, "after")
+
+
+_BUILTIN_HOOKS: t.Dict[str, t.Type[Hook]] = {"profile": ProfileHook, "host_load": HostLoadHook}
+
+_active: t.Tuple[t.Optional[str], t.List[Hook]] = (None, [])
+"""Value of `MLCUBE_HOOKS` and hooks that have been created for it."""
+
+_active_lock = threading.Lock()
+
+
+def load_hook(name: str) -> Hook:
+    """Create a hook (see module docstring for hook names)."""
+    hook_cls: t.Optional[t.Type[Hook]] = _BUILTIN_HOOKS.get(name, None)
+    if hook_cls is None and entry_points is not None:
+        eps = entry_points()
+        group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+        for entry_point in group:
+            if entry_point.name == name:
+                hook_cls = entry_point.load()
+                break
+    if hook_cls is None:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as err:
+            raise ConfigurationError(f"Hook not found (name={name}): {err}")
+        get_hook_class: t.Optional[t.Callable] = getattr(module, "get_hook_class", None)
+        if get_hook_class is None:
+            raise ConfigurationError(
+                f"Imported module ({name}) does not provide hook class function (get_hook_class)."
+            )
+        hook_cls = get_hook_class()
+    if not (isinstance(hook_cls, type) and issubclass(hook_cls, Hook)):
+        raise ConfigurationError(f"Invalid hook type (name={name}, expected={Hook}, actual={hook_cls}).")
+    return hook_cls()
+
+
+def active_hooks() -> t.List[Hook]:
+    """Return hooks enabled with `MLCUBE_HOOKS` environment variable. Hooks are created once per value.
+
+    Hooks that can't be loaded are logged and skipped (they are not loaded again until the value changes).
+    """
+    global _active
+    names = os.environ.get("MLCUBE_HOOKS", "")
+    with _active_lock:
+        if _active[0] != names:
+            hooks: t.List[Hook] = []
+            for name in (name.strip() for name in names.split(",")):
+                if not name:
+                    continue
+                try:
+                    hooks.append(load_hook(name))
+                except Exception as err:
+                    logger.error("MLCube hook can't be loaded, running without it (name=%s): %s", name, str(err))
+            logger.info("Active MLCube hooks: %s", [hook.__class__.__name__ for hook in hooks])
+            _active = (names, hooks)
+        return _active[1]
+
+
+def _call(hook: Hook, method: str, event: HookEvent) -> None:
+    try:
+        getattr(hook, method)(event)
+    except Exception as err:
+        logger.warning("Hook %s.%s failed (stage=%s): %s", hook.__class__.__name__, method, event.stage, str(err))
+
+
+@contextlib.contextmanager
+def stage(
+    name: str, mlcube: t.Optional[DictConfig] = None, task: t.Optional[str] = None, **data: t.Any
+) -> t.Iterator[HookEvent]:
+    """Call active hooks before and after a stage.
+
+    Platform and task names are taken from default metric labels of the current context (see `metrics.labels`)
+    unless task is provided.
+
+    Args:
+        name: Stage name.
+        mlcube: MLCube configuration.
+        task: Task name.
+        data: Stage-specific data.
+    Returns:
+        Stage event. Callers can add data (e.g., stage results) to `event.data` for `Hook.after`.
+    """
+    labels = metrics.current_labels()
+    event = HookEvent(
+        name, labels.get("platform", None), task or labels.get("task", None), mlcube, time.time(), data=data
+    )
+    hooks = active_hooks()
+    for hook in hooks:
+        _call(hook, "before", event)
+    start = time.monotonic()
+    error: t.Optional[BaseException] = None
+    try:
+        yield event
+    except BaseException as err:
+        error = err
+        raise
+    finally:
+        if hooks:
+            event = event._replace(duration=time.monotonic() - start, error=error)
+            for hook in hooks:
+                _call(hook, "after", event)
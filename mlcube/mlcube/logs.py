@@ -0,0 +1,219 @@
+"""Capture of MLCube task output.
+
+- `TaskLog`: Streams task output to the terminal and to a rotating log file keeping the last lines in memory.
+
+Task output is never accumulated in memory: it is processed in fixed-size chunks, and only the last `tail_lines` lines
+(each truncated to `MAX_LINE_LENGTH` bytes) are kept to be reported with errors.
+"""
+import asyncio
+import collections
+import gzip
+import logging
+import os
+import shutil
+import sys
+import threading
+import typing as t
+
+from mlcube.config import LogPolicy
+from mlcube.errors import ExecutionError
+
+__all__ = ["TaskLog"]
+
+logger = logging.getLogger(__name__)
+
+
+class TaskLog(object):
+    """Output of one MLCube task.
+
+    Output is written to the terminal (stdout or stderr of this process), appended to the `path` log file, and the
+    last lines are kept in a ring buffer. The log file is created on first write. If it already exists (e.g., output
+    of a previous run), it is rotated first, so that `path` always contains output of the current run only. Log files
+    are rotated when they grow larger than `LogPolicy.max_size`: `path` becomes `path.1` (or `path.1.gz`), `path.1`
+    becomes `path.2` and so on, and files beyond `LogPolicy.backups` are removed.
+
+    Instances are thread-safe: output of one command is usually streamed by two threads (stdout and stderr).
+
+    Args:
+        path: Path to the log file.
+        policy: Log policy.
+        echo: If true, also write output to stdout/stderr of this process.
+    """
+
+    STDOUT: int = 1
+    """Stream identifier of standard output (same as in the Docker Engine API)."""
+
+    STDERR: int = 2
+    """Stream identifier of standard error (same as in the Docker Engine API)."""
+
+    CHUNK_SIZE: int = 64 * 1024
+    """Maximal number of bytes read from a pipe at once."""
+
+    MAX_LINE_LENGTH: int = 4 * 1024
+    """Lines in the ring buffer are truncated to this number of bytes (only the last bytes are kept)."""
+
+    def __init__(self, path: str, policy: t.Optional[LogPolicy] = None, echo: bool = True) -> None:
+        self.path = path
+        self.policy = policy or LogPolicy()
+        self.echo = echo
+        self.bytes_written = 0
+        """Total number of bytes of output (in all log files of this run)."""
+
+        self._tail: t.Deque[bytes] = collections.deque(maxlen=max(self.policy.tail_lines, 1))
+        self._partial: t.Dict[int, bytes] = {}
+        self._file: t.Optional[t.BinaryIO] = None
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "TaskLog":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+    def write(self, data: bytes, stream: int = STDOUT) -> None:
+        """Process a chunk of task output.
+
+        Args:
+            data: Output chunk (not necessarily ending with a new line).
+            stream: Stream the chunk has been read from (`STDOUT` or `STDERR`).
+        """
+        if not data:
+            return
+        if self.echo:
+            TaskLog._echo(data, stream)
+        with self._lock:
+            self._update_tail(data, stream)
+            try:
+                self._write_file(data)
+            except OSError as err:
+                # Failure to write log files must not fail the task itself.
+                logger.warning("TaskLog.write can't write log file (%s): %s. Output will not be saved.", self.path, err)
+                self._close_file()
+                self._file, self._size = None, -1
+
+    def tail(self) -> t.List[str]:
+        """Return last lines of output (at most `LogPolicy.tail_lines` lines)."""
+        with self._lock:
+            lines = list(self._tail) + [line for line in self._partial.values() if line]
+        if self.policy.tail_lines <= 0:
+            return []
+        return [line.decode(errors="replace") for line in lines[-self.policy.tail_lines:]]
+
+    def attach(self, err: ExecutionError) -> ExecutionError:
+        """Add log file path and last lines of output to the context of an error (unless they are already there)."""
+        if self.bytes_written > 0:
+            if self._size >= 0:
+                err.context.setdefault("log_file", self.path)
+            err.context.setdefault("log_tail", self.tail())
+        return err
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_file()
+
+    def pump(self, pipe: t.BinaryIO, stream: int = STDOUT) -> threading.Thread:
+        """Start a daemon thread that copies `pipe` to this log until end of file.
+
+        Args:
+            pipe: Readable end of a pipe (e.g., `Popen.stdout`). It is closed when the end of file is reached.
+            stream: Stream identifier.
+        Returns:
+            Started thread.
+        """
+        def _pump() -> None:
+            try:
+                read = getattr(pipe, "read1", pipe.read)
+                while True:
+                    data = read(TaskLog.CHUNK_SIZE)
+                    if not data:
+                        break
+                    self.write(data, stream)
+            except (OSError, ValueError) as err:
+                logger.warning("TaskLog.pump stopped reading output (stream=%d): %s", stream, err)
+            finally:
+                pipe.close()
+
+        thread = threading.Thread(target=_pump, name=f"mlcube-log-{stream}", daemon=True)
+        thread.start()
+        return thread
+
+    async def apump(self, reader: asyncio.StreamReader, stream: int = STDOUT) -> None:
+        """Copy an asyncio stream (e.g., `asyncio.subprocess.Process.stdout`) to this log until end of file."""
+        while True:
+            data = await reader.read(TaskLog.CHUNK_SIZE)
+            if not data:
+                break
+            self.write(data, stream)
+
+    @staticmethod
+    def _echo(data: bytes, stream: int) -> None:
+        out = sys.stderr if stream == TaskLog.STDERR else sys.stdout
+        try:
+            buffer = getattr(out, "buffer", None)
+            if buffer is not None:
+                out.flush()
+                buffer.write(data)
+                buffer.flush()
+            else:
+                out.write(data.decode(errors="replace"))
+                out.flush()
+        except (OSError, ValueError):
+            pass
+
+    def _update_tail(self, data: bytes, stream: int) -> None:
+        lines = (self._partial.get(stream, b"") + data).split(b"\n")
+        # Carriage returns (e.g., progress bars) overwrite lines on a terminal: keep what a terminal would show.
+        for line in lines[:-1]:
+            self._tail.append(line.rsplit(b"\r", 1)[-1][-TaskLog.MAX_LINE_LENGTH:])
+        self._partial[stream] = lines[-1][-TaskLog.MAX_LINE_LENGTH:]
+
+    def _write_file(self, data: bytes) -> None:
+        self.bytes_written += len(data)
+        if self._size < 0:
+            return  # Log file can't be written.
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            if os.path.isfile(self.path) and os.path.getsize(self.path) > 0:
+                self._rotate()
+            self._file, self._size = open(self.path, "ab"), 0
+        elif self._size > 0 and self._size + len(data) > self.policy.max_size:
+            self._close_file()
+            self._rotate()
+            self._file, self._size = open(self.path, "ab"), 0
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _backup(self, index: int) -> t.Optional[str]:
+        """Return path to an existing rotated log file with this index."""
+        for path in (f"{self.path}.{index}", f"{self.path}.{index}.gz"):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _rotate(self) -> None:
+        """Rotate log files (`path` -> `path.1[.gz]`, `path.1[.gz]` -> `path.2[.gz]`, ...)."""
+        backups = self.policy.backups
+        if backups <= 0:
+            os.remove(self.path)
+            return
+        oldest = self._backup(backups)
+        if oldest:
+            os.remove(oldest)
+        for index in range(backups - 1, 0, -1):
+            path = self._backup(index)
+            if path:
+                os.replace(path, f"{self.path}.{index + 1}" + (".gz" if path.endswith(".gz") else ""))
+        if self.policy.compress:
+            with open(self.path, "rb") as src, gzip.open(f"{self.path}.1.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(self.path)
+        else:
+            os.replace(self.path, f"{self.path}.1")
+        logger.debug("TaskLog rotated log file (%s).", self.path)
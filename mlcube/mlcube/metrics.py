@@ -0,0 +1,328 @@
+"""Metrics of MLCube operations in Prometheus text format (and OpenMetrics).
+
+- `Counter`: Metric family whose values only increase (e.g., number of failed tasks).
+- `Histogram`: Metric family of observed values (e.g., task durations) counted in buckets.
+- `Registry`: Collection of metric families that renders them and writes them to textfile-collector files.
+- `labels`: Context manager that sets default labels (e.g., platform and task) in the current context.
+- `current_labels`: Returns default labels of the current context.
+- `timed`: Context manager that observes duration of a code block.
+- `write_textfile`: Adds metrics of the default registry to the file in `MLCUBE_METRICS_FILE`.
+
+MLCube metrics (in the default registry `REGISTRY`):
+- `mlcube_tasks_total{platform, task, status}`: Number of completed task runs (status is `ok` or `failed`).
+- `mlcube_task_duration_seconds{platform, task, status}`: Task durations (including retries).
+- `mlcube_task_failures_total{platform, task, error}`: Number of failed task runs by error class (e.g.,
+  `ExecutionError`, `ConfigurationError` or `KeyboardInterrupt`).
+- `mlcube_configure_duration_seconds{platform, task, step}`: Durations of configure steps (`configure`, `pull`,
+  `build`).
+- `mlcube_workspace_sync_bytes_total{platform, task}`: Number of bytes copied when syncing workspaces.
+- `mlcube_workspace_sync_duration_seconds{platform, task}`: Durations of workspace syncs.
+
+Metrics are exposed by `mlcube serve` (`GET /metrics`), and `mlcube run` and `mlcube configure` add them to a
+textfile-collector file (e.g., for the Prometheus node exporter) if `MLCUBE_METRICS_FILE` environment variable is set.
+"""
+import contextlib
+import contextvars
+import logging
+import math
+import os
+import re
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+__all__ = ["Counter", "Histogram", "Registry", "REGISTRY", "labels", "current_labels", "timed", "write_textfile"]
+
+logger = logging.getLogger(__name__)
+
+_labels: contextvars.ContextVar[t.Dict[str, str]] = contextvars.ContextVar("mlcube_metrics_labels", default={})
+"""Default labels of metrics observed in the current context (see `labels`)."""
+
+_SampleKey = t.Tuple[str, str]
+"""Sample name and formatted labels (e.g., `('mlcube_tasks_total', '{platform="docker",task="train"}')`)."""
+
+
+def _format_labels(names: t.Iterable[str], values: t.Iterable[str]) -> str:
+    pairs = [
+        name + '="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Family(object):
+    """Base class for metric families."""
+
+    TYPE: str = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: t.Dict[str, t.Any]) -> t.Tuple[str, ...]:
+        """Return label values: explicit labels override default labels of the current context."""
+        labels = {**_labels.get(), **labels}
+        unknown = set(labels) - set(self.labelnames) - set(_labels.get())
+        if unknown:
+            raise ValueError(f"Unknown labels of {self.name} metric (labels={sorted(unknown)}).")
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def sample_names(self) -> t.Tuple[str, ...]:
+        raise NotImplementedError
+
+    def samples(self) -> t.List[t.Tuple[_SampleKey, float]]:
+        raise NotImplementedError
+
+
+class Counter(_Family):
+    """Metric family whose values only increase. Sample name is `{name}_total`."""
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: t.Dict[t.Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: t.Any) -> None:
+        if amount < 0:
+            raise ValueError(f"Counters can only increase (metric={self.name}, amount={amount}).")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: t.Any) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def sample_names(self) -> t.Tuple[str, ...]:
+        return (f"{self.name}_total",)
+
+    def samples(self) -> t.List[t.Tuple[_SampleKey, float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [((f"{self.name}_total", _format_labels(self.labelnames, key)), value) for key, value in values]
+
+
+class Histogram(_Family):
+    """Metric family of observed values. Sample names are `{name}_bucket` (cumulative), `{name}_sum`, `{name}_count`."""
+
+    TYPE = "histogram"
+
+    DEFAULT_BUCKETS: t.Tuple[float, ...] = (0.1, 0.5, 1, 5, 10, 30, 60, 300, 600, 1800, 3600, 7200, 21600, 86400)
+    """Buckets (seconds) suitable for MLCube operations that take from milliseconds to days."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(bucket) for bucket in buckets)) + (math.inf,)
+        self._values: t.Dict[t.Tuple[str, ...], t.Tuple[t.List[int], float]] = {}
+
+    def observe(self, value: float, **labels: t.Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, None) or ([0] * len(self.buckets), 0.0)
+            for idx, bucket in enumerate(self.buckets):
+                if value <= bucket:
+                    counts[idx] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: t.Any) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), None) or ([0], 0.0)
+        return sum(counts)
+
+    def sample_names(self) -> t.Tuple[str, ...]:
+        return f"{self.name}_bucket", f"{self.name}_sum", f"{self.name}_count"
+
+    def samples(self) -> t.List[t.Tuple[_SampleKey, float]]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples: t.List[t.Tuple[_SampleKey, float]] = []
+        for key, counts, total in values:
+            cumulative = 0
+            for bucket, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ("le",), key + (_format_value(bucket),))
+                samples.append(((f"{self.name}_bucket", labels), float(cumulative)))
+            labels = _format_labels(self.labelnames, key)
+            samples.append(((f"{self.name}_sum", labels), total))
+            samples.append(((f"{self.name}_count", labels), float(cumulative)))
+        return samples
+
+
+class Registry(object):
+    """Collection of metric families."""
+
+    _SAMPLE_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)(?:\s+\S+)?$")
+
+    def __init__(self) -> None:
+        self._families: t.Dict[str, _Family] = OrderedDict()
+        self._lock = threading.Lock()
+        self._written: t.Dict[_SampleKey, float] = {}
+        """Sample values that have already been added to textfile-collector files (see `write_textfile`)."""
+
+    def _register(self, family: _Family) -> _Family:
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Metric has already been registered ({family.name}).")
+            self._families[family.name] = family
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames: t.Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: t.Sequence[str] = (),
+        buckets: t.Sequence[float] = Histogram.DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, openmetrics: bool = False, base: t.Optional[t.Dict[_SampleKey, float]] = None) -> str:
+        """Render all metrics.
+
+        Args:
+            openmetrics: If true, use OpenMetrics format (`application/openmetrics-text`), else Prometheus text format
+                (`text/plain; version=0.0.4`).
+            base: Values to add to samples of this registry (e.g., loaded from an existing textfile). Samples of metric
+                families that this registry does not define are ignored.
+        """
+        base = dict(base or {})
+        lines: t.List[str] = []
+        for family in list(self._families.values()):
+            samples: t.Dict[_SampleKey, float] = OrderedDict(family.samples())
+            for key, value in base.items():
+                if key[0] in family.sample_names():
+                    samples[key] = samples.get(key, 0.0) + value
+            type_name = family.name if openmetrics or family.TYPE != "counter" else f"{family.name}_total"
+            lines.append(f"# HELP {type_name} {family.documentation}")
+            lines.append(f"# TYPE {type_name} {family.TYPE}")
+            lines.extend(f"{name}{labels} {_format_value(value)}" for (name, labels), value in samples.items())
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def parse(text: str) -> t.Dict[_SampleKey, float]:
+        """Parse samples from metrics in Prometheus text format (comments and invalid lines are ignored)."""
+        samples: t.Dict[_SampleKey, float] = {}
+        for line in text.splitlines():
+            match = Registry._SAMPLE_LINE.match(line.strip())
+            if line.startswith("#") or not match:
+                continue
+            try:
+                samples[(match.group(1), match.group(2) or "")] = float(match.group(3))
+            except ValueError:
+                continue
+        return samples
+
+    def write_textfile(self, path: str) -> None:
+        """Add metrics of this registry to a textfile-collector file (e.g., for the Prometheus node exporter).
+
+        Values in the file accumulate across MLCube processes: values that this registry has not added to files yet
+        are added to the values in the file. The file is updated under an exclusive lock and replaced atomically.
+        """
+        path = os.path.abspath(os.path.expanduser(path))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                base: t.Dict[_SampleKey, float] = {}
+                if os.path.isfile(path):
+                    with open(path, "r") as stream:
+                        base = self.parse(stream.read())
+                current = dict(sample for family in list(self._families.values()) for sample in family.samples())
+                for key, value in self._written.items():
+                    base[key] = base.get(key, 0.0) - value
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as stream:
+                    stream.write(self.render(base=base))
+                os.replace(tmp_path, path)
+                self._written = current
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+@contextlib.contextmanager
+def labels(**values: t.Any) -> t.Iterator[None]:
+    """Set default labels (e.g., `platform` and `task`) of metrics observed in the current context."""
+    token = _labels.set({**_labels.get(), **{name: str(value) for name, value in values.items()}})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+
+def current_labels() -> t.Dict[str, str]:
+    """Return default labels of metrics observed in the current context (see `labels`)."""
+    return dict(_labels.get())
+
+
+@contextlib.contextmanager
+def timed(histogram: Histogram, **values: t.Any) -> t.Iterator[None]:
+    """Observe duration (seconds) of a code block whether it succeeds or fails."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        histogram.observe(time.monotonic() - start, **values)
+
+
+def write_textfile() -> None:
+    """Add metrics of the default registry to the file in `MLCUBE_METRICS_FILE` (if set). Errors are logged."""
+    path = os.environ.get("MLCUBE_METRICS_FILE", None)
+    if not path:
+        return
+    try:
+        REGISTRY.write_textfile(path)
+    except OSError as err:
+        logger.warning("Can't write metrics to textfile (%s): %s", path, err)
+
+
+REGISTRY = Registry()
+"""Default registry with MLCube metrics."""
+
+TASKS: Counter = REGISTRY.counter(
+    "mlcube_tasks", "Number of completed MLCube task runs.", ("platform", "task", "status")
+)
+TASK_DURATION: Histogram = REGISTRY.histogram(
+    "mlcube_task_duration_seconds", "Durations of MLCube task runs including retries.", ("platform", "task", "status")
+)
+TASK_FAILURES: Counter = REGISTRY.counter(
+    "mlcube_task_failures", "Number of failed MLCube task runs by error class.", ("platform", "task", "error")
+)
+CONFIGURE_DURATION: Histogram = REGISTRY.histogram(
+    "mlcube_configure_duration_seconds",
+    "Durations of MLCube configure steps (configure, pull, build).",
+    ("platform", "task", "step"),
+)
+SYNC_BYTES: Counter = REGISTRY.counter(
+    "mlcube_workspace_sync_bytes", "Number of bytes copied when syncing MLCube workspaces.", ("platform", "task")
+)
+SYNC_DURATION: Histogram = REGISTRY.histogram(
+    "mlcube_workspace_sync_duration_seconds", "Durations of MLCube workspace syncs.", ("platform", "task")
+)
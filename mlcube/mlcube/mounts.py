@@ -0,0 +1,421 @@
+"""Mount plans: how task parameters map to container mounts and task arguments.
+
+- `Mount`: One host directory mounted into a container.
+- `PlannedParameter`: One task parameter with its resolved type, host path and container path.
+- `MountPlan`: Immutable plan of mounts and task arguments for one task. Plans are compiled once per configuration
+  (see `MountPlan.compile`), and local container runners (docker, singularity) use the same plan, so that a task
+  gets identical mounts no matter what runner runs it.
+
+Host directories are mounted as `/mlcube_io{N}` where `N` is the index of a directory in the order parameters are
+declared (inputs first, then outputs), so that indices are the same every time a task runs.
+
+Mounts are optimized according to the `mounts` section of MLCube configuration (see `MountPolicy`):
+- Directories inside other mounted directories with the same access (read-only or read-write) are not mounted again.
+- Optionally, directories inside the workspace with the same access are mounted via their common ancestor, unless the
+  ancestor contains directories that must be mounted with other options.
+- Conflicting mount options (a directory requested as `ro` and `rw`, or a read-only directory inside a read-write
+  mount) are reported, and are errors if `mounts.conflicts` is `error`.
+
+Directories of inputs with content keys (`cache`) are linked from the dataset cache, and are mounted read-only if no
+parameter requests options for them, and no other parameter uses them, their ancestors or directories inside them.
+"""
+import json
+import logging
+import os
+import threading
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube import storage
+from mlcube.config import IOType, MountPolicy, MountType, ParameterType
+from mlcube.errors import ConfigurationError
+
+__all__ = ["Mount", "PlannedParameter", "MountPlan", "get_host_path"]
+
+logger = logging.getLogger(__name__)
+
+
+def get_host_path(workspace_path: str, path_from_config: str) -> str:
+    """Return absolute host path for a task parameter (see `Shell.get_host_path`)."""
+    if storage.is_storage_uri(path_from_config):
+        # Files and directories in storages are downloaded to (or uploaded from) the workspace.
+        return storage.local_path(os.path.abspath(workspace_path), path_from_config)
+    # Omega conf will resolve any variables defined in MLCube configuration file. We need to take care about `~`
+    # (user home directory) and environment variables.
+    host_path = Path(os.path.expandvars(os.path.expanduser(path_from_config)))
+    # According to MLCube contract, relative paths are relative to MLCube workspace directory.
+    if not host_path.is_absolute():
+        host_path = Path(workspace_path) / host_path
+    return host_path.as_posix()
+
+
+class Mount(t.NamedTuple):
+    """Host directory mounted into a container.
+
+    Args:
+        host_path: Host directory.
+        container_path: Path inside container (`/mlcube_io{N}`).
+        opts: Mount options (`rw` or `ro`) if parameters request them, else None (runner default).
+    """
+
+    host_path: str
+    container_path: str
+    opts: t.Optional[str] = None
+
+
+class PlannedParameter(t.NamedTuple):
+    """Task parameter.
+
+    Args:
+        name: Parameter name.
+        io: Input or output (`IOType`).
+        type: File or directory (`ParameterType`). Unknown types of input parameters are resolved when the plan is
+            compiled.
+        path: Parameter path as specified in MLCube configuration.
+        host_path: Absolute host path of a file or directory.
+        container_path: Path of this file or directory inside container.
+        mount: Index of the mount that provides this file or directory.
+    """
+
+    name: str
+    io: str
+    type: str
+    path: str
+    host_path: str
+    container_path: str
+    mount: int
+
+
+class MountPlan(t.NamedTuple):
+    """Immutable plan of mounts and task arguments for one task.
+
+    Args:
+        task: Task name.
+        mounts: Host directories to mount in the order of their indices.
+        args: Task arguments (the first one is the task name).
+        parameters: Task parameters (inputs, then outputs).
+        dirs: Host directories that parameters need (directories, and parent directories of files), including those
+            that are not mounted because they are inside other mounts.
+    """
+
+    task: str
+    mounts: t.Tuple[Mount, ...]
+    args: t.Tuple[str, ...]
+    parameters: t.Tuple[PlannedParameter, ...]
+    dirs: t.Tuple[str, ...] = ()
+
+    CONTAINER_PATH = "/mlcube_io{}"
+    """Container path of the N-th mount."""
+
+    CACHE_SIZE = 256
+    """Maximal number of compiled plans kept in memory."""
+
+    _cache = OrderedDict()
+    """Compiled plans (see `compile`)."""
+
+    _cache_lock = threading.Lock()
+
+    @staticmethod
+    def compile(mlcube: DictConfig, task: str) -> "MountPlan":
+        """Return mount plan for this task.
+
+        Plans are cached: the key is the task configuration, workspace, global mount options, mount policy and host
+        paths (paths can contain environment variables), so that parameters with unknown types are checked on a file
+        system once.
+        The MLCube configuration is not modified.
+
+        Args:
+            mlcube: MLCube configuration (e.g., coming from `mlcube.yaml` file).
+            task: Task name.
+        """
+        # By design, when users provide `--mount=rw|ro` on a command line, this applies only to input parameters,
+        # and overrides anything that's specified in config files.
+        mount_opts_for_input_params: t.Optional[str] = None
+        if isinstance(mlcube.get("runner", None), (DictConfig, dict)):
+            mount_opts_for_input_params = mlcube.runner.get("--mount_opts", None)
+            if mount_opts_for_input_params and not MountType.is_valid(mount_opts_for_input_params):
+                raise ConfigurationError(
+                    "Shell.generate_mounts_and_args invalid global mount options: "
+                    f"--mount_opts={mount_opts_for_input_params}."
+                )
+        workspace: str = mlcube.runtime.workspace
+        params = mlcube.tasks[task].parameters  # Dictionary of input and output parameters for the task.
+        params = OmegaConf.to_container(params, resolve=True) if isinstance(params, DictConfig) else params
+        host_paths = [
+            get_host_path(workspace, param_def["default"])
+            for io in (IOType.INPUT, IOType.OUTPUT)
+            for param_def in (params.get(f"{io}s", None) or {}).values()
+        ]
+        policy = MountPolicy.from_config(mlcube.get("mounts", None))
+        key = json.dumps(
+            [task, workspace, mount_opts_for_input_params, params, host_paths, policy._asdict()], sort_keys=True
+        )
+        with MountPlan._cache_lock:
+            plan = MountPlan._cache.get(key, None)
+            if plan is not None:
+                MountPlan._cache.move_to_end(key)
+                return plan
+        plan = MountPlan._compile(task, params, host_paths, mount_opts_for_input_params, workspace, policy)
+        with MountPlan._cache_lock:
+            MountPlan._cache[key] = plan
+            while len(MountPlan._cache) > MountPlan.CACHE_SIZE:
+                MountPlan._cache.popitem(last=False)
+        return plan
+
+    @staticmethod
+    def _compile(
+        task: str,
+        params: t.Dict,
+        host_paths: t.List[str],
+        mount_opts_for_input_params: t.Optional[str],
+        workspace: str,
+        policy: MountPolicy,
+    ) -> "MountPlan":
+        # Host directories that parameters need (files are mounted via their parent directories) with mount options.
+        mounts_opts: t.Dict[str, t.Optional[str]] = OrderedDict()
+        # Host directories that only inputs with content keys (shared with the dataset cache) use.
+        cached_only: t.Dict[str, bool] = {}
+        requests: t.List[t.Tuple[str, str, str, str, str, str, t.Optional[str]]] = []
+
+        host_paths_iter = iter(host_paths)
+        for io in (IOType.INPUT, IOType.OUTPUT):
+            for param_name, param_def in (params.get(f"{io}s", None) or {}).items():
+                assert isinstance(param_def, dict), f"Unexpected parameter definition: {param_def}."
+                param_type: str = param_def.get("type", None)
+                if not ParameterType.is_valid(param_type):
+                    raise ConfigurationError(
+                        f"Invalid task: task={task}, param={param_name}, type={param_type}. Type is invalid."
+                    )
+                # MLCube contract says relative paths in MLCube configuration files are relative with respect to MLCube
+                # workspace directory. Absolute paths, `~` (user home directory) and environment variables can be used
+                # too (e.g., to reuse host cache directories that machine learning frameworks use).
+                host_path: str = next(host_paths_iter)
+                if param_type == ParameterType.UNKNOWN:
+                    if io == IOType.OUTPUT:
+                        raise ConfigurationError(
+                            f"Invalid task: task={task}, param={param_name}, type={param_type}. "
+                            "Type cannot be unknown for output parameters."
+                        )
+                    if os.path.isdir(host_path):
+                        param_type = ParameterType.DIRECTORY
+                    elif os.path.isfile(host_path):
+                        param_type = ParameterType.FILE
+                    else:
+                        raise ConfigurationError(
+                            f"Invalid task: task={task}, param={param_name}, type={param_type}. "
+                            f"Type is unknown and unable to identify it ({host_path})."
+                        )
+
+                mount_path, file_name = host_path, None
+                if param_type == ParameterType.FILE:
+                    mount_path, file_name = os.path.split(host_path)
+                requests.append((param_name, io, param_type, param_def["default"], host_path, mount_path, file_name))
+                mounts_opts.setdefault(mount_path, None)
+                is_cached = io == IOType.INPUT and param_def.get("cache", None) is not None
+                cached_only[mount_path] = cached_only.get(mount_path, True) and is_cached
+
+                mount_type: t.Optional[str] = param_def.get("opts", None)
+                if io == IOType.INPUT and mount_opts_for_input_params:
+                    logger.debug(
+                        "MountPlan.compile overriding parameter mount options (task=%s, param=%s, io=%s, "
+                        "mount_opts=%s) with global mount option (%s) for input parameters.",
+                        task,
+                        param_name,
+                        io,
+                        mount_type,
+                        mount_opts_for_input_params,
+                    )
+                    mount_type = mount_opts_for_input_params
+                if not mount_type:
+                    continue
+                if not MountType.is_valid(mount_type):
+                    raise ConfigurationError(
+                        f"Invalid mount options: task={task}, param={param_name}, opts={mount_type}."
+                    )
+                if mount_type == MountType.RO and io == IOType.OUTPUT:
+                    logger.warning(
+                        "Task's (%s) parameter (%s) is OUTPUT and requested to mount as RO.", task, param_name
+                    )
+                if mounts_opts[mount_path] not in (None, mount_type):
+                    MountPlan._conflict(
+                        policy,
+                        f"Conflicting mount options found. Host path ({mount_path}) has already been requested to "
+                        f"mount as '{mounts_opts[mount_path]}', but new parameter ({param_name}) requests to mount "
+                        f"as '{mount_type}'.",
+                    )
+                    # Since we can only have `ro`/`rw`, we'll set the mount option to `rw`.
+                    mount_type = MountType.RW
+                mounts_opts[mount_path] = mount_type
+                logger.info(
+                    "Host path (%s) for parameter '%s' will be mounted with '%s' option.",
+                    mount_path,
+                    param_name,
+                    mount_type,
+                )
+
+        for path, opts in mounts_opts.items():
+            if opts is None and cached_only[path] and not any(
+                other != path and (other.startswith(path.rstrip("/") + "/") or path.startswith(other.rstrip("/") + "/"))
+                for other in mounts_opts
+            ):
+                mounts_opts[path] = MountType.RO
+
+        targets = MountPlan._optimize(mounts_opts, workspace, policy)
+
+        # Mount indices are assigned in the order parameters use mounts.
+        indices: t.Dict[str, int] = OrderedDict()
+        args: t.List[str] = [task]  # First task argument is always the task name.
+        parameters: t.List[PlannedParameter] = []
+        for param_name, io, param_type, path, host_path, mount_path, file_name in requests:
+            target, target_opts = targets[mount_path]
+            index = indices.setdefault(target, len(indices))
+            container_path = MountPlan.CONTAINER_PATH.format(index)
+            if mount_path != target:
+                container_path += "/" + Path(os.path.relpath(mount_path, target)).as_posix()
+            if file_name is not None:
+                container_path += "/" + file_name
+            args.append(f"--{param_name}={container_path}")
+            parameters.append(PlannedParameter(param_name, io, param_type, path, host_path, container_path, index))
+
+        target_opts = {target: opts for target, opts in targets.values()}
+        return MountPlan(
+            task,
+            tuple(
+                Mount(path, MountPlan.CONTAINER_PATH.format(index), target_opts[path])
+                for path, index in indices.items()
+            ),
+            tuple(args),
+            tuple(parameters),
+            tuple(mounts_opts),
+        )
+
+    @staticmethod
+    def _conflict(policy: MountPolicy, message: str) -> None:
+        """Report conflicting mount options: log a warning, or raise an error if policy says so."""
+        if policy.conflicts == "error":
+            raise ConfigurationError(message + " Change `opts` of task parameters, or set `mounts.conflicts` to `rw`.")
+        logger.warning(message)
+
+    @staticmethod
+    def _optimize(
+        mounts_opts: t.Dict[str, t.Optional[str]], workspace: str, policy: MountPolicy
+    ) -> t.Dict[str, t.Tuple[str, t.Optional[str]]]:
+        """Return host directories to mount for directories that parameters need.
+
+        Args:
+            mounts_opts: Host directories that parameters need, and their mount options.
+            workspace: Workspace directory. Only directories inside the workspace are coalesced.
+            policy: Mount policy.
+        Returns:
+            Mapping from directories in `mounts_opts` to directories to mount (the same directory, or one of its
+                ancestors) and their mount options.
+        """
+
+        def _access(_opts: t.Optional[str]) -> str:
+            return _opts or MountType.RW  # Runners mount directories as read-write by default.
+
+        def _is_inside(_path: str, _parent: str) -> bool:
+            return _path == _parent or _path.startswith(_parent.rstrip("/") + "/")
+
+        targets: t.Dict[str, t.Tuple[str, t.Optional[str]]] = {path: (path, opts) for path, opts in mounts_opts.items()}
+        # Read-only directories inside read-write mounts are writable anyway.
+        for path, opts in mounts_opts.items():
+            if _access(opts) != MountType.RO:
+                continue
+            for parent, parent_opts in mounts_opts.items():
+                if parent != path and _is_inside(path, parent) and _access(parent_opts) == MountType.RW:
+                    MountPlan._conflict(
+                        policy,
+                        f"Host path ({path}) is requested to mount as 'ro', but it is inside another host path "
+                        f"({parent}) that is mounted as 'rw'.",
+                    )
+                    break
+
+        if policy.dedupe:
+            # Directories inside other directories with the same access are accessed via the outermost directory.
+            for path in sorted(mounts_opts, key=len):
+                for parent in sorted(mounts_opts, key=len):
+                    if len(parent) >= len(path):
+                        break
+                    if _is_inside(path, parent) and _access(mounts_opts[parent]) == _access(mounts_opts[path]):
+                        targets[path] = targets[parent]
+                        break
+
+        if policy.coalesce:
+            workspace = os.path.abspath(workspace)
+            for access in (MountType.RO, MountType.RW):
+                mounted: t.Dict[str, t.Optional[str]] = dict(targets.values())
+                group = sorted(
+                    path for path, opts in mounted.items() if _is_inside(path, workspace) and _access(opts) == access
+                )
+                if len(group) < 2:
+                    continue
+                ancestor = os.path.commonpath(group)
+                others = [path for path in mounted if path not in group and _is_inside(path, ancestor)]
+                if others:
+                    logger.debug(
+                        "MountPlan will not coalesce mounts (%s) into their ancestor (%s) because it contains "
+                        "mounts with other options (%s).",
+                        group,
+                        ancestor,
+                        others,
+                    )
+                    continue
+                opts = next((mounted[path] for path in group if mounted[path]), None)
+                for path, (target, _) in list(targets.items()):
+                    if target in group:
+                        targets[path] = (ancestor, opts)
+
+        return targets
+
+    def make_dirs(self) -> None:
+        """Create host directories that do not exist (mounted directories and directories inside them)."""
+        for path in [mount.host_path for mount in self.mounts] + list(self.dirs):
+            os.makedirs(path, exist_ok=True)
+
+    def host_mounts(self) -> t.Dict[str, str]:
+        """Return mapping from host paths to container paths."""
+        return {mount.host_path: mount.container_path for mount in self.mounts}
+
+    def mount_options(self) -> t.Dict[str, str]:
+        """Return mapping from host paths to mount options (only for mounts that have options)."""
+        return {mount.host_path: mount.opts for mount in self.mounts if mount.opts}
+
+    def table(self) -> str:
+        """Return mount table: one line per mount with its options and parameters that use it."""
+        header = ("CONTAINER PATH", "HOST PATH", "OPTS", "PARAMETERS")
+        rows = [header] + [
+            (
+                mount.container_path,
+                mount.host_path,
+                mount.opts or "-",
+                ",".join(param.name for param in self.parameters if param.mount == index),
+            )
+            for index, mount in enumerate(self.mounts)
+        ]
+        widths = [max(len(row[idx]) for row in rows) for idx in range(len(header))]
+        return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+
+    def to_dict(self) -> t.Dict[str, t.Any]:
+        """Return JSON-serializable representation of this plan."""
+        return {
+            "task": self.task,
+            "mounts": [mount._asdict() for mount in self.mounts],
+            "args": list(self.args),
+            "parameters": [param._asdict() for param in self.parameters],
+            "dirs": list(self.dirs),
+        }
+
+    @staticmethod
+    def from_dict(plan: t.Dict[str, t.Any]) -> "MountPlan":
+        """Create plan from its dictionary representation (see `to_dict`)."""
+        return MountPlan(
+            plan["task"],
+            tuple(Mount(**mount) for mount in plan["mounts"]),
+            tuple(plan["args"]),
+            tuple(PlannedParameter(**param) for param in plan["parameters"]),
+            tuple(plan.get("dirs", ())),
+        )
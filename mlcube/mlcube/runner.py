@@ -61,6 +61,10 @@ class Runner(object):
 
     CONFIG: RunnerConfigType = RunnerConfig
 
+    NATIVE_TASK_POLICY: bool = False
+    """If true, this runner maps task timeouts and retries (`mlcube.config.TaskPolicy`) to native settings of its
+    platform (e.g., k8s jobs), and `mlcube.executor.TaskExecutor` does not enforce them on the client side."""
+
     def __init__(
         self, mlcube: t.Union[DictConfig, t.Dict], task: t.Optional[str]
     ) -> None:
@@ -94,6 +98,58 @@ class Runner(object):
         """Run one MLCube task."""
         ...
 
+    async def arun(self) -> None:
+        """Run one MLCube task without blocking the event loop (asyncio version of `run`).
+
+        Runners override this method to wait for tasks with asyncio subprocesses or asynchronous clients, so that one
+        process can drive many concurrent tasks. The default implementation runs `run` in the default executor of the
+        running event loop (one thread per running task). When the coroutine is cancelled, `run` is cancelled with
+        `Shell.cancellation` (commands started with `Shell.run` are stopped), and cancellation completes when `run`
+        returns. Runners that do not use `Shell` should check `Shell.cancelled` or override this method. Implementations
+        must stop their tasks (containers, remote jobs) when cancelled.
+        """
+        from mlcube.shell import Shell  # `mlcube.shell` depends on `mlcube.runner` via `mlcube.config`.
+
+        await Shell.in_thread(self.run)
+
+    def prefetch(self) -> t.Dict:
+        """Fetch what this task needs (e.g., images, inputs in storages) ahead of time.
+
+        `mlcube.executor.TaskExecutor` calls this method in a background thread for next tasks while other tasks are
+        running, and `mlcube prefetch` calls it with no task to warm up hosts (only images are fetched then).
+        Implementations only fill caches (pull or build images that do not exist, download inputs into content stores);
+        they must not change the workspace or start tasks, and must stop when work is cancelled (`Shell.cancelled`,
+        commands started with `Shell.run` are stopped automatically). The default implementation downloads task inputs
+        with `storage:` URIs.
+
+        Returns:
+            Information on fetched objects that `mlcube prefetch` reports. Runners with images report `image` (name),
+                `fetched` (true if the image has been pulled or built) and `size` (bytes, None if unknown).
+        """
+        from mlcube.shell import Shell
+
+        if self.task is None:
+            return {}
+        return {"downloaded_bytes": Shell.prefetch_inputs(self.mlcube, self.task)}
+
+    @classmethod
+    def preload(cls, mlcubes: t.List[DictConfig]) -> None:
+        """Fill per-process caches for multiple MLCubes at once (e.g., query all local images with one call).
+
+        `mlcube inspect` and `mlcube prefetch` call this method with effective configurations of all MLCubes that use
+        this runner before these MLCubes are inspected or prefetched one by one. Errors are logged and ignored. The
+        default implementation does nothing.
+        """
+        ...
+
+    def teardown(self) -> None:
+        """Release resources that all tasks of one run share (e.g., remote instances).
+
+        `mlcube.executor.TaskExecutor` calls this method once after the last task of a run has completed or failed (with
+        `task` set to the last requested task), so that tasks of one run can reuse these resources.
+        """
+        ...
+
     def inspect(self, force: bool = False) -> t.Dict:
         """Return low-level information about MLCube objects.
 
@@ -0,0 +1,389 @@
+"""MLCube server: a long-running process that executes MLCube requests received over a local Unix socket.
+
+Each `mlcube` invocation pays for Python startup, runner discovery, loading system settings and merging MLCube
+configurations. The server (`mlcube serve`) pays these costs once: system settings are reloaded only when the system
+settings file changes, effective MLCube configurations are cached until their `mlcube.yaml` files change, and
+per-process runner caches (e.g., local docker images) stay warm. Requests are executed concurrently.
+
+- `MLCubeService`: Executes `run`, `configure` and `inspect` requests.
+- `Server`: HTTP server listening on a Unix socket that dispatches requests to `MLCubeService`.
+- `Client`: Thin client for the server API.
+
+Server API (JSON over HTTP/1.1, e.g., `curl --unix-socket ~/.mlcube/server.sock http://localhost/ping`):
+- `GET /ping`: Returns `{"status": "ok", "pid": PID}`.
+- `GET /metrics`: Returns MLCube metrics (see `mlcube.metrics`) in Prometheus text format, or in OpenMetrics format if
+  the `Accept` header asks for `application/openmetrics-text`.
+- `POST /run`: Runs tasks. Request: `{"mlcube": PATH, "platform": NAME, "tasks": [NAME, ...], "workspace": PATH,
+  "args": ["-Pname=value", "name=value", ...], "options": {"network": ..., "gpus": ..., ...}}`. Only `mlcube` and
+  `platform` are required. Options are the same as `mlcube run` options (network, security, gpus, memory, cpu, mount).
+- `POST /configure`: Configures MLCube. Request: `{"mlcube": PATH, "platform": NAME, "args": [...]}`.
+- `POST /inspect`: Inspects MLCube. Request: `{"mlcube": PATH, "platform": NAME, "force": false}`.
+
+Responses of `run`, `configure` and `inspect` requests: `{"status": "ok" | "failed", "exit_code": INT, "duration":
+SECONDS, "result": ANY, "error": MESSAGE, "context": ERROR_CONTEXT}`.
+"""
+import copy
+import http.client
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+
+from omegaconf import DictConfig
+
+from mlcube import hooks, metrics
+from mlcube.cli import parse_cli_args
+from mlcube.errors import ConfigurationError, ExecutionError, MLCubeError
+from mlcube.executor import TaskExecutor
+from mlcube.parser import CliParser
+from mlcube.runner import Runner
+from mlcube.system_settings import SystemSettings
+
+__all__ = ["MLCubeService", "Server", "Client"]
+
+logger = logging.getLogger(__name__)
+
+_RUN_OPTIONS = ("network", "security", "gpus", "memory", "cpu", "mount")
+"""Options of `run` requests (same as `mlcube run` options)."""
+
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class MLCubeService(object):
+    """Execute MLCube requests reusing system settings and effective MLCube configurations.
+
+    Args:
+        max_jobs: Maximal number of requests to execute concurrently. Other requests wait.
+        max_configs: Maximal number of effective MLCube configurations to cache.
+    """
+
+    def __init__(self, max_jobs: int = 8, max_configs: int = 256) -> None:
+        self.max_configs = max_configs
+        self._slots = threading.BoundedSemaphore(max(1, max_jobs))
+        self._lock = threading.Lock()
+        self._settings: t.Optional[SystemSettings] = None
+        self._settings_mtime: t.Optional[int] = None
+        self._configs: "OrderedDict[t.Tuple, t.Tuple[t.Optional[t.Type[Runner]], DictConfig]]" = OrderedDict()
+
+    @staticmethod
+    def _mtime(path: str) -> t.Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def system_settings(self) -> SystemSettings:
+        """Return system settings reloading them if the system settings file has changed."""
+        with self._lock:
+            mtime = self._mtime(SystemSettings.system_settings_file())
+            if self._settings is None or mtime != self._settings_mtime:
+                logger.info("MLCubeService.system_settings loading system settings (mtime=%s).", mtime)
+                self._settings, self._settings_mtime = SystemSettings(), mtime
+                self._configs.clear()
+            return self._settings
+
+    def mlcube_config(
+        self, mlcube: t.Optional[str], platform: t.Optional[str], args: t.List[str], parsed_args: t.Dict[str, t.Any]
+    ) -> t.Tuple[t.Optional[t.Type[Runner]], DictConfig]:
+        """Return runner class and effective MLCube configuration.
+
+        Configurations are cached until MLCube configuration files (or system settings) change. Callers receive copies
+        since runners may update configurations.
+        """
+        system_settings = self.system_settings()
+        mlcube_inst = CliParser.parse_mlcube_arg(mlcube or os.getcwd())
+        mlcube_file = os.path.join(mlcube_inst.path, mlcube_inst.file)
+        parsed_args = {**parsed_args, "mlcube": mlcube_file, "platform": platform}
+        key = (mlcube_file, self._mtime(mlcube_file), tuple(args), json.dumps(parsed_args, sort_keys=True))
+        with self._lock:
+            cached = self._configs.get(key, None)
+            if cached is not None:
+                self._configs.move_to_end(key)
+        if cached is None:
+            # Parsing loads runner packages and reads files, so other requests are not blocked while it runs.
+            logger.debug("MLCubeService.mlcube_config cache miss (key=%s).", key)
+            cached = parse_cli_args(args, parsed_args, resolve=True, system_settings=system_settings)
+            with self._lock:
+                # Do not cache configurations created with system settings that have been reloaded since.
+                if self._settings is system_settings:
+                    self._configs[key] = cached
+                    while len(self._configs) > self.max_configs:
+                        self._configs.popitem(last=False)
+        runner_cls, mlcube_config = cached
+        return runner_cls, copy.deepcopy(mlcube_config)
+
+    @staticmethod
+    def _runner_cls(runner_cls: t.Optional[t.Type[Runner]], platform: t.Optional[str]) -> t.Type[Runner]:
+        if runner_cls is None:
+            raise ConfigurationError(f"Platform is not specified or unknown (platform={platform}).")
+        return runner_cls
+
+    def run(self, request: t.Dict) -> None:
+        """Run MLCube tasks (`POST /run`)."""
+        parsed_args = dict(request.get("options", None) or {})
+        unknown_options = set(parsed_args.keys()) - set(_RUN_OPTIONS)
+        if unknown_options:
+            raise ConfigurationError(f"Unknown run options (options={sorted(unknown_options)}).")
+        parsed_args["workspace"] = request.get("workspace", None)
+        runner_cls, mlcube_config = self.mlcube_config(
+            request.get("mlcube", None),
+            request.get("platform", None),
+            list(request.get("args", None) or []),
+            parsed_args,
+        )
+        runner_cls = self._runner_cls(runner_cls, request.get("platform", None))
+        mlcube_tasks = list((mlcube_config.get("tasks", None) or {}).keys())
+        tasks = list(request.get("tasks", None) or [])
+        if not tasks:
+            if len(mlcube_tasks) != 1:
+                raise ConfigurationError(f"Task name could not be automatically resolved (tasks={mlcube_tasks}).")
+            tasks = mlcube_tasks
+        unknown_tasks = [name for name in tasks if name not in mlcube_tasks]
+        if unknown_tasks:
+            raise ConfigurationError(
+                f"Unknown tasks have been requested (tasks={mlcube_tasks}, unknown={unknown_tasks})."
+            )
+        TaskExecutor(runner_cls, mlcube_config, platform=request.get("platform", None)).run(tasks)
+
+    def configure(self, request: t.Dict) -> None:
+        """Configure MLCube (`POST /configure`)."""
+        runner_cls, mlcube_config = self.mlcube_config(
+            request.get("mlcube", None), request.get("platform", None), list(request.get("args", None) or []), {}
+        )
+        runner = self._runner_cls(runner_cls, request.get("platform", None))(mlcube_config, task=None)
+        with metrics.labels(platform=request.get("platform", None)):
+            with metrics.timed(metrics.CONFIGURE_DURATION, step="configure"), hooks.stage("configure", mlcube_config):
+                runner.configure()
+
+    def inspect(self, request: t.Dict) -> t.Dict:
+        """Inspect MLCube (`POST /inspect`)."""
+        runner_cls, mlcube_config = self.mlcube_config(
+            request.get("mlcube", None), request.get("platform", None), [], {}
+        )
+        runner = self._runner_cls(runner_cls, request.get("platform", None))(mlcube_config, task=None)
+        return runner.inspect(force=bool(request.get("force", False)))
+
+    def handle(self, operation: str, request: t.Dict) -> t.Dict:
+        """Execute one request and return a response (see module docstring for the format)."""
+        handler: t.Optional[t.Callable[[t.Dict], t.Any]] = {
+            "run": self.run,
+            "configure": self.configure,
+            "inspect": self.inspect,
+        }.get(operation, None)
+        if handler is None:
+            raise ConfigurationError(f"Unknown operation ({operation}).")
+        start = time.monotonic()
+        with self._slots:
+            logger.info("MLCubeService.handle operation=%s, request=%s", operation, request)
+            try:
+                result = handler(request)
+                response = {"status": "ok", "exit_code": 0, "result": result}
+            except MLCubeError as err:
+                exit_code = err.context.get("code", 1) if isinstance(err, ExecutionError) else 1
+                logger.error("MLCubeService.handle operation=%s failed: %s", operation, str(err))
+                response = {
+                    "status": "failed",
+                    "exit_code": exit_code or 1,
+                    "error": str(err),
+                    "context": getattr(err, "context", {}),
+                }
+        response["duration"] = time.monotonic() - start
+        return response
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: "Server"
+    protocol_version = "HTTP/1.1"
+
+    def address_string(self) -> str:
+        return "unix"
+
+    def log_message(self, format: str, *args: t.Any) -> None:
+        logger.debug("Server %s", format % args)
+
+    def _send(self, status: int, body: t.Union[t.Dict, str], content_type: str = "application/json") -> None:
+        data = body.encode() if isinstance(body, str) else json.dumps(body, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path == "/ping":
+            self._send(200, {"status": "ok", "pid": os.getpid()})
+        elif self.path == "/metrics":
+            # Prometheus servers that support OpenMetrics ask for it in the `Accept` header.
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            self._send(
+                200,
+                metrics.REGISTRY.render(openmetrics=openmetrics),
+                _OPENMETRICS_CONTENT_TYPE if openmetrics else _PROMETHEUS_CONTENT_TYPE,
+            )
+        else:
+            self._send(404, {"status": "failed", "error": f"Not found ({self.path})."})
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError(f"Request must be a JSON object (type={type(request).__name__}).")
+        except ValueError as err:
+            self._send(400, {"status": "failed", "error": f"Invalid request: {err}"})
+            return
+        operation = self.path.strip("/")
+        if operation not in ("run", "configure", "inspect"):
+            self._send(404, {"status": "failed", "error": f"Not found ({self.path})."})
+            return
+        try:
+            self._send(200, self.server.service.handle(operation, request))
+        except Exception as err:
+            logger.exception("Server failed to handle request (path=%s).", self.path)
+            self._send(500, {"status": "failed", "exit_code": 1, "error": f"{type(err).__name__}: {err}"})
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """MLCube server that listens on a Unix socket (see module docstring for API).
+
+    Args:
+        socket_path: Path to a Unix socket. Stale socket files (no server is listening) are removed.
+        service: Service that executes requests.
+    """
+
+    daemon_threads = True
+
+    @staticmethod
+    def default_socket() -> str:
+        """Return default socket path (`MLCUBE_SERVER_SOCKET` environment variable or `~/.mlcube/server.sock`)."""
+        return os.environ.get("MLCUBE_SERVER_SOCKET", None) or (Path.home() / ".mlcube" / "server.sock").as_posix()
+
+    def __init__(self, socket_path: str, service: MLCubeService) -> None:
+        self.socket_path = os.path.abspath(os.path.expanduser(socket_path))
+        self.service = service
+        if os.path.exists(self.socket_path):
+            if Client(self.socket_path, timeout=5).ping():
+                raise ExecutionError(
+                    "MLCube server is already running.",
+                    f"Socket is in use ({self.socket_path}).",
+                    socket=self.socket_path,
+                )
+            logger.warning("Server removing stale socket file (%s).", self.socket_path)
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+        super().__init__(self.socket_path, _RequestHandler)
+        # Requests run arbitrary commands on behalf of this user, so only this user can connect.
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix socket."""
+
+    def __init__(self, socket_path: str, timeout: t.Optional[float] = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class Client(object):
+    """Thin client for the MLCube server.
+
+    Args:
+        socket_path: Path to the server socket. Default is `Server.default_socket()`.
+        timeout: Socket timeout in seconds (None waits for requests to complete).
+    """
+
+    def __init__(self, socket_path: t.Optional[str] = None, timeout: t.Optional[float] = None) -> None:
+        self.socket_path = os.path.abspath(os.path.expanduser(socket_path or Server.default_socket()))
+        self.timeout = timeout
+
+    def _request(self, method: str, url: str, body: t.Optional[t.Dict] = None) -> t.Dict:
+        connection = _UnixHTTPConnection(self.socket_path, self.timeout)
+        try:
+            connection.request(
+                method,
+                url,
+                body=json.dumps(body) if body is not None else None,
+                headers={"Content-Type": "application/json"},
+            )
+            response = connection.getresponse()
+            data = json.loads(response.read() or b"{}")
+        except (OSError, http.client.HTTPException, ValueError) as err:
+            raise ExecutionError(
+                "MLCube server request failed.", str(err), socket=self.socket_path, method=method, url=url
+            )
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ExecutionError(
+                "MLCube server request failed.", data.get("error", ""), status=response.status, method=method, url=url
+            )
+        return data
+
+    def ping(self) -> bool:
+        """Return True if the server is running."""
+        try:
+            return self._request("GET", "/ping").get("status", None) == "ok"
+        except ExecutionError:
+            return False
+
+    def run(
+        self,
+        mlcube: str,
+        platform: str,
+        tasks: t.Optional[t.List[str]] = None,
+        workspace: t.Optional[str] = None,
+        args: t.Optional[t.List[str]] = None,
+        **options: t.Any,
+    ) -> t.Dict:
+        """Run MLCube tasks and return the server response.
+
+        Args:
+            mlcube: Path to MLCube directory or `mlcube.yaml` file.
+            platform: Platform name.
+            tasks: Tasks to run.
+            workspace: Workspace directory.
+            args: MLCube (`-Pname=value`) and task (`name=value`) parameters.
+            options: Options of the `mlcube run` command (network, security, gpus, memory, cpu, mount).
+        """
+        return self._request(
+            "POST",
+            "/run",
+            {
+                "mlcube": os.path.abspath(mlcube),
+                "platform": platform,
+                "tasks": tasks or [],
+                "workspace": os.path.abspath(workspace) if workspace else None,
+                "args": args or [],
+                "options": options,
+            },
+        )
+
+    def configure(self, mlcube: str, platform: str, args: t.Optional[t.List[str]] = None) -> t.Dict:
+        """Configure MLCube and return the server response."""
+        return self._request(
+            "POST", "/configure", {"mlcube": os.path.abspath(mlcube), "platform": platform, "args": args or []}
+        )
+
+    def inspect(self, mlcube: str, platform: str, force: bool = False) -> t.Dict:
+        """Inspect MLCube and return the server response (`result` field contains MLCube information)."""
+        return self._request(
+            "POST", "/inspect", {"mlcube": os.path.abspath(mlcube), "platform": platform, "force": force}
+        )
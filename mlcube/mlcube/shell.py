@@ -1,30 +1,184 @@
 """Various utils to work with shell (mostly - running external processes).
 
 - `Shell`: This class provides a collection of methods to work with shell to run external processes.
+- `Interrupted`: Exception raised in the main thread when MLCube receives a termination signal.
 """
+import asyncio
+import contextlib
+import contextvars
 import copy
+import functools
 import logging
 import os
 import shutil
+import signal
 import subprocess
 import sys
+import threading
+import time
 import typing as t
 from distutils import dir_util
 from pathlib import Path
 
 from omegaconf import DictConfig
 
-from mlcube.config import IOType, MountType, ParameterType
+from mlcube import hooks, metrics, storage
 from mlcube.errors import ConfigurationError, ExecutionError
+from mlcube.logs import TaskLog
+from mlcube.mounts import MountPlan, get_host_path
+from mlcube.store import dataset_key
+from mlcube.system_settings import SystemSettings
 
-__all__ = ["Shell"]
+__all__ = ["Shell", "Interrupted"]
 
 logger = logging.getLogger(__name__)
 
+_deadline: contextvars.ContextVar[t.Optional[float]] = contextvars.ContextVar("mlcube_shell_deadline", default=None)
+"""Time (`time.monotonic`) by which commands started in the current context must complete (see `Shell.deadline`)."""
+
+_task_log: contextvars.ContextVar[t.Optional[TaskLog]] = contextvars.ContextVar("mlcube_shell_task_log", default=None)
+"""Log that captures output of commands started in the current context (see `Shell.capture`)."""
+
+_cancel_event: contextvars.ContextVar[t.Optional[threading.Event]] = contextvars.ContextVar(
+    "mlcube_shell_cancel_event", default=None
+)
+"""Event that is set when work done in the current context must stop (see `Shell.cancellation`)."""
+
+
+class Interrupted(KeyboardInterrupt):
+    """MLCube process has received a termination signal (e.g., SIGTERM from a job scheduler).
+
+    This is a `KeyboardInterrupt` so that it's handled exactly like Ctrl-C: it is not caught by `except Exception`
+    clauses, and runners clean up (stop containers, delete remote jobs) before it propagates.
+    """
+
+    def __init__(self, signum: int) -> None:
+        super().__init__(f"Received signal {signum}.")
+        self.signum = signum
+
 
 class Shell(object):
     """Helper functions to run commands."""
 
+    STOP_GRACE_PERIOD: float = 10.0
+    """Seconds to wait for processes (containers, jobs) to exit after forwarding them a termination signal."""
+
+    TIMEOUT_EXIT_CODE: int = 124
+    """Exit code reported for commands that have been stopped because of a deadline (same as GNU `timeout`)."""
+
+    _processes: t.Set[t.Union[subprocess.Popen, asyncio.subprocess.Process]] = set()
+    """Commands started by `Shell.run` and `Shell.arun` that are still running (in all threads)."""
+
+    _processes_lock = threading.Lock()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def deadline(timeout: t.Optional[float]) -> t.Iterator[None]:
+        """Set a deadline for all commands started with `Shell.run` in this context (thread, asyncio task).
+
+        Commands that do not complete before the deadline are stopped, and `ExecutionError` is raised with
+        `code=TIMEOUT_EXIT_CODE` and `timeout=True` in its context. Nested deadlines can only make the deadline earlier.
+
+        Args:
+            timeout: Seconds from now. None means no (additional) deadline.
+        """
+        if timeout is None:
+            yield
+            return
+        deadline = time.monotonic() + timeout
+        current = _deadline.get()
+        token = _deadline.set(deadline if current is None else min(current, deadline))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    @staticmethod
+    def remaining_time() -> t.Optional[float]:
+        """Return seconds left until the deadline of the current context (can be negative), or None if no deadline."""
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - time.monotonic()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def cancellation(event: threading.Event) -> t.Iterator[None]:
+        """Stop commands started with `Shell.run` in this context (thread, asyncio task) when `event` is set.
+
+        Commands are stopped shortly after the event has been set, and `ExecutionError` is raised with `cancelled=True`
+        in its context. Long-running operations that do not start commands (e.g., downloads) check `Shell.cancelled`.
+        """
+        token = _cancel_event.set(event)
+        try:
+            yield
+        finally:
+            _cancel_event.reset(token)
+
+    @staticmethod
+    def cancelled() -> bool:
+        """Return true if work in the current context must stop (see `Shell.cancellation`)."""
+        event = _cancel_event.get()
+        return event is not None and event.is_set()
+
+    @staticmethod
+    def cancel_event() -> t.Optional[threading.Event]:
+        """Return the event that cancels work in the current context, or None (see `Shell.cancellation`)."""
+        return _cancel_event.get()
+
+    @staticmethod
+    @contextlib.contextmanager
+    def capture(log: t.Optional[TaskLog]) -> t.Iterator[None]:
+        """Capture output of all commands started with `Shell.run` in this context (thread, asyncio task) to a log.
+
+        Args:
+            log: Task log. None means do not capture output (commands write directly to the terminal).
+        """
+        token = _task_log.set(log)
+        try:
+            yield
+        finally:
+            _task_log.reset(token)
+
+    @staticmethod
+    def task_log() -> t.Optional[TaskLog]:
+        """Return log that captures output of commands in the current context, or None (see `Shell.capture`)."""
+        return _task_log.get()
+
+    @staticmethod
+    def _timeout_error(cmd: t.Union[str, t.List]) -> ExecutionError:
+        return ExecutionError(
+            "Shell command has not completed before the deadline.",
+            status="timeout",
+            code=Shell.TIMEOUT_EXIT_CODE,
+            cmd=cmd,
+            timeout=True,
+        )
+
+    @staticmethod
+    def _cancelled_error(cmd: t.Union[str, t.List]) -> ExecutionError:
+        return ExecutionError("Shell command has been cancelled.", status="cancelled", cmd=cmd, cancelled=True)
+
+    @staticmethod
+    def _wait(process: subprocess.Popen, timeout: t.Optional[float]) -> int:
+        """Wait for a process to exit, checking for cancellation (see `Shell.cancellation`) if it is enabled.
+
+        Raises:
+            subprocess.TimeoutExpired if the process does not exit in `timeout` seconds.
+            ExecutionError if work in the current context has been cancelled (the process is still running).
+        """
+        event = _cancel_event.get()
+        if event is None:
+            return process.wait(timeout=timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not event.is_set():
+            wait_time = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait_time <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            try:
+                return process.wait(timeout=wait_time)
+            except subprocess.TimeoutExpired:
+                continue
+        raise Shell._cancelled_error(process.args)
+
     @staticmethod
     def null() -> str:
         """Return /dev/null for Linux/Windows.
@@ -67,13 +221,108 @@ class Shell(object):
         Args:
             cmd: Command to execute, e.g. Shell.run(['ls', -lh']). If type is iterable, this method will join into
                 one string using whitespace as a separator.
-            on_error: Action to perform if `os.system` returns a non-zero status. Options - ignore (do nothing, return
+            on_error: Action to perform if the command returns a non-zero status. Options - ignore (do nothing, return
                 exit code), 'raise' (raise a RuntimeError exception), 'die' (exit the process).
         Returns:
-            Exit status. On Windows, the exit status is the output of `os.system`. On Linux, the output is either
-                process exit status if that processes exited, or -1 in other cases (e.g., process was killed).
+            Exit status. This is either the process exit code, or a negative signal number if the process was killed
+                by a signal.
+
+        If this process is interrupted (KeyboardInterrupt or `Interrupted`) while waiting for the command, the signal is
+        forwarded to the command, and the command is killed if it does not exit in `STOP_GRACE_PERIOD` seconds. Commands
+        that run past the current deadline (see `Shell.deadline`) or have been cancelled (see `Shell.cancellation`) are
+        stopped the same way, and `ExecutionError` is raised regardless of the `on_error` value. Output of the command
+        is streamed to the current task log if there is one (see `Shell.capture`).
         """
         logger.debug("Shell.run input_arg: cmd=%s, on_error=%s)", cmd, on_error)
+        cmd = Shell._command(cmd, on_error)
+
+        remaining_time = Shell.remaining_time()
+        if remaining_time is not None and remaining_time <= 0:
+            raise Shell._timeout_error(cmd)
+        if Shell.cancelled():
+            raise Shell._cancelled_error(cmd)
+        log = Shell.task_log()
+        if log is None:
+            process, pumps = subprocess.Popen(cmd, shell=True), []
+        else:
+            process = subprocess.Popen(cmd, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            pumps = [log.pump(process.stdout, TaskLog.STDOUT), log.pump(process.stderr, TaskLog.STDERR)]
+        with Shell._processes_lock:
+            Shell._processes.add(process)
+        try:
+            status: int = Shell._wait(process, remaining_time)
+        except subprocess.TimeoutExpired:
+            logger.error("Shell.run command='%s' has not completed before the deadline.", cmd)
+            Shell.terminate(process, signal.SIGTERM)
+            raise Shell._timeout_error(cmd)
+        except ExecutionError:
+            logger.warning("Shell.run command='%s' has been cancelled.", cmd)
+            Shell.terminate(process, signal.SIGTERM)
+            raise
+        except KeyboardInterrupt as err:
+            # Ctrl-C or termination signal: make sure the child process does not outlive MLCube.
+            Shell.terminate(process, getattr(err, "signum", signal.SIGINT))
+            raise
+        finally:
+            with Shell._processes_lock:
+                Shell._processes.discard(process)
+            # Output may still be buffered in pipes. Processes started in background by the command may keep pipes
+            # open, so do not wait for the end of output forever.
+            for pump in pumps:
+                pump.join(timeout=Shell.STOP_GRACE_PERIOD)
+        return Shell._exit_code(cmd, status, on_error)
+
+    @staticmethod
+    async def arun(cmd: t.Union[str, t.List], on_error: str = "raise") -> int:
+        """Run the `cmd` command in an external process without blocking the event loop (asyncio version of `run`).
+
+        Arguments and return value are the same as in `run`. If the calling task is cancelled (e.g., by
+        `asyncio.wait_for`), the command is terminated before `asyncio.CancelledError` propagates. Commands are not
+        started if work in the current context has been cancelled (see `Shell.cancellation`), and are stopped by
+        `Shell.terminate_all`.
+        """
+        logger.debug("Shell.arun input_arg: cmd=%s, on_error=%s)", cmd, on_error)
+        cmd = Shell._command(cmd, on_error)
+
+        remaining_time = Shell.remaining_time()
+        if remaining_time is not None and remaining_time <= 0:
+            raise Shell._timeout_error(cmd)
+        if Shell.cancelled():
+            raise Shell._cancelled_error(cmd)
+        log = Shell.task_log()
+        if log is None:
+            process, pumps = await asyncio.create_subprocess_shell(cmd), []
+        else:
+            process = await asyncio.create_subprocess_shell(
+                cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+            pumps = [
+                asyncio.ensure_future(log.apump(process.stdout, TaskLog.STDOUT)),
+                asyncio.ensure_future(log.apump(process.stderr, TaskLog.STDERR)),
+            ]
+        with Shell._processes_lock:
+            Shell._processes.add(process)
+        try:
+            status: int = await asyncio.wait_for(process.wait(), remaining_time)
+        except asyncio.TimeoutError:
+            logger.error("Shell.arun command='%s' has not completed before the deadline.", cmd)
+            await Shell.aterminate(process, signal.SIGTERM)
+            raise Shell._timeout_error(cmd)
+        except asyncio.CancelledError:
+            await Shell.aterminate(process, signal.SIGTERM)
+            raise
+        finally:
+            with Shell._processes_lock:
+                Shell._processes.discard(process)
+            if pumps:
+                _, pending = await asyncio.wait(pumps, timeout=Shell.STOP_GRACE_PERIOD)
+                for pump in pending:
+                    pump.cancel()
+        return Shell._exit_code(cmd, status, on_error)
+
+    @staticmethod
+    def _command(cmd: t.Union[str, t.List], on_error: str) -> str:
+        """Validate `on_error` and return command as a string (see `run`)."""
         if isinstance(cmd, t.List):
             cmd = " ".join(c for c in (c.strip() for c in cmd) if c)
             logger.debug('Shell.run list->str: cmd="%s")', cmd)
@@ -82,15 +331,12 @@ class Shell(object):
             raise ValueError(
                 f"Unrecognized 'on_error' action ({on_error}). Valid options are ('raise', 'die', 'ignore')."
             )
+        return cmd
 
-        status: int = os.system(cmd)
-        exit_code, exit_status = Shell.parse_exec_status(status)
-        if exit_status == "na":
-            logger.warning(
-                "Shell.run command (cmd=%s) did not exit properly (status=%d).",
-                cmd,
-                status,
-            )
+    @staticmethod
+    def _exit_code(cmd: str, status: int, on_error: str) -> int:
+        """Return exit code of a completed command performing `on_error` action if it has failed (see `run`)."""
+        exit_code, exit_status = (status, "exited") if status >= 0 else (status, "signalled")
 
         msg = (
             f"Shell.run command='{cmd}' status={status} exit_status={exit_status} exit_code={exit_code} "
@@ -111,6 +357,152 @@ class Shell(object):
             logger.info(msg)
         return exit_code
 
+    @staticmethod
+    def terminate(
+        process: subprocess.Popen, signum: int = signal.SIGTERM, grace_period: t.Optional[float] = None
+    ) -> None:
+        """Stop a child process: send it a signal, and kill it if it does not exit within a grace period.
+
+        Args:
+            process: Child process.
+            signum: Signal to send first (ignored on Windows where the process is terminated).
+            grace_period: Seconds to wait before killing the process. Default is `STOP_GRACE_PERIOD`.
+        """
+        if process.poll() is not None:
+            return
+        grace_period = Shell.STOP_GRACE_PERIOD if grace_period is None else grace_period
+        logger.warning("Shell.terminate stopping process (pid=%d, signal=%d).", process.pid, signum)
+        if os.name == "nt":
+            process.terminate()
+        else:
+            process.send_signal(signum)
+        try:
+            process.wait(timeout=grace_period)
+        except subprocess.TimeoutExpired:
+            logger.warning(
+                "Shell.terminate process (pid=%d) did not exit in %.1fs, killing.", process.pid, grace_period
+            )
+            process.kill()
+            process.wait()
+
+    @staticmethod
+    async def aterminate(
+        process: asyncio.subprocess.Process, signum: int = signal.SIGTERM, grace_period: t.Optional[float] = None
+    ) -> None:
+        """Stop an asyncio child process (asyncio version of `terminate`)."""
+        if process.returncode is not None:
+            return
+        grace_period = Shell.STOP_GRACE_PERIOD if grace_period is None else grace_period
+        logger.warning("Shell.aterminate stopping process (pid=%d, signal=%d).", process.pid, signum)
+        try:
+            if os.name == "nt":
+                process.terminate()
+            else:
+                process.send_signal(signum)
+            await asyncio.wait_for(process.wait(), grace_period)
+        except ProcessLookupError:
+            pass
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Shell.aterminate process (pid=%d) did not exit in %.1fs, killing.", process.pid, grace_period
+            )
+            process.kill()
+            await process.wait()
+
+    @staticmethod
+    async def in_thread(fn: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        """Run a blocking function in the default executor of the running event loop.
+
+        Context variables (e.g., the deadline set with `Shell.deadline`) are visible in the function. If the calling
+        task is cancelled, the function is cancelled with `Shell.cancellation` (commands started with `Shell.run` are
+        stopped), and `asyncio.CancelledError` propagates once the function has returned, so that it does not keep
+        running in background.
+        """
+        cancelled = threading.Event()
+
+        def _call() -> t.Any:
+            with Shell.cancellation(cancelled):
+                return fn(*args)
+
+        context = contextvars.copy_context()
+        future = asyncio.get_running_loop().run_in_executor(None, functools.partial(context.run, _call))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            cancelled.set()
+            logger.warning("Shell.in_thread cancelling %s, waiting for it to stop.", getattr(fn, "__qualname__", fn))
+            await asyncio.wait([future])
+            raise
+
+    @staticmethod
+    def terminate_all(signum: int = signal.SIGTERM, grace_period: t.Optional[float] = None) -> None:
+        """Stop all commands started by `Shell.run` or `Shell.arun` (e.g., when parallel runs are interrupted).
+
+        Only the main thread receives KeyboardInterrupt, so commands that other threads wait for must be stopped
+        explicitly. All commands share one grace period.
+        """
+        with Shell._processes_lock:
+            processes = list(Shell._processes)
+        if not processes:
+            return
+        grace_period = Shell.STOP_GRACE_PERIOD if grace_period is None else grace_period
+        deadline = time.monotonic() + grace_period
+        for process in processes:
+            running = process.poll() is None if isinstance(process, subprocess.Popen) else process.returncode is None
+            if running:
+                logger.warning("Shell.terminate_all stopping process (pid=%d, signal=%d).", process.pid, signum)
+                try:
+                    if os.name == "nt":
+                        process.terminate()
+                    else:
+                        process.send_signal(signum)
+                except ProcessLookupError:
+                    pass
+        for process in processes:
+            if isinstance(process, subprocess.Popen):
+                try:
+                    process.wait(timeout=max(0.0, deadline - time.monotonic()))
+                except subprocess.TimeoutExpired:
+                    logger.warning("Shell.terminate_all process (pid=%d) did not exit in time, killing.", process.pid)
+                    process.kill()
+                    process.wait()
+                continue
+            # Processes started by `Shell.arun` are reaped by their event loops (that may run in other threads).
+            while process.returncode is None and time.monotonic() < deadline:
+                time.sleep(0.1)
+            if process.returncode is None:
+                logger.warning("Shell.terminate_all process (pid=%d) did not exit in time, killing.", process.pid)
+                try:
+                    process.kill()
+                except ProcessLookupError:
+                    pass
+
+    @staticmethod
+    @contextlib.contextmanager
+    def interrupt_on_signals(signals: t.Iterable[str] = ("SIGTERM", "SIGHUP")) -> t.Iterator[None]:
+        """Raise `Interrupted` in the main thread when one of these signals is received.
+
+        By default, Python terminates on SIGTERM without running any cleanup code. Within this context, termination
+        signals are handled like Ctrl-C, so that runners can stop containers and delete remote jobs. Does nothing when
+        called not from the main thread.
+
+        Args:
+            signals: Signal names. Signals not available on this platform are ignored.
+        """
+        def _raise(signum: int, _frame) -> None:
+            raise Interrupted(signum)
+
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for name in signals:
+                if hasattr(signal, name):
+                    handlers[getattr(signal, name)] = signal.signal(getattr(signal, name), _raise)
+        try:
+            yield
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
     @staticmethod
     def run_and_capture_output(cmd: t.List[str]) -> t.Tuple[int, str]:
         """Run command and return the exit code and command output.
@@ -122,15 +514,20 @@ class Shell(object):
              A tuple containing exit code (either 0 or `subprocess.CalledProcessError.returncode`) and command output
              which is either output of `subprocess.check_output` or `subprocess.CalledProcessError.output.decode()`.
         """
+        remaining_time = Shell.remaining_time()
+        if remaining_time is not None and remaining_time <= 0:
+            raise Shell._timeout_error(cmd)
         try:
             exit_code = 0
-            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+            output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, timeout=remaining_time)
             if isinstance(output, bytes):
                 output = output.decode()
         except FileNotFoundError as err:
             exit_code, output = 1, str(err)
         except subprocess.CalledProcessError as err:
             exit_code, output = err.returncode, err.output.decode()
+        except subprocess.TimeoutExpired:
+            raise Shell._timeout_error(cmd)
 
         logger.debug(
             'Shell.run_and_capture_output cmd=%s, exit_code=%d, output="%s"',
@@ -156,7 +553,7 @@ class Shell(object):
 
     @staticmethod
     def ssh(
-        connection_str: str, command: t.Optional[str], on_error: str = "raise"
+        connection_str: str, command: t.Optional[str], on_error: str = "raise", tty: bool = False
     ) -> int:
         """Execute a command on a remote host via SSH.
 
@@ -164,11 +561,14 @@ class Shell(object):
             connection_str: SSH connection string.
             command: Command to execute.
             on_error: Action to perform if an error occurs.
+            tty: If true, force pseudo-terminal allocation (`ssh -tt`), so that the remote command receives SIGHUP and
+                stops when the local ssh client exits (e.g., it is interrupted or cancelled). Output of the remote
+                command goes to the standard output only.
         """
         if not command:
             return 0
         return Shell.run(
-            f"ssh -o StrictHostKeyChecking=no {connection_str} '{command}'",
+            f"ssh {'-tt ' if tty else ''}-o StrictHostKeyChecking=no {connection_str} '{command}'",
             on_error=on_error,
         )
 
@@ -183,6 +583,20 @@ class Shell(object):
         """
         return Shell.run(f"rsync -e 'ssh' '{source}' '{dest}'", on_error=on_error)
 
+    @staticmethod
+    async def assh(connection_str: str, command: t.Optional[str], on_error: str = "raise", tty: bool = False) -> int:
+        """Execute a command on a remote host via SSH (asyncio version of `ssh`)."""
+        if not command:
+            return 0
+        return await Shell.arun(
+            f"ssh {'-tt ' if tty else ''}-o StrictHostKeyChecking=no {connection_str} '{command}'", on_error=on_error
+        )
+
+    @staticmethod
+    async def arsync_dirs(source: str, dest: str, on_error: str = "raise") -> int:
+        """Synchronize directories (asyncio version of `rsync_dirs`)."""
+        return await Shell.arun(f"rsync -e 'ssh' '{source}' '{dest}'", on_error=on_error)
+
     @staticmethod
     def get_host_path(workspace_path: str, path_from_config: str) -> str:
         """Return host path for a task parameter.
@@ -190,17 +604,12 @@ class Shell(object):
         Args:
             workspace_path: Workspace directory path for this MLCube.
             path_from_config: Parameter path as specified by a user in an MLCube configuration file (e.g., mlcube.yaml).
+                Paths with `storage:` URIs are mapped to their local copies in the workspace (see `mlcube.storage`).
 
         Returns:
             Absolute host path.
         """
-        # Omega conf will resolve any variables defined in MLCube configuration file. We need to take care about `~`
-        # (user home directory) and environment variables.
-        host_path = Path(os.path.expandvars(os.path.expanduser(path_from_config)))
-        # According to MLCube contract, relative paths are relative to MLCube workspace directory.
-        if not host_path.is_absolute():
-            host_path = Path(workspace_path) / host_path
-        return host_path.as_posix()
+        return get_host_path(workspace_path, path_from_config)
 
     @staticmethod
     def generate_mounts_and_args(
@@ -210,6 +619,8 @@ class Shell(object):
     ) -> t.Tuple[t.Dict, t.List, t.Dict]:
         """Generate mount points, task arguments and mount options for the given task.
 
+        Mounts and arguments come from the task's mount plan (see `MountPlan`) that is compiled once per configuration.
+
         Args:
             mlcube: MLCube configuration (e.g., coming from `mlcube.yaml` file).
             task: Task name for which mount points need to be generated.
@@ -221,148 +632,13 @@ class Shell(object):
                 - A list of task arguments.
                 - A mapping from host paths to mount options (optional).
         """
-        # First task argument is always the task name.
-        mounts: t.Dict[str, str] = {}  # Mapping from host paths to container paths.
-        args: t.List[str] = [task]  # List of arguments for the given task.
-        mounts_opts: t.Dict[
-            str, str
-        ] = {}  # Mapping from host paths to mount options (rw/ro).
-
-        # By design, when users provide `--mount=rw|ro` on a command line, this applies only to input parameters,
-        # and overrides anything that's specified in config files.
-        # TODO: MLCube has the concept of effective configuration. This should move there at some point in time.
-        mount_opts_for_input_params: t.Optional[str] = None
-        if isinstance(mlcube.get("runner", None), (DictConfig, dict)):
-            mount_opts_for_input_params = mlcube.runner.get("--mount_opts", None)
-            if mount_opts_for_input_params and not MountType.is_valid(
-                mount_opts_for_input_params
-            ):
-                raise ConfigurationError(
-                    "Shell.generate_mounts_and_args invalid global mount options: "
-                    f"--mount_opts={mount_opts_for_input_params}."
-                )
-
-        def _generate(_params: DictConfig, _io: str) -> None:
-            """Process parameters (could be inputs or outputs).
-
-            This function updates `mounts`, `args` and `mounts_opts`.
-
-            Args:
-                _params: Dictionary of input or output parameters.
-                _io: Specifies if these parameters are input our output parameters.
-            """
-            if not IOType.is_valid(_io):
-                raise ConfigurationError(f"Invalid IO = {_io}")
-            for _param_name, _param_def in _params.items():
-                assert isinstance(
-                    _param_def, DictConfig
-                ), f"Unexpected parameter definition: {_param_def}."
-                if not ParameterType.is_valid(_param_def.type):
-                    raise ConfigurationError(
-                        f"Invalid task: task={task}, param={_param_name}, type={_param_def.type}. Type is invalid."
-                    )
-
-                # MLCube contract says relative paths in MLCube configuration files are relative with respect to MLCube
-                # workspace directory. In certain cases it makes sense to use absolute paths too. This maybe the case
-                # when we want to reuse host cache directories that many machine learning frameworks use to cache models
-                # and datasets. We also need to be able to resolve `~` (user home directory), as well as environment
-                # variables (BTW, this is probably needs some discussion at some point in time). This environment
-                # variable could be, for instance, `${HOME}`.
-                _host_path: str = Shell.get_host_path(
-                    mlcube.runtime.workspace, _param_def.default
-                )
-
-                if _param_def.type == ParameterType.UNKNOWN:
-                    if _io == IOType.OUTPUT:
-                        raise ConfigurationError(
-                            f"Invalid task: task={task}, param={_param_name}, type={_param_def.type}. "
-                            "Type cannot be unknown for output parameters."
-                        )
-                    else:
-                        if os.path.isdir(_host_path):
-                            _param_def.type = ParameterType.DIRECTORY
-                        elif os.path.isfile(_host_path):
-                            _param_def.type = ParameterType.FILE
-                        else:
-                            raise ConfigurationError(
-                                f"Invalid task: task={task}, param={_param_name}, type={_param_def.type}. "
-                                f"Type is unknown and unable to identify it ({_host_path})."
-                            )
-
-                if _param_def.type == ParameterType.DIRECTORY:
-                    if make_dirs:
-                        os.makedirs(_host_path, exist_ok=True)
-                    mounts[_host_path] = mounts.get(
-                        _host_path, f"/mlcube_io{len(mounts)}"
-                    )
-                    args.append("--{}={}".format(_param_name, mounts[_host_path]))
-                elif _param_def.type == ParameterType.FILE:
-                    _host_path, _file_name = os.path.split(_host_path)
-                    if make_dirs:
-                        os.makedirs(_host_path, exist_ok=True)
-                    mounts[_host_path] = mounts.get(
-                        _host_path, f"/mlcube_io{len(mounts)}"
-                    )
-                    args.append(
-                        "--{}={}".format(
-                            _param_name, mounts[_host_path] + "/" + _file_name
-                        )
-                    )
-
-                mount_type: t.Optional[str] = _param_def.get("opts", None)
-                if _io == IOType.INPUT and mount_opts_for_input_params:
-                    logger.debug(
-                        "Shell.generate_mounts_and_args overriding parameter mount options (task=%s, param=%s, "
-                        "io=%s, mount_opts=%s) with global mount option (%s) for input parameters.",
-                        task,
-                        _param_name,
-                        _io,
-                        mount_type,
-                        mount_opts_for_input_params,
-                    )
-                    mount_type = mount_opts_for_input_params
-
-                if mount_type:
-                    if not MountType.is_valid(mount_type):
-                        raise ConfigurationError(
-                            f"Invalid mount options: task={task}, param={_param_name}, opts={mount_type}."
-                        )
-                    if mount_type == MountType.RO and _io == IOType.OUTPUT:
-                        logger.warning(
-                            "Task's (%s) parameter (%s) is OUTPUT and requested to mount as RO.",
-                            task,
-                            _param_name,
-                        )
-                    if (
-                        _host_path in mounts_opts
-                        and mounts_opts[_host_path] != mount_type
-                    ):
-                        logger.warning(
-                            "Conflicting mount options found. Host path (%s) has already been requested to mount "
-                            "as '%s', but new parameter (%s) requests to mount as '%s'.",
-                            _host_path,
-                            mounts_opts[_host_path],
-                            _param_name,
-                            mount_type,
-                        )
-                        # Since we can only have `ro`/`rw`, we'll set the mount option to `rw`.
-                        mount_type = MountType.RW
-
-                    mounts_opts[_host_path] = mount_type
-                    logger.info(
-                        "Host path (%s) for parameter '%s' will be mounted with '%s' option.",
-                        _host_path,
-                        _param_name,
-                        mount_type,
-                    )
-
-        params = mlcube.tasks[
-            task
-        ].parameters  # Dictionary of input and output parameters for the task.
-        _generate(params.inputs, IOType.INPUT)  # Process input parameters.
-        _generate(params.outputs, IOType.OUTPUT)  # Process output parameters.
-
-        return mounts, args, mounts_opts
+        with hooks.stage("generate_mounts_and_args", mlcube, task) as event:
+            plan = MountPlan.compile(mlcube, task)
+            if make_dirs:
+                plan.make_dirs()
+            event.data["mounts"] = len(plan.mounts)
+        logger.info("Shell.generate_mounts_and_args task=%s, mounts:\n%s", task, plan.table())
+        return plan.host_mounts(), list(plan.args), plan.mount_options()
 
     @staticmethod
     def to_cli_args(
@@ -380,7 +656,12 @@ class Shell(object):
 
     @staticmethod
     def sync_workspace(target_mlcube: DictConfig, task: str) -> None:
-        """Synchronize MLCube workspaces.
+        """Synchronize MLCube workspaces, and download task inputs with `storage:` URIs (see `mlcube.storage`).
+
+        Inputs with content keys (the `cache` field of parameter definitions) that are missing in the workspace are
+        linked from the dataset cache if it is configured (see `SystemSettings.dataset_cache`), so they are neither
+        copied nor downloaded. Number of copied (and downloaded) bytes and sync duration are counted in
+        `mlcube.metrics`, and active hooks are called before and after syncing (see `mlcube.hooks`).
 
         Args:
             target_mlcube: MLCube configuration. Its name (target_) means that this configuration defines actual
@@ -388,19 +669,129 @@ class Shell(object):
                 refer to the MLCube configuration with default (internal) workspace.
             task: Task name to be executed.
         """
+        with hooks.stage("sync_workspace", target_mlcube, task) as event:
+            with metrics.timed(metrics.SYNC_DURATION, task=task):
+                event.data["cached_inputs"] = Shell._link_cached_inputs(target_mlcube, task)
+                copied_bytes = Shell._sync_workspace(target_mlcube, task)
+                event.data["downloaded_bytes"] = Shell._download_inputs(target_mlcube, task)
+                event.data["bytes"] = copied_bytes + event.data["downloaded_bytes"]
+                metrics.SYNC_BYTES.inc(event.data["bytes"], task=task)
 
-        def _storage_not_supported(_uri: str) -> str:
-            """Raise an exception if the given URI is not supported.
-
-            Args:
-                _uri: URI to check. If it starts with `storage:` (yet unsupported schema), raise an exception.
-            """
-            _uri = _uri.strip()
-            if _uri.startswith("storage:"):
-                raise NotImplementedError(
-                    f"Storage protocol (uri={_uri}) is not supported yet."
+    @staticmethod
+    def _cached_parameters(mlcube: DictConfig, task: str, io: str) -> t.List[t.Tuple[str, str]]:
+        """Return host paths and content keys of task inputs (`io="inputs"`) or outputs that have content keys."""
+        params = (mlcube.tasks[task].get("parameters", None) or {}).get(io, None) or {}
+        cached: t.List[t.Tuple[str, str]] = []
+        for name, param_def in params.items():
+            content_key = param_def.get("cache", None)
+            if content_key is None:
+                continue
+            if not isinstance(content_key, (str, int)) or not str(content_key).strip():
+                raise ConfigurationError(
+                    f"Invalid content key (task={task}, parameter={name}, cache={content_key}). Expecting non-empty "
+                    "string that identifies content of this parameter, e.g., `imagenet-2012-v1`."
                 )
-            return _uri
+            cached.append((get_host_path(mlcube.runtime.workspace, param_def.default), str(content_key).strip()))
+        return cached
+
+    @staticmethod
+    def _link_cached_inputs(mlcube: DictConfig, task: str) -> int:
+        """Link task inputs with content keys from the dataset cache, and return number of linked inputs.
+
+        Inputs that exist (in the workspace or at absolute paths) and are not in the cache yet are copied to the cache,
+        so that cached objects do not share files with user data (cached files are read-only).
+        """
+        inputs = Shell._cached_parameters(mlcube, task, "inputs")
+        if not inputs:
+            return 0
+        cache = SystemSettings().dataset_cache
+        if cache is None:
+            logger.debug("Shell.link_cached_inputs task=%s dataset cache is not configured in system settings.", task)
+            return 0
+        num_linked = 0
+        for host_path, content_key in inputs:
+            key = dataset_key(content_key)
+            if os.path.exists(host_path):
+                if not cache.contains(key):
+                    cache.put(key, host_path, name=content_key, copy=True)
+            elif cache.contains(key):
+                cache.link(key, host_path)
+                num_linked += 1
+                logger.info("Shell.link_cached_inputs task=%s, key=%s linked to %s.", task, content_key, host_path)
+        return num_linked
+
+    @staticmethod
+    def _cache_outputs(mlcube: DictConfig, task: str) -> int:
+        """Add task outputs with content keys to the dataset cache, and return number of added outputs.
+
+        Outputs are copied, so that next runs of this task can modify their outputs without changing cached objects.
+        """
+        outputs = Shell._cached_parameters(mlcube, task, "outputs")
+        cache = SystemSettings().dataset_cache if outputs else None
+        if cache is None:
+            return 0
+        num_cached = 0
+        for host_path, content_key in outputs:
+            # Content keys identify content, so cached outputs are never replaced (new content needs a new key).
+            if os.path.exists(host_path) and not cache.contains(dataset_key(content_key)):
+                cache.put(dataset_key(content_key), host_path, name=content_key, copy=True)
+                num_cached += 1
+        return num_cached
+
+    @staticmethod
+    def _download_inputs(mlcube: DictConfig, task: str) -> int:
+        """Download task inputs with `storage:` URIs into the workspace, and return number of downloaded bytes."""
+        inputs = (mlcube.tasks[task].get("parameters", None) or {}).get("inputs", None) or {}
+        uris = [input_def.default for input_def in inputs.values() if storage.is_storage_uri(input_def.default)]
+        if not uris:
+            return 0
+        manager = storage.StorageManager()
+        return sum(manager.download(uri, os.path.abspath(mlcube.runtime.workspace)) for uri in uris)
+
+    @staticmethod
+    def prefetch_inputs(mlcube: DictConfig, task: str) -> int:
+        """Download task inputs with `storage:` URIs into the download cache without changing the workspace.
+
+        Runners call this method to prefetch inputs of next tasks while other tasks are running (see `Runner.prefetch`).
+        When the task runs, these inputs are linked into the workspace without downloading (see `sync_workspace`). The
+        download stops when work in the current context is cancelled (see `Shell.cancellation`).
+
+        Returns:
+            Number of downloaded bytes.
+        """
+        inputs = (mlcube.tasks[task].get("parameters", None) or {}).get("inputs", None) or {}
+        uris = [input_def.default for input_def in inputs.values() if storage.is_storage_uri(input_def.default)]
+        if not uris:
+            return 0
+        manager = storage.StorageManager()
+        return sum(manager.fetch(uri, cancelled=_cancel_event.get()) for uri in uris)
+
+    @staticmethod
+    def upload_outputs(mlcube: DictConfig, task: str) -> int:
+        """Upload task outputs with `storage:` URIs from the workspace to their storages.
+
+        Runners call this method when tasks succeed. Outputs with content keys are also added to the dataset cache (see
+        `sync_workspace`). Active hooks are called before and after uploading (the `upload_outputs` stage).
+
+        Args:
+            mlcube: MLCube configuration.
+            task: Task name.
+        Returns:
+            Number of uploaded bytes.
+        """
+        Shell._cache_outputs(mlcube, task)
+        outputs = (mlcube.tasks[task].get("parameters", None) or {}).get("outputs", None) or {}
+        uris = [output_def.default for output_def in outputs.values() if storage.is_storage_uri(output_def.default)]
+        if not uris:
+            return 0
+        with hooks.stage("upload_outputs", mlcube, task) as event:
+            manager = storage.StorageManager()
+            event.data["bytes"] = sum(manager.upload(uri, os.path.abspath(mlcube.runtime.workspace)) for uri in uris)
+        return event.data["bytes"]
+
+    @staticmethod
+    def _sync_workspace(target_mlcube: DictConfig, task: str) -> int:
+        """Synchronize MLCube workspaces (see `sync_workspace`), and return number of copied bytes."""
 
         def _is_inside_workspace(_workspace: str, _artifact: str) -> bool:
             """Check if artifact is inside this workspace. Workspace directory and artifact must exist."""
@@ -458,9 +849,9 @@ class Shell(object):
                     _output_param_name,
                     _output_param_def,
                 ) in _task_def.parameters.outputs.items():
-                    _target_output_artifact: str = Path(
-                        target_workspace
-                    ) / _storage_not_supported(_output_param_def.default)
+                    if storage.is_storage_uri(_output_param_def.default):
+                        continue
+                    _target_output_artifact: str = Path(target_workspace) / _output_param_def.default.strip()
 
                     # Can't really use `os.path.samefile` here since files may not exist.
                     # if os.path.samefile(_target_artifact, _target_output_artifact):
@@ -477,9 +868,11 @@ class Shell(object):
             return False
 
         # Check if actual workspace is not internal one (which is default workspace).
-        target_workspace = os.path.abspath(
-            _storage_not_supported(target_mlcube.runtime.workspace)
-        )
+        if storage.is_storage_uri(target_mlcube.runtime.workspace):
+            raise ConfigurationError(
+                f"Storage URIs can't be used as workspaces (workspace={target_mlcube.runtime.workspace})."
+            )
+        target_workspace = os.path.abspath(target_mlcube.runtime.workspace.strip())
         os.makedirs(target_workspace, exist_ok=True)
 
         source_workspace = os.path.abspath(
@@ -490,14 +883,14 @@ class Shell(object):
                 "[sync_workspace] source workspace (%s) does not exist, nothing to sync.",
                 source_workspace,
             )
-            return
+            return 0
         if os.path.samefile(target_workspace, source_workspace):
             logger.debug(
                 "[sync_workspace] target workspace (%s) is the same as source workspace (%s).",
                 target_workspace,
                 source_workspace,
             )
-            return
+            return 0
 
         if task not in target_mlcube.tasks:
             raise ValueError(f"Task does not exist: {task}")
@@ -508,26 +901,20 @@ class Shell(object):
         source_mlcube.runtime.workspace = source_workspace
         source_mlcube.workspace = source_workspace
 
+        copied_bytes = 0
         inputs: t.Mapping[str, DictConfig] = target_mlcube.tasks[task].parameters.inputs
         for input_name, input_def in inputs.items():
-            # TODO: add support for storage protocol. Idea is to be able to retrieve actual storage specs from
-            #       system settings file. It should be possible to also specify paths within that storage (see
-            #       https://en.wikipedia.org/wiki/Uniform_Resource_Identifier). For instance, the `storage:home/${name}`
-            #       means that the `storage` section defines some storage labelled as `home`, and MLCube needs to use
-            #       ${name} path within that storage.
-
-            source_uri: str = Path(source_workspace) / _storage_not_supported(
-                input_def.default
-            )
+            if storage.is_storage_uri(input_def.default):
+                # Inputs in storages are downloaded by `_download_inputs`.
+                continue
+            source_uri: str = Path(source_workspace) / input_def.default.strip()
 
             if not _is_ok(
                 input_name, "source", source_workspace, source_uri, _must_exist=True
             ):
                 continue
 
-            target_uri: str = Path(target_workspace) / _storage_not_supported(
-                input_def.default
-            )
+            target_uri: str = Path(target_workspace) / input_def.default.strip()
             if not _is_ok(
                 input_name, "target", target_workspace, target_uri, _must_exist=False
             ):
@@ -539,8 +926,10 @@ class Shell(object):
             if os.path.isfile(source_uri):
                 os.makedirs(os.path.dirname(target_uri), exist_ok=True)
                 shutil.copy(source_uri, target_uri)
+                copied_bytes += os.path.getsize(target_uri)
             elif os.path.isdir(source_uri):
-                dir_util.copy_tree(source_uri, target_uri)
+                copied_files: t.List[str] = dir_util.copy_tree(source_uri, target_uri)
+                copied_bytes += sum(os.path.getsize(file) for file in copied_files if os.path.isfile(file))
             else:
                 raise RuntimeError(f"Unknown artifact type ({source_uri}).")
             logger.debug(
@@ -550,3 +939,4 @@ class Shell(object):
                 source_uri,
                 target_uri,
             )
+        return copied_bytes
@@ -0,0 +1,483 @@
+"""Storages for task parameters with `storage:` URIs.
+
+- `StorageObject`: One file (object) in a storage.
+- `Storage`: Base class for storage backends.
+- `LocalStorage`: Local (or network-mounted) directory (`file:///data` or `/data`).
+- `HTTPStorage`: HTTP(S) server that supports range requests for downloads and `PUT` requests for uploads.
+- `S3Storage`: S3-compatible object storage (AWS S3, MinIO, Ceph etc.). Requires `boto3` (`pip install mlcube[s3]`).
+- `StorageManager`: Downloads task inputs and uploads task outputs.
+
+Storages are defined in the `storage` section of MLCube system settings file, and task parameters reference files
+and directories in these storages with `storage:{name}/{path}` URIs:
+```yaml
+storage:
+  datasets:
+    uri: s3://mlcommons-datasets/v1     # file:///data, /data, https://example.com/datasets, s3://bucket/prefix
+    endpoint_url: http://minio:9000     # S3 only, optional.
+    chunk_size: 8M                      # Size of chunks that are downloaded in parallel.
+    jobs: 8                             # Number of parallel downloads.
+```
+
+Inputs are downloaded in chunks in parallel into a host-wide content-addressed store (`ContentStore`), and are then
+hard-linked into `{workspace}/.mlcube/storage/{name}/{path}`. Objects are keyed by their storage URI, size and version
+(ETag or modification time), so files that have not changed in a storage are downloaded only once per host. Outputs are
+written by tasks to the same local paths, and are streamed to their storages when tasks succeed.
+"""
+import contextlib
+import hashlib
+import http.client
+import logging
+import os
+import shutil
+import threading
+import typing as t
+import urllib.parse
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from omegaconf import DictConfig
+
+from mlcube.errors import ConfigurationError, MLCubeError
+from mlcube.store import ContentStore, parse_size
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+__all__ = [
+    "StorageObject", "Storage", "LocalStorage", "HTTPStorage", "S3Storage", "StorageManager",
+    "is_storage_uri", "parse_uri", "local_path"
+]
+
+logger = logging.getLogger(__name__)
+
+SCHEME = "storage:"
+"""Prefix of parameter paths that reference files and directories in storages."""
+
+_COPY_BUFFER_SIZE = 1024 * 1024
+"""Buffer size for streaming data from and to storages."""
+
+
+def is_storage_uri(value: t.Any) -> bool:
+    """Return true if `value` is a `storage:` URI."""
+    return isinstance(value, str) and value.strip().startswith(SCHEME)
+
+
+def parse_uri(uri: str) -> t.Tuple[str, str]:
+    """Parse `storage:{name}/{path}` URI.
+
+    Args:
+        uri: Storage URI. Path may be empty (whole storage).
+    Returns:
+        Storage name and path within this storage (without leading and trailing slashes).
+    """
+    if not is_storage_uri(uri):
+        raise ConfigurationError(f"Not a storage URI: '{uri}'. Expecting `{SCHEME}{{name}}/{{path}}`.")
+    name, _, path = uri.strip()[len(SCHEME):].lstrip("/").partition("/")
+    path = path.strip("/")
+    if not name or any(part in ("", ".", "..") for part in path.split("/") if path):
+        raise ConfigurationError(f"Invalid storage URI: '{uri}'. Expecting `{SCHEME}{{name}}/{{path}}`.")
+    return name, path
+
+
+def local_path(workspace: str, uri: str) -> str:
+    """Return local path of a storage file or directory (`{workspace}/.mlcube/storage/{name}/{path}`)."""
+    name, path = parse_uri(uri)
+    return (Path(workspace) / ".mlcube" / "storage" / name / path).as_posix()
+
+
+class StorageObject(t.NamedTuple):
+    """File (object) in a storage.
+
+    Args:
+        path: Path relative to storage root.
+        size: Size in bytes.
+        version: Version of this object that changes every time the object changes (ETag or modification time).
+    """
+
+    path: str
+    size: int
+    version: str
+
+
+class Storage(object):
+    """Base class for storage backends.
+
+    Args:
+        name: Storage name (key in the `storage` section of system settings).
+        config: Storage configuration. The `uri` field is required, other fields are backend-specific.
+    """
+
+    def __init__(self, name: str, config: DictConfig) -> None:
+        self.name = name
+        self.uri: str = str(config.uri).rstrip("/")
+        self.chunk_size: int = parse_size(config.get("chunk_size", None)) or 8 * 1024 * 1024
+        self.jobs: int = int(config.get("jobs", None) or 8)
+        if self.chunk_size <= 0 or self.jobs <= 0:
+            raise ConfigurationError(f"Invalid storage configuration (name={name}): chunk_size and jobs must be > 0.")
+
+    @staticmethod
+    def create(name: str, config: t.Optional[DictConfig]) -> "Storage":
+        """Create storage backend for this configuration (backend is selected based on URI scheme)."""
+        if config is None or not config.get("uri", None):
+            raise ConfigurationError(
+                f"Storage '{name}' is not defined. Add it to the `storage` section of MLCube system settings file "
+                f"(e.g., `mlcube config --get storage`), and make sure it has the `uri` field."
+            )
+        scheme = urllib.parse.urlparse(str(config.uri)).scheme.lower()
+        if scheme in ("", "file"):
+            return LocalStorage(name, config)
+        if scheme in ("http", "https"):
+            return HTTPStorage(name, config)
+        if scheme == "s3":
+            return S3Storage(name, config)
+        raise ConfigurationError(f"Unsupported storage URI (name={name}, uri={config.uri}). Supported schemes are "
+                                 "file, http, https and s3.")
+
+    def list(self, path: str) -> t.List[StorageObject]:
+        """Return objects under this path (one object if the path is a file).
+
+        Raises:
+            FileNotFoundError if there are no objects under this path.
+        """
+        raise NotImplementedError
+
+    def open(self, path: str, offset: int, length: int) -> t.BinaryIO:
+        """Open object for reading `length` bytes starting at `offset`."""
+        raise NotImplementedError
+
+    def write(self, path: str, stream: t.BinaryIO, size: int) -> None:
+        """Write (upload) object reading its content from the stream."""
+        raise NotImplementedError
+
+    def supports_ranges(self, obj: StorageObject) -> bool:
+        """Return true if this object can be downloaded in chunks."""
+        return True
+
+    def key(self, obj: StorageObject) -> str:
+        """Return content store key of this object version."""
+        return hashlib.sha256(f"{self.uri}/{obj.path}\n{obj.size}\n{obj.version}".encode()).hexdigest()
+
+    def download(
+        self, objects: t.List[StorageObject], store: ContentStore, cancelled: t.Optional[threading.Event] = None
+    ) -> int:
+        """Download objects that are not in the content store.
+
+        Objects are split into chunks that are downloaded in parallel into temporary files in the store, and these
+        files are added to the store when all their chunks have been downloaded.
+
+        Args:
+            objects: Objects to download.
+            store: Content store.
+            cancelled: Optional event that stops the download (`MLCubeError` is raised) when it is set.
+        Returns:
+            Number of downloaded bytes.
+        """
+        missing = {self.key(obj): obj for obj in objects if not store.contains(self.key(obj))}
+        if not missing:
+            return 0
+        tmp_files: t.Dict[str, Path] = {}
+        chunks: t.List[t.Tuple[StorageObject, Path, int, int]] = []
+        try:
+            for key, obj in missing.items():
+                tmp_files[key] = store.root / f".download.{key}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_files[key], "wb") as stream:
+                    stream.truncate(obj.size)
+                chunk_size = self.chunk_size if self.supports_ranges(obj) else max(obj.size, 1)
+                for offset in range(0, max(obj.size, 1), chunk_size):
+                    chunks.append((obj, tmp_files[key], offset, min(chunk_size, obj.size - offset)))
+            logger.info("Storage.download name=%s, objects=%d, chunks=%d, jobs=%d.",
+                        self.name, len(missing), len(chunks), self.jobs)
+            with ThreadPoolExecutor(max_workers=min(self.jobs, len(chunks))) as executor:
+                for _ in executor.map(lambda chunk: self._download_chunk(*chunk, cancelled), chunks):
+                    pass
+            for key, obj in missing.items():
+                store.put(key, tmp_files[key], name=f"{SCHEME}{self.name}/{obj.path}", move=True)
+        finally:
+            for tmp_file in tmp_files.values():
+                if tmp_file.exists():
+                    tmp_file.unlink()
+        return sum(obj.size for obj in missing.values())
+
+    def _download_chunk(
+        self, obj: StorageObject, file_path: Path, offset: int, length: int, cancelled: t.Optional[threading.Event]
+    ) -> None:
+        """Download one chunk of an object into the file at the same offset."""
+        if length <= 0:
+            return
+        if cancelled is not None and cancelled.is_set():
+            raise MLCubeError(f"Download has been cancelled (storage={self.name}, path={obj.path}).")
+        with contextlib.closing(self.open(obj.path, offset, length)) as source, open(file_path, "r+b") as dest:
+            dest.seek(offset)
+            remaining = length
+            while remaining > 0:
+                data = source.read(min(_COPY_BUFFER_SIZE, remaining))
+                if not data:
+                    raise MLCubeError(
+                        f"Unexpected end of data (storage={self.name}, path={obj.path}, offset={offset}, "
+                        f"length={length}, remaining={remaining})."
+                    )
+                dest.write(data)
+                remaining -= len(data)
+
+
+class LocalStorage(Storage):
+    """Directory on a local (or network) file system."""
+
+    def __init__(self, name: str, config: DictConfig) -> None:
+        super().__init__(name, config)
+        parsed = urllib.parse.urlparse(self.uri)
+        root = urllib.parse.unquote(parsed.path) if parsed.scheme else self.uri
+        self.root = Path(root).expanduser()
+
+    def list(self, path: str) -> t.List[StorageObject]:
+        full_path = self.root / path
+        if full_path.is_file():
+            files = [full_path]
+        elif full_path.is_dir():
+            files = sorted(file for file in full_path.rglob("*") if file.is_file())
+        else:
+            raise FileNotFoundError(f"Storage file or directory does not exist (storage={self.name}, path={path}).")
+        objects = []
+        for file in files:
+            stat = file.stat()
+            objects.append(StorageObject(file.relative_to(self.root).as_posix(), stat.st_size, str(stat.st_mtime_ns)))
+        return objects
+
+    def open(self, path: str, offset: int, length: int) -> t.BinaryIO:
+        stream = open(self.root / path, "rb")
+        stream.seek(offset)
+        return stream
+
+    def write(self, path: str, stream: t.BinaryIO, size: int) -> None:
+        dest = self.root / path
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_file, "wb") as tmp_stream:
+                shutil.copyfileobj(stream, tmp_stream, _COPY_BUFFER_SIZE)
+            os.replace(tmp_file, dest)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+
+class _HTTPResponse(object):
+    """Readable HTTP response that closes its connection when closed."""
+
+    def __init__(self, connection: http.client.HTTPConnection, response: http.client.HTTPResponse) -> None:
+        self.connection, self.response = connection, response
+
+    def read(self, size: int = -1) -> bytes:
+        return self.response.read(size)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def __enter__(self) -> "_HTTPResponse":
+        return self
+
+    def __exit__(self, *args: t.Any) -> None:
+        self.close()
+
+
+class HTTPStorage(Storage):
+    """HTTP(S) server.
+
+    Only files can be downloaded (directories can not be listed). Files are downloaded in chunks with range requests
+    if the server accepts them (`Accept-Ranges: bytes`). Uploads are streamed with `PUT` requests. Optional `headers`
+    configuration field defines HTTP headers (e.g., authorization) sent with every request.
+    """
+
+    def __init__(self, name: str, config: DictConfig) -> None:
+        super().__init__(name, config)
+        self.url = urllib.parse.urlparse(self.uri)
+        self.headers: t.Dict[str, str] = {str(k): str(v) for k, v in (config.get("headers", None) or {}).items()}
+        self._ranges: t.Dict[str, bool] = {}
+
+    def _request(
+        self, method: str, path: str, headers: t.Optional[t.Dict[str, str]] = None, body: t.Optional[t.Any] = None,
+        expected: t.Tuple[int, ...] = (200,)
+    ) -> _HTTPResponse:
+        connection_cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+        connection = connection_cls(self.url.netloc, timeout=60)
+        url_path = self.url.path.rstrip("/") + "/" + urllib.parse.quote(path)
+        try:
+            connection.request(method, url_path, body=body, headers={**self.headers, **(headers or {})})
+            response = connection.getresponse()
+        except (OSError, http.client.HTTPException) as err:
+            connection.close()
+            raise MLCubeError(f"HTTP request failed (storage={self.name}, method={method}, path={url_path}): {err}")
+        if response.status not in expected:
+            connection.close()
+            if response.status == 404:
+                raise FileNotFoundError(f"Storage file does not exist (storage={self.name}, path={path}).")
+            raise MLCubeError(
+                f"HTTP request failed (storage={self.name}, method={method}, path={url_path}, "
+                f"status={response.status}, reason={response.reason})."
+            )
+        return _HTTPResponse(connection, response)
+
+    def list(self, path: str) -> t.List[StorageObject]:
+        with self._request("HEAD", path) as response:
+            headers = response.response.headers
+        size = headers.get("Content-Length", None)
+        if size is None:
+            raise MLCubeError(f"HTTP server did not report file size (storage={self.name}, path={path}).")
+        self._ranges[path] = headers.get("Accept-Ranges", "").lower() == "bytes"
+        version = headers.get("ETag", None) or headers.get("Last-Modified", None) or ""
+        return [StorageObject(path, int(size), version)]
+
+    def supports_ranges(self, obj: StorageObject) -> bool:
+        return self._ranges.get(obj.path, False)
+
+    def open(self, path: str, offset: int, length: int) -> t.BinaryIO:
+        if not self._ranges.get(path, False):
+            return self._request("GET", path)
+        return self._request("GET", path, headers={"Range": f"bytes={offset}-{offset + length - 1}"}, expected=(206,))
+
+    def write(self, path: str, stream: t.BinaryIO, size: int) -> None:
+        # `http.client` streams file objects in blocks when the content length is known.
+        headers = {"Content-Length": str(size), "Content-Type": "application/octet-stream"}
+        with self._request("PUT", path, headers=headers, body=stream, expected=(200, 201, 204)):
+            pass
+
+
+class S3Storage(Storage):
+    """S3-compatible object storage.
+
+    Optional configuration fields: `endpoint_url` (e.g., MinIO server), `region`, and `profile` (AWS credentials
+    profile). Otherwise, `boto3` finds credentials in the usual places (environment variables, `~/.aws`).
+    """
+
+    def __init__(self, name: str, config: DictConfig) -> None:
+        super().__init__(name, config)
+        if boto3 is None:
+            raise ConfigurationError(
+                f"S3 storage (name={name}) requires `boto3` package. Install it with `pip install boto3`."
+            )
+        parsed = urllib.parse.urlparse(self.uri)
+        self.bucket, self.prefix = parsed.netloc, parsed.path.strip("/")
+        session = boto3.session.Session(profile_name=config.get("profile", None))
+        self.client = session.client(
+            "s3", endpoint_url=config.get("endpoint_url", None), region_name=config.get("region", None)
+        )
+
+    def _key(self, path: str) -> str:
+        return f"{self.prefix}/{path}".strip("/")
+
+    def list(self, path: str) -> t.List[StorageObject]:
+        key, objects = self._key(path), []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=key):
+            for item in page.get("Contents", []):
+                # Prefix `data/train` must not match `data/train_v2`.
+                if item["Key"] == key or item["Key"].startswith(key.rstrip("/") + "/") or not key:
+                    rel_path = item["Key"][len(self.prefix):].strip("/") if self.prefix else item["Key"]
+                    objects.append(StorageObject(rel_path, item["Size"], item["ETag"].strip('"')))
+        if not objects:
+            raise FileNotFoundError(f"Storage file or directory does not exist (storage={self.name}, path={path}).")
+        return objects
+
+    def open(self, path: str, offset: int, length: int) -> t.BinaryIO:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self._key(path), Range=f"bytes={offset}-{offset + length - 1}"
+        )
+        return response["Body"]
+
+    def write(self, path: str, stream: t.BinaryIO, size: int) -> None:
+        from boto3.s3.transfer import TransferConfig
+
+        # Large files are streamed as multipart uploads with parts of `chunk_size` bytes.
+        config = TransferConfig(multipart_chunksize=self.chunk_size, max_concurrency=self.jobs)
+        self.client.upload_fileobj(stream, self.bucket, self._key(path), Config=config)
+
+
+class StorageManager(object):
+    """Download task inputs from storages and upload task outputs to storages.
+
+    Args:
+        storage: The `storage` section of system settings. If None, it is loaded from the system settings file.
+        store: Content store for downloaded objects. Default is the dataset cache if it is configured in system settings
+            (see `SystemSettings.dataset_cache`), else `{cache}/storage` in MLCube cache directory (see
+            `SystemSettings.cache_dir`) with maximal size `cache_size` of the storage section if present.
+    """
+
+    def __init__(self, storage: t.Optional[DictConfig] = None, store: t.Optional[ContentStore] = None) -> None:
+        from mlcube.system_settings import SystemSettings
+
+        if storage is None or store is None:
+            settings = SystemSettings()
+            storage = settings.storage if storage is None else storage
+            store = settings.dataset_cache if store is None else store
+        self.storage = storage
+        if store is None:
+            store = ContentStore(
+                SystemSettings.cache_dir() / "storage", max_size=parse_size(storage.get("cache_size", None))
+            )
+        self.store = store
+        self._backends: t.Dict[str, Storage] = {}
+
+    def backend(self, name: str) -> Storage:
+        """Return storage backend with this name."""
+        if name not in self._backends:
+            self._backends[name] = Storage.create(name, self.storage.get(name, None))
+        return self._backends[name]
+
+    def fetch(self, uri: str, cancelled: t.Optional[threading.Event] = None) -> int:
+        """Download a storage file or directory into the content store without linking it into a workspace.
+
+        Returns:
+            Number of downloaded bytes (files that are in the content store are not downloaded).
+        """
+        name, path = parse_uri(uri)
+        backend = self.backend(name)
+        return backend.download(backend.list(path), self.store, cancelled)
+
+    def download(self, uri: str, workspace: str) -> int:
+        """Make a storage file or directory available in the workspace (see `local_path`).
+
+        Returns:
+            Number of downloaded bytes (files that are in the content store are not downloaded).
+        """
+        name, path = parse_uri(uri)
+        backend, dest = self.backend(name), Path(local_path(workspace, uri))
+        objects = backend.list(path)
+        num_bytes = backend.download(objects, self.store)
+        for obj in objects:
+            # The path is either a file (one object with the same path) or a directory.
+            if obj.path == path:
+                self.store.link(backend.key(obj), dest)
+            else:
+                self.store.link(backend.key(obj), dest / (Path(obj.path).relative_to(path) if path else obj.path))
+        logger.info("StorageManager.download uri=%s, objects=%d, downloaded=%d bytes, path=%s.",
+                    uri, len(objects), num_bytes, dest)
+        return num_bytes
+
+    def upload(self, uri: str, workspace: str) -> int:
+        """Upload a local file or directory (see `local_path`) to a storage.
+
+        Returns:
+            Number of uploaded bytes.
+        """
+        name, path = parse_uri(uri)
+        backend, source = self.backend(name), Path(local_path(workspace, uri))
+        if source.is_file():
+            files = [(source, path)]
+        elif source.is_dir():
+            files = [
+                (file, f"{path}/{file.relative_to(source).as_posix()}".lstrip("/"))
+                for file in sorted(source.rglob("*")) if file.is_file()
+            ]
+        else:
+            raise FileNotFoundError(f"Task output does not exist (uri={uri}, path={source}).")
+        num_bytes = 0
+        for file, file_path in files:
+            size = file.stat().st_size
+            with open(file, "rb") as stream:
+                backend.write(file_path, stream, size)
+            num_bytes += size
+        logger.info("StorageManager.upload uri=%s, files=%d, uploaded=%d bytes.", uri, len(files), num_bytes)
+        return num_bytes
@@ -0,0 +1,392 @@
+"""Content-addressed storage for large files (such as container images) shared across MLCube workspaces.
+
+- `StoreEntry`: Description of one object in a content store.
+- `ContentStore`: Host-wide store of immutable files and directories keyed by their content (or source) digests.
+- `file_sha256`: Streaming sha256 hash of a (large) file, cached in a sidecar file.
+- `dataset_key`: Content store key of a dataset with a user-defined content key.
+
+Objects are files or directory trees (e.g., datasets) stored under `{root}/objects/{key[:2]}/{key}`, and workspaces
+reference them via hard links (or symbolic links when hard links are not possible, e.g., the store and a workspace are
+on different file systems). Directory objects are linked file by file. The store maintains an index file
+(`{root}/index.json`) with object sizes and last access times that is used to evict least recently used objects when
+the store grows beyond its maximal size (pinned objects are never evicted). Objects that are hard-linked into
+workspaces remain available there after eviction; symbolic links become dangling, and MLCube runners treat them as
+missing files. Files of objects are read-only, so that tasks can not modify objects in place via hard links in their
+workspaces.
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import stat
+import time
+import typing as t
+import uuid
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from mlcube.errors import ConfigurationError
+
+__all__ = ["StoreEntry", "ContentStore", "file_sha256", "parse_size", "format_size", "dataset_key"]
+
+logger = logging.getLogger(__name__)
+
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(size: t.Union[str, int, None]) -> t.Optional[int]:
+    """Parse human-readable size.
+
+    Args:
+        size: Size in bytes (int) or string such as `500M`, `20G` or `1.5T` (binary units). Empty values and None
+            mean `no limit`.
+    Returns:
+        Size in bytes or None.
+    """
+    if size is None or size == "":
+        return None
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*", str(size), flags=re.IGNORECASE)
+    if not match:
+        raise ConfigurationError(f"Invalid size ({size}). Expecting number of bytes or strings like `500M` or `20G`.")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(num_bytes: int) -> str:
+    """Format number of bytes as a human-readable string (e.g., `1.5G`)."""
+    for unit in ("", "K", "M", "G"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f}{unit}" if unit else f"{num_bytes}B"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}T"
+
+
+_HASH_CHUNK_SIZE = 8 * 1024 * 1024
+"""Read buffer size for computing file hashes."""
+
+_HASH_SIDECAR_SUFFIX = ".sha256.json"
+"""Suffix of a sidecar file that caches file hash (`{file_name}.sha256.json`)."""
+
+
+def file_sha256(
+    path: t.Union[str, Path], progress: t.Optional[t.Callable[[int, int], None]] = None, use_cache: bool = True
+) -> str:
+    """Compute sha256 hash of a file reading it in large chunks.
+
+    The hash is cached in a sidecar file next to the file (`{file_name}.sha256.json`) along with the file's inode, size
+    and modification time. Next time, if these did not change, the cached value is returned without reading the file.
+    When the sidecar file can not be written (e.g., read-only directory), the hash is not cached.
+
+    Args:
+        path: File path.
+        progress: Optional callback that is called with the number of bytes hashed so far and the file size.
+        use_cache: If false, the cache is not used (but is updated).
+    Returns:
+        Hex digest.
+    """
+    path = Path(path)
+    stat = path.stat()
+    file_id = {"inode": stat.st_ino, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    sidecar = path.with_name(path.name + _HASH_SIDECAR_SUFFIX)
+    if use_cache and sidecar.is_file():
+        try:
+            cached: t.Dict = json.loads(sidecar.read_text())
+            if cached.get("file", None) == file_id and cached.get("sha256", None):
+                logger.debug("file_sha256 using cached hash for %s (%s).", path, sidecar)
+                return cached["sha256"]
+        except (OSError, ValueError) as err:
+            logger.debug("file_sha256 ignoring invalid sidecar file %s: %s", sidecar, str(err))
+
+    sha256, num_bytes = hashlib.sha256(), 0
+    buffer = memoryview(bytearray(_HASH_CHUNK_SIZE))
+    with open(path, "rb", buffering=0) as stream:
+        while True:
+            chunk_size = stream.readinto(buffer)
+            if not chunk_size:
+                break
+            sha256.update(buffer[:chunk_size])
+            num_bytes += chunk_size
+            if progress is not None:
+                progress(num_bytes, stat.st_size)
+    digest = sha256.hexdigest()
+
+    try:
+        tmp_file = sidecar.with_name(f".{sidecar.name}.{uuid.uuid4().hex}.tmp")
+        tmp_file.write_text(json.dumps({"file": file_id, "sha256": digest}))
+        os.replace(tmp_file, sidecar)
+    except OSError as err:
+        logger.debug("file_sha256 can't cache hash of %s: %s", path, str(err))
+    return digest
+
+
+def dataset_key(content_key: str) -> str:
+    """Return content store key of a dataset (or any other task artifact) identified by a user-defined content key."""
+    return hashlib.sha256(f"dataset:{content_key}".encode()).hexdigest()
+
+
+def _object_size(path: Path) -> int:
+    """Return size of a file, or total size of files in a directory tree."""
+    if path.is_dir():
+        return sum(file.stat().st_size for file in path.rglob("*") if file.is_file() and not file.is_symlink())
+    return path.stat().st_size
+
+
+def _remove(path: Path) -> None:
+    """Remove a file, symbolic link or directory tree (including read-only files)."""
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path, onerror=_remove_read_only)
+    else:
+        try:
+            path.unlink()
+        except PermissionError:
+            _remove_read_only(os.unlink, str(path), None)
+
+
+def _remove_read_only(fn: t.Callable[[str], t.Any], path: str, _: t.Any) -> None:
+    """Make a file writable and remove it (read-only files can not be removed on Windows)."""
+    os.chmod(path, stat.S_IWRITE | stat.S_IREAD)
+    fn(path)
+
+
+def _make_read_only(path: Path) -> None:
+    """Remove write permissions of a file, or of all files in a directory tree (directories stay writable)."""
+    files = [path]
+    if path.is_dir():
+        files = [Path(dir_path) / name for dir_path, _, names in os.walk(path) for name in names]
+    for file in files:
+        if not file.is_symlink():
+            file.chmod(stat.S_IMODE(file.stat().st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _link_tree(source: Path, dest: Path, fallback: t.Callable[[Path, Path], t.Any]) -> None:
+    """Recreate directory tree `source` at `dest` hard-linking files, or calling `fallback` if hard links fail."""
+    for dir_path, _, file_names in os.walk(source):
+        rel_path = Path(dir_path).relative_to(source)
+        (dest / rel_path).mkdir(parents=True, exist_ok=True)
+        for file_name in file_names:
+            try:
+                os.link(Path(dir_path) / file_name, dest / rel_path / file_name)
+            except OSError:
+                fallback(Path(dir_path) / file_name, dest / rel_path / file_name)
+
+
+class StoreEntry(t.NamedTuple):
+    """Object in a content store."""
+
+    key: str
+    """Object key (content or source digest)."""
+
+    size: int
+    """Object size in bytes."""
+
+    last_used: float
+    """Last time (seconds since the Epoch) this object was added to the store or linked into a workspace."""
+
+    name: str = ""
+    """Human-readable description of this object (e.g., image build source)."""
+
+    pinned: bool = False
+    """Pinned objects are never evicted."""
+
+
+class ContentStore(object):
+    """Host-wide store of immutable files keyed by their digests.
+
+    Args:
+        root: Root directory of this store. It's created if it does not exist.
+        max_size: Maximal total size in bytes of all objects. When exceeded, least recently used objects are evicted.
+            None means no limit.
+    """
+
+    def __init__(self, root: t.Union[str, Path], max_size: t.Optional[int] = None) -> None:
+        self.root = Path(root).expanduser().resolve()
+        self.max_size = max_size
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+
+    @property
+    def _index_file(self) -> Path:
+        return self.root / "index.json"
+
+    @contextlib.contextmanager
+    def _index(self, write: bool = False) -> t.Iterator[t.Dict[str, t.Dict]]:
+        """Read (and optionally update) store index under an exclusive lock (protects against concurrent processes)."""
+        with open(self.root / ".lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                index: t.Dict[str, t.Dict] = {}
+                if self._index_file.exists():
+                    try:
+                        index = json.loads(self._index_file.read_text())
+                    except ValueError:
+                        logger.warning("ContentStore index is corrupted (%s), rebuilding.", self._index_file)
+                # Objects may have been removed manually.
+                index = {key: entry for key, entry in index.items() if self.path(key).exists()}
+                yield index
+                if write:
+                    tmp_file = self._index_file.with_name(f".index.{uuid.uuid4().hex}.tmp")
+                    tmp_file.write_text(json.dumps(index, indent=2))
+                    os.replace(tmp_file, self._index_file)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def path(self, key: str) -> Path:
+        """Return path to the object with the given key (object may not exist)."""
+        return self.root / "objects" / key[:2] / key
+
+    def contains(self, key: str) -> bool:
+        """Return true if object with this key exists in this store."""
+        return self.path(key).exists()
+
+    def put(
+        self, key: str, source: t.Union[str, Path], name: str = "", move: bool = False, copy: bool = False
+    ) -> Path:
+        """Add a file or a directory to this store.
+
+        Files of the new object are made read-only. Unless they are copied, this includes files at the `source` path.
+
+        Args:
+            key: Object key.
+            source: File or directory to add. Files must not be modified after they have been added.
+            name: Human-readable description of this object.
+            move: If true, move the file (directory) into the store, else hard-link (if possible) or copy its files.
+            copy: If true (and `move` is false), copy files, so that `source` does not share files with the store.
+        Returns:
+            Path to the object in the store.
+        """
+        source, object_path = Path(source), self.path(key)
+        object_path.parent.mkdir(parents=True, exist_ok=True)
+        if not object_path.exists():
+            tmp_path = object_path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+            if move:
+                shutil.move(source.as_posix(), tmp_path.as_posix())
+            elif copy and source.is_dir():
+                shutil.copytree(source, tmp_path)
+            elif copy:
+                shutil.copyfile(source, tmp_path)
+            elif source.is_dir():
+                _link_tree(source, tmp_path, shutil.copyfile)
+            else:
+                try:
+                    os.link(source, tmp_path)
+                except OSError:
+                    shutil.copyfile(source, tmp_path)
+            _make_read_only(tmp_path)
+            try:
+                os.replace(tmp_path, object_path)
+            except OSError:
+                # Directories can't replace existing directories - another process may have just added this object.
+                if not object_path.exists():
+                    raise
+                _remove(tmp_path)
+        elif move:
+            _remove(source)
+        with self._index(write=True) as index:
+            entry = index.get(key, {})
+            entry.update(size=_object_size(object_path), last_used=time.time(), name=name or entry.get("name", ""))
+            index[key] = entry
+        logger.info("ContentStore.put key=%s, name=%s, path=%s.", key, name, object_path)
+        if self.max_size is not None:
+            self.evict(self.max_size, keep=[key])
+        return object_path
+
+    def link(self, key: str, dest: t.Union[str, Path]) -> Path:
+        """Make the object with the given key available at the `dest` path.
+
+        A hard link is created if possible, else a symbolic link. Directory objects are recreated at `dest` linking
+        their files one by one. Existing `dest` file is atomically replaced, existing `dest` directory is removed first.
+
+        Args:
+            key: Object key. The object must exist.
+            dest: Destination path.
+        Returns:
+            Destination path.
+        """
+        object_path, dest = self.path(key), Path(dest)
+        if not object_path.exists():
+            raise FileNotFoundError(f"ContentStore object does not exist (key={key}, path={object_path}).")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.exists() and os.path.samefile(dest, object_path):
+            self.touch(key)
+            return dest
+        tmp_path = dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.tmp")
+        if object_path.is_dir():
+            _link_tree(object_path, tmp_path, os.symlink)
+            if dest.is_dir() and not dest.is_symlink():
+                shutil.rmtree(dest)
+        else:
+            try:
+                os.link(object_path, tmp_path)
+            except OSError:
+                logger.debug("ContentStore.link can't hard-link %s to %s, creating symbolic link.", object_path, dest)
+                os.symlink(object_path, tmp_path)
+        os.replace(tmp_path, dest)
+        self.touch(key)
+        return dest
+
+    def touch(self, key: str) -> None:
+        """Update last access time for this object."""
+        with self._index(write=True) as index:
+            if key in index:
+                index[key]["last_used"] = time.time()
+
+    def pin(self, key: str, pinned: bool = True) -> None:
+        """Pin (or unpin) object. Pinned objects are never evicted."""
+        with self._index(write=True) as index:
+            if key not in index:
+                raise FileNotFoundError(f"ContentStore object does not exist (key={key}).")
+            index[key]["pinned"] = pinned
+
+    def entries(self) -> t.List[StoreEntry]:
+        """Return objects in this store, most recently used first."""
+        with self._index() as index:
+            entries = [
+                StoreEntry(
+                    key, entry["size"], entry["last_used"], entry.get("name", ""), entry.get("pinned", False)
+                ) for key, entry in index.items()
+            ]
+        return sorted(entries, key=lambda e: e.last_used, reverse=True)
+
+    def size(self) -> int:
+        """Return total size of all objects in bytes."""
+        return sum(entry.size for entry in self.entries())
+
+    def remove(self, key: str) -> None:
+        """Remove object from this store."""
+        with self._index(write=True) as index:
+            index.pop(key, None)
+            if self.path(key).exists():
+                _remove(self.path(key))
+
+    def evict(self, max_size: int, keep: t.Optional[t.Iterable[str]] = None) -> t.List[StoreEntry]:
+        """Remove least recently used objects until total size of objects does not exceed `max_size`.
+
+        Args:
+            max_size: Maximal total size of objects in bytes.
+            keep: Keys of objects that must not be evicted (pinned objects are never evicted).
+        Returns:
+            List of evicted objects.
+        """
+        keep, evicted = set(keep or []), []
+        with self._index(write=True) as index:
+            total_size = sum(entry["size"] for entry in index.values())
+            for key, entry in sorted(index.items(), key=lambda item: item[1]["last_used"]):
+                if total_size <= max_size:
+                    break
+                if key in keep or entry.get("pinned", False):
+                    continue
+                _remove(self.path(key))
+                del index[key]
+                total_size -= entry["size"]
+                evicted.append(StoreEntry(key, entry["size"], entry["last_used"], entry.get("name", "")))
+                logger.info("ContentStore.evict key=%s, size=%d, name=%s.", key, entry["size"], entry.get("name", ""))
+        return evicted
@@ -0,0 +1,214 @@
+"""Parameter sweeps: run the same MLCube tasks with many combinations of MLCube and task parameters.
+
+- `SweepRun`: One combination of MLCube parameters (`-Pname=value`) and task parameters (`name=value`).
+- `SweepResult`: Outcome of one sweep run.
+- `Sweep`: Sweep specification loaded from a YAML file, and a parallel executor of its runs.
+
+Sweep file example:
+```yaml
+name: batch-size     # Optional sweep name (default is the sweep file name without extension).
+grid:                # Runs for all combinations (Cartesian product) of these values.
+  params:            # MLCube parameters, same as `-Pname=value` on a command line.
+    docker.build_strategy: [auto]
+  args:              # Task parameters, same as `name=value` on a command line.
+    parameters_file: [small.yaml, large.yaml]
+runs:                # Optional list of additional runs.
+  - args: {parameters_file: huge.yaml}
+```
+"""
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube.errors import ConfigurationError, ExecutionError, MLCubeError
+from mlcube.shell import Shell
+
+__all__ = ["SweepRun", "SweepResult", "Sweep"]
+
+logger = logging.getLogger(__name__)
+
+
+class SweepRun(t.NamedTuple):
+    """One run of a sweep."""
+
+    index: int
+    """Run index (0-based)."""
+
+    params: t.Dict[str, t.Any]
+    """MLCube parameters (`-Pname=value`)."""
+
+    args: t.Dict[str, t.Any]
+    """Task parameters (`name=value`)."""
+
+    @property
+    def name(self) -> str:
+        """Run name that is also used as the name of the run's workspace directory."""
+        return f"run-{self.index:03d}"
+
+    def cli_args(self) -> t.List[str]:
+        """Return command line arguments for this run (`-Pname=value` and `name=value`)."""
+        return [f"-P{name}={value}" for name, value in self.params.items()] + [
+            f"{name}={value}" for name, value in self.args.items()
+        ]
+
+    def describe(self) -> str:
+        return " ".join(self.cli_args())
+
+
+class SweepResult(t.NamedTuple):
+    """Outcome of one sweep run."""
+
+    run: SweepRun
+    workspace: str
+    exit_code: int
+    """Zero on success."""
+    duration: float
+    """Run time in seconds."""
+    error: str = ""
+
+    @property
+    def status(self) -> str:
+        return "ok" if self.exit_code == 0 else "failed"
+
+
+class Sweep(object):
+    """Sweep specification.
+
+    Args:
+        name: Sweep name.
+        runs: List of runs.
+    """
+
+    def __init__(self, name: str, runs: t.List[SweepRun]) -> None:
+        self.name = name
+        self.runs = runs
+
+    @classmethod
+    def load(cls, path: str) -> "Sweep":
+        """Load sweep specification from a YAML file (see module docstring for the format)."""
+        spec: DictConfig = OmegaConf.load(path)
+        unknown_keys = set(spec.keys()) - {"name", "grid", "runs"}
+        if unknown_keys:
+            raise ConfigurationError(f"Unknown keys in sweep file {path}: {sorted(unknown_keys)}.")
+
+        def _section(_config: t.Any, _section_name: str, _context: str) -> t.Dict:
+            _value = _config.get(_section_name, None) if _config is not None else None
+            _value = OmegaConf.to_container(_value) if isinstance(_value, DictConfig) else (_value or {})
+            if not isinstance(_value, dict):
+                raise ConfigurationError(f"Sweep {_context}.{_section_name} must be a dictionary (file={path}).")
+            return _value
+
+        combinations: t.List[t.Tuple[t.Dict, t.Dict]] = []
+        grid = spec.get("grid", None)
+        if grid is not None:
+            params, args = _section(grid, "params", "grid"), _section(grid, "args", "grid")
+            axes = [("params", k, v) for k, v in params.items()] + [("args", k, v) for k, v in args.items()]
+            for _, name, values in axes:
+                if not isinstance(values, list) or not values:
+                    raise ConfigurationError(f"Sweep grid values must be non-empty lists (name={name}, file={path}).")
+            for values in itertools.product(*[axis[2] for axis in axes]):
+                combination: t.Tuple[t.Dict, t.Dict] = ({}, {})
+                for (section, name, _), value in zip(axes, values):
+                    combination[0 if section == "params" else 1][name] = value
+                combinations.append(combination)
+
+        for idx, run in enumerate(spec.get("runs", None) or []):
+            combinations.append((_section(run, "params", f"runs[{idx}]"), _section(run, "args", f"runs[{idx}]")))
+
+        if not combinations:
+            raise ConfigurationError(f"Sweep file does not define any runs (file={path}).")
+        name = spec.get("name", None) or os.path.splitext(os.path.basename(path))[0]
+        return cls(name, [SweepRun(idx, params, args) for idx, (params, args) in enumerate(combinations)])
+
+    def execute(
+        self,
+        run_fn: t.Callable[[SweepRun, str], None],
+        sweep_dir: str,
+        jobs: int = 1,
+        cancelled: t.Optional[threading.Event] = None,
+    ) -> t.List[SweepResult]:
+        """Execute all runs.
+
+        When interrupted (Ctrl-C or a termination signal), runs that have not started are cancelled, the `cancelled`
+        event is set, and commands of runs in progress are stopped with `Shell.terminate_all`.
+
+        Args:
+            run_fn: Function that executes one run in the given workspace directory. It raises an exception on error.
+            sweep_dir: Directory for run workspaces (`{sweep_dir}/run-NNN`) and the summary file (`summary.json`).
+            jobs: Maximal number of runs to execute in parallel.
+            cancelled: Event that `run_fn` checks to stop early (e.g., `TaskExecutor` does not start new tasks).
+        Returns:
+            List of results ordered by run index.
+        """
+        os.makedirs(sweep_dir, exist_ok=True)
+
+        def _execute(_run: SweepRun) -> SweepResult:
+            workspace = os.path.join(sweep_dir, _run.name)
+            start = time.monotonic()
+            logger.info("Sweep.execute starting %s (%s), workspace=%s.", _run.name, _run.describe(), workspace)
+            try:
+                run_fn(_run, workspace)
+                exit_code, error = 0, ""
+            except MLCubeError as err:
+                exit_code = err.context.get("code", 1) if isinstance(err, ExecutionError) else 1
+                error = str(err)
+            except Exception as err:
+                exit_code, error = 1, f"{type(err).__name__}: {err}"
+            result = SweepResult(_run, workspace, (exit_code or 1) if error else 0, time.monotonic() - start, error)
+            logger.info(
+                "Sweep.execute %s finished: status=%s, duration=%.1f.", _run.name, result.status, result.duration
+            )
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = [pool.submit(_execute, run) for run in self.runs]
+            try:
+                results = [future.result() for future in as_completed(futures)]
+            except KeyboardInterrupt:
+                logger.warning("Sweep.execute interrupted, stopping runs in progress.")
+                for future in futures:
+                    future.cancel()
+                if cancelled is not None:
+                    cancelled.set()
+                Shell.terminate_all()
+                raise
+
+        results.sort(key=lambda r: r.run.index)
+        with open(os.path.join(sweep_dir, "summary.json"), "w") as stream:
+            json.dump(
+                [
+                    {
+                        "run": r.run.name,
+                        "params": r.run.params,
+                        "args": r.run.args,
+                        "status": r.status,
+                        "exit_code": r.exit_code,
+                        "duration": round(r.duration, 3),
+                        "workspace": r.workspace,
+                        "error": r.error,
+                    }
+                    for r in results
+                ],
+                stream,
+                indent=2,
+                default=str,
+            )
+        return results
+
+    @staticmethod
+    def summary(results: t.List[SweepResult]) -> str:
+        """Format results as a text table."""
+        rows = [("RUN", "STATUS", "EXIT", "TIME", "PARAMETERS")] + [
+            (r.run.name, r.status, str(r.exit_code), f"{r.duration:.1f}s", r.run.describe()) for r in results
+        ]
+        widths = [max(len(row[col]) for row in rows) for col in range(len(rows[0]) - 1)]
+        return "\n".join(
+            "  ".join(value.ljust(width) for value, width in zip(row, widths)) + "  " + row[-1] for row in rows
+        )
@@ -28,6 +28,9 @@ execute the following command: `mlcube config --help`.
       reasons. For instance, users can have multiple SSH configurations that they use to run MLCubes on different remote
       machines. Or maybe users have different docker runners, one configured to use all available RAM, and the other
       configured to use only a limited RAM, e.g., 64 GB (for benchmarking purposes)
+- `storage`: Named storages for task parameters with `storage:` URIs (see `mlcube.storage`).
+- `cache`: Optional host-wide cache of task inputs and outputs shared across workspaces (see `dataset_cache`). It is
+  disabled unless its `path` is set, e.g., `cache: {path: ~/.mlcube/datasets, max_size: 500G}`.
 
 # Classes implemented in this module:
 - `SystemSettings`: Class that implements various operations associated with the MLCube system settings file.
@@ -40,6 +43,7 @@ from pathlib import Path
 from mlcube.errors import MLCubeError
 from mlcube.platform import Platform
 from mlcube.runner import Runner
+from mlcube.store import ContentStore, parse_size
 
 from omegaconf import (DictConfig, OmegaConf)
 
@@ -56,6 +60,17 @@ class SystemSettings(object):
         """Return full path to MLCube system settings file."""
         return os.path.abspath(os.environ.get('MLCUBE_SYSTEM_SETTINGS', Path.home() / 'mlcube.yaml'))
 
+    @staticmethod
+    def cache_dir() -> Path:
+        """Return MLCube cache directory (for data that can be safely removed, e.g., docker registry responses).
+
+        The default location is `${HOME}/.mlcube/cache`, but can be overridden with `MLCUBE_CACHE_DIR` environment
+        variable. The directory is created if it does not exist.
+        """
+        path = Path(os.environ.get('MLCUBE_CACHE_DIR', None) or Path.home() / '.mlcube' / 'cache').expanduser()
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
     def __init__(self, path: t.Optional[str] = None) -> None:
         """Initialize system settings file class.
 
@@ -98,6 +113,18 @@ class SystemSettings(object):
         """Return `storage` configuration section."""
         return self.settings.storage
 
+    @property
+    def dataset_cache(self) -> t.Optional[ContentStore]:
+        """Return host-wide dataset cache configured in the `cache` section, or None if it is not configured.
+
+        Task parameters with content keys (the `cache` field of parameter definitions) are stored in this cache, and
+        are linked from it into workspaces.
+        """
+        config: t.Optional[DictConfig] = self.settings.get('cache', None)
+        if not config or not config.get('path', None):
+            return None
+        return ContentStore(config.path, max_size=parse_size(config.get('max_size', None)))
+
     def save(self, resolve: bool = False) -> 'SystemSettings':
         """Serialize system settings.
 
@@ -0,0 +1,93 @@
+"""Echo runner that records tasks instead of running them, and a test case that registers it in system settings.
+
+- `EchoRunner`: Runner that records (task, greeting, name, workspace) tuples for each task it runs.
+- `EchoRunnerTestCase`: Base test case that creates the `echo` MLCube and system settings with the `echo` platform.
+"""
+import os
+import tempfile
+import threading
+import typing as t
+from unittest import TestCase
+from unittest.mock import patch
+
+from omegaconf import OmegaConf
+
+from mlcube.errors import ExecutionError
+from mlcube.runner import Runner, RunnerConfig
+
+__all__ = ["MLCUBE", "EchoRunnerConfig", "EchoRunner", "get_runner_class", "EchoRunnerTestCase"]
+
+MLCUBE = """
+name: echo
+tasks:
+  hello:
+    parameters:
+      inputs: {name: {type: file, default: name.txt}}
+      outputs: {greeting: {type: file, default: greeting.txt}}
+  fail: {parameters: {inputs: {}, outputs: {}}}
+  wait: {parameters: {inputs: {}, outputs: {}}}
+"""
+
+
+class EchoRunnerConfig(RunnerConfig):
+    DEFAULT = OmegaConf.create({"runner": "echo", "greeting": "Hello"})
+
+    @staticmethod
+    def merge(mlcube: t.Any) -> None:
+        mlcube.runner = OmegaConf.merge(mlcube.runner, mlcube.get("echo", OmegaConf.create({})))
+
+
+class EchoRunner(Runner):
+    """Runner that does not run anything.
+
+    Tasks: `hello` is recorded in `runs`, `fail` fails with exit code 3, `wait` waits on `barrier` (for tests that
+    need concurrent runs). Configure fails with exit code 5.
+    """
+
+    CONFIG = EchoRunnerConfig
+    runs: t.List[t.Tuple[str, str, str, str]] = []
+    barrier = threading.Barrier(2, timeout=10)
+
+    def configure(self) -> None:
+        raise ExecutionError.mlcube_configure_error(self.__class__.__name__, "Can't configure.", code=5)
+
+    def run(self) -> None:
+        if self.task == "fail":
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Task failed.", code=3)
+        if self.task == "wait":
+            EchoRunner.barrier.wait()
+            return
+        params = self.mlcube.tasks[self.task].parameters
+        EchoRunner.runs.append(
+            (self.task, self.mlcube.runner.greeting, params.inputs.name.default, self.mlcube.runtime.workspace)
+        )
+
+    def inspect(self, force: bool = False) -> t.Dict:
+        return {"name": self.mlcube.name, "greeting": self.mlcube.runner.greeting, "force": force}
+
+
+def get_runner_class() -> t.Type[Runner]:
+    return EchoRunner
+
+
+class EchoRunnerTestCase(TestCase):
+    """Creates the `echo` MLCube in `mlcube_dir` and system settings with the `echo` platform in `tmp_dir`."""
+
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.mlcube_dir = os.path.join(self.tmp_dir, "echo")
+        os.makedirs(self.mlcube_dir)
+        with open(os.path.join(self.mlcube_dir, "mlcube.yaml"), "w") as stream:
+            stream.write(MLCUBE)
+        settings_file = os.path.join(self.tmp_dir, "mlcube.yaml")
+        OmegaConf.save(
+            {"runners": {"echo": {"pkg": __name__}}, "platforms": {"echo": {"runner": "echo"}}, "storage": {}},
+            settings_file,
+        )
+        _patch = patch.dict(os.environ, {"MLCUBE_SYSTEM_SETTINGS": settings_file})
+        _patch.start()
+        self.addCleanup(_patch.stop)
+        EchoRunner.runs = []
+        EchoRunner.barrier.reset()
@@ -0,0 +1,71 @@
+import asyncio
+import os
+import typing as t
+
+from mlcube import api
+from mlcube.errors import ConfigurationError, ExecutionError
+from mlcube.tests.echo_runner import EchoRunner, EchoRunnerTestCase
+
+
+class TestApi(EchoRunnerTestCase):
+    def test_load(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo")
+        self.assertEqual(mlcube.path, os.path.join(self.mlcube_dir, "mlcube.yaml"))
+        self.assertListEqual(mlcube.tasks, ["hello", "fail", "wait"])
+        with self.assertRaises(ConfigurationError):
+            api.load(self.mlcube_dir, platform="docker")
+        with self.assertRaises(ConfigurationError):
+            api.load(os.path.join(self.mlcube_dir, "missing"), platform="echo")
+
+    def test_run(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo", params={"echo.greeting": "Hi"})
+        result = mlcube.run("hello")
+        self.assertTrue(result.ok)
+        self.assertEqual(result.exit_code, 0)
+        self.assertListEqual(result.tasks, ["hello"])
+
+        workspace = os.path.join(self.mlcube_dir, "workspace-2")
+        mlcube.run(["hello"], params={"echo.greeting": "Hey"}, args={"name": "bob.txt"}, workspace=workspace)
+        self.assertListEqual(
+            EchoRunner.runs,
+            [
+                ("hello", "Hi", "name.txt", os.path.join(self.mlcube_dir, "workspace")),
+                ("hello", "Hey", "bob.txt", workspace),
+            ],
+        )
+
+    def test_run_failed(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo")
+        result = mlcube.run(["fail", "hello"])
+        self.assertFalse(result.ok)
+        self.assertEqual(result.exit_code, 3)
+        self.assertIsInstance(result.error, ExecutionError)
+        self.assertListEqual(EchoRunner.runs, [])
+
+        self.assertEqual(mlcube.configure().exit_code, 5)
+        with self.assertRaises(ConfigurationError):
+            mlcube.run("train")
+        with self.assertRaises(ConfigurationError):
+            mlcube.run()
+
+    def test_run_async(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo")
+        futures = [mlcube.run_async("hello", args={"name": f"{idx}.txt"}) for idx in range(4)]
+        self.assertTrue(all(future.result(timeout=30).ok for future in futures))
+        self.assertListEqual(sorted(run[2] for run in EchoRunner.runs), ["0.txt", "1.txt", "2.txt", "3.txt"])
+        with self.assertRaises(ConfigurationError):
+            mlcube.run_async("train").result(timeout=30)
+
+    def test_arun(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo")
+
+        async def _run() -> t.List[api.Result]:
+            return await asyncio.gather(*[mlcube.arun("hello", args={"name": f"{idx}.txt"}) for idx in range(2)])
+
+        self.assertTrue(all(result.ok for result in asyncio.run(_run())))
+        self.assertListEqual(sorted(run[2] for run in EchoRunner.runs), ["0.txt", "1.txt"])
+        self.assertEqual(asyncio.run(mlcube.arun("fail")).exit_code, 3)
+
+    def test_inspect(self) -> None:
+        mlcube = api.load(self.mlcube_dir, platform="echo")
+        self.assertDictEqual(mlcube.inspect(), {"name": "echo", "greeting": "Hello", "force": False})
@@ -1,14 +1,80 @@
+import json
+import os
+import tempfile
 import typing as t
 from unittest import TestCase
+from unittest.mock import patch
 
 from click import BaseCommand, Option
 from click.testing import CliRunner, Result
 
-from mlcube.__main__ import cli, config, configure, create, describe, run, show_config
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube.__main__ import (
+    cache, cli, config, configure, create, describe, history, inspect, prefetch, run, serve, show_config
+)
 from mlcube.cli import Options, markdown2text
+from mlcube.errors import MLCubeError
+from mlcube.history import RunHistory
+from mlcube.runner import Runner
+
+
+class _ImageRunner(Runner):
+    """Runner with images that exist (`hello_world`), are pulled (`mnist`) or can not be pulled (`matmul`)."""
+
+    preloaded: t.List[t.List[str]] = []
+
+    @classmethod
+    def preload(cls, mlcubes: t.List[DictConfig]) -> None:
+        _ImageRunner.preloaded.append(sorted(mlcube.name for mlcube in mlcubes))
+
+    def prefetch(self) -> t.Dict:
+        if self.mlcube.name == "matmul":
+            raise MLCubeError("Image not found.")
+        return {"image": f"mlcommons/{self.mlcube.name}", "fetched": self.mlcube.name == "mnist", "size": 2048}
+
+
+def _parse_cli_args(unparsed_args: t.List[str], parsed_args: t.Dict, resolve: bool) -> t.Tuple[type, DictConfig]:
+    return _ImageRunner, OmegaConf.create({
+        "name": os.path.basename(parsed_args["mlcube"]), "runner": {"runner": parsed_args["platform"]}
+    })
+
+
+class _InputsRunner(Runner):
+    """Runner that records paths of task inputs."""
+
+    inputs: t.List[t.Tuple[str, t.Dict]] = []
+
+    def run(self) -> None:
+        inputs = self.mlcube.tasks[self.task].parameters.inputs
+        _InputsRunner.inputs.append((self.task, {name: param.default for name, param in inputs.items()}))
+
+
+def _parse_sweep_args(unparsed_args: t.List[str], parsed_args: t.Dict, resolve: bool) -> t.Tuple[type, DictConfig]:
+    return _InputsRunner, OmegaConf.create({
+        "name": "mnist",
+        "runner": {"runner": "docker"},
+        "runtime": {"root": parsed_args["mlcube"], "workspace": parsed_args["workspace"]},
+        "logs": {"enabled": False},
+        "tasks": {
+            "train": {
+                "parameters": {"inputs": {"data": {"default": "data/"}}, "outputs": {"model": {"default": "model/"}}}
+            },
+            "evaluate": {"parameters": {"inputs": {"model": {"default": "model/ckpt"}}, "outputs": {}}},
+        },
+    })
 
 
 class TestCli(TestCase):
+    def setUp(self) -> None:
+        # Commands that run tasks record them in the per-user run history by default.
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.history_db = os.path.join(tmp_dir.name, "history.db")
+        _patch = patch.dict(os.environ, {"MLCUBE_HISTORY_DB": self.history_db})
+        _patch.start()
+        self.addCleanup(_patch.stop)
+
     def test_options(self) -> None:
         class Obj:
             ...
@@ -40,8 +106,89 @@ class TestCli(TestCase):
 
     def test_help(self) -> None:
         """python -m unittest  mlcube.tests.test_cli"""
-        cli_funcs = [cli, show_config, configure, run, describe, config, create]
+        cli_funcs = [
+            cli, show_config, configure, run, describe, config, create, inspect, prefetch, cache, history, serve
+        ]
         for cli_func in cli_funcs:
             self.assertIsInstance(cli_func, BaseCommand)
             result: Result = CliRunner().invoke(cli_func, [f"--help"])
             self.assertEqual(result.exit_code, 0, f"Error while running `{cli_func.name}`. Output: {result.output}")
+
+    def test_inspect_many(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("mnist", "hello_world", "matmul"):
+                os.makedirs(os.path.join(tmp_dir, name))
+
+            def _inspect(mlcube: str, platform: str, force: bool, parsed=None) -> t.Dict:
+                if mlcube.endswith("matmul"):
+                    raise MLCubeError("Image not found.")
+                return {"hash": os.path.basename(mlcube)}
+
+            with patch("mlcube.__main__._inspect_mlcube", side_effect=_inspect):
+                result: Result = CliRunner().invoke(
+                    inspect, ["--mlcube", f"{tmp_dir}/m*,{tmp_dir}/hello_world", "--platform", "docker", "-j", "2"]
+                )
+                self.assertEqual(result.exit_code, 1)
+                self.assertDictEqual(
+                    json.loads(result.output),
+                    {
+                        f"{tmp_dir}/matmul": {"error": "Image not found."},
+                        f"{tmp_dir}/mnist": {"hash": "mnist"},
+                        f"{tmp_dir}/hello_world": {"hash": "hello_world"},
+                    },
+                )
+
+                # Single MLCube - the output format does not change.
+                result = CliRunner().invoke(inspect, ["--mlcube", f"{tmp_dir}/mnist", "--platform", "docker"])
+                self.assertEqual(result.exit_code, 0)
+                self.assertDictEqual(json.loads(result.output), {"hash": "mnist"})
+
+    def test_run_sweep(self) -> None:
+        _InputsRunner.inputs = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sweep_file = os.path.join(tmp_dir, "sweep.yaml")
+            with open(sweep_file, "wt") as file:
+                file.write("runs: [{args: {lr: 1}}]")
+            with patch("mlcube.__main__.parse_cli_args", side_effect=_parse_sweep_args):
+                args = ["--mlcube", tmp_dir, "--task", "train,evaluate", "--workspace", tmp_dir, "--sweep", sweep_file]
+                result = CliRunner().invoke(run, args)
+            self.assertEqual(result.exit_code, 0, result.output)
+            # Datasets are shared by all runs, while evaluate reads the model that train has written in this run.
+            self.assertListEqual(
+                _InputsRunner.inputs,
+                [("train", {"data": os.path.join(tmp_dir, "data")}), ("evaluate", {"model": "model/ckpt"})],
+            )
+        self.assertListEqual(sorted(r.task for r in RunHistory(self.history_db).query()), ["evaluate", "train"])
+
+    def test_prefetch_many(self) -> None:
+        _ImageRunner.preloaded = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for name in ("mnist", "hello_world", "matmul"):
+                os.makedirs(os.path.join(tmp_dir, name))
+
+            with patch("mlcube.__main__.parse_cli_args", side_effect=_parse_cli_args):
+                result: Result = CliRunner().invoke(
+                    prefetch, ["--mlcube", f"{tmp_dir}/*", "--platform", "docker,singularity", "-j", "3"]
+                )
+                self.assertEqual(result.exit_code, 1)
+                lines = result.output.splitlines()
+                self.assertEqual(len(lines), 8)
+                self.assertListEqual(lines[0].split(), ["MLCUBE", "PLATFORM", "STATUS", "SIZE", "TIME", "IMAGE"])
+                statuses = {(row.split()[0], row.split()[1]): row.split()[2] for row in lines[1:-1]}
+                self.assertDictEqual(
+                    statuses,
+                    {
+                        (f"{tmp_dir}/{name}", platform): status
+                        for name, status in (("hello_world", "exists"), ("matmul", "failed"), ("mnist", "fetched"))
+                        for platform in ("docker", "singularity")
+                    },
+                )
+                self.assertIn("2.0K", lines[1])
+                self.assertTrue(lines[-1].startswith("Prefetched 4 of 6 images"))
+                # Runners query state of all MLCubes at once (e.g., all local docker images with one call).
+                self.assertListEqual(
+                    _ImageRunner.preloaded, [["hello_world", "hello_world", "matmul", "matmul", "mnist", "mnist"]]
+                )
+
+                result = CliRunner().invoke(prefetch, ["--mlcube", f"{tmp_dir}/mnist"])
+                self.assertEqual(result.exit_code, 0)
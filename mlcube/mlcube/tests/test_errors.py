@@ -39,3 +39,11 @@ class TestErrors(TestCase):
             "MLCube Reference Runner runner failed to run MLCube.", "Long error description.",
             {'param_a': 'value_a', 'param_b': 1.2}
         )
+
+    def test_execution_error_describe_log_tail(self) -> None:
+        err = ExecutionError("Task failed.", code=1, log_tail=['epoch 1', 'out of memory'])
+        self.assertEqual(
+            err.describe(),
+            "ERROR:\n\tmessage: Task failed.\n\tcontext: {'code': 1}\n\tlast lines of output:\n\t\tepoch 1\n"
+            "\t\tout of memory"
+        )
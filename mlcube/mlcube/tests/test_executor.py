@@ -0,0 +1,219 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import typing as t
+from unittest import TestCase
+
+from omegaconf import OmegaConf
+
+from mlcube.config import TaskPolicy
+from mlcube.errors import ExecutionError, IllegalParameterValueError
+from mlcube.executor import TaskExecutor
+from mlcube.runner import Runner
+from mlcube.shell import Shell
+
+
+class _FlakyRunner(Runner):
+    """Runner that fails first `failures` attempts of each task."""
+
+    failures: int = 0
+    attempts: t.List[str] = []
+    teardowns: t.List[str] = []
+
+    def run(self) -> None:
+        _FlakyRunner.attempts.append(self.task)
+        if _FlakyRunner.attempts.count(self.task) <= _FlakyRunner.failures:
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Task failed.", code=3)
+
+    def teardown(self) -> None:
+        _FlakyRunner.teardowns.append(self.task)
+
+
+class _ShellRunner(Runner):
+    def run(self) -> None:
+        Shell.run(f'python -c "import time; time.sleep({self.mlcube.tasks[self.task].sleep})"')
+
+
+class _OutputRunner(Runner):
+    def run(self) -> None:
+        Shell.run('python -c "import sys; [print(idx) for idx in range(1000)]; sys.exit(3)"')
+
+
+class _AsyncRunner(_FlakyRunner):
+    async def arun(self) -> None:
+        await asyncio.sleep(self.mlcube.tasks[self.task].get("sleep", 0))
+        self.run()
+
+
+class _PrefetchRunner(_FlakyRunner):
+    """Runner that prefetches tasks with a command that runs for `prefetch_sleep` seconds."""
+
+    prefetched: t.List[str] = []
+
+    def prefetch(self) -> None:
+        prefetch_sleep = self.mlcube.tasks[self.task].get("prefetch_sleep", 0)
+        if prefetch_sleep < 0:
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Prefetch failed.")
+        Shell.run(f'python -c "import time; time.sleep({prefetch_sleep})"')
+        _PrefetchRunner.prefetched.append(self.task)
+
+    def run(self) -> None:
+        # Tasks start when their prefetch has completed.
+        if self.task != "download" and self.mlcube.tasks[self.task].get("prefetch_sleep", 0) >= 0:
+            assert self.task in _PrefetchRunner.prefetched, f"Task {self.task} has not been prefetched."
+        super().run()
+
+
+class TestTaskPolicy(TestCase):
+    def test_from_config(self) -> None:
+        self.assertEqual(TaskPolicy.from_config(None), TaskPolicy(None, 0, 5.0))
+        policy = TaskPolicy.from_config({"timeout": "30m", "retries": 2, "retry_backoff": 1})
+        self.assertEqual(policy, TaskPolicy(1800.0, 2, 1.0))
+        self.assertListEqual([policy.backoff(attempt) for attempt in (1, 2, 3)], [1.0, 2.0, 4.0])
+        self.assertEqual(TaskPolicy.from_config({"timeout": 90}).timeout, 90.0)
+        self.assertEqual(TaskPolicy.from_config({"timeout": "1.5h"}).timeout, 5400.0)
+
+    def test_invalid(self) -> None:
+        for task in ({"timeout": "soon"}, {"timeout": -1}, {"retries": -1}, {"retries": "3"}, {"retries": True}):
+            with self.assertRaises(IllegalParameterValueError, msg=f"task={task}"):
+                TaskPolicy.from_config(task, "train")
+
+
+class TestTaskExecutor(TestCase):
+    def setUp(self) -> None:
+        _FlakyRunner.failures, _FlakyRunner.attempts, _FlakyRunner.teardowns = 0, [], []
+        _PrefetchRunner.prefetched = []
+        self.delays: t.List[float] = []
+
+    def _mlcube(self, **task) -> OmegaConf:
+        return OmegaConf.create({"runner": {}, "tasks": {"download": task, "train": {}}})
+
+    def test_run(self) -> None:
+        TaskExecutor(_FlakyRunner, self._mlcube()).run(["download", "train"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download", "train"])
+
+    def test_retries(self) -> None:
+        _FlakyRunner.failures = 2
+        TaskExecutor(_FlakyRunner, self._mlcube(retries=2, retry_backoff=1), sleep=self.delays.append).run(["download"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download"] * 3)
+        self.assertListEqual(self.delays, [1.0, 2.0])
+
+    def test_retries_exhausted(self) -> None:
+        _FlakyRunner.failures = 5
+        executor = TaskExecutor(_FlakyRunner, self._mlcube(retries=1), sleep=self.delays.append)
+        with self.assertRaises(ExecutionError) as ctx:
+            executor.run(["download", "train"])
+        self.assertEqual(ctx.exception.context["code"], 3)
+        # The `train` task must not run after `download` has failed.
+        self.assertListEqual(_FlakyRunner.attempts, ["download"] * 2)
+
+    def test_teardown(self) -> None:
+        # Runners tear down once per run, after the last task or the task that has failed.
+        TaskExecutor(_FlakyRunner, self._mlcube()).run(["download", "train"])
+        self.assertListEqual(_FlakyRunner.teardowns, ["train"])
+        _FlakyRunner.failures = 5
+        with self.assertRaises(ExecutionError):
+            TaskExecutor(_FlakyRunner, self._mlcube()).run(["download", "train"])
+        self.assertListEqual(_FlakyRunner.teardowns, ["train", "train"])
+        _FlakyRunner.failures = 0
+        asyncio.run(TaskExecutor(_AsyncRunner, self._mlcube(), teardown=False).arun(["train"]))
+        self.assertListEqual(_FlakyRunner.teardowns, ["train", "train"])
+
+    def test_native_policy(self) -> None:
+        class _NativeRunner(_FlakyRunner):
+            NATIVE_TASK_POLICY = True
+
+        _FlakyRunner.failures = 1
+        with self.assertRaises(ExecutionError):
+            TaskExecutor(_NativeRunner, self._mlcube(retries=3), sleep=self.delays.append).run(["download"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download"])
+
+    def test_timeout(self) -> None:
+        executor = TaskExecutor(_ShellRunner, self._mlcube(sleep=30, timeout=0.5, retries=1), sleep=self.delays.append)
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError) as ctx:
+            executor.run(["download"])
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertTrue(ctx.exception.context["timeout"])
+        self.assertEqual(ctx.exception.context["code"], Shell.TIMEOUT_EXIT_CODE)
+        self.assertEqual(len(self.delays), 1)
+        self.assertIsNone(Shell.remaining_time())
+
+    def test_cancelled(self) -> None:
+        _FlakyRunner.failures = 1
+        cancelled = threading.Event()
+        executor = TaskExecutor(
+            _FlakyRunner, self._mlcube(retries=3), sleep=lambda _: cancelled.set(), cancelled=cancelled
+        )
+        with self.assertRaises(ExecutionError):
+            executor.run(["download", "train"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download"])
+        with self.assertRaises(ExecutionError) as ctx:
+            executor.run(["train"])
+        self.assertTrue(ctx.exception.context["cancelled"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download"])
+
+    def test_arun(self) -> None:
+        _FlakyRunner.failures = 1
+        asyncio.run(TaskExecutor(_AsyncRunner, self._mlcube(retries=1, retry_backoff=0)).arun(["download"]))
+        self.assertListEqual(_FlakyRunner.attempts, ["download", "download"])
+
+    def test_arun_timeout(self) -> None:
+        executor = TaskExecutor(_AsyncRunner, self._mlcube(sleep=30, timeout=0.5))
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError) as ctx:
+            asyncio.run(executor.arun(["download"]))
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertTrue(ctx.exception.context["timeout"])
+        self.assertListEqual(_FlakyRunner.attempts, [])
+
+    def test_task_log(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mlcube = OmegaConf.create({
+                "runner": {},
+                "runtime": {"workspace": tmp_dir},
+                "logs": {"tail_lines": 2},
+                "tasks": {"train": {"retries": 1}},
+            })
+            executor = TaskExecutor(_OutputRunner, mlcube, sleep=self.delays.append)
+            with self.assertRaises(ExecutionError) as ctx:
+                executor.run(["train"])
+            log_file = os.path.join(tmp_dir, "logs", "train.log")
+            self.assertEqual(ctx.exception.context["log_file"], log_file)
+            self.assertListEqual(ctx.exception.context["log_tail"], ["998", "999"])
+            with open(log_file) as stream:
+                # Output of both attempts is in the log file.
+                self.assertEqual(len(stream.read().splitlines()), 2000)
+
+            mlcube.logs.enabled = False
+            with self.assertRaises(ExecutionError) as ctx:
+                TaskExecutor(_OutputRunner, mlcube, sleep=self.delays.append).run(["train"])
+            self.assertNotIn("log_tail", ctx.exception.context)
+
+    def test_prefetch(self) -> None:
+        mlcube = OmegaConf.create({
+            "runner": {},
+            "tasks": {"download": {}, "train": {"prefetch_sleep": 0.5}, "evaluate": {"prefetch_sleep": -1}},
+        })
+        TaskExecutor(_PrefetchRunner, mlcube, prefetch=2).run(["download", "train", "evaluate"])
+        self.assertListEqual(_FlakyRunner.attempts, ["download", "train", "evaluate"])
+        # The first task is not prefetched, and failed prefetches do not fail tasks.
+        self.assertListEqual(_PrefetchRunner.prefetched, ["train"])
+
+        _FlakyRunner.attempts, _PrefetchRunner.prefetched = [], []
+        asyncio.run(TaskExecutor(_PrefetchRunner, mlcube, prefetch=1).arun(["download", "train"]))
+        self.assertListEqual(_FlakyRunner.attempts, ["download", "train"])
+        self.assertListEqual(_PrefetchRunner.prefetched, ["train"])
+
+    def test_prefetch_cancelled(self) -> None:
+        _FlakyRunner.failures = 1
+        mlcube = OmegaConf.create({"runner": {}, "tasks": {"download": {}, "train": {"prefetch_sleep": 30}}})
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError):
+            TaskExecutor(_PrefetchRunner, mlcube, prefetch=1).run(["download", "train"])
+        # The prefetch of the `train` task has been stopped when the `download` task failed.
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertListEqual(_FlakyRunner.attempts, ["download"])
+        self.assertListEqual(_PrefetchRunner.prefetched, [])
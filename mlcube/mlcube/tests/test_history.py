@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import time
+import typing as t
+from unittest import TestCase
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from omegaconf import OmegaConf
+
+from mlcube.__main__ import history
+from mlcube.errors import ExecutionError
+from mlcube.executor import TaskExecutor
+from mlcube.history import RunHistory, RunRecord, fingerprint
+from mlcube.runner import Runner
+
+
+class _ModelRunner(Runner):
+    """Runner that writes the `model` output file, and fails the `fail` task."""
+
+    def run(self) -> None:
+        if self.task == "fail":
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Task failed.", code=3)
+        with open(os.path.join(self.mlcube.runtime.workspace, "model.bin"), "w") as stream:
+            stream.write("weights")
+
+    def inspect(self, force: bool = False) -> t.Dict:
+        return {"hash": "sha256:0123456789abcdef"}
+
+
+def _record(task: str = "train", exit_code: int = 0, start_time: float = 1000.0, **kwargs) -> RunRecord:
+    values = dict(
+        id=None,
+        mlcube="/cubes/mnist",
+        name="mnist",
+        task=task,
+        platform="docker",
+        workspace="/cubes/mnist/workspace",
+        config_hash="c0ffee",
+        image="sha256:abc",
+        start_time=start_time,
+        end_time=start_time + 10,
+        exit_code=exit_code,
+        attempts=1,
+    )
+    values.update(kwargs)
+    return RunRecord(**values)
+
+
+class TestRunHistory(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.history = RunHistory(os.path.join(self.tmp_dir, "db", "history.db"))
+
+    def test_add_and_query(self) -> None:
+        first = self.history.add(_record(resources={"user_time": 1.5}, outputs={"model": "abc"}))
+        self.history.add(_record("evaluate", 2, 2000.0, image="sha256:def", error="Failed."))
+        self.history.add(_record(start_time=3000.0, platform="singularity", config_hash="beef"))
+
+        self.assertEqual(first.id, 1)
+        [record] = self.history.query(task="train", platform="docker")
+        self.assertEqual(record, first)
+        self.assertEqual(record.duration, 10.0)
+        self.assertDictEqual(record.outputs, {"model": "abc"})
+
+        self.assertListEqual([r.id for r in self.history.query()], [3, 2, 1])
+        self.assertListEqual([r.id for r in self.history.query(status="failed")], [2])
+        self.assertListEqual([r.id for r in self.history.query(image="def")], [2])
+        self.assertListEqual([r.id for r in self.history.query(since=1500.0, limit=1)], [3])
+        self.assertListEqual([r.id for r in self.history.query(mlcube="/cubes/mnist")], [3, 2, 1])
+        self.assertListEqual(self.history.query(mlcube="cifar"), [])
+        self.assertEqual(self.history.last_successful("mnist", "train").id, 3)
+        self.assertEqual(self.history.last_successful("mnist", "train", config_hash="c0ffee").id, 1)
+        self.assertIsNone(self.history.last_successful("mnist", "evaluate"))
+
+        table = RunHistory.table(self.history.query()).splitlines()
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table[0].startswith("ID"))
+        self.assertIn("failed", table[2])
+
+    def test_from_option(self) -> None:
+        self.assertIsNone(RunHistory.from_option("off"))
+        self.assertEqual(
+            RunHistory.from_option("workspace", self.tmp_dir).path, RunHistory.workspace_path(self.tmp_dir).resolve()
+        )
+        self.assertEqual(RunHistory.from_option(None).path, RunHistory.default_path().resolve())
+
+    def test_fingerprint(self) -> None:
+        self.assertIsNone(fingerprint(os.path.join(self.tmp_dir, "missing")))
+        data_dir = os.path.join(self.tmp_dir, "data")
+        os.makedirs(data_dir)
+        with open(os.path.join(data_dir, "train.csv"), "w") as stream:
+            stream.write("1,2,3\n")
+        dir_fingerprint = fingerprint(data_dir)
+        self.assertEqual(fingerprint(data_dir), dir_fingerprint)
+        with open(os.path.join(data_dir, "test.csv"), "w") as stream:
+            stream.write("4,5,6\n")
+        self.assertNotEqual(fingerprint(data_dir), dir_fingerprint)
+        self.assertNotEqual(fingerprint(os.path.join(data_dir, "train.csv")), fingerprint(data_dir))
+
+        # Files are fingerprinted by metadata, and are not read.
+        file_path = os.path.join(data_dir, "train.csv")
+        file_fingerprint = fingerprint(file_path)
+        with patch("builtins.open", side_effect=AssertionError("Output files must not be read.")):
+            self.assertEqual(fingerprint(file_path), file_fingerprint)
+        with open(file_path, "w") as stream:
+            stream.write("1,2,3,4\n")
+        self.assertNotEqual(fingerprint(file_path), file_fingerprint)
+
+    def test_task_executor(self) -> None:
+        mlcube = OmegaConf.create({
+            "name": "mnist",
+            "runner": {"runner": "model"},
+            "runtime": {"root": "/cubes/mnist", "workspace": self.tmp_dir},
+            "logs": {"enabled": False},
+            "tasks": {
+                "train": {"parameters": {"outputs": {"model": {"type": "file", "default": "model.bin"}}}},
+                "fail": {"retries": 1, "retry_backoff": 0, "parameters": {"outputs": {}}},
+            },
+        })
+        executor = TaskExecutor(_ModelRunner, mlcube, history=self.history, platform="local", sleep=lambda _: None)
+        executor.run(["train"])
+        with self.assertRaises(ExecutionError):
+            executor.run(["fail"])
+
+        failed, train = self.history.query()
+        self.assertEqual(train.platform, "local")
+        self.assertEqual(train.image, "sha256:0123456789abcdef")
+        self.assertEqual(train.outputs["model"], fingerprint(os.path.join(self.tmp_dir, "model.bin")))
+        self.assertEqual(train.attempts, 1)
+        self.assertEqual((failed.exit_code, failed.attempts, failed.outputs), (3, 2, {}))
+        self.assertIn("Task failed.", failed.error)
+
+    def test_cli(self) -> None:
+        self.history.add(_record(start_time=time.time() - 3600))
+        self.history.add(_record("evaluate", 2, time.time()))
+        db = self.history.path.as_posix()
+
+        result = CliRunner().invoke(history, ["--db", db, "--since", "2h", "--format", "json"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        runs = json.loads(result.output)
+        self.assertListEqual([(run["task"], run["status"]) for run in runs], [("evaluate", "failed"), ("train", "ok")])
+
+        result = CliRunner().invoke(history, ["--db", db, "--task", "train"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(result.output.splitlines()), 2)
+
+        result = CliRunner().invoke(history, ["--db", db, "--since", "yesterday"])
+        self.assertEqual(result.exit_code, 1)
@@ -0,0 +1,133 @@
+import json
+import os
+import pstats
+import tempfile
+import typing as t
+from unittest import TestCase
+from unittest.mock import patch
+
+from omegaconf import OmegaConf
+
+from mlcube import hooks
+from mlcube.errors import ConfigurationError, ExecutionError
+from mlcube.executor import TaskExecutor
+from mlcube.hooks import Hook, HookEvent, HostLoadHook, ProfileHook
+from mlcube.runner import Runner
+from mlcube.shell import Shell
+
+
+class _RecordingHook(Hook):
+    events: t.List[t.Tuple[str, str, t.Optional[str], bool]] = []
+
+    def before(self, event: HookEvent) -> None:
+        _RecordingHook.events.append(("before", event.stage, event.task, event.error is not None))
+
+    def after(self, event: HookEvent) -> None:
+        _RecordingHook.events.append(("after", event.stage, event.task, event.error is not None))
+        if event.stage == "generate_mounts_and_args":
+            raise RuntimeError("Hook errors must not fail tasks.")
+
+
+def get_hook_class() -> t.Type[Hook]:
+    return _RecordingHook
+
+
+class _MountsRunner(Runner):
+    def run(self) -> None:
+        Shell.generate_mounts_and_args(self.mlcube, self.task, make_dirs=False)
+        if self.task == "fail":
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Task failed.")
+
+
+class TestHooks(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+        self.mlcube = OmegaConf.create({
+            "runner": {"runner": "local"},
+            "runtime": {"workspace": self.tmp_dir},
+            "logs": {"enabled": False},
+            "tasks": {
+                "train": {"parameters": {"inputs": {}, "outputs": {}}},
+                "fail": {"parameters": {"inputs": {}, "outputs": {}}},
+            },
+        })
+        _RecordingHook.events = []
+
+    def _patch_env(self, **env: str) -> None:
+        _patch = patch.dict(os.environ, env)
+        _patch.start()
+        self.addCleanup(_patch.stop)
+
+    def test_stages(self) -> None:
+        self._patch_env(MLCUBE_HOOKS=__name__)
+        executor = TaskExecutor(_MountsRunner, self.mlcube, platform="local")
+        executor.run(["train"])
+        with self.assertRaises(ExecutionError):
+            executor.run(["fail"])
+        self.assertListEqual(
+            _RecordingHook.events,
+            [
+                ("before", "task", "train", False),
+                ("before", "generate_mounts_and_args", "train", False),
+                ("after", "generate_mounts_and_args", "train", False),
+                ("after", "task", "train", False),
+                ("before", "task", "fail", False),
+                ("before", "generate_mounts_and_args", "fail", False),
+                ("after", "generate_mounts_and_args", "fail", False),
+                ("after", "task", "fail", True),
+            ],
+        )
+
+    def test_event(self) -> None:
+        self._patch_env(MLCUBE_HOOKS="")
+        with hooks.stage("container", self.mlcube, "train", command=["docker", "run"]) as event:
+            event.data["exit_code"] = 0
+        self.assertEqual((event.stage, event.task, event.workspace), ("container", "train", self.tmp_dir))
+        self.assertDictEqual(event.data, {"command": ["docker", "run"], "exit_code": 0})
+
+    def test_load_hook(self) -> None:
+        self.assertIsInstance(hooks.load_hook("host_load"), HostLoadHook)
+        self.assertIsInstance(hooks.load_hook(__name__), _RecordingHook)
+        for name in ("mlcube.no_such_module", "mlcube.errors"):
+            with self.assertRaises(ConfigurationError):
+                hooks.load_hook(name)
+        self._patch_env(MLCUBE_PROFILER="yappi")
+        with self.assertRaises(ConfigurationError):
+            hooks.load_hook("profile")
+
+    def test_invalid_hooks(self) -> None:
+        # Hooks that can't be loaded are skipped, do not fail stages and are not loaded again for each stage.
+        self._patch_env(MLCUBE_HOOKS=f"host_load,mlcube.no_such_module,profile,{__name__}", MLCUBE_PROFILER="yappi")
+        with patch("mlcube.hooks.load_hook", wraps=hooks.load_hook) as load_hook:
+            with self.assertLogs("mlcube.hooks", level="ERROR") as logs:
+                active = hooks.active_hooks()
+            self.assertListEqual([type(hook) for hook in active], [HostLoadHook, _RecordingHook])
+            self.assertEqual(len(logs.records), 2)
+            self._patch_env(MLCUBE_HOST_LOAD_FILE=os.path.join(self.tmp_dir, "host_load.jsonl"))
+            for _ in range(2):
+                with hooks.stage("task", self.mlcube, "train"):
+                    pass
+            self.assertEqual(load_hook.call_count, 4)
+        self.assertEqual(len(_RecordingHook.events), 4)
+
+    def test_profile_hook(self) -> None:
+        self._patch_env(MLCUBE_PROFILE_DIR=os.path.join(self.tmp_dir, "profiles"), MLCUBE_PROFILER="cprofile")
+        hook = ProfileHook()
+        event = HookEvent("task", "local", "train", self.mlcube, 0.0, data={})
+        hook.before(event)
+        sum(range(1000))
+        hook.after(event._replace(duration=1.0))
+        self.assertTrue(event.data["profile"].startswith(os.path.join(self.tmp_dir, "profiles", "task-train-")))
+        self.assertGreater(pstats.Stats(event.data["profile"]).total_calls, 0)
+
+    def test_host_load_hook(self) -> None:
+        hook = HostLoadHook()
+        event = HookEvent("sync_workspace", "local", "train", self.mlcube, 0.0, data={})
+        hook.before(event)
+        hook.after(event._replace(duration=0.5))
+        with open(os.path.join(self.tmp_dir, ".mlcube", "host_load.jsonl")) as stream:
+            records = [json.loads(line) for line in stream]
+        self.assertListEqual([(r["event"], r["duration"]) for r in records], [("before", None), ("after", 0.5)])
+        self.assertEqual(records[0]["cpu_count"], os.cpu_count())
@@ -0,0 +1,83 @@
+import gzip
+import os
+import tempfile
+from unittest import TestCase
+
+from mlcube.config import LogPolicy
+from mlcube.errors import ExecutionError, IllegalParameterValueError
+from mlcube.logs import TaskLog
+
+
+class TestLogPolicy(TestCase):
+    def test_from_config(self) -> None:
+        self.assertEqual(LogPolicy.from_config(None), LogPolicy())
+        policy = LogPolicy.from_config({"enabled": False, "max_size": "1.5K", "backups": 0, "tail_lines": 10})
+        self.assertEqual(policy, LogPolicy(False, 1536, 0, True, 10))
+        self.assertEqual(LogPolicy.from_config({"max_size": "64MiB"}).max_size, 64 * 1024 ** 2)
+        self.assertEqual(LogPolicy.from_config({"max_size": 100}).max_size, 100)
+
+    def test_invalid(self) -> None:
+        for logs in ({"max_size": "big"}, {"max_size": 0}, {"backups": -1}, {"tail_lines": "10"}, {"compress": 1}):
+            with self.assertRaises(IllegalParameterValueError, msg=f"logs={logs}"):
+                LogPolicy.from_config(logs)
+
+
+class TestTaskLog(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = os.path.join(tmp_dir.name, "logs", "train.log")
+
+    def _read(self, path: str) -> bytes:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rb") as stream:
+            return stream.read()
+
+    def test_tail(self) -> None:
+        with TaskLog(self.path, LogPolicy(tail_lines=3), echo=False) as log:
+            for idx in range(1000):
+                log.write(f"line {idx}\n".encode())
+            log.write(b"epoch 1: 10%\repoch 1: 100%\nerr", TaskLog.STDERR)
+            log.write(b"or\n", TaskLog.STDERR)
+            log.write(b"partial")
+        self.assertListEqual(log.tail(), ["epoch 1: 100%", "error", "partial"])
+        self.assertEqual(log.bytes_written, len(self._read(self.path)))
+
+    def test_long_lines(self) -> None:
+        with TaskLog(self.path, LogPolicy(tail_lines=2), echo=False) as log:
+            for _ in range(100):
+                log.write(b"x" * TaskLog.CHUNK_SIZE)
+            log.write(b"end\n")
+        [line] = log.tail()
+        self.assertEqual(len(line), TaskLog.MAX_LINE_LENGTH)
+        self.assertTrue(line.endswith("xend"))
+
+    def test_rotation(self) -> None:
+        policy = LogPolicy(max_size=100, backups=2, compress=True)
+        for run in range(2):
+            with TaskLog(self.path, policy, echo=False) as log:
+                for idx in range(5):
+                    log.write(f"run {run} chunk {idx} ".encode() + b"." * 30 + b"\n")
+        # Each file has two chunks at most, and the previous run has been rotated when the second run started.
+        self.assertTrue(self._read(self.path).startswith(b"run 1 chunk 4 "))
+        self.assertTrue(self._read(self.path + ".1.gz").startswith(b"run 1 chunk 2 "))
+        self.assertTrue(self._read(self.path + ".2.gz").startswith(b"run 1 chunk 0 "))
+        self.assertListEqual(sorted(os.listdir(os.path.dirname(self.path))), ["train.log", "train.log.1.gz",
+                                                                              "train.log.2.gz"])
+
+    def test_rotation_uncompressed(self) -> None:
+        with TaskLog(self.path, LogPolicy(max_size=10, backups=1, compress=False), echo=False) as log:
+            for idx in range(3):
+                log.write(f"chunk {idx}\n".encode())
+        self.assertEqual(self._read(self.path), b"chunk 2\n")
+        self.assertEqual(self._read(self.path + ".1"), b"chunk 1\n")
+        self.assertFalse(os.path.exists(self.path + ".2"))
+
+    def test_attach(self) -> None:
+        err = ExecutionError("Task failed.")
+        self.assertNotIn("log_tail", TaskLog(self.path, echo=False).attach(err).context)
+        with TaskLog(self.path, echo=False) as log:
+            log.write(b"out of memory\n")
+        log.attach(err)
+        self.assertEqual(err.context["log_file"], self.path)
+        self.assertListEqual(err.context["log_tail"], ["out of memory"])
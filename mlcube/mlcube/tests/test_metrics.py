@@ -0,0 +1,110 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from omegaconf import OmegaConf
+
+from mlcube import metrics
+from mlcube.errors import ExecutionError
+from mlcube.executor import TaskExecutor
+from mlcube.metrics import Registry
+from mlcube.runner import Runner
+
+
+class _FailRunner(Runner):
+    def run(self) -> None:
+        if self.task == "fail":
+            raise ExecutionError.mlcube_run_error(self.__class__.__name__, "Task failed.", code=3)
+
+
+class TestMetrics(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = tmp_dir.name
+
+    @staticmethod
+    def _registry() -> Registry:
+        registry = Registry()
+        registry.counter("mlcube_tasks", "Number of tasks.", ("platform", "task"))
+        registry.histogram("mlcube_task_duration_seconds", "Task durations.", ("task",), buckets=(1, 10))
+        return registry
+
+    def test_render(self) -> None:
+        registry = Registry()
+        tasks = registry.counter("mlcube_tasks", "Number of tasks.", ("platform", "task"))
+        durations = registry.histogram("mlcube_task_duration_seconds", "Task durations.", ("task",), buckets=(10, 1))
+        with metrics.labels(platform="docker", task="train"):
+            tasks.inc()
+            tasks.inc(2, task="evaluate")
+            durations.observe(0.5)
+            durations.observe(5)
+        self.assertEqual(tasks.value(platform="docker", task="train"), 1)
+        self.assertEqual(durations.count(task="train"), 2)
+        with self.assertRaises(ValueError):
+            tasks.inc(-1)
+        with self.assertRaises(ValueError):
+            tasks.inc(status="ok")
+        with self.assertRaises(ValueError):
+            registry.counter("mlcube_tasks", "Duplicate.")
+
+        self.assertListEqual(
+            registry.render().splitlines(),
+            [
+                "# HELP mlcube_tasks_total Number of tasks.",
+                "# TYPE mlcube_tasks_total counter",
+                'mlcube_tasks_total{platform="docker",task="train"} 1',
+                'mlcube_tasks_total{platform="docker",task="evaluate"} 2',
+                "# HELP mlcube_task_duration_seconds Task durations.",
+                "# TYPE mlcube_task_duration_seconds histogram",
+                'mlcube_task_duration_seconds_bucket{task="train",le="1"} 1',
+                'mlcube_task_duration_seconds_bucket{task="train",le="10"} 2',
+                'mlcube_task_duration_seconds_bucket{task="train",le="+Inf"} 2',
+                'mlcube_task_duration_seconds_sum{task="train"} 5.5',
+                'mlcube_task_duration_seconds_count{task="train"} 2',
+            ],
+        )
+        openmetrics = registry.render(openmetrics=True)
+        self.assertIn("# TYPE mlcube_tasks counter", openmetrics)
+        self.assertTrue(openmetrics.endswith("# EOF\n"))
+
+    def test_parse(self) -> None:
+        samples = Registry.parse(
+            '# TYPE mlcube_tasks_total counter\nmlcube_tasks_total{task="a b"} 3\nmlcube_up 1 1700000000\nbad line x\n'
+        )
+        self.assertDictEqual(samples, {("mlcube_tasks_total", '{task="a b"}'): 3.0, ("mlcube_up", ""): 1.0})
+
+    def test_write_textfile(self) -> None:
+        path = os.path.join(self.tmp_dir, "textfile", "mlcube.prom")
+        first, second = self._registry(), self._registry()
+        first._families["mlcube_tasks"].inc(platform="docker", task="train")
+        first.write_textfile(path)
+        second._families["mlcube_tasks"].inc(platform="docker", task="train")
+        second._families["mlcube_task_duration_seconds"].observe(2, task="train")
+        second.write_textfile(path)
+        # Values that have already been written are not added again.
+        first._families["mlcube_tasks"].inc(platform="docker", task="train")
+        first.write_textfile(path)
+
+        with open(path) as stream:
+            samples = Registry.parse(stream.read())
+        self.assertEqual(samples[("mlcube_tasks_total", '{platform="docker",task="train"}')], 3)
+        self.assertEqual(samples[("mlcube_task_duration_seconds_bucket", '{task="train",le="10"}')], 1)
+        self.assertEqual(samples[("mlcube_task_duration_seconds_sum", '{task="train"}')], 2)
+        self.assertListEqual(sorted(os.listdir(os.path.dirname(path))), ["mlcube.prom", "mlcube.prom.lock"])
+
+    def test_task_executor(self) -> None:
+        mlcube = OmegaConf.create({
+            "runner": {"runner": "local"},
+            "tasks": {"train": {"parameters": {}}, "fail": {"parameters": {}}},
+        })
+        labels = {"platform": "metrics-test", "task": "fail"}
+        executor = TaskExecutor(_FailRunner, mlcube, platform="metrics-test", sleep=lambda _: None)
+        executor.run(["train"])
+        with self.assertRaises(ExecutionError):
+            executor.run(["fail"])
+
+        self.assertEqual(metrics.TASKS.value(platform="metrics-test", task="train", status="ok"), 1)
+        self.assertEqual(metrics.TASKS.value(status="failed", **labels), 1)
+        self.assertEqual(metrics.TASK_FAILURES.value(error="ExecutionError", **labels), 1)
+        self.assertEqual(metrics.TASK_DURATION.count(status="failed", **labels), 1)
@@ -0,0 +1,171 @@
+import json
+import os
+import tempfile
+import typing as t
+from unittest import TestCase
+
+from omegaconf import OmegaConf
+
+from mlcube.config import MountPolicy, ParameterType
+from mlcube.errors import ConfigurationError, IllegalParameterValueError
+from mlcube.mounts import Mount, MountPlan
+
+
+class TestMountPlan(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.workspace = os.path.join(tmp_dir.name, "workspace")
+        os.makedirs(os.path.join(self.workspace, "data"))
+        self.mlcube = OmegaConf.create({
+            "runtime": {"workspace": self.workspace},
+            "tasks": {
+                "train": {
+                    "parameters": {
+                        "inputs": {
+                            "data_dir": {"type": "unknown", "default": "data"},
+                            "config": {"type": "file", "default": "config/train.yaml", "opts": "ro"},
+                            "hparams": {"type": "file", "default": "config/hparams.yaml"},
+                        },
+                        "outputs": {"model_dir": {"type": "directory", "default": "model", "opts": "rw"}},
+                    }
+                }
+            },
+        })
+
+    def test_compile(self) -> None:
+        plan = MountPlan.compile(self.mlcube, "train")
+        ws = self.workspace
+        self.assertTupleEqual(
+            plan.mounts,
+            (
+                Mount(f"{ws}/data", "/mlcube_io0"),
+                Mount(f"{ws}/config", "/mlcube_io1", "ro"),
+                Mount(f"{ws}/model", "/mlcube_io2", "rw"),
+            ),
+        )
+        self.assertTupleEqual(
+            plan.args,
+            (
+                "train",
+                "--data_dir=/mlcube_io0",
+                "--config=/mlcube_io1/train.yaml",
+                "--hparams=/mlcube_io1/hparams.yaml",
+                "--model_dir=/mlcube_io2",
+            ),
+        )
+        self.assertEqual(plan.parameters[0].type, ParameterType.DIRECTORY)
+        # Unknown types are resolved in the plan, not in the MLCube configuration.
+        self.assertEqual(self.mlcube.tasks.train.parameters.inputs.data_dir.type, "unknown")
+        self.assertDictEqual(plan.mount_options(), {f"{ws}/config": "ro", f"{ws}/model": "rw"})
+
+    def test_cache(self) -> None:
+        plan = MountPlan.compile(self.mlcube, "train")
+        self.assertIs(MountPlan.compile(self.mlcube.copy(), "train"), plan)
+        self.mlcube.runtime.workspace = os.path.join(self.workspace, "..", "other")
+        with self.assertRaises(ConfigurationError):
+            # The `data_dir` type can't be identified in the new workspace.
+            MountPlan.compile(self.mlcube, "train")
+
+    def test_serialize(self) -> None:
+        plan = MountPlan.compile(self.mlcube, "train")
+        self.assertEqual(MountPlan.from_dict(json.loads(json.dumps(plan.to_dict()))), plan)
+
+    def test_make_dirs(self) -> None:
+        plan = MountPlan.compile(self.mlcube, "train")
+        plan.make_dirs()
+        for name in ("config", "model"):
+            self.assertTrue(os.path.isdir(os.path.join(self.workspace, name)))
+        self.assertFalse(os.path.exists(os.path.join(self.workspace, "config", "train.yaml")))
+
+    def test_make_nested_dirs(self) -> None:
+        outputs = {
+            "model_dir": {"type": "directory", "default": "model"},
+            "ckpt": {"type": "directory", "default": "model/ckpt"},
+            "log_file": {"type": "file", "default": "model/logs/train.log"},
+        }
+        plan = self._plan({}, {}, outputs)
+        self.assertEqual(len(plan.mounts), 1)
+        self.assertIn("--ckpt=/mlcube_io0/ckpt", plan.args)
+        plan.make_dirs()
+        # Directories inside mounted directories are created too.
+        for name in ("model/ckpt", "model/logs"):
+            self.assertTrue(os.path.isdir(os.path.join(self.workspace, name)), name)
+        self.assertEqual(MountPlan.from_dict(json.loads(json.dumps(plan.to_dict()))), plan)
+
+    def _plan(self, mounts: t.Dict, inputs: t.Dict, outputs: t.Dict) -> MountPlan:
+        self.mlcube.mounts = mounts
+        self.mlcube.tasks.train.parameters = {"inputs": inputs, "outputs": outputs}
+        return MountPlan.compile(self.mlcube, "train")
+
+    def test_dedupe(self) -> None:
+        inputs = {
+            "data_dir": {"type": "directory", "default": "data"},
+            "train_file": {"type": "file", "default": "data/train/part-0.csv"},
+            "labels": {"type": "file", "default": "data/labels.csv"},
+        }
+        outputs = {"log_dir": {"type": "directory", "default": "data/logs"}}
+        plan = self._plan({}, inputs, outputs)
+        ws = self.workspace
+        self.assertTupleEqual(plan.mounts, (Mount(f"{ws}/data", "/mlcube_io0"),))
+        self.assertListEqual(
+            list(plan.args[1:]),
+            [
+                "--data_dir=/mlcube_io0",
+                "--train_file=/mlcube_io0/train/part-0.csv",
+                "--labels=/mlcube_io0/labels.csv",
+                "--log_dir=/mlcube_io0/logs",
+            ],
+        )
+        self.assertEqual(len(self._plan({"dedupe": False}, inputs, outputs).mounts), 3)
+
+    def test_coalesce(self) -> None:
+        inputs = {
+            "data": {"type": "file", "default": "inputs/data/train.csv", "opts": "ro"},
+            "config": {"type": "file", "default": "inputs/config/train.yaml", "opts": "ro"},
+            "cache": {"type": "directory", "default": "/tmp/mlcube-test-cache"},
+        }
+        outputs = {
+            "model_dir": {"type": "directory", "default": "out/model"},
+            "log_dir": {"type": "directory", "default": "out/logs", "opts": "rw"},
+        }
+        plan = self._plan({"coalesce": True}, inputs, outputs)
+        ws = self.workspace
+        self.assertTupleEqual(
+            plan.mounts,
+            (
+                Mount(f"{ws}/inputs", "/mlcube_io0", "ro"),
+                Mount("/tmp/mlcube-test-cache", "/mlcube_io1"),
+                Mount(f"{ws}/out", "/mlcube_io2", "rw"),
+            ),
+        )
+        self.assertIn("--config=/mlcube_io0/config/train.yaml", plan.args)
+        self.assertIn("--model_dir=/mlcube_io2/model", plan.args)
+        table = plan.table().splitlines()
+        self.assertEqual(len(table), 4)
+        self.assertTrue(table[1].startswith("/mlcube_io0") and table[1].endswith("data,config"))
+
+        # Read-write directories are not coalesced into the workspace that contains read-only directories.
+        outputs["model_dir"]["default"] = "model"
+        self.assertEqual(len(self._plan({"coalesce": True}, inputs, outputs).mounts), 4)
+
+    def test_conflicts(self) -> None:
+        inputs = {"train": {"type": "file", "default": "data/train.csv", "opts": "ro"}}
+        outputs = {"stats": {"type": "file", "default": "data/stats.json", "opts": "rw"}}
+        self.assertEqual(self._plan({}, inputs, outputs).mounts[0].opts, "rw")
+        with self.assertRaises(ConfigurationError):
+            self._plan({"conflicts": "error"}, inputs, outputs)
+
+        outputs = {"data": {"type": "directory", "default": "data"}}
+        inputs = {"train": {"type": "directory", "default": "data/train", "opts": "ro"}}
+        self.assertEqual(len(self._plan({}, inputs, outputs).mounts), 2)
+        with self.assertRaises(ConfigurationError):
+            self._plan({"conflicts": "error"}, inputs, outputs)
+
+    def test_policy(self) -> None:
+        self.assertEqual(MountPolicy.from_config(None), MountPolicy())
+        policy = MountPolicy.from_config({"coalesce": True, "conflicts": "error"})
+        self.assertEqual(policy, MountPolicy(True, True, "error"))
+        for mounts in ({"dedupe": "yes"}, {"coalesce": 1}, {"conflicts": "ro"}):
+            with self.assertRaises(IllegalParameterValueError, msg=f"mounts={mounts}"):
+                MountPolicy.from_config(mounts)
@@ -0,0 +1,112 @@
+import os
+import threading
+import typing as t
+from unittest.mock import patch
+
+from mlcube.errors import ExecutionError
+from mlcube.server import Client, MLCubeService, Server, _UnixHTTPConnection
+from mlcube.tests.echo_runner import EchoRunner, EchoRunnerTestCase
+
+
+class TestServer(EchoRunnerTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.service = MLCubeService(max_jobs=2)
+        self.server = Server(os.path.join(self.tmp_dir, "server.sock"), self.service)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+
+        def _stop_server() -> None:
+            self.server.shutdown()
+            self.server.server_close()
+            thread.join()
+
+        self.addCleanup(_stop_server)
+        self.client = Client(self.server.socket_path, timeout=30)
+
+    def test_ping(self) -> None:
+        self.assertTrue(self.client.ping())
+        self.assertFalse(Client(self.server.socket_path + ".missing").ping())
+
+    def test_socket_in_use(self) -> None:
+        with self.assertRaises(ExecutionError):
+            Server(self.server.socket_path, self.service)
+
+    def test_run(self) -> None:
+        workspace = os.path.join(self.mlcube_dir, "workspace-1")
+        for _ in range(2):
+            response = self.client.run(self.mlcube_dir, "echo", tasks=["hello"], workspace=workspace)
+            self.assertEqual(response["status"], "ok")
+            self.assertEqual(response["exit_code"], 0)
+        self.assertListEqual(EchoRunner.runs, [("hello", "Hello", "name.txt", workspace)] * 2)
+        # The second request reuses the effective MLCube configuration.
+        self.assertEqual(len(self.service._configs), 1)
+
+    def test_config_parsed_without_lock(self) -> None:
+        from mlcube.server import parse_cli_args
+
+        locked: t.List[bool] = []
+
+        def _parse_cli_args(*args, **kwargs):
+            # Other requests (e.g., those with cached configurations) are not blocked while configurations are parsed.
+            locked.append(self.service._lock.locked())
+            return parse_cli_args(*args, **kwargs)
+
+        with patch("mlcube.server.parse_cli_args", side_effect=_parse_cli_args):
+            self.assertEqual(self.client.run(self.mlcube_dir, "echo", tasks=["hello"])["status"], "ok")
+        self.assertListEqual(locked, [False])
+        self.assertEqual(len(self.service._configs), 1)
+
+    def test_run_failed(self) -> None:
+        response = self.client.run(self.mlcube_dir, "echo", tasks=["fail"])
+        self.assertEqual(response["status"], "failed")
+        self.assertEqual(response["exit_code"], 3)
+        self.assertEqual(response["context"]["code"], 3)
+
+        response = self.client.run(self.mlcube_dir, "echo", tasks=["train"])
+        self.assertEqual(response["status"], "failed")
+        self.assertIn("Unknown tasks", response["error"])
+
+        with self.assertRaises(ExecutionError) as ctx:
+            self.client._request("POST", "/delete", {})
+        self.assertEqual(ctx.exception.context["status"], 404)
+
+    def test_concurrent_runs(self) -> None:
+        responses: t.List[t.Dict] = []
+        threads = [
+            threading.Thread(target=lambda: responses.append(self.client.run(self.mlcube_dir, "echo", tasks=["wait"])))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Both requests pass the barrier only if they run concurrently.
+        self.assertListEqual([r["status"] for r in responses], ["ok", "ok"])
+
+    def test_inspect(self) -> None:
+        response = self.client.inspect(self.mlcube_dir, "echo", force=True)
+        self.assertEqual(response["status"], "ok")
+        self.assertDictEqual(response["result"], {"name": "echo", "greeting": "Hello", "force": True})
+
+    def test_metrics(self) -> None:
+        self.client.run(self.mlcube_dir, "echo", tasks=["fail"])
+
+        def _get_metrics(headers: t.Dict[str, str]) -> t.Tuple[str, str]:
+            connection = _UnixHTTPConnection(self.server.socket_path, 30)
+            try:
+                connection.request("GET", "/metrics", headers=headers)
+                response = connection.getresponse()
+                return response.getheader("Content-Type"), response.read().decode()
+            finally:
+                connection.close()
+
+        content_type, text = _get_metrics({})
+        self.assertTrue(content_type.startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE mlcube_tasks_total counter", text)
+        self.assertIn('mlcube_task_failures_total{platform="echo",task="fail",error="ExecutionError"}', text)
+
+        content_type, text = _get_metrics({"Accept": "application/openmetrics-text; version=1.0.0"})
+        self.assertTrue(content_type.startswith("application/openmetrics-text"))
+        self.assertIn("# TYPE mlcube_tasks counter", text)
+        self.assertTrue(text.endswith("# EOF\n"))
@@ -1,11 +1,20 @@
+import asyncio
+import os
+import signal
+import subprocess
+import tempfile
+import threading
+import time
 import typing as t
+import unittest
 from unittest import TestCase
 
 from omegaconf import DictConfig, OmegaConf
 
 from mlcube.config import MountType
 from mlcube.errors import ExecutionError
-from mlcube.shell import Shell
+from mlcube.logs import TaskLog
+from mlcube.shell import Interrupted, Shell
 
 
 class TestShell(TestCase):
@@ -31,6 +40,126 @@ class TestShell(TestCase):
         with self.assertRaises(ExecutionError):
             _ = Shell.run('python -c "print(message)"', on_error="raise")
 
+    @unittest.skipIf(os.name == "nt", reason="POSIX signals are required.")
+    def test_run_interrupted(self) -> None:
+        # MLCube receives SIGTERM while a long-running command is executing.
+        timer = threading.Timer(0.5, os.kill, args=(os.getpid(), signal.SIGTERM))
+        start = time.monotonic()
+        with self.assertRaises(Interrupted) as ctx:
+            with Shell.interrupt_on_signals():
+                timer.start()
+                Shell.run('python -c "import time; time.sleep(30)"')
+        self.assertEqual(ctx.exception.signum, signal.SIGTERM)
+        # The command has been terminated, not waited for.
+        self.assertLess(time.monotonic() - start, 10)
+        # Original signal handler has been restored.
+        self.assertIs(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+
+    def test_run_cancellation(self) -> None:
+        cancelled = threading.Event()
+        timer = threading.Timer(0.5, cancelled.set)
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError) as ctx:
+            with Shell.cancellation(cancelled), Shell.deadline(60):
+                self.assertEqual(Shell.run('python -c "import sys; sys.exit(0)"'), 0)
+                timer.start()
+                Shell.run('python -c "import time; time.sleep(30)"')
+        # The command has been terminated, not waited for.
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertTrue(ctx.exception.context["cancelled"])
+        self.assertFalse(Shell.cancelled())
+
+    def test_terminate(self) -> None:
+        # This process ignores SIGTERM and must be killed after the grace period.
+        script = "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(30)"
+        process = subprocess.Popen(["python", "-c", script])
+        time.sleep(0.5)
+        Shell.terminate(process, grace_period=0.5)
+        self.assertIsNotNone(process.poll())
+
+    def test_arun(self) -> None:
+        self.assertEqual(asyncio.run(Shell.arun("python -c 'import sys; sys.exit(0)'")), 0)
+        self.assertEqual(asyncio.run(Shell.arun("python -c 'import sys; sys.exit(3)'", on_error="ignore")), 3)
+        with self.assertRaises(ExecutionError):
+            asyncio.run(Shell.arun("python -c 'import sys; sys.exit(3)'"))
+
+    def test_arun_deadline(self) -> None:
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError) as ctx:
+            with Shell.deadline(0.5):
+                asyncio.run(Shell.arun('python -c "import time; time.sleep(30)"'))
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(ctx.exception.context["code"], Shell.TIMEOUT_EXIT_CODE)
+
+    def test_arun_cancelled(self) -> None:
+        async def _run() -> None:
+            task = asyncio.ensure_future(Shell.arun('python -c "import time; time.sleep(30)"'))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            await task
+
+        start = time.monotonic()
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(_run())
+        # The command has been terminated, not waited for.
+        self.assertLess(time.monotonic() - start, 10)
+
+    def test_arun_cancellation(self) -> None:
+        cancelled = threading.Event()
+        cancelled.set()
+        with self.assertRaises(ExecutionError) as ctx:
+            with Shell.cancellation(cancelled):
+                asyncio.run(Shell.arun('python -c "import sys; sys.exit(0)"'))
+        self.assertTrue(ctx.exception.context["cancelled"])
+
+        async def _run() -> None:
+            task = asyncio.ensure_future(Shell.arun('python -c "import time; time.sleep(30)"'))
+            await asyncio.sleep(0.5)
+            # Commands started by `Shell.arun` are stopped by `Shell.terminate_all` (e.g., from other threads).
+            await Shell.in_thread(Shell.terminate_all, signal.SIGTERM, 5)
+            await task
+
+        start = time.monotonic()
+        with self.assertRaises(ExecutionError) as ctx:
+            asyncio.run(_run())
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(ctx.exception.context["status"], "signalled")
+
+    def test_in_thread_cancelled(self) -> None:
+        results: t.List[str] = []
+
+        def _run() -> None:
+            try:
+                Shell.run('python -c "import time; time.sleep(30)"')
+            except ExecutionError as err:
+                results.append("cancelled" if err.context.get("cancelled") else "failed")
+
+        async def _run_and_cancel() -> None:
+            task = asyncio.ensure_future(Shell.in_thread(_run))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            await task
+
+        start = time.monotonic()
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(_run_and_cancel())
+        # The command has been stopped, and the function has returned before cancellation completed.
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertListEqual(results, ["cancelled"])
+
+    def test_capture(self) -> None:
+        script = "import sys; print('to stdout'); print('to stderr', file=sys.stderr); sys.exit(2)"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = TaskLog(os.path.join(tmp_dir, "task.log"), echo=False)
+            with Shell.capture(log):
+                self.assertEqual(Shell.run(f'python -c "{script}"', on_error="ignore"), 2)
+                self.assertEqual(asyncio.run(Shell.arun(f'python -c "{script}"', on_error="ignore")), 2)
+            self.assertIsNone(Shell.task_log())
+            log.close()
+            self.assertListEqual(sorted(log.tail()), ["to stderr"] * 2 + ["to stdout"] * 2)
+            with open(log.path) as stream:
+                self.assertEqual(len(stream.read().splitlines()), 4)
+
     def test_run_and_capture_output(self) -> None:
         exit_code, version_str = Shell.run_and_capture_output(["python", "--version"])
         self.assertEqual(
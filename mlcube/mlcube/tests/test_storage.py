@@ -0,0 +1,200 @@
+import os
+import tempfile
+import threading
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from omegaconf import OmegaConf
+
+from mlcube.errors import ConfigurationError, MLCubeError
+from mlcube.mounts import MountPlan
+from mlcube.shell import Shell
+from mlcube.storage import HTTPStorage, LocalStorage, Storage, StorageManager, local_path, parse_uri
+from mlcube.store import ContentStore
+
+
+class _ObjectStoreHandler(BaseHTTPRequestHandler):
+    """In-memory stand-in for an object storage: HEAD, GET (with ranges) and PUT."""
+
+    objects: t.Dict[str, bytes] = {}
+    requests: t.List[t.Tuple[str, str, t.Optional[str]]] = []
+
+    def log_message(self, *args: t.Any) -> None:
+        pass
+
+    def _object(self) -> t.Optional[bytes]:
+        _ObjectStoreHandler.requests.append((self.command, self.path, self.headers.get("Range", None)))
+        data = self.objects.get(self.path, None)
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return data
+
+    def do_HEAD(self) -> None:
+        data = self._object()
+        if data is not None:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", f'"{hash(data)}"')
+            self.end_headers()
+
+    def do_GET(self) -> None:
+        data = self._object()
+        if data is not None:
+            start, end = self.headers["Range"][len("bytes="):].split("-")
+            chunk = data[int(start):int(end) + 1]
+            self.send_response(206)
+            self.send_header("Content-Length", str(len(chunk)))
+            self.end_headers()
+            self.wfile.write(chunk)
+
+    def do_PUT(self) -> None:
+        _ObjectStoreHandler.requests.append((self.command, self.path, None))
+        self.objects[self.path] = self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class TestStorage(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.tmp_dir = Path(tmp_dir.name)
+        self.workspace = (self.tmp_dir / "workspace").as_posix()
+        self.store = ContentStore(self.tmp_dir / "store")
+
+        self.data = self.tmp_dir / "data"
+        (self.data / "mnist").mkdir(parents=True)
+        (self.data / "mnist" / "train.csv").write_bytes(b"1,2\n" * 1000)
+        (self.data / "mnist" / "test.csv").write_bytes(b"3,4\n")
+        (self.data / "mnist" / "empty.txt").write_bytes(b"")
+
+    def _manager(self, **config: t.Any) -> StorageManager:
+        config = {"local": {"uri": self.data.as_uri(), "chunk_size": 512, "jobs": 4}, **config}
+        return StorageManager(OmegaConf.create(config), store=self.store)
+
+    def test_parse_uri(self) -> None:
+        self.assertEqual(parse_uri("storage:datasets/mnist/train/"), ("datasets", "mnist/train"))
+        self.assertEqual(parse_uri(" storage:datasets"), ("datasets", ""))
+        for uri in ("storage:", "storage:datasets/../secrets", "/data", "storage:datasets/a//b"):
+            with self.assertRaises(ConfigurationError, msg=uri):
+                parse_uri(uri)
+        self.assertEqual(local_path("/ws", "storage:datasets/mnist"), "/ws/.mlcube/storage/datasets/mnist")
+
+    def test_create(self) -> None:
+        self.assertIsInstance(Storage.create("a", OmegaConf.create({"uri": "/data"})), LocalStorage)
+        self.assertIsInstance(Storage.create("a", OmegaConf.create({"uri": "https://example.com/a"})), HTTPStorage)
+        for config in (None, {"uri": "ftp://example.com"}, {"uri": "/data", "jobs": -1}):
+            with self.assertRaises(ConfigurationError, msg=str(config)):
+                Storage.create("a", OmegaConf.create(config) if config else None)
+
+    def test_local_download(self) -> None:
+        manager = self._manager()
+        num_bytes = manager.download("storage:local/mnist", self.workspace)
+        self.assertEqual(num_bytes, 4004)
+        dest = Path(self.workspace, ".mlcube", "storage", "local", "mnist")
+        self.assertListEqual(sorted(os.listdir(dest)), ["empty.txt", "test.csv", "train.csv"])
+        self.assertEqual((dest / "train.csv").read_bytes(), b"1,2\n" * 1000)
+        # Files are hard links to objects in the content store.
+        self.assertEqual(len(self.store.entries()), 3)
+        self.assertEqual((dest / "train.csv").stat().st_nlink, 2)
+
+        # Files that did not change are not downloaded again (in this or other workspaces).
+        other_workspace = (self.tmp_dir / "other").as_posix()
+        self.assertEqual(manager.download("storage:local/mnist/train.csv", other_workspace), 0)
+        self.assertTrue(os.path.isfile(local_path(other_workspace, "storage:local/mnist/train.csv")))
+
+        (self.data / "mnist" / "test.csv").write_bytes(b"5,6\n7,8\n")
+        self.assertEqual(manager.download("storage:local/mnist", self.workspace), 8)
+        self.assertEqual((dest / "test.csv").read_bytes(), b"5,6\n7,8\n")
+
+        with self.assertRaises(FileNotFoundError):
+            manager.download("storage:local/cifar10", self.workspace)
+        with self.assertRaises(ConfigurationError):
+            manager.download("storage:datasets/mnist", self.workspace)
+
+    def test_fetch(self) -> None:
+        manager, cancelled = self._manager(), threading.Event()
+        cancelled.set()
+        with self.assertRaises(MLCubeError):
+            manager.fetch("storage:local/mnist", cancelled)
+        self.assertEqual(len(self.store.entries()), 0)
+        # Temporary files of cancelled downloads are removed.
+        self.assertListEqual([name for name in os.listdir(self.store.root) if name.endswith(".tmp")], [])
+
+        self.assertEqual(manager.fetch("storage:local/mnist"), 4004)
+        self.assertFalse(os.path.exists(self.workspace))
+        # Prefetched files are not downloaded again.
+        self.assertEqual(manager.download("storage:local/mnist", self.workspace), 0)
+
+    def test_local_upload(self) -> None:
+        output_dir = Path(local_path(self.workspace, "storage:local/models/v1"))
+        (output_dir / "checkpoints").mkdir(parents=True)
+        (output_dir / "model.bin").write_bytes(b"x" * 100)
+        (output_dir / "checkpoints" / "1.bin").write_bytes(b"y" * 10)
+        self.assertEqual(self._manager().upload("storage:local/models/v1", self.workspace), 110)
+        self.assertEqual((self.data / "models" / "v1" / "checkpoints" / "1.bin").read_bytes(), b"y" * 10)
+        with self.assertRaises(FileNotFoundError):
+            self._manager().upload("storage:local/models/v2", self.workspace)
+
+    def test_http(self) -> None:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ObjectStoreHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        _ObjectStoreHandler.objects = {"/bucket/data/train.bin": bytes(range(256)) * 10}
+        _ObjectStoreHandler.requests = []
+
+        manager = self._manager(http={"uri": f"http://127.0.0.1:{server.server_port}/bucket", "chunk_size": 1000})
+        self.assertEqual(manager.download("storage:http/data/train.bin", self.workspace), 2560)
+        with open(local_path(self.workspace, "storage:http/data/train.bin"), "rb") as stream:
+            self.assertEqual(stream.read(), bytes(range(256)) * 10)
+        ranges = sorted(r for method, _, r in _ObjectStoreHandler.requests if method == "GET")
+        self.assertListEqual(ranges, ["bytes=0-999", "bytes=1000-1999", "bytes=2000-2559"])
+
+        output = Path(local_path(self.workspace, "storage:http/models/model.bin"))
+        output.parent.mkdir(parents=True)
+        output.write_bytes(b"model")
+        self.assertEqual(manager.upload("storage:http/models/model.bin", self.workspace), 5)
+        self.assertEqual(_ObjectStoreHandler.objects["/bucket/models/model.bin"], b"model")
+        with self.assertRaises(FileNotFoundError):
+            manager.download("storage:http/data/test.bin", self.workspace)
+
+    def test_shell(self) -> None:
+        settings = self.tmp_dir / "mlcube.yaml"
+        settings.write_text(OmegaConf.to_yaml({"storage": {"local": {"uri": self.data.as_posix()}}}))
+        _patch = patch.dict(
+            os.environ,
+            {"MLCUBE_SYSTEM_SETTINGS": settings.as_posix(), "MLCUBE_CACHE_DIR": (self.tmp_dir / "cache").as_posix()}
+        )
+        _patch.start()
+        self.addCleanup(_patch.stop)
+
+        mlcube = OmegaConf.create({
+            "runtime": {"root": self.tmp_dir.as_posix(), "workspace": self.workspace},
+            "tasks": {
+                "train": {
+                    "parameters": {
+                        "inputs": {"data_dir": {"type": "unknown", "default": "storage:local/mnist"}},
+                        "outputs": {"model_dir": {"type": "directory", "default": "storage:local/models/mnist"}},
+                    }
+                }
+            },
+        })
+        self.assertEqual(Shell.prefetch_inputs(mlcube, "train"), 4004)
+        self.assertFalse(os.path.exists(self.workspace))
+        Shell.sync_workspace(mlcube, "train")
+        plan = MountPlan.compile(mlcube, "train")
+        self.assertEqual(plan.parameters[0].host_path, local_path(self.workspace, "storage:local/mnist"))
+        self.assertEqual(plan.parameters[0].type, "directory")
+
+        plan.make_dirs()
+        Path(plan.parameters[1].host_path, "model.bin").write_bytes(b"model")
+        self.assertEqual(Shell.upload_outputs(mlcube, "train"), 5)
+        self.assertEqual((self.data / "models" / "mnist" / "model.bin").read_bytes(), b"model")
@@ -0,0 +1,242 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from omegaconf import OmegaConf
+
+from mlcube.errors import ConfigurationError
+from mlcube.mounts import MountPlan
+from mlcube.shell import Shell
+from mlcube.store import ContentStore, dataset_key, file_sha256, format_size, parse_size
+from mlcube.system_settings import SystemSettings
+
+
+class TestContentStore(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.store = ContentStore(self.root / "store")
+
+    def _file(self, name: str, size: int) -> Path:
+        path = self.root / name
+        path.write_bytes(b"x" * size)
+        return path
+
+    def test_parse_size(self) -> None:
+        self.assertIsNone(parse_size(None))
+        self.assertIsNone(parse_size(""))
+        self.assertEqual(parse_size(100), 100)
+        self.assertEqual(parse_size("100"), 100)
+        self.assertEqual(parse_size("2K"), 2048)
+        self.assertEqual(parse_size("1.5G"), int(1.5 * 1024 ** 3))
+        self.assertEqual(parse_size("20GiB"), 20 * 1024 ** 3)
+        with self.assertRaises(ConfigurationError):
+            parse_size("twenty gigabytes")
+        self.assertEqual(format_size(100), "100B")
+        self.assertEqual(format_size(1536), "1.5K")
+
+    def test_put_link(self) -> None:
+        source = self._file("image.sif", 10)
+        self.store.put("a" * 64, source, name="docker://ubuntu:18.04")
+        self.assertTrue(self.store.contains("a" * 64))
+        self.assertTrue(source.exists(), "Source file must not be removed unless move=True.")
+
+        workspaces = [self.root / "workspace_1" / ".image" / "image.sif", self.root / "workspace_2" / "image.sif"]
+        for workspace in workspaces:
+            self.store.link("a" * 64, workspace)
+            self.assertTrue(os.path.samefile(workspace, self.store.path("a" * 64)))
+
+        entries = self.store.entries()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual((entries[0].size, entries[0].name), (10, "docker://ubuntu:18.04"))
+
+        with self.assertRaises(FileNotFoundError):
+            self.store.link("b" * 64, workspaces[0])
+
+    def test_put_read_only(self) -> None:
+        source = self._file("a.bin", 10)
+        self.store.put("a" * 64, source)
+        # Hard-linked sources become read-only too, while copied ones stay independent of the store.
+        self.assertEqual(self.store.path("a" * 64).stat().st_mode & 0o222, 0)
+        self.assertEqual(source.stat().st_mode & 0o222, 0)
+        source = self._file("b.bin", 10)
+        self.store.put("b" * 64, source, copy=True)
+        self.assertFalse(os.path.samefile(source, self.store.path("b" * 64)))
+        self.assertNotEqual(source.stat().st_mode & 0o222, 0)
+        self.store.remove("a" * 64)
+        self.assertFalse(self.store.contains("a" * 64))
+
+    def test_put_move(self) -> None:
+        source = self._file("image.sif", 10)
+        self.store.put("a" * 64, source, move=True)
+        self.assertFalse(source.exists())
+        self.assertEqual(self.store.size(), 10)
+
+    def test_link_fallback_to_symlink(self) -> None:
+        self.store.put("a" * 64, self._file("image.sif", 10))
+        with patch("mlcube.store.os.link", side_effect=OSError("Invalid cross-device link")):
+            dest = self.store.link("a" * 64, self.root / "workspace" / "image.sif")
+        self.assertTrue(dest.is_symlink())
+        self.assertEqual(dest.read_bytes(), b"x" * 10)
+
+    def test_evict(self) -> None:
+        for key in ("a", "b", "c"):
+            self.store.put(key * 64, self._file(f"{key}.sif", 10))
+            time.sleep(0.01)
+        # Object `a` is the oldest one, but has been used recently.
+        self.store.link("a" * 64, self.root / "workspace" / "a.sif")
+
+        evicted = self.store.evict(20)
+        self.assertListEqual([entry.key for entry in evicted], ["b" * 64])
+        self.assertSetEqual({entry.key for entry in self.store.entries()}, {"a" * 64, "c" * 64})
+        # Hard-linked files remain available in workspaces.
+        self.assertTrue((self.root / "workspace" / "a.sif").is_file())
+
+    def test_max_size(self) -> None:
+        store = ContentStore(self.root / "store", max_size=15)
+        store.put("a" * 64, self._file("a.sif", 10))
+        time.sleep(0.01)
+        # Just added object is never evicted even if it is larger than the max store size.
+        store.put("b" * 64, self._file("b.sif", 20))
+        self.assertListEqual([entry.key for entry in store.entries()], ["b" * 64])
+
+    def test_cache_command(self) -> None:
+        from click.testing import CliRunner
+
+        from mlcube.__main__ import cache
+
+        for key in ("a", "b"):
+            self.store.put(key * 64, self._file(f"{key}.sif", 10), name=f"{key}.sif")
+            time.sleep(0.01)
+        result = CliRunner().invoke(cache, ["--path", str(self.store.root), "--prune", "--max-size", "10"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("evicted 1 objects", result.output)
+        self.assertIn("b.sif", result.output)
+        self.assertListEqual([entry.key for entry in self.store.entries()], ["b" * 64])
+
+    def test_directories(self) -> None:
+        source = self.root / "mnist"
+        (source / "train").mkdir(parents=True)
+        (source / "train" / "part-0.csv").write_bytes(b"x" * 10)
+        (source / "test.csv").write_bytes(b"y" * 5)
+        self.store.put("d" * 64, source, name="mnist")
+        self.assertEqual(self.store.entries()[0].size, 15)
+
+        dest = self.root / "workspace" / "data"
+        (dest / "stale").mkdir(parents=True)
+        self.store.link("d" * 64, dest)
+        self.assertListEqual(sorted(os.listdir(dest)), ["test.csv", "train"])
+        self.assertTrue(os.path.samefile(dest / "train" / "part-0.csv", source / "train" / "part-0.csv"))
+
+        self.store.put("d" * 64, source, move=True)
+        self.assertFalse(source.exists())
+        self.store.remove("d" * 64)
+        self.assertFalse(self.store.contains("d" * 64))
+        self.assertEqual((dest / "test.csv").read_bytes(), b"y" * 5)
+
+    def test_pin(self) -> None:
+        from click.testing import CliRunner
+
+        from mlcube.__main__ import cache
+
+        self.store.put(dataset_key("mnist-v1"), self._file("a.bin", 10), name="mnist-v1")
+        time.sleep(0.01)
+        self.store.put("b" * 64, self._file("b.bin", 10), name="b.bin")
+        with self.assertRaises(FileNotFoundError):
+            self.store.pin("c" * 64)
+
+        result = CliRunner().invoke(cache, ["--path", str(self.store.root), "--pin", "mnist-v1"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("pinned mnist-v1", result.output)
+        self.assertListEqual([entry.name for entry in self.store.evict(0)], ["b.bin"])
+        self.assertTrue(self.store.entries()[0].pinned)
+
+        result = CliRunner().invoke(cache, ["--path", str(self.store.root), "--unpin", dataset_key("mnist-v1")[:8]])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(self.store.evict(0)), 1)
+
+    def test_dataset_cache(self) -> None:
+        settings = self.root / "mlcube.yaml"
+        settings.write_text(f"cache: {{path: {self.root / 'datasets'}, max_size: 1G}}\n")
+        with patch.dict(os.environ, {"MLCUBE_SYSTEM_SETTINGS": settings.as_posix()}):
+            self.assertEqual(SystemSettings().dataset_cache.max_size, 1024 ** 3)
+            mlcube = OmegaConf.create({
+                "runtime": {"root": self.root.as_posix(), "workspace": (self.root / "workspace_1").as_posix()},
+                "tasks": {
+                    "download": {
+                        "parameters": {"outputs": {"data_dir": {"default": "data/", "cache": "mnist-v1"}}}
+                    },
+                    "train": {
+                        "parameters": {
+                            "inputs": {"data_dir": {"type": "directory", "default": "data/", "cache": "mnist-v1"}},
+                            "outputs": {"model_dir": {"type": "directory", "default": "model/"}},
+                        }
+                    },
+                },
+            })
+            (self.root / "workspace_1" / "data").mkdir(parents=True)
+            (self.root / "workspace_1" / "data" / "train.csv").write_bytes(b"x" * 10)
+            Shell.upload_outputs(mlcube, "download")
+
+            # Outputs are copied into the cache, so that tasks can modify them later.
+            cached_file = SystemSettings().dataset_cache.path(dataset_key("mnist-v1")) / "train.csv"
+            self.assertFalse(os.path.samefile(self.root / "workspace_1" / "data" / "train.csv", cached_file))
+            self.assertNotEqual((self.root / "workspace_1" / "data" / "train.csv").stat().st_mode & 0o222, 0)
+            self.assertEqual(cached_file.stat().st_mode & 0o222, 0, "Cached files must be read-only.")
+
+            # Inputs are linked from the cache into other workspaces instead of being downloaded or copied, and are
+            # mounted read-only.
+            mlcube.runtime.workspace = (self.root / "workspace_2").as_posix()
+            Shell.sync_workspace(mlcube, "train")
+            self.assertTrue(os.path.samefile(self.root / "workspace_2" / "data" / "train.csv", cached_file))
+            plan = MountPlan.compile(mlcube, "train")
+            self.assertDictEqual(plan.mount_options(), {(self.root / "workspace_2" / "data").as_posix(): "ro"})
+            self.assertListEqual([entry.name for entry in SystemSettings().dataset_cache.entries()], ["mnist-v1"])
+
+            # Existing inputs that are not in the cache are copied, so that user files do not become read-only.
+            mlcube.tasks.train.parameters.inputs.data_dir.cache = "mnist-v2"
+            mlcube.runtime.workspace = (self.root / "workspace_3").as_posix()
+            (self.root / "workspace_3" / "data").mkdir(parents=True)
+            (self.root / "workspace_3" / "data" / "train.csv").write_bytes(b"y" * 10)
+            Shell.sync_workspace(mlcube, "train")
+            cached_file = SystemSettings().dataset_cache.path(dataset_key("mnist-v2")) / "train.csv"
+            self.assertFalse(os.path.samefile(self.root / "workspace_3" / "data" / "train.csv", cached_file))
+            self.assertNotEqual((self.root / "workspace_3" / "data" / "train.csv").stat().st_mode & 0o222, 0)
+            self.assertEqual(cached_file.read_bytes(), b"y" * 10)
+
+            mlcube.tasks.train.parameters.inputs.data_dir.cache = ""
+            with self.assertRaises(ConfigurationError):
+                Shell.sync_workspace(mlcube, "train")
+
+
+class TestFileSha256(TestCase):
+    def setUp(self) -> None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.file = Path(tmp_dir.name) / "image.sif"
+        self.file.write_bytes(os.urandom(3 * 1024 * 1024 + 17))
+
+    def test_file_sha256(self) -> None:
+        expected = hashlib.sha256(self.file.read_bytes()).hexdigest()
+        progress = []
+        with patch("mlcube.store._HASH_CHUNK_SIZE", 1024 * 1024):
+            digest = file_sha256(self.file, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(digest, expected)
+        self.assertEqual(len(progress), 4)
+        self.assertEqual(progress[-1], (self.file.stat().st_size, self.file.stat().st_size))
+
+    def test_file_sha256_cache(self) -> None:
+        digest = file_sha256(self.file)
+        self.assertTrue(self.file.with_name("image.sif.sha256.json").is_file())
+        # File is not read if it has not changed.
+        with patch("mlcube.store.open", create=True, side_effect=AssertionError("File must not be read.")):
+            self.assertEqual(file_sha256(self.file), digest)
+
+        # File has been replaced.
+        self.file.write_bytes(b"new content")
+        self.assertEqual(file_sha256(self.file), hashlib.sha256(b"new content").hexdigest())
@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import typing as t
+from unittest import TestCase
+
+from mlcube.errors import ConfigurationError, ExecutionError
+from mlcube.sweep import Sweep, SweepRun
+
+_SWEEP = """
+name: lr
+grid:
+  params:
+    docker.build_strategy: [auto, always]
+  args:
+    lr: [0.1, 0.01]
+runs:
+  - args: {lr: 1.0, epochs: 2}
+"""
+
+
+class TestSweep(TestCase):
+    def setUp(self) -> None:
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def _sweep_file(self, content: str) -> str:
+        path = os.path.join(self.tmp_dir.name, "sweep.yaml")
+        with open(path, "w") as stream:
+            stream.write(content)
+        return path
+
+    def test_load(self) -> None:
+        sweep = Sweep.load(self._sweep_file(_SWEEP))
+        self.assertEqual(sweep.name, "lr")
+        self.assertEqual(len(sweep.runs), 5)
+        self.assertEqual(sweep.runs[0], SweepRun(0, {"docker.build_strategy": "auto"}, {"lr": 0.1}))
+        self.assertEqual(sweep.runs[3], SweepRun(3, {"docker.build_strategy": "always"}, {"lr": 0.01}))
+        self.assertEqual(sweep.runs[4], SweepRun(4, {}, {"lr": 1.0, "epochs": 2}))
+        self.assertEqual(sweep.runs[4].name, "run-004")
+        self.assertListEqual(sweep.runs[0].cli_args(), ["-Pdocker.build_strategy=auto", "lr=0.1"])
+
+    def test_load_default_name(self) -> None:
+        self.assertEqual(Sweep.load(self._sweep_file("runs: [{args: {lr: 1}}]")).name, "sweep")
+
+    def test_load_invalid(self) -> None:
+        for content in ("name: empty", "grid: {args: {lr: 0.1}}", "grid: {args: {lr: []}}", "runs: [{args: [1]}]",
+                        "sweep: {}"):
+            with self.assertRaises(ConfigurationError, msg=content):
+                Sweep.load(self._sweep_file(content))
+
+    def test_execute(self) -> None:
+        sweep = Sweep.load(self._sweep_file(_SWEEP))
+        lock, active, max_active = threading.Lock(), [0], [0]
+
+        def _run_fn(run: SweepRun, workspace: str) -> None:
+            with lock:
+                active[0] += 1
+                max_active[0] = max(max_active[0], active[0])
+            time.sleep(0.2)
+            with lock:
+                active[0] -= 1
+            if run.args["lr"] == 0.01:
+                raise ExecutionError("Training diverged.", code=2)
+
+        results = sweep.execute(_run_fn, self.tmp_dir.name, jobs=2)
+        self.assertEqual(max_active[0], 2)
+        self.assertListEqual([r.run.index for r in results], [0, 1, 2, 3, 4])
+        self.assertListEqual([r.exit_code for r in results], [0, 2, 0, 2, 0])
+        self.assertEqual(results[0].workspace, os.path.join(self.tmp_dir.name, "run-000"))
+
+        with open(os.path.join(self.tmp_dir.name, "summary.json")) as stream:
+            summary = json.load(stream)
+        self.assertListEqual([r["status"] for r in summary], ["ok", "failed", "ok", "failed", "ok"])
+        self.assertEqual(summary[1]["error"], "Training diverged.")
+
+        table = Sweep.summary(results).splitlines()
+        self.assertEqual(len(table), 6)
+        self.assertTrue(table[0].startswith("RUN"))
+        self.assertIn("failed", table[2])
+        self.assertTrue(table[2].endswith("-Pdocker.build_strategy=auto lr=0.01"))
+
+    def test_execute_interrupted(self) -> None:
+        sweep = Sweep("interrupted", [SweepRun(idx, {}, {}) for idx in range(4)])
+        cancelled = threading.Event()
+        started: t.List[int] = []
+
+        def _run_fn(run: SweepRun, workspace: str) -> None:
+            started.append(run.index)
+            if run.index == 0:
+                raise KeyboardInterrupt
+            cancelled.wait(5)
+
+        with self.assertRaises(KeyboardInterrupt):
+            sweep.execute(_run_fn, self.tmp_dir.name, jobs=1, cancelled=cancelled)
+        self.assertTrue(cancelled.is_set())
+        self.assertListEqual(started, [0])
@@ -50,7 +50,7 @@ setup(
     install_requires=requires,
     python_requires='>=3.6',
     package_data={"": extra_files},
-    extras_require={},
+    extras_require={'s3': ['boto3']},
     cmdclass={
         'clean': Clean,
     },
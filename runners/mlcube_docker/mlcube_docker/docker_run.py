@@ -1,12 +1,19 @@
-import json
+import asyncio
 import logging
 import os
 import shlex
+import shutil
+import sys
+import tempfile
+import threading
 import typing as t
 from pathlib import Path
 
+from mlcube_docker.engine_client import EngineClient
+from mlcube_docker.image_cache import ImageCache
 from omegaconf import DictConfig, OmegaConf
 
+from mlcube import hooks, metrics
 from mlcube.errors import (
     ConfigurationError,
     ExecutionError,
@@ -16,6 +23,7 @@ from mlcube.errors import (
 from mlcube.parser import CliParser, DeviceSpecs
 from mlcube.runner import Runner, RunnerConfig
 from mlcube.shell import Shell
+from mlcube.store import parse_size
 from mlcube.validate import Validate
 
 __all__ = ["Config", "DockerRun"]
@@ -91,6 +99,8 @@ class Config(RunnerConfig):
             "--memory": None,  # RAM options defined during MLCube container execution.
             "--cpuset-cpus": None,  # CPU cores options for Docker.
             "--mount_opts": "",  # Mount options for Docker volumes.
+            "backend": "cli",  # How to run containers: 'cli' (docker executable) or 'api' (Docker Engine API).
+            "socket": "",  # Docker Engine API socket for `api` backend. Default depends on `docker` executable.
         }
     )
 
@@ -116,6 +126,8 @@ class Config(RunnerConfig):
             ["image", "docker", "build_strategy"], str, blanks=False
         )
         Config.BuildStrategy.validate(mlcube.runner.build_strategy)
+        if mlcube.runner.backend not in ("cli", "api"):
+            raise IllegalParameterValueError("backend", mlcube.runner.backend, "['cli', 'api']", "runner")
 
         if isinstance(mlcube.runner.build_args, DictConfig):
             mlcube.runner.build_args = Shell.to_cli_args(
@@ -132,6 +144,11 @@ class DockerRun(Runner):
 
     CONFIG = Config
 
+    _image_locks: t.Dict[t.Tuple[str, str], threading.Lock] = {}
+    """Locks that serialize checks, pulls and builds of one image in tasks and prefetches (see `_ensure_image`)."""
+
+    _image_locks_lock = threading.Lock()
+
     def __init__(
         self, mlcube: t.Union[DictConfig, t.Dict], task: t.Optional[t.Text]
     ) -> None:
@@ -167,7 +184,8 @@ class DockerRun(Runner):
                     build_strategy,
                 )
             try:
-                Shell.run([docker, "pull", image])
+                with metrics.timed(metrics.CONFIGURE_DURATION, step="pull"):
+                    Shell.run([docker, "pull", image])
             except ExecutionError as err:
                 description = f"Error occurred while pulling docker image (docker={docker}, image={image})."
                 if build_recipe_exists:
@@ -178,6 +196,9 @@ class DockerRun(Runner):
                 raise ExecutionError.mlcube_configure_error(
                     self.__class__.__name__, description, **err.context
                 )
+            finally:
+                # Tags may now point to different images.
+                ImageCache.invalidate(docker)
 
         else:
             logger.info(
@@ -188,9 +209,10 @@ class DockerRun(Runner):
             )
             build_args: t.Text = self.mlcube.runner.build_args
             try:
-                Shell.run(
-                    [docker, "build", build_args, "-t", image, "-f", recipe, context]
-                )
+                with metrics.timed(metrics.CONFIGURE_DURATION, step="build"):
+                    Shell.run(
+                        [docker, "build", build_args, "-t", image, "-f", recipe, context]
+                    )
             except ExecutionError as err:
                 raise ExecutionError.mlcube_configure_error(
                     self.__class__.__name__,
@@ -198,23 +220,168 @@ class DockerRun(Runner):
                     f"image={image}, recipe={recipe}, context={context}).",
                     **err.context,
                 )
+            finally:
+                ImageCache.invalidate(docker)
 
     def run(self) -> None:
         """Run a cube."""
+        engine: t.Optional[EngineClient] = self._engine_client()
+        mounts, task_args, device_specs = self._prepare_run(engine)
+
+        if engine is not None:
+            try:
+                spec = self._engine_container_spec(mounts, task_args, device_specs)
+            except ConfigurationError as err:
+                logger.warning("Can't run this task with Docker Engine API, will use docker CLI instead: %s", str(err))
+            else:
+                self._engine_run(engine, spec)
+                self._upload_outputs()
+                return
+
+        docker: t.Text = self.mlcube.runner.docker
+        # Docker writes container ID to this file, so that the container can be stopped if MLCube is interrupted (the
+        # docker CLI may exit or get killed while the container keeps running).
+        cid_dir = tempfile.mkdtemp(prefix="mlcube-docker-")
+        cid_file = os.path.join(cid_dir, "container.id")
+        cmd = self._docker_run_command(mounts, task_args, device_specs, cid_file)
+        try:
+            with hooks.stage("container", self.mlcube, self.task, command=cmd):
+                Shell.run(cmd)
+        except ExecutionError as err:
+            if self._cli_stopped(err):
+                # Docker CLI has been stopped, but the container may still be running.
+                self._stop_container(docker, cid_file)
+            raise self._run_error(cmd, err)
+        except KeyboardInterrupt:
+            self._stop_container(docker, cid_file)
+            raise
+        finally:
+            shutil.rmtree(cid_dir, ignore_errors=True)
+        self._upload_outputs()
+
+    async def arun(self) -> None:
+        """Run a cube without blocking the event loop.
+
+        The docker CLI runs as an asyncio subprocess, and the container is stopped if this coroutine is cancelled.
+        Preparation steps (pulling or building the image if needed, syncing the workspace) run in the default executor.
+        The Docker Engine API client is synchronous, so with the `api` backend the whole task runs in the executor, and
+        the container is stopped when this coroutine is cancelled (see `Shell.in_thread`).
+        """
+        if self.mlcube.runner.get("backend", "cli") == "api":
+            await Shell.in_thread(self.run)
+            return
+        mounts, task_args, device_specs = await Shell.in_thread(self._prepare_run, None)
+
+        docker: t.Text = self.mlcube.runner.docker
+        cid_dir = tempfile.mkdtemp(prefix="mlcube-docker-")
+        cid_file = os.path.join(cid_dir, "container.id")
+        cmd = self._docker_run_command(mounts, task_args, device_specs, cid_file)
+        try:
+            with hooks.stage("container", self.mlcube, self.task, command=cmd):
+                await Shell.arun(cmd)
+        except ExecutionError as err:
+            if self._cli_stopped(err):
+                await Shell.in_thread(self._stop_container, docker, cid_file)
+            raise self._run_error(cmd, err)
+        except asyncio.CancelledError:
+            await Shell.in_thread(self._stop_container, docker, cid_file)
+            raise
+        finally:
+            shutil.rmtree(cid_dir, ignore_errors=True)
+        await Shell.in_thread(self._upload_outputs)
+
+    def _upload_outputs(self) -> None:
+        """Upload task outputs with `storage:` URIs to their storages (see `Shell.upload_outputs`)."""
+        try:
+            Shell.upload_outputs(self.mlcube, self.task)
+        except Exception as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                f"Error occurred while uploading task outputs (task={self.task}). Actual error is {type(err)} - see "
+                "context for details.",
+                error=str(err),
+                workspace=self.mlcube.runtime.workspace,
+                task=self.task,
+            )
+
+    def prefetch(self) -> t.Dict:
+        """Pull or build the image if it does not exist, and download task inputs from storages.
+
+        Existing images are not pulled or rebuilt (with the `always` build strategy, tasks rebuild images themselves).
+        """
+        engine: t.Optional[EngineClient] = self._engine_client()
         docker: t.Text = self.mlcube.runner.docker
         image: t.Text = self.mlcube.runner.image
+        fetched = self._ensure_image(engine, missing_only=True)
+        size = engine.image_size(image) if engine is not None else ImageCache.image_size(docker, image)
+        return {"image": image, "fetched": fetched, "size": size, **super().prefetch()}
+
+    @classmethod
+    def preload(cls, mlcubes: t.List[DictConfig]) -> None:
+        """Query local images of all MLCubes that use docker CLI with one `docker image inspect` call per executable."""
+        images: t.Dict[str, t.List[str]] = {}
+        for mlcube in mlcubes:
+            if mlcube.runner.get("backend", "cli") != "api":
+                images.setdefault(mlcube.runner.docker, []).append(mlcube.runner.image)
+        for docker, docker_images in images.items():
+            ImageCache.query_many(docker, docker_images)
+
+    def _ensure_image(self, engine: t.Optional[EngineClient], missing_only: bool = False) -> bool:
+        """Run the `configure` phase if the image does not exist or build strategy is `always`.
+
+        Tasks and their prefetches (see `prefetch`) check and pull (build) one image one at a time, so that an image is
+        not pulled twice when a task starts while its image is being prefetched. Different images are pulled in
+        parallel (e.g., by `mlcube prefetch`).
 
-        build_strategy: t.Text = self.mlcube.runner.build_strategy
-        if (
-            build_strategy == Config.BuildStrategy.ALWAYS
-            or not Shell.docker_image_exists(docker, image)
-        ):
+        Args:
+            engine: Docker Engine API client, or None to use docker CLI.
+            missing_only: If true, ignore the `always` build strategy (pull or build the image only if it does not
+                exist).
+        Returns:
+            True if the image has been pulled or built.
+        """
+        docker: t.Text = self.mlcube.runner.docker
+        image: t.Text = self.mlcube.runner.image
+
+        with DockerRun._image_locks_lock:
+            lock = DockerRun._image_locks.setdefault((docker, image), threading.Lock())
+        with lock:
+            if engine is not None:
+                try:
+                    image_exists = engine.image_id(image) is not None
+                except ExecutionError as err:
+                    raise ExecutionError.mlcube_run_error(
+                        self.__class__.__name__,
+                        f"Docker Engine API is not available (socket={engine.socket_path}). Make sure docker (podman) "
+                        "service is running, or rerun with `-Prunner.backend=cli`.",
+                        **err.context,
+                    )
+            else:
+                image_exists = ImageCache.exists(docker, image)
+
+            always: bool = self.mlcube.runner.build_strategy == Config.BuildStrategy.ALWAYS and not missing_only
+            if image_exists and not always:
+                return False
             logger.warning(
                 "Docker image (%s) does not exist or build strategy is 'always'. "
                 "Will run 'configure' phase.",
                 image,
             )
             self.configure()
+            return True
+
+    def _prepare_run(
+        self, engine: t.Optional[EngineClient]
+    ) -> t.Tuple[t.Dict[str, str], t.List[str], DeviceSpecs]:
+        """Prepare to run the current task: configure MLCube if needed, sync workspace and generate mounts.
+
+        Args:
+            engine: Docker Engine API client, or None to use docker CLI.
+        Returns:
+            Tuple of mounts (host paths to container paths with optional mount options), task arguments (the first one
+                is the task name) and GPU specifications.
+        """
+        self._ensure_image(engine)
         # Deal with user-provided workspace
         try:
             Shell.sync_workspace(self.mlcube, self.task)
@@ -246,13 +413,25 @@ class DockerRun(Runner):
             )
         logger.info(f"mounts={mounts}, task_args={task_args}")
 
-        volumes = Shell.to_cli_args(mounts, sep=":", parent_arg="--volume")
-        env_args = self.mlcube.runner.env_args
-
         device_specs = DeviceSpecs.from_config(
             accelerator_count=self.mlcube.get("platform", {}).get("accelerator_count", None),
             gpus=self.mlcube.runner.get("--gpus", None)
         )
+        return mounts, task_args, device_specs
+
+    def _docker_run_command(
+        self, mounts: t.Dict[str, str], task_args: t.List[str], device_specs: DeviceSpecs, cid_file: str
+    ) -> t.List[str]:
+        """Return `docker run` command for the current task (see `_prepare_run` for arguments).
+
+        Args:
+            cid_file: File where docker writes container ID.
+        """
+        docker: t.Text = self.mlcube.runner.docker
+        image: t.Text = self.mlcube.runner.image
+        task_args = list(task_args)
+        volumes = Shell.to_cli_args(mounts, sep=":", parent_arg="--volume")
+        env_args = self.mlcube.runner.env_args
 
         run_args: str = (
             self.mlcube.runner.cpu_args
@@ -314,80 +493,179 @@ class DockerRun(Runner):
             # first positional arguments.
             _ = task_args.pop(0)
 
+        run_args += f" --cidfile={cid_file}"
+        if ("entrypoint" in self.mlcube.tasks[self.task]) and (
+            len(shlex.split(self.mlcube.tasks[self.task].entrypoint)) > 1
+        ):
+            # entrypoint with multiple arguments e.g. "python something.py" or "sh something.sh"
+            args_for_new_entrypoint = " ".join(
+                shlex.split(self.mlcube.tasks[self.task].entrypoint)[1:]
+            )
+            return [docker, "run", run_args, env_args, volumes, image, args_for_new_entrypoint, " ".join(task_args)]
+        if ("entrypoint" in self.mlcube.tasks[self.task]) and (
+            len(shlex.split(self.mlcube.tasks[self.task].entrypoint)) == 1
+        ):
+            #  new entrypoint executable specified with no optional parameters (e.g. entrypoint: "/bin/bash")
+            return [docker, "run", run_args, env_args, volumes, image]
+        #  no new entrypoints specified, "entrypoint: " blank
+        return [docker, "run", run_args, env_args, volumes, image, " ".join(task_args)]
+
+    def _run_error(self, cmd: t.List[str], err: ExecutionError) -> ExecutionError:
+        """Return error for a failed `docker run` command."""
+        return ExecutionError.mlcube_run_error(
+            self.__class__.__name__,
+            f"Error occurred while running MLCube task (task={self.task}, cmd={' '.join(c for c in cmd if c)}).",
+            **err.context,
+        )
+
+    @staticmethod
+    def _cli_stopped(err: ExecutionError) -> bool:
+        """Return true if docker CLI has not exited on its own (timeout, cancellation or a signal).
+
+        In these cases the container may still be running, and it must be stopped.
+        """
+        context = err.context
+        if context.get("timeout", False) or context.get("cancelled", False):
+            return True
+        return context.get("status", None) == "signalled"
+
+    @staticmethod
+    def _stop_container(docker: str, cid_file: str) -> None:
+        """Stop container (if it is still running) which ID docker CLI has written to `cid_file`."""
         try:
-            if ("entrypoint" in self.mlcube.tasks[self.task]) and (
-                len(shlex.split(self.mlcube.tasks[self.task].entrypoint)) > 1
-            ):
-                # entrypoint with multiple arguments e.g. "python something.py" or "sh something.sh"
-                args_for_new_entrypoint = " ".join(
-                    shlex.split(self.mlcube.tasks[self.task].entrypoint)[1:]
-                )
-                Shell.run(
-                    [
-                        docker,
-                        "run",
-                        run_args,
-                        env_args,
-                        volumes,
-                        image,
-                        args_for_new_entrypoint,
-                        " ".join(task_args),
-                    ]
-                )
-            elif ("entrypoint" in self.mlcube.tasks[self.task]) and (
-                len(shlex.split(self.mlcube.tasks[self.task].entrypoint)) == 1
-            ):
-                #  new entrypoint executable specified with no optional parameters (e.g. entrypoint: "/bin/bash")
-                Shell.run([docker, "run", run_args, env_args, volumes, image])
+            with open(cid_file, "r") as stream:
+                container_id = stream.read().strip()
+        except OSError:
+            container_id = ""
+        if container_id:
+            logger.warning("DockerRun stopping interrupted container (id=%s).", container_id)
+            # The task may have been cancelled (see `Shell.cancellation`), but the container must be stopped anyway.
+            with Shell.cancellation(threading.Event()):
+                Shell.run([docker, "stop", f"--time={int(Shell.STOP_GRACE_PERIOD)}", container_id], on_error="ignore")
+
+    def _engine_client(self) -> t.Optional[EngineClient]:
+        """Return Docker Engine API client if `backend` is `api`, else None."""
+        if self.mlcube.runner.get("backend", "cli") != "api":
+            return None
+        socket_path = self.mlcube.runner.get("socket", None) or EngineClient.default_socket(self.mlcube.runner.docker)
+        return EngineClient(socket_path)
+
+    def _engine_container_spec(
+        self, mounts: t.Dict[str, str], task_args: t.List[str], device_specs: DeviceSpecs
+    ) -> t.Dict:
+        """Build Docker Engine API container configuration for the current task.
+
+        This mirrors the `docker run` command line that the CLI backend builds. Free-form docker CLI arguments
+        (`cpu_args`, `gpu_args`) can not be translated into API requests.
+
+        Args:
+            mounts: Mapping from host paths to container paths (possibly with mount options, e.g. `/data:ro`).
+            task_args: Task arguments, the first one is the task name.
+            device_specs: GPU specifications.
+        Returns:
+            Container configuration.
+        Raises:
+            ConfigurationError if this task uses docker CLI arguments that are not supported.
+        """
+        runner = self.mlcube.runner
+        run_args = runner.cpu_args if device_specs.none else runner.gpu_args
+        if run_args:
+            raise ConfigurationError(f"Docker run arguments are not supported by Engine API backend ({run_args}).")
+
+        env_tokens = shlex.split(runner.env_args or "")
+        if len(env_tokens) % 2 != 0 or any(token != "-e" for token in env_tokens[::2]):
+            raise ConfigurationError(f"Can't parse environment variables ({runner.env_args}).")
+
+        host_config: t.Dict = {"Binds": [f"{host}:{container}" for host, container in mounts.items()]}
+        if runner.get("--network", None) is not None:
+            host_config["NetworkMode"] = str(runner["--network"])
+        if runner.get("--security-opt", None) is not None:
+            host_config["SecurityOpt"] = [str(runner["--security-opt"])]
+        if runner.get("--memory", None) is not None:
+            host_config["Memory"] = parse_size(str(runner["--memory"]))
+        if runner.get("--cpuset-cpus", None) is not None:
+            host_config["CpusetCpus"] = str(runner["--cpuset-cpus"])
+        if not device_specs.none:
+            gpus: str = device_specs.get_docker_specs().gpus
+            device_request: t.Dict = {"Driver": "", "Capabilities": [["gpu"]]}
+            if gpus == "all":
+                device_request["Count"] = -1
+            elif gpus.startswith("device="):
+                device_request["DeviceIDs"] = gpus[7:].split(",")
             else:
-                #  no new entrypoints specified, "entrypoint: " blank
-                Shell.run(
-                    [
-                        docker,
-                        "run",
-                        run_args,
-                        env_args,
-                        volumes,
-                        image,
-                        " ".join(task_args),
-                    ]
-                )
+                device_request["Count"] = int(gpus)
+            host_config["DeviceRequests"] = [device_request]
+
+        spec: t.Dict = {
+            "Image": runner.image,
+            "Env": env_tokens[1::2],
+            "HostConfig": host_config,
+            "AttachStdout": True,
+            "AttachStderr": True,
+        }
+        # Task arguments are joined and split to get exactly the same arguments that the shell passes to docker CLI.
+        entrypoint: t.Optional[str] = self.mlcube.tasks[self.task].get("entrypoint", None)
+        if entrypoint:
+            # Custom entry points do not accept task name as their first positional argument.
+            entrypoint_tokens = shlex.split(entrypoint)
+            spec["Entrypoint"] = entrypoint_tokens[:1]
+            spec["Cmd"] = entrypoint_tokens[1:] + shlex.split(" ".join(task_args[1:]))
+        else:
+            spec["Cmd"] = shlex.split(" ".join(task_args))
+        return spec
+
+    def _engine_run(self, engine: EngineClient, spec: t.Dict) -> None:
+        """Run container with Docker Engine API streaming its output to stdout/stderr of this process.
 
+        If output of this task is captured (see `Shell.capture`), it is streamed to the task log instead.
+        """
+        log = Shell.task_log()
+
+        def _output(stream: int, data: bytes) -> None:
+            if log is not None:
+                log.write(data, stream)
+                return
+            out = sys.stderr if stream == EngineClient.STREAM_STDERR else sys.stdout
+            out.write(data.decode(errors="replace"))
+            out.flush()
+
+        logger.info("DockerRun running task=%s with Docker Engine API: %s", self.task, spec)
+        try:
+            with hooks.stage("container", self.mlcube, self.task, command=spec):
+                exit_code = engine.run_container(
+                    spec,
+                    output=_output,
+                    grace_period=int(Shell.STOP_GRACE_PERIOD),
+                    timeout=Shell.remaining_time(),
+                    cancelled=Shell.cancel_event(),
+                )
         except ExecutionError as err:
             raise ExecutionError.mlcube_run_error(
                 self.__class__.__name__,
-                f"Error occurred while running MLCube task (docker={docker}, run_args={run_args}, env_args={env_args}, "
-                f"volumes={volumes}, image={image}, task_args={task_args}).",
+                f"Error occurred while running MLCube task with Docker Engine API (socket={engine.socket_path}, "
+                f"task={self.task}).",
                 **err.context,
             )
+        if exit_code != 0:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                f"MLCube task failed (task={self.task}, image={spec['Image']}).",
+                code=exit_code,
+                container=spec,
+            )
 
     def inspect(self, force: bool = False) -> t.Dict:
         docker: str = self.mlcube.runner.docker
         image: str = self.mlcube.runner.image
-        if not Shell.docker_image_exists(docker, image):
+        image_id: t.Optional[str] = ImageCache.image_id(docker, image)
+        if image_id is None:
             if not force:
                 raise MLCubeError(
                     "MLCube does not exist. Either configure MLCube (e.g., `mlcube configure ...`) or set `force` "
                     "argument to True (e.g., `mlcube inspect --force ...`)."
                 )
             self.configure()
-
-        docker_inspect_cmd = [docker, "inspect", image]
-        exit_code, output = Shell.run_and_capture_output(docker_inspect_cmd)
-        if exit_code != 0:
-            raise MLCubeError(output)
-
-        image_info: t.List[t.Dict] = json.loads(output)
-        if (
-            not isinstance(image_info, list)
-            or len(image_info) != 1
-            or not isinstance(image_info[0], dict)
-        ):
-            raise MLCubeError(
-                f"Unexpected output from `{' '.join(docker_inspect_cmd)}`. Expected a list of dicts of length 1."
-            )
-
-        image_id: str = image_info[0].get("Id", None)
-        if image_id and image_id.startswith("sha256:"):
-            image_id = image_id[7:]
+            image_id = ImageCache.image_id(docker, image)
+            if image_id is None:
+                raise MLCubeError(f"Docker image ({image}) does not exist after configuring MLCube.")
         return {"hash": image_id}
@@ -0,0 +1,305 @@
+"""Minimal client for the Docker Engine API (also served by Podman) over a Unix socket.
+
+- `EngineClient`: Creates, starts, streams logs of, waits for, stops and removes containers.
+
+Docker runner uses this client when `backend` is `api`. Containers are created from structured requests (image, command,
+environment variables, bind mounts), so nothing goes through a shell, and there is no docker CLI start-up overhead. Only
+the subset of the API that the runner needs is implemented, and only the Python standard library is used.
+
+API reference: https://docs.docker.com/engine/api/latest/
+"""
+import http.client
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import typing as t
+from urllib.parse import quote, urlencode
+
+from mlcube.errors import ExecutionError
+
+__all__ = ["EngineClient"]
+
+logger = logging.getLogger(__name__)
+
+_TIMEOUT_ERRORS = (TimeoutError, socket.timeout)
+"""Socket timeouts (`socket.timeout` is not a subclass of `TimeoutError` before Python 3.10)."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: t.Optional[float] = None) -> None:
+        super().__init__("localhost")
+        self.socket_path = socket_path
+        self.socket_timeout = timeout
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.socket_timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class EngineClient(object):
+    """Docker Engine API client.
+
+    Args:
+        socket_path: Path to the API Unix socket (e.g., /var/run/docker.sock).
+        timeout: Timeout in seconds for requests that are expected to complete quickly. Streaming requests (logs) and
+            requests that wait for containers to exit have no timeout.
+    """
+
+    STREAM_STDOUT = 1
+    STREAM_STDERR = 2
+
+    def __init__(self, socket_path: str, timeout: float = 60.0) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    @staticmethod
+    def default_socket(docker: t.Optional[str] = None) -> str:
+        """Return the API socket path for the given docker executable.
+
+        The `DOCKER_HOST` environment variable is respected if it points to a Unix socket. Podman serves the API on a
+        per-user socket (`$XDG_RUNTIME_DIR/podman/podman.sock`) or on a system socket for root.
+        """
+        docker_host = os.environ.get("DOCKER_HOST", "")
+        if docker_host.startswith("unix://"):
+            return docker_host[7:]
+        if docker and "podman" in docker:
+            runtime_dir = os.environ.get("XDG_RUNTIME_DIR", "")
+            user_socket = os.path.join(runtime_dir, "podman", "podman.sock")
+            if runtime_dir and os.path.exists(user_socket):
+                return user_socket
+            return "/run/podman/podman.sock"
+        return "/var/run/docker.sock"
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        query: t.Optional[t.Dict] = None,
+        body: t.Optional[t.Dict] = None,
+        timeout: t.Optional[float] = -1,
+        ok_status: t.Iterable[int] = (200, 201, 204, 304),
+    ) -> t.Tuple[int, http.client.HTTPResponse, _UnixHTTPConnection]:
+        """Send request and return response status, response and connection (caller must close the connection).
+
+        Args:
+            timeout: Request timeout. -1 means default timeout (`self.timeout`), None means no timeout. When it
+                expires, `TimeoutError` is raised.
+            ok_status: Expected status codes. For other codes, `ExecutionError` is raised.
+        """
+        url = path + ("?" + urlencode(query) if query else "")
+        conn = _UnixHTTPConnection(self.socket_path, self.timeout if timeout == -1 else timeout)
+        headers, payload = {}, None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers = {"Content-Type": "application/json", "Content-Length": str(len(payload))}
+        try:
+            conn.request(method, url, body=payload, headers=headers)
+            response = conn.getresponse()
+        except _TIMEOUT_ERRORS as err:
+            conn.close()
+            raise TimeoutError(str(err)) from err
+        except OSError as err:
+            conn.close()
+            raise ExecutionError(
+                "Docker Engine API request failed.", socket=self.socket_path, method=method, url=url, error=str(err)
+            )
+        logger.debug("EngineClient._request %s %s status=%d", method, url, response.status)
+        if response.status not in ok_status:
+            message = response.read().decode(errors="replace")
+            conn.close()
+            try:
+                message = json.loads(message).get("message", message)
+            except (ValueError, AttributeError):
+                pass
+            raise ExecutionError(
+                "Docker Engine API request failed.", method=method, url=url, status=response.status, error=message
+            )
+        return response.status, response, conn
+
+    def _json(self, method: str, path: str, **kwargs) -> t.Any:
+        """Send request and return decoded JSON response (None for empty responses)."""
+        _, response, conn = self._request(method, path, **kwargs)
+        try:
+            data = response.read()
+        finally:
+            conn.close()
+        return json.loads(data) if data else None
+
+    def ping(self) -> bool:
+        """Return true if the engine is available."""
+        try:
+            _, response, conn = self._request("GET", "/_ping", timeout=min(self.timeout, 5.0))
+        except ExecutionError:
+            return False
+        try:
+            return response.read().strip() == b"OK"
+        finally:
+            conn.close()
+
+    def image_info(self, image: str) -> t.Optional[t.Dict]:
+        """Return low-level information on a local image (`docker image inspect`) or None if it does not exist."""
+        info = self._json("GET", f"/images/{quote(image, safe='/:@')}/json", ok_status=(200, 404))
+        return info if isinstance(info, dict) and info.get("Id", None) else None
+
+    def image_size(self, image: str) -> t.Optional[int]:
+        """Return local image size (bytes) or None if image does not exist."""
+        size = (self.image_info(image) or {}).get("Size", None)
+        return size if isinstance(size, int) else None
+
+    def image_id(self, image: str) -> t.Optional[str]:
+        """Return local image ID (without `sha256:` prefix) or None if image does not exist."""
+        info = self.image_info(image)
+        image_id: t.Optional[str] = info.get("Id", None) if isinstance(info, dict) else None
+        if image_id and image_id.startswith("sha256:"):
+            image_id = image_id[7:]
+        return image_id or None
+
+    def create_container(self, spec: t.Dict, name: t.Optional[str] = None) -> str:
+        """Create a container and return its ID.
+
+        Args:
+            spec: Container configuration (`Image`, `Cmd`, `Entrypoint`, `Env`, `HostConfig` etc.). TTY is always
+                disabled (see `container_logs`).
+            name: Optional container name.
+        """
+        spec = {**spec, "Tty": False}
+        info = self._json("POST", "/containers/create", query={"name": name} if name else None, body=spec)
+        for warning in info.get("Warnings", None) or []:
+            logger.warning("EngineClient.create_container warning: %s", warning)
+        return info["Id"]
+
+    def start_container(self, container_id: str) -> None:
+        self._json("POST", f"/containers/{container_id}/start")
+
+    def container_logs(
+        self, container_id: str, follow: bool = True, timeout: t.Optional[float] = None
+    ) -> t.Iterator[t.Tuple[int, bytes]]:
+        """Stream container output.
+
+        Containers created by this client have no TTY, and so the engine multiplexes stdout and stderr into one stream
+        of frames (older engines report `raw-stream` content type for such streams too). Each frame has an 8-byte
+        header: stream type (1 byte), 3 zero bytes and payload size (uint32, big endian).
+
+        Args:
+            container_id: Container ID.
+            follow: If true, stream output until the container exits.
+            timeout: Maximal time in seconds to wait for the next output chunk (`TimeoutError` is raised).
+        Returns:
+            Iterator over (stream, data) tuples where stream is either `STREAM_STDOUT` or `STREAM_STDERR`.
+        """
+        query = {"follow": int(follow), "stdout": 1, "stderr": 1}
+        _, response, conn = self._request("GET", f"/containers/{container_id}/logs", query=query, timeout=timeout)
+        try:
+            while True:
+                header = response.read(8)
+                if len(header) < 8:
+                    break
+                stream, size = struct.unpack(">BxxxL", header)
+                yield stream, response.read(size)
+        finally:
+            conn.close()
+
+    def wait_container(self, container_id: str, timeout: t.Optional[float] = None) -> int:
+        """Wait for a container to exit and return its exit code (`TimeoutError` is raised on timeout)."""
+        info = self._json("POST", f"/containers/{container_id}/wait", timeout=timeout)
+        if (info.get("Error", None) or {}).get("Message", None):
+            logger.warning("EngineClient.wait_container error: %s", info["Error"]["Message"])
+        return int(info.get("StatusCode", -1))
+
+    def stop_container(self, container_id: str, grace_period: int = 10) -> None:
+        """Stop a container (SIGTERM, then SIGKILL after `grace_period` seconds)."""
+        self._json("POST", f"/containers/{container_id}/stop", query={"t": grace_period}, timeout=grace_period + 30)
+
+    def remove_container(self, container_id: str, force: bool = True) -> None:
+        self._json("DELETE", f"/containers/{container_id}", query={"force": int(force)}, ok_status=(200, 204, 404))
+
+    def run_container(
+        self,
+        spec: t.Dict,
+        output: t.Optional[t.Callable[[int, bytes], None]] = None,
+        name: t.Optional[str] = None,
+        grace_period: int = 10,
+        timeout: t.Optional[float] = None,
+        cancelled: t.Optional[threading.Event] = None,
+    ) -> int:
+        """Create and start a container, stream its output, wait for it to exit and remove it.
+
+        The container is removed even if this method is interrupted (e.g., KeyboardInterrupt), times out or is
+        cancelled. In these cases, the container is stopped first (SIGTERM, then SIGKILL after `grace_period` seconds).
+
+        Args:
+            spec: Container configuration.
+            output: Callback that receives (stream, data) output chunks.
+            name: Optional container name.
+            grace_period: Seconds to wait for the container to stop when interrupted.
+            timeout: Maximal run time in seconds. When exceeded, `ExecutionError` is raised with `timeout=True` in its
+                context.
+            cancelled: Optional event that stops the container when set (from any thread). Then `ExecutionError` is
+                raised with `cancelled=True` in its context.
+        Returns:
+            Container exit code.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def _remaining_time() -> t.Optional[float]:
+            if deadline is None:
+                return None
+            remaining_time = deadline - time.monotonic()
+            if remaining_time <= 0:
+                raise TimeoutError()
+            return remaining_time
+
+        container_id = self.create_container(spec, name)
+        done = threading.Event()
+
+        def _stop_on_cancel() -> None:
+            # Reading container output blocks, so a watcher stops the container and output ends.
+            while not done.wait(0.1):
+                if cancelled.is_set():
+                    logger.warning("EngineClient.run_container stopping cancelled container (id=%s).", container_id)
+                    try:
+                        self.stop_container(container_id, grace_period)
+                    except (ExecutionError,) + _TIMEOUT_ERRORS as err:
+                        logger.warning("EngineClient.run_container can't stop container %s: %s", container_id, err)
+                    return
+
+        watcher = threading.Thread(target=_stop_on_cancel, daemon=True) if cancelled is not None else None
+        try:
+            self.start_container(container_id)
+            if watcher is not None:
+                watcher.start()
+            for stream, data in self.container_logs(container_id, follow=True, timeout=_remaining_time()):
+                if output is not None:
+                    output(stream, data)
+                _ = _remaining_time()
+            exit_code = self.wait_container(container_id, timeout=_remaining_time())
+            if cancelled is not None and cancelled.is_set():
+                raise ExecutionError("Container has been cancelled.", container=container_id, cancelled=True)
+            return exit_code
+        except (KeyboardInterrupt,) + _TIMEOUT_ERRORS as err:
+            logger.warning("EngineClient.run_container stopping container (id=%s, error=%r).", container_id, err)
+            try:
+                self.stop_container(container_id, grace_period)
+            except ExecutionError as stop_err:
+                logger.warning("EngineClient.run_container can't stop container %s: %s", container_id, str(stop_err))
+            if isinstance(err, _TIMEOUT_ERRORS):
+                raise ExecutionError(
+                    "Container has not completed before the deadline.", container=container_id, timeout=True, code=124
+                )
+            raise
+        finally:
+            done.set()
+            if watcher is not None and watcher.is_alive():
+                watcher.join()
+            try:
+                self.remove_container(container_id, force=True)
+            except ExecutionError as err:
+                logger.warning("EngineClient.run_container can't remove container %s: %s", container_id, str(err))
@@ -0,0 +1,196 @@
+"""Per-process cache of local docker image state.
+
+- `ImageCache`: Answers `does this image exist locally`, `what is its ID` and `what is its size` questions for docker
+  and docker-compatible executables (podman, nvidia-docker, ...).
+
+Docker runner needs to know if an image exists before running each task, and needs image IDs when MLCubes are
+inspected. Each query used to spawn a `docker inspect` process. This cache remembers results of
+`docker image inspect IMAGE ...` for the lifetime of the current process. Commands that work with multiple MLCubes
+query all their images with one call (`query_many`), and threads that query the same image at the same time share one
+call. Entries are invalidated when images are built or pulled.
+"""
+import json
+import logging
+import subprocess
+import threading
+import typing as t
+
+__all__ = ["ImageCache"]
+
+logger = logging.getLogger(__name__)
+
+
+class ImageCache(object):
+    """Process-wide memo of local docker images.
+
+    Keys are (docker executable, image name) tuples, values are image IDs (without the `sha256:` prefix), or None if
+    an image does not exist locally. Image sizes (bytes) are kept with the same keys.
+    """
+
+    _images: t.Dict[t.Tuple[str, str], t.Optional[str]] = {}
+    _sizes: t.Dict[t.Tuple[str, str], t.Optional[int]] = {}
+    _pending: t.Dict[t.Tuple[str, str], threading.Event] = {}
+    """Queries that are running (other threads that need the same image wait for them)."""
+
+    _generation: int = 0
+    """Incremented by `invalidate`, so that queries that started before do not store stale results."""
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _inspect(docker: str, images: t.List[str]) -> t.List[t.Dict]:
+        """Run `docker image inspect` for the given images, and return descriptions of images that exist."""
+        cmd = docker.split() + ["image", "inspect"] + images
+        try:
+            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except FileNotFoundError as err:
+            logger.warning("ImageCache can't run `%s`: %s", " ".join(cmd), str(err))
+            return []
+        try:
+            info = json.loads(proc.stdout.decode() or "[]")
+        except ValueError:
+            logger.warning("ImageCache unexpected output from `%s`: %s", " ".join(cmd), proc.stdout.decode())
+            info = []
+        logger.debug("ImageCache._inspect cmd=%s, exit_code=%d", cmd, proc.returncode)
+        # Docker prints descriptions of images that exist (in the order of arguments), and fails if some do not exist.
+        return [item for item in info if isinstance(item, dict)] if isinstance(info, list) else []
+
+    @staticmethod
+    def _matches(image: str, info: t.Dict) -> bool:
+        """Return true if the image description (`docker image inspect`) is for this image name, digest or ID."""
+
+        def _normalize(name: str) -> str:
+            for prefix in ("docker.io/library/", "docker.io/"):
+                if name.startswith(prefix):
+                    return name[len(prefix):]
+            return name
+
+        name = _normalize(image)
+        if "@" not in name and ":" not in name.rsplit("/", 1)[-1]:
+            name += ":latest"
+        references = (info.get("RepoTags", None) or []) + (info.get("RepoDigests", None) or [])
+        references = [_normalize(ref) for ref in references]
+        if name in references or _normalize(image) in references:
+            return True
+        short_id = image[7:] if image.startswith("sha256:") else image
+        return len(short_id) >= 12 and (ImageCache._image_id(info) or "").startswith(short_id)
+
+    @classmethod
+    def _inspect_many(cls, docker: str, images: t.List[str]) -> t.Dict[str, t.Optional[t.Dict]]:
+        """Describe images with one `docker image inspect` call, and return a mapping from images to descriptions."""
+        info = cls._inspect(docker, images)
+        if len(info) == len(images):
+            return dict(zip(images, info))
+        # Some images do not exist, so descriptions are matched to images by names, digests and IDs.
+        found: t.Dict[str, t.Optional[t.Dict]] = {}
+        for item in info:
+            image = next((image for image in images if image not in found and cls._matches(image, item)), None)
+            if image is not None:
+                found[image] = item
+        if len(found) < len(info):
+            # Some descriptions could not be matched (e.g., images referenced by tags of other images), so remaining
+            # images are inspected one by one.
+            for image in images:
+                if image not in found:
+                    single = cls._inspect(docker, [image])
+                    found[image] = single[0] if len(single) == 1 else None
+        return {image: found.get(image, None) for image in images}
+
+    @staticmethod
+    def _image_id(info: t.Optional[t.Dict]) -> t.Optional[str]:
+        image_id: t.Optional[str] = info.get("Id", None) if isinstance(info, dict) else None
+        if image_id and image_id.startswith("sha256:"):
+            image_id = image_id[7:]
+        return image_id or None
+
+    @staticmethod
+    def _image_size(info: t.Optional[t.Dict]) -> t.Optional[int]:
+        size = info.get("Size", None) if isinstance(info, dict) else None
+        return size if isinstance(size, int) else None
+
+    @classmethod
+    def query_many(
+        cls, docker: t.Optional[str], images: t.List[str]
+    ) -> t.Dict[str, t.Tuple[t.Optional[str], t.Optional[int]]]:
+        """Return IDs and sizes of local images querying all images that are not cached with one docker call.
+
+        The `docker image inspect` command runs without holding the cache lock. Images that other threads are querying
+        are not queried again - this thread waits for their results.
+
+        Args:
+            docker: Docker executable (docker/sudo docker/podman/nvidia-docker/...).
+            images: Image names.
+        Returns:
+            Dictionary that maps image names to tuples containing image ID and image size in bytes (None if unknown).
+        """
+        docker = docker or "docker"
+        results: t.Dict[str, t.Tuple[t.Optional[str], t.Optional[int]]] = {}
+        remaining = list(dict.fromkeys(images))
+        while remaining:
+            claimed: t.List[str] = []
+            pending: t.List[threading.Event] = []
+            with cls._lock:
+                generation = cls._generation
+                for image in remaining:
+                    key = (docker, image)
+                    if key in cls._images:
+                        results[image] = (cls._images[key], cls._sizes.get(key, None))
+                    elif key in cls._pending:
+                        pending.append(cls._pending[key])
+                    else:
+                        cls._pending[key] = threading.Event()
+                        claimed.append(image)
+            if claimed:
+                try:
+                    found = cls._inspect_many(docker, claimed)
+                    with cls._lock:
+                        for image in claimed:
+                            results[image] = (cls._image_id(found[image]), cls._image_size(found[image]))
+                            if generation == cls._generation:
+                                cls._images[(docker, image)], cls._sizes[(docker, image)] = results[image]
+                finally:
+                    with cls._lock:
+                        events = [cls._pending.pop((docker, image)) for image in claimed]
+                    for event in events:
+                        event.set()
+            # Images are being queried by other threads. If their results have been invalidated, query them again.
+            for event in pending:
+                event.wait()
+            remaining = [image for image in remaining if image not in results]
+        return {image: results[image] for image in images}
+
+    @classmethod
+    def query(cls, docker: t.Optional[str], image: str) -> t.Tuple[t.Optional[str], t.Optional[int]]:
+        """Return ID and size of a local image (None, None if the image does not exist), see `query_many`."""
+        return cls.query_many(docker, [image])[image]
+
+    @classmethod
+    def exists(cls, docker: t.Optional[str], image: str) -> bool:
+        """Return true if docker image exists locally."""
+        return cls.query(docker, image)[0] is not None
+
+    @classmethod
+    def image_id(cls, docker: t.Optional[str], image: str) -> t.Optional[str]:
+        """Return ID of a local docker image, or None if it does not exist."""
+        return cls.query(docker, image)[0]
+
+    @classmethod
+    def image_size(cls, docker: t.Optional[str], image: str) -> t.Optional[int]:
+        """Return size (bytes) of a local docker image, or None if it does not exist or its size is unknown."""
+        return cls.query(docker, image)[1]
+
+    @classmethod
+    def invalidate(cls, docker: t.Optional[str] = None, image: t.Optional[str] = None) -> None:
+        """Remove entries from the cache.
+
+        Args:
+            docker: Docker executable. If None, entries for all executables are removed.
+            image: Image name. If None, all images are removed. Since an image can be referenced by different names,
+                and one tag can be moved to another image, it's generally safer to drop all images for this executable.
+        """
+        with cls._lock:
+            cls._generation += 1
+            for key in list(cls._images):
+                if (docker is None or key[0] == docker) and (image is None or key[1] == image):
+                    del cls._images[key]
+                    cls._sizes.pop(key, None)
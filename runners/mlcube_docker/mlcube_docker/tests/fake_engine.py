@@ -0,0 +1,119 @@
+"""Local fake Docker Engine API server (subset used by `EngineClient`) listening on a Unix socket.
+
+Containers do not run anything: each container "prints" its command to stdout and a message to stderr, and exits
+with the exit code taken from the `FAKE_EXIT_CODE` environment variable (default is 0).
+"""
+import json
+import os
+import socketserver
+import struct
+import tempfile
+import threading
+import typing as t
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class FakeEngine(object):
+    """Fake Docker Engine running in a background thread.
+
+    Attributes:
+        images: Local images (name -> ID).
+        containers: Containers that exist (ID -> create request body).
+        requests: List of (method, path) tuples for all requests this server received.
+    """
+
+    def __init__(self) -> None:
+        self.images: t.Dict[str, str] = {"ubuntu:18.04": "sha256:" + "a" * 64}
+        self.containers: t.Dict[str, t.Dict] = {}
+        self.created: t.List[t.Dict] = []
+        self.requests: t.List[t.Tuple[str, str]] = []
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self._tmp_dir.name, "docker.sock")
+        self._server = _UnixHTTPServer(self.socket_path, self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    def __enter__(self) -> "FakeEngine":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._tmp_dir.cleanup()
+
+    def _handler(self) -> t.Type[BaseHTTPRequestHandler]:
+        engine = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                ...
+
+            def _reply(self, status: int, body: t.Any = None, content_type: str = "application/json") -> None:
+                data = body if isinstance(body, bytes) else (json.dumps(body).encode() if body is not None else b"")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _handle(self, method: str) -> None:
+                engine.requests.append((method, self.path))
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip("/").split("/")
+                body = None
+                if int(self.headers.get("Content-Length", 0)) > 0:
+                    body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+
+                if url.path == "/_ping":
+                    self._reply(200, b"OK", "text/plain")
+                elif parts[0] == "images" and parts[-1] == "json":
+                    image = "/".join(parts[1:-1])
+                    if image in engine.images:
+                        self._reply(200, {"Id": engine.images[image], "Size": 1024})
+                    else:
+                        self._reply(404, {"message": f"No such image: {image}"})
+                elif url.path == "/containers/create":
+                    if body["Image"] not in engine.images:
+                        self._reply(404, {"message": f"No such image: {body['Image']}"})
+                        return
+                    container_id = f"{len(engine.created):064d}"
+                    engine.containers[container_id] = body
+                    engine.created.append(body)
+                    self._reply(201, {"Id": container_id, "Warnings": []})
+                elif parts[0] == "containers" and parts[1] not in engine.containers:
+                    self._reply(404, {"message": f"No such container: {parts[1]}"})
+                elif parts[0] == "containers" and parts[-1] == "logs":
+                    spec = engine.containers[parts[1]]
+                    frames = [(1, " ".join(spec.get("Entrypoint", []) + spec["Cmd"]) + "\n"), (2, "done\n")]
+                    data = b"".join(struct.pack(">BxxxL", s, len(m.encode())) + m.encode() for s, m in frames)
+                    self._reply(200, data, "application/vnd.docker.multiplexed-stream")
+                elif parts[0] == "containers" and parts[-1] == "wait":
+                    env = dict(var.split("=", 1) for var in engine.containers[parts[1]]["Env"])
+                    self._reply(200, {"StatusCode": int(env.get("FAKE_EXIT_CODE", 0)), "Error": None})
+                elif parts[0] == "containers" and parts[-1] in ("start", "stop"):
+                    self._reply(204)
+                elif method == "DELETE" and parts[0] == "containers":
+                    assert query.get("force") == ["1"]
+                    del engine.containers[parts[1]]
+                    self._reply(204)
+                else:
+                    self._reply(404, {"message": f"page not found: {self.path}"})
+
+            def do_GET(self) -> None:
+                self._handle("GET")
+
+            def do_POST(self) -> None:
+                self._handle("POST")
+
+            def do_DELETE(self) -> None:
+                self._handle("DELETE")
+
+        return _Handler
@@ -1,3 +1,4 @@
+import asyncio
 import typing as t
 import unittest
 from unittest import TestCase
@@ -7,6 +8,7 @@ from mlcube_docker.docker_run import Config, DockerRun
 from omegaconf import DictConfig, OmegaConf
 
 from mlcube.config import MLCubeConfig
+from mlcube.errors import ExecutionError
 from mlcube.shell import Shell
 
 _HAVE_DOCKER: bool = Shell.run(["docker", "--version"], on_error="ignore") == 0
@@ -118,3 +120,100 @@ class TestDockerRunner(TestCase):
     @unittest.skipUnless(_HAVE_DOCKER, reason="No docker available.")
     def test_custom_entrypoints_with_docker(self):
         self.custom_entry_points("docker")
+
+
+class TestDockerRunInterrupt(TestCase):
+    def test_container_stopped_on_interrupt(self) -> None:
+        with patch("io.open", mock_open(read_data=_MLCUBE_DEFAULT_ENTRY_POINT)):
+            mlcube: DictConfig = MLCubeConfig.create_mlcube_config(
+                "/some/path/to/mlcube.yaml", runner_config=Config.DEFAULT, runner_cls=DockerRun
+            )
+
+        def _docker(cmd: t.List[str], on_error: str = "raise") -> int:
+            if cmd[1] == "run":
+                # Docker CLI has started the container and has been interrupted.
+                with open(cmd[2].split("--cidfile=")[1], "w") as cid_file:
+                    cid_file.write("c" * 64)
+                raise KeyboardInterrupt
+            return 0
+
+        with patch.object(Shell, "sync_workspace"), patch.object(Shell, "run", side_effect=_docker) as shell_run:
+            with patch("mlcube_docker.docker_run.ImageCache.exists", return_value=True):
+                with self.assertRaises(KeyboardInterrupt):
+                    DockerRun(mlcube, task="ls").run()
+        self.assertListEqual(shell_run.call_args[0][0], ["docker", "stop", "--time=10", "c" * 64])
+
+    def test_container_stopped_when_cli_stopped(self) -> None:
+        with patch("io.open", mock_open(read_data=_MLCUBE_DEFAULT_ENTRY_POINT)):
+            mlcube: DictConfig = MLCubeConfig.create_mlcube_config(
+                "/some/path/to/mlcube.yaml", runner_config=Config.DEFAULT, runner_cls=DockerRun
+            )
+        # Docker CLI has been cancelled, killed by a signal or has exited with an error code.
+        for context, stopped in (({"cancelled": True}, True), ({"status": "signalled"}, True), ({"code": 3}, False)):
+            def _docker(cmd: t.List[str], on_error: str = "raise") -> int:
+                if cmd[1] == "run":
+                    with open(cmd[2].split("--cidfile=")[1], "w") as cid_file:
+                        cid_file.write("c" * 64)
+                    raise ExecutionError("Failed to execute shell command.", **context)
+                return 0
+
+            with patch.object(Shell, "sync_workspace"), patch.object(Shell, "run", side_effect=_docker) as shell_run:
+                with patch("mlcube_docker.docker_run.ImageCache.exists", return_value=True):
+                    with self.assertRaises(ExecutionError):
+                        DockerRun(mlcube, task="ls").run()
+            commands = [call[0][0] for call in shell_run.call_args_list]
+            self.assertEqual(["docker", "stop", "--time=10", "c" * 64] in commands, stopped, context)
+
+    def test_arun_container_stopped_on_cancel(self) -> None:
+        with patch("io.open", mock_open(read_data=_MLCUBE_DEFAULT_ENTRY_POINT)):
+            mlcube: DictConfig = MLCubeConfig.create_mlcube_config(
+                "/some/path/to/mlcube.yaml", runner_config=Config.DEFAULT, runner_cls=DockerRun
+            )
+        started = asyncio.Event()
+
+        async def _docker(cmd: t.List[str], on_error: str = "raise") -> int:
+            with open(cmd[2].split("--cidfile=")[1], "w") as cid_file:
+                cid_file.write("c" * 64)
+            started.set()
+            await asyncio.sleep(60)
+            return 0
+
+        async def _run_and_cancel() -> None:
+            task = asyncio.ensure_future(DockerRun(mlcube, task="ls").arun())
+            await started.wait()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch.object(Shell, "sync_workspace"), patch.object(Shell, "arun", side_effect=_docker) as shell_arun:
+            with patch.object(Shell, "run") as shell_run:
+                with patch("mlcube_docker.docker_run.ImageCache.exists", return_value=True):
+                    asyncio.run(_run_and_cancel())
+        self.assertListEqual(shell_arun.call_args[0][0][:2], ["docker", "run"])
+        self.assertListEqual(shell_run.call_args[0][0], ["docker", "stop", "--time=10", "c" * 64])
+
+
+class TestDockerRunPrefetch(TestCase):
+    def setUp(self) -> None:
+        with patch("io.open", mock_open(read_data=_MLCUBE_DEFAULT_ENTRY_POINT)):
+            self.mlcube: DictConfig = MLCubeConfig.create_mlcube_config(
+                "/some/path/to/mlcube.yaml", runner_config=Config.DEFAULT, runner_cls=DockerRun
+            )
+
+    def _prefetch(self, image_exists: bool) -> t.Tuple[t.Dict, t.List[t.List[str]]]:
+        with patch.object(Shell, "run", return_value=0) as shell_run:
+            with patch("mlcube_docker.docker_run.ImageCache.exists", return_value=image_exists):
+                with patch("mlcube_docker.docker_run.ImageCache.image_size", return_value=1024):
+                    info = DockerRun(self.mlcube, task=None).prefetch()
+        return info, [call[0][0] for call in shell_run.call_args_list]
+
+    def test_prefetch(self) -> None:
+        info, commands = self._prefetch(image_exists=False)
+        self.assertDictEqual(info, {"image": "ubuntu:18.04", "fetched": True, "size": 1024})
+        self.assertListEqual(commands, [["docker", "pull", "ubuntu:18.04"]])
+
+        # Existing images are not pulled or rebuilt again, even with the `always` build strategy.
+        self.mlcube.runner.build_strategy = Config.BuildStrategy.ALWAYS
+        info, commands = self._prefetch(image_exists=True)
+        self.assertFalse(info["fetched"])
+        self.assertListEqual(commands, [])
@@ -0,0 +1,176 @@
+import io
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import mock_open, patch
+
+from mlcube_docker.docker_run import Config, DockerRun
+from mlcube_docker.engine_client import EngineClient
+from mlcube_docker.tests.fake_engine import FakeEngine
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube.config import MLCubeConfig
+from mlcube.errors import ExecutionError, IllegalParameterValueError
+from mlcube.logs import TaskLog
+from mlcube.shell import Shell
+
+_MLCUBE = """
+docker:
+  image: ubuntu:18.04
+  env_args: {FAKE_EXIT_CODE: 0}
+tasks:
+  ls: {parameters: {inputs: {}, outputs: {}}}
+  free: {entrypoint: 'python /workspace/free.py', parameters: {inputs: {}, outputs: {}}}
+"""
+
+
+class TestEngineClient(TestCase):
+    def setUp(self) -> None:
+        self.engine = FakeEngine()
+        self.engine.__enter__()
+        self.addCleanup(self.engine.__exit__)
+        self.client = EngineClient(self.engine.socket_path, timeout=5)
+
+    def test_default_socket(self) -> None:
+        with patch.dict(os.environ, {"DOCKER_HOST": "unix:///tmp/docker.sock"}):
+            self.assertEqual(EngineClient.default_socket("docker"), "/tmp/docker.sock")
+        with patch.dict(os.environ, {"DOCKER_HOST": "", "XDG_RUNTIME_DIR": ""}):
+            self.assertEqual(EngineClient.default_socket("docker"), "/var/run/docker.sock")
+            self.assertEqual(EngineClient.default_socket("podman"), "/run/podman/podman.sock")
+
+    def test_ping(self) -> None:
+        self.assertTrue(self.client.ping())
+        self.assertFalse(EngineClient(self.engine.socket_path + ".missing").ping())
+
+    def test_image_id(self) -> None:
+        self.assertEqual(self.client.image_id("ubuntu:18.04"), "a" * 64)
+        self.assertIsNone(self.client.image_id("ubuntu:22.04"))
+        self.assertEqual(self.client.image_size("ubuntu:18.04"), 1024)
+        self.assertIsNone(self.client.image_size("ubuntu:22.04"))
+
+    def test_run_container(self) -> None:
+        output = []
+        exit_code = self.client.run_container(
+            {"Image": "ubuntu:18.04", "Cmd": ["ls", "-la"], "Env": ["FAKE_EXIT_CODE=3"]},
+            output=lambda stream, data: output.append((stream, data)),
+        )
+        self.assertEqual(exit_code, 3)
+        self.assertListEqual(
+            output, [(EngineClient.STREAM_STDOUT, b"ls -la\n"), (EngineClient.STREAM_STDERR, b"done\n")]
+        )
+        # Container has been removed.
+        self.assertDictEqual(self.engine.containers, {})
+
+    def test_run_container_removed_on_interrupt(self) -> None:
+        with patch.object(EngineClient, "wait_container", side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.client.run_container({"Image": "ubuntu:18.04", "Cmd": [], "Env": []}, grace_period=3)
+        self.assertDictEqual(self.engine.containers, {})
+        self.assertTrue(self.engine.requests[-2][1].endswith("/stop?t=3"))
+
+    def test_run_container_timeout(self) -> None:
+        # Sockets raise `socket.timeout` that is not a `TimeoutError` before Python 3.10.
+        for error in (TimeoutError, socket.timeout):
+            with patch.object(EngineClient, "wait_container", side_effect=error):
+                with self.assertRaises(ExecutionError) as ctx:
+                    self.client.run_container({"Image": "ubuntu:18.04", "Cmd": [], "Env": []}, timeout=60)
+            self.assertTrue(ctx.exception.context["timeout"])
+            self.assertTrue(self.engine.requests[-2][1].endswith("/stop?t=10"))
+            self.assertDictEqual(self.engine.containers, {})
+
+    def test_run_container_cancelled(self) -> None:
+        def _wait_container(container_id: str, timeout=None) -> int:
+            # The container runs until it is stopped.
+            deadline = time.monotonic() + 5
+            while not any(path.endswith("/stop?t=3") for _, path in self.engine.requests[1:]):
+                if time.monotonic() > deadline:
+                    return 0
+                time.sleep(0.05)
+            return 137
+
+        cancelled = threading.Event()
+        cancelled.set()
+        with patch.object(EngineClient, "wait_container", side_effect=_wait_container):
+            with self.assertRaises(ExecutionError) as ctx:
+                self.client.run_container(
+                    {"Image": "ubuntu:18.04", "Cmd": [], "Env": []}, grace_period=3, cancelled=cancelled
+                )
+        self.assertTrue(ctx.exception.context["cancelled"])
+        self.assertDictEqual(self.engine.containers, {})
+
+    def test_request_timeout(self) -> None:
+        getresponse = "mlcube_docker.engine_client._UnixHTTPConnection.getresponse"
+        with patch(getresponse, side_effect=socket.timeout("timed out")):
+            with self.assertRaises(TimeoutError):
+                self.client.wait_container("abc", timeout=1)
+
+    def test_errors(self) -> None:
+        with self.assertRaises(ExecutionError) as ctx:
+            self.client.create_container({"Image": "ubuntu:22.04", "Cmd": []})
+        self.assertEqual(ctx.exception.context["status"], 404)
+        self.assertEqual(ctx.exception.context["error"], "No such image: ubuntu:22.04")
+
+
+class TestDockerRunEngineBackend(TestCase):
+    def setUp(self) -> None:
+        self.engine = FakeEngine()
+        self.engine.__enter__()
+        self.addCleanup(self.engine.__exit__)
+        _patch = patch.object(Shell, "sync_workspace", lambda *args, **kwargs: None)
+        _patch.start()
+        self.addCleanup(_patch.stop)
+
+    def _mlcube(self, **docker) -> DictConfig:
+        docker = {"backend": "api", "socket": self.engine.socket_path, **docker}
+        with patch("io.open", mock_open(read_data=_MLCUBE)):
+            return MLCubeConfig.create_mlcube_config(
+                "/some/path/to/mlcube.yaml",
+                runner_config=Config.DEFAULT,
+                runner_cls=DockerRun,
+                mlcube_cli_args=OmegaConf.create({"docker": docker}),
+            )
+
+    def test_run(self) -> None:
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+            DockerRun(self._mlcube(**{"--network": "none", "--memory": "1g"}), task="ls").run()
+            DockerRun(self._mlcube(), task="free").run()
+        self.assertEqual(stdout.getvalue(), "ls\npython /workspace/free.py\n")
+
+        ls, free = self.engine.created
+        self.assertListEqual(ls["Cmd"], ["ls"])
+        self.assertListEqual(ls["Env"], ["FAKE_EXIT_CODE=0"])
+        self.assertEqual(ls["HostConfig"]["NetworkMode"], "none")
+        self.assertEqual(ls["HostConfig"]["Memory"], 1024 ** 3)
+        self.assertListEqual(free["Entrypoint"], ["python"])
+        self.assertListEqual(free["Cmd"], ["/workspace/free.py"])
+
+    def test_run_failed(self) -> None:
+        with self.assertRaises(ExecutionError) as ctx:
+            DockerRun(self._mlcube(env_args={"FAKE_EXIT_CODE": 2}), task="ls").run()
+        self.assertEqual(ctx.exception.context["code"], 2)
+
+    def test_run_captured(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = TaskLog(os.path.join(tmp_dir, "logs", "ls.log"), echo=False)
+            with patch("sys.stdout", new_callable=io.StringIO) as stdout, Shell.capture(log):
+                DockerRun(self._mlcube(), task="ls").run()
+            log.close()
+            self.assertEqual(stdout.getvalue(), "")
+            self.assertListEqual(log.tail(), ["ls", "done"])
+            with open(log.path) as stream:
+                self.assertEqual(stream.read(), "ls\ndone\n")
+
+    def test_unsupported_args_fallback_to_cli(self) -> None:
+        mlcube = self._mlcube(cpu_args="--rm")
+        with patch.object(Shell, "run") as shell_run:
+            DockerRun(mlcube, task="ls").run()
+        self.assertListEqual(shell_run.call_args[0][0][:2], ["docker", "run"])
+        self.assertTrue(shell_run.call_args[0][0][2].startswith("--rm --cidfile="))
+        self.assertListEqual(self.engine.created, [])
+
+    def test_invalid_backend(self) -> None:
+        with self.assertRaises(IllegalParameterValueError):
+            self._mlcube(backend="grpc")
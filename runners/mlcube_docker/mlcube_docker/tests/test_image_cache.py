@@ -0,0 +1,110 @@
+import json
+import subprocess
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+from unittest.mock import patch
+
+from mlcube_docker.image_cache import ImageCache
+
+_LOCAL_IMAGES = {"ubuntu:18.04": "sha256:" + "a" * 64, "mlcommons/mnist:0.0.1": "sha256:" + "b" * 64}
+
+
+class TestImageCache(TestCase):
+    def setUp(self) -> None:
+        self.calls: t.List[t.List[str]] = []
+        ImageCache.invalidate()
+        self.addCleanup(ImageCache.invalidate)
+        _patch = patch("mlcube_docker.image_cache.subprocess.run", side_effect=self._docker)
+        _patch.start()
+        self.addCleanup(_patch.stop)
+
+    def _docker(self, cmd: t.List[str], **kwargs) -> subprocess.CompletedProcess:
+        """Fake `docker image inspect IMAGE` command."""
+        self.calls.append(cmd)
+        images = cmd[cmd.index("inspect") + 1:]
+        info = [
+            {"Id": _LOCAL_IMAGES[image], "RepoTags": [image], "Size": 1024}
+            for image in images
+            if image in _LOCAL_IMAGES
+        ]
+        exit_code = 0 if len(info) == len(images) else 1
+        return subprocess.CompletedProcess(cmd, exit_code, json.dumps(info).encode(), b"")
+
+    def test_query(self) -> None:
+        self.assertTupleEqual(ImageCache.query("docker", "ubuntu:18.04"), ("a" * 64, 1024))
+        self.assertListEqual(self.calls, [["docker", "image", "inspect", "ubuntu:18.04"]])
+
+        # Results are cached for the lifetime of a process.
+        self.assertTrue(ImageCache.exists("docker", "ubuntu:18.04"))
+        self.assertEqual(ImageCache.image_id("docker", "mlcommons/mnist:0.0.1"), "b" * 64)
+        self.assertEqual(ImageCache.image_size("docker", "mlcommons/mnist:0.0.1"), 1024)
+        self.assertEqual(len(self.calls), 2)
+
+        # Cache is per docker executable.
+        self.assertTrue(ImageCache.exists("sudo docker", "ubuntu:18.04"))
+        self.assertListEqual(self.calls[-1], ["sudo", "docker", "image", "inspect", "ubuntu:18.04"])
+
+    def test_missing_images(self) -> None:
+        self.assertFalse(ImageCache.exists("docker", "ubuntu:22.04"))
+        self.assertIsNone(ImageCache.image_size("docker", "ubuntu:22.04"))
+        self.assertEqual(len(self.calls), 1)
+
+    def test_query_many(self) -> None:
+        images = ["ubuntu:18.04", "ubuntu:22.04", "mlcommons/mnist:0.0.1"]
+        self.assertDictEqual(
+            ImageCache.query_many("docker", images),
+            {"ubuntu:18.04": ("a" * 64, 1024), "ubuntu:22.04": (None, None), "mlcommons/mnist:0.0.1": ("b" * 64, 1024)},
+        )
+        # All images are queried with one call, and results are cached.
+        self.assertListEqual(self.calls, [["docker", "image", "inspect"] + images])
+        self.assertTrue(ImageCache.exists("docker", "mlcommons/mnist:0.0.1"))
+        self.assertFalse(ImageCache.exists("docker", "ubuntu:22.04"))
+        self.assertEqual(len(self.calls), 1)
+
+        # Images that are cached are not queried again.
+        ImageCache.query_many("docker", ["ubuntu:18.04", "mlcommons/mnist:0.0.2"])
+        self.assertListEqual(self.calls[-1], ["docker", "image", "inspect", "mlcommons/mnist:0.0.2"])
+
+    def test_matches(self) -> None:
+        info = {"Id": "sha256:" + "c" * 64, "RepoTags": ["docker.io/library/ubuntu:latest"], "RepoDigests": []}
+        for image in ("ubuntu", "ubuntu:latest", "docker.io/library/ubuntu", "c" * 12, "sha256:" + "c" * 64):
+            self.assertTrue(ImageCache._matches(image, info), image)
+        for image in ("ubuntu:18.04", "c" * 6, "mlcommons/ubuntu"):
+            self.assertFalse(ImageCache._matches(image, info), image)
+
+    def test_concurrent_queries(self) -> None:
+        started, release = threading.Event(), threading.Event()
+        docker = self._docker
+
+        def _slow_docker(cmd: t.List[str], **kwargs) -> subprocess.CompletedProcess:
+            if cmd[-1] == "ubuntu:18.04":
+                started.set()
+                release.wait(10)
+            return docker(cmd, **kwargs)
+
+        with patch("mlcube_docker.image_cache.subprocess.run", side_effect=_slow_docker):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                futures = [pool.submit(ImageCache.image_id, "docker", "ubuntu:18.04") for _ in range(3)]
+                self.assertTrue(started.wait(10))
+                # Other images are queried while `docker image inspect` runs for this one.
+                self.assertEqual(ImageCache.image_id("docker", "mlcommons/mnist:0.0.1"), "b" * 64)
+                release.set()
+                self.assertListEqual([future.result() for future in futures], ["a" * 64] * 3)
+        # Threads that query the same image share one call.
+        self.assertEqual([cmd[-1] for cmd in self.calls].count("ubuntu:18.04"), 1)
+
+    def test_invalidate(self) -> None:
+        self.assertFalse(ImageCache.exists("docker", "ubuntu:22.04"))
+        _LOCAL_IMAGES["ubuntu:22.04"] = "sha256:" + "c" * 64
+        self.addCleanup(_LOCAL_IMAGES.pop, "ubuntu:22.04")
+        self.assertFalse(ImageCache.exists("docker", "ubuntu:22.04"))
+
+        ImageCache.invalidate("docker")
+        self.assertTrue(ImageCache.exists("docker", "ubuntu:22.04"))
+        self.assertEqual(len(self.calls), 2)
+
+    def test_docker_not_found(self) -> None:
+        with patch("mlcube_docker.image_cache.subprocess.run", side_effect=FileNotFoundError("docker")):
+            self.assertFalse(ImageCache.exists("docker", "ubuntu:18.04"))
@@ -25,6 +25,11 @@ class Instance(object):
     def status(self) -> t.Optional[t.Text]:
         return self.instance.get('status', None)
 
+    @property
+    def metadata(self) -> t.Dict[t.Text, t.Text]:
+        items = (self.instance.get('metadata', None) or {}).get('items', None) or []
+        return {item['key']: item.get('value', None) for item in items}
+
     @property
     def public_ip(self) -> t.Optional[t.Text]:
         for interface in self.instance.get('networkInterfaces', None) or []:
@@ -2,7 +2,7 @@ import typing as t
 
 
 class Operation(object):
-    def __int__(self, operation: t.Dict) -> None:
+    def __init__(self, operation: t.Dict) -> None:
         self.operation: t.Dict = operation
 
     @property
@@ -1,6 +1,7 @@
 import time
 import typing as t
 import googleapiclient.discovery
+from googleapiclient.errors import HttpError
 from google.oauth2 import service_account
 from mlcube_gcp.gcp_client.operation import Operation
 
@@ -11,9 +12,25 @@ class Service(object):
     https://stackoverflow.com/questions/51303178/launch-gcp-instance-from-my-pc-using-python
     https://stackoverflow.com/questions/49444290/googleapiclient-authentication-using-personal-account
     """
-    def __init__(self, project_id: t.Text, zone: t.Text, credentials: t.Optional[t.Text] = None) -> None:
+
+    DEFAULT_IMAGE = {'project': 'ubuntu-os-cloud', 'family': 'ubuntu-1804-lts'}
+    """Source image for new instances when users do not provide one."""
+
+    def __init__(self, project_id: t.Text, zone: t.Text, credentials: t.Optional[t.Text] = None,
+                 compute: t.Optional[t.Any] = None) -> None:
+        """
+        Args:
+            project_id: GCP project identifier.
+            zone: GCP zone.
+            credentials: Credentials to use (see `test_data/platform_01.yaml` for supported options).
+            compute: Compute Engine API resource. If None, a new one is built with `googleapiclient.discovery`. Unit
+                tests provide a local fake of the Compute API here.
+        """
         self.project_id: t.Text = project_id
         self.zone: t.Text = zone
+        if compute is not None:
+            self.service = compute
+            return
         if isinstance(credentials, t.Dict) and 'file' in credentials:
             credentials = service_account.Credentials.from_service_account_file(
                 credentials.get('file'),
@@ -28,10 +45,12 @@ class Service(object):
         return response.get('items', [])
 
     def get_instance(self, name: t.Text) -> t.Optional[t.Dict]:
-        for instance in self.list_instances():
-            if instance.get('name', None) == name:
-                return instance
-        return None
+        try:
+            return self.service.instances().get(project=self.project_id, zone=self.zone, instance=name).execute()
+        except HttpError as err:
+            if err.resp.status == 404:
+                return None
+            raise
 
     def start_instance(self, name: t.Text) -> t.Dict:
         return self.service.instances().start(project=self.project_id, zone=self.zone, instance=name).execute()
@@ -42,21 +61,48 @@ class Service(object):
     def delete_instance(self, name: t.Text) -> t.Dict:
         return self.service.instances().delete(project=self.project_id, zone=self.zone, instance=name).execute()
 
+    def set_metadata(self, instance: t.Dict, items: t.Dict[t.Text, t.Text]) -> t.Dict:
+        """Add or update instance metadata items.
+
+        Args:
+            instance: Instance dictionary as returned by `get_instance`. Its metadata fingerprint is used to guard
+                against concurrent updates.
+            items: Metadata items to set.
+        """
+        metadata: t.Dict = instance.get('metadata', None) or {}
+        merged = {item['key']: item['value'] for item in metadata.get('items', None) or []}
+        merged.update(items)
+        body = {
+            'fingerprint': metadata.get('fingerprint', None),
+            'items': [{'key': key, 'value': value} for key, value in merged.items()]
+        }
+        return self.service.instances().setMetadata(
+            project=self.project_id, zone=self.zone, instance=instance['name'], body=body
+        ).execute()
+
     def create_instance(self, **kwargs) -> t.Dict:
         """
         https://cloud.google.com/compute/docs/reference/rest/v1/instances/setMachineType
         Assumed: https://cloud.google.com/compute/docs/instances/adding-removing-ssh-keys#project-wide
         https://cloud.google.com/compute/docs/reference/rest/v1/instances/insert
+
+        The `image` argument is a dictionary with `project` and either `family` (latest image in this family is used)
+        or `name` (exact image, e.g. pre-baked image with docker already installed).
         """
         name = kwargs.get('name', 'gcp-f1-micro')
         machine_type = kwargs.get('machine_type', 'f1-micro')
-        image = kwargs.get('image', {'project': 'ubuntu-os-cloud', 'family': 'ubuntu-1804-lts'})
+        image = kwargs.get('image', None) or Service.DEFAULT_IMAGE
         disk_size_gb = kwargs.get('disk_size_gb', 20)
 
-        image_response = self.service.images().getFromFamily(project=image['project'], family=image['family']).execute()
+        if image.get('name', None):
+            image_response = self.service.images().get(project=image['project'], image=image['name']).execute()
+        else:
+            image_response = self.service.images().getFromFamily(
+                project=image['project'], family=image['family']
+            ).execute()
         config: t.Dict = {
             'name': name,
-            'machine_type': f"zones/{self.zone}/machineTypes/{machine_type}",
+            'machineType': f"zones/{self.zone}/machineTypes/{machine_type}",
             'disks': [{
                 'boot': True,
                 'autoDelete': True,
@@ -86,19 +132,43 @@ class Service(object):
                 ]
             }],
         }
+        if kwargs.get('metadata', None):
+            config['metadata'] = {'items': [{'key': k, 'value': v} for k, v in kwargs['metadata'].items()]}
         return self.service.instances().insert(project=self.project_id, zone=self.zone, body=config).execute()
 
-    def wait_for_operation(self, operation: t.Union[t.Text, t.Dict, Operation], retry_pause: float = 5):
+    def wait_for_operation(self, operation: t.Union[t.Text, t.Dict, Operation], timeout: float = 600,
+                           max_pause: float = 30) -> t.Dict:
+        """Block until zone operation is done.
+
+        This uses the `zoneOperations.wait` API method that returns as soon as the operation is done (or when a server
+        side deadline of about two minutes is reached), so no fixed-interval polling is involved. If the server returns
+        before the operation is done, or a transient error occurs, the call is retried with exponential backoff.
+
+        Args:
+            operation: Operation name or operation object returned by one of `*_instance` methods.
+            timeout: Maximal time in seconds to wait for this operation.
+            max_pause: Maximal pause in seconds between consecutive wait requests.
+        Returns:
+            Operation resource.
+        """
         if isinstance(operation, t.Dict):
             operation = operation.get('name', None)
         elif isinstance(operation, Operation):
             operation = operation.name
+        deadline, pause = time.monotonic() + timeout, 1.0
         while True:
-            result = self.service.zoneOperations().get(
-                project=self.project_id, zone=self.zone, operation=operation
-            ).execute()
-            if result['status'] == 'DONE':
-                if 'error' in result:
-                    raise Exception(result['error'])
-                return result
-            time.sleep(retry_pause)
+            try:
+                result = self.service.zoneOperations().wait(
+                    project=self.project_id, zone=self.zone, operation=operation
+                ).execute()
+                if result['status'] == 'DONE':
+                    if 'error' in result:
+                        raise Exception(result['error'])
+                    return result
+            except HttpError as err:
+                if err.resp.status < 500 and err.resp.status != 429:
+                    raise
+            if time.monotonic() + pause > deadline:
+                raise TimeoutError(f"GCP operation ({operation}) has not completed in {timeout} seconds.")
+            time.sleep(pause)
+            pause = min(2 * pause, max_pause)
@@ -1,13 +1,17 @@
 import os
+import time
+import hashlib
 import logging
 import typing as t
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from omegaconf import (DictConfig, OmegaConf)
+from mlcube.cli import parse_cli_args
 from mlcube.validate import Validate
 from mlcube.shell import Shell
 from ssh_config.client import (SSHConfig, Host)
 from mlcube.runner import (RunnerConfig, Runner)
-from mlcube.errors import ExecutionError
+from mlcube.errors import (ExecutionError, IllegalParameterValueError, MLCubeError)
 from mlcube_gcp.gcp_client.instance import Instance as GCPInstance, Status as GCPInstanceStatus
 from mlcube_gcp.gcp_client.service import Service
 
@@ -28,7 +32,13 @@ class Config(RunnerConfig):
         'instance': {
             'name': '',
             'machine_type': '',
-            'disk_size_gb': ''
+            'disk_size_gb': '',
+            'image': {},            # Source image for new instances: {project, family} or {project, name}.
+            'preinstalled': False   # Image is pre-baked (docker, python3-pip, virtualenv), skip provisioning.
+        },
+        'idle_policy': {
+            'action': 'none',       # What to do with the instance when a task is done: none, stop or delete.
+            'minutes': 0            # For `stop`, number of idle minutes (no new tasks) before the instance stops.
         },
         'platform': ''
     })
@@ -37,27 +47,62 @@ class Config(RunnerConfig):
     def validate(mlcube: DictConfig) -> None:
         Validate(mlcube.runner, 'runner')\
             .check_unknown_keys(Config.DEFAULT.keys())\
-            .check_values(['gcp', 'instance'], DictConfig)\
+            .check_values(['gcp', 'instance', 'idle_policy'], DictConfig)\
             .check_values(['platform'], str, blanks=False)
         Validate(mlcube.runner.gcp, 'runner.gcp')\
             .check_unknown_keys(['project_id', 'zone', 'credentials'])\
             .check_values(['project_id', 'zone'], str, blanks=False) \
             .not_none(['credentials'])
         Validate(mlcube.runner.instance, 'runner.instance')\
-            .check_unknown_keys(['name', 'machine_type', 'disk_size_gb'])\
+            .check_unknown_keys(['name', 'machine_type', 'disk_size_gb', 'image', 'preinstalled'])\
             .not_none(['name', 'machine_type', 'disk_size_gb']) \
             .check_values(['name', 'machine_type'], str, blanks=False)
+        Validate(mlcube.runner.idle_policy, 'runner.idle_policy')\
+            .check_unknown_keys(['action', 'minutes'])\
+            .check_values(['action'], str, blanks=False)\
+            .check_values(['minutes'], int)
+        idle_policy: DictConfig = mlcube.runner.idle_policy
+        if idle_policy.action not in GCPRun.IDLE_ACTIONS:
+            raise IllegalParameterValueError('action', idle_policy.action, GCPRun.IDLE_ACTIONS, 'runner.idle_policy')
+        if idle_policy.minutes < 0:
+            raise IllegalParameterValueError('minutes', idle_policy.minutes, "'non-negative integer'",
+                                             'runner.idle_policy')
 
 
 class GCPRun(Runner):
 
     CONFIG = Config
 
+    PROVISION_CMD = (
+        'sudo snap install docker && sudo addgroup --system docker && sudo adduser ${USER} docker && '
+        'sudo snap disable docker && sudo snap enable docker && '
+        'sudo apt update && yes | sudo apt install python3-pip virtualenv && sudo apt clean'
+    )
+    """Commands to install system packages on a new remote instance (specific for docker-based images now)."""
+
+    PROVISION_METADATA_KEY = 'mlcube-provisioned'
+    """Instance metadata key that stores hash of provisioning commands that have been executed on this instance."""
+
+    IDLE_ACTIONS = ('none', 'stop', 'delete')
+    """Supported actions (`idle_policy.action`) to perform with a remote instance when MLCube task completes."""
+
+    IDLE_SHUTDOWN_CMD = 'pgrep -f "[m]lcube run" > /dev/null || sudo shutdown -h +{minutes}'
+    """Schedule instance shutdown unless other MLCube tasks are running there (GCP stops instances on shutdown)."""
+
+    IDLE_CANCEL_CMD = 'sudo shutdown -c'
+    """Cancel shutdown scheduled by previous MLCube task."""
+
     def __init__(self, mlcube: t.Union[DictConfig, t.Dict], task: t.Text) -> None:
         super().__init__(mlcube, task)
 
     def configure(self) -> None:
-        """  """
+        """Make sure remote GCP instance exists, is running and is provisioned, then configure delegated platform.
+
+        Instance creation/start (that blocks on GCP operations) runs in a background thread while the effective
+        configuration of the delegated platform is being resolved locally. Provisioning of a remote instance is skipped
+        if the instance's image is pre-baked (`instance.preinstalled`) or the instance metadata says it has already
+        been provisioned with the current provisioning script.
+        """
         gcp: DictConfig = self.mlcube.runner
 
         # Check that SSH is configured.
@@ -82,10 +127,51 @@ class GCPRun(Runner):
                 "and/or `IdentifyFile`."
             )
 
-        # Connect to GCP
+        service = self._connect()
+
+        # Figure out if an instance needs to be created or started. While GCP is doing its job, resolve configuration
+        # of the platform this runner delegates to.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            instance_future = executor.submit(self._ensure_instance, service)
+            platform_runner, platform_config = self._delegated_runner()
+            instance, instance_started = instance_future.result()
+
+        # Make sure SSH mlcube is up-to-date
+        if gcp_host.get('HostName', None) != instance.public_ip:
+            print(f"Updating SSH mlcube (prev={gcp_host.get('HostName')}, new={instance.public_ip}, "
+                  f"file={ssh_config_file})")
+            ssh_config.update(instance.name, {'HostName': instance.public_ip})
+            ssh_config.write(ssh_config_file)
+            # TODO: clean '.ssh/known_hosts'.
+
+        if instance_started:
+            self._wait_for_ssh(instance.name)
+        else:
+            self._cancel_idle_shutdown()
+
+        # Configure remote instance. This is specific for docker-based images now.
+        self._provision(service, instance)
+
+        # Remote GCP instance has been configured
+        print(instance)
+
+        # Should be as simple as invoking configure of the delegated platform (that is done in this process).
+        try:
+            platform_runner(platform_config, task=None).configure()
+        except MLCubeError as err:
+            raise ExecutionError.mlcube_configure_error(
+                self.__class__.__name__,
+                f"Error occurred while running mlcube configure with GCP platform (platform={gcp.platform}). See "
+                "context for more details.",
+                error=str(err)
+            )
+
+    def _connect(self) -> Service:
+        """Connect to GCP."""
+        gcp: DictConfig = self.mlcube.runner
         logger.info("Connecting to GCP ...")
         try:
-            service = Service(project_id=gcp.gcp.project_id, zone=gcp.gcp.zone, credentials=gcp.gcp.credentials)
+            return Service(project_id=gcp.gcp.project_id, zone=gcp.gcp.zone, credentials=gcp.gcp.credentials)
         except Exception as err:
             raise ExecutionError.mlcube_configure_error(
                 self.__class__.__name__,
@@ -96,22 +182,30 @@ class GCPRun(Runner):
                 gcp_info={'project_id': gcp.gcp.project_id, 'zone': gcp.gcp.zone, 'credentials': gcp.gcp.credentials}
             )
 
-        # Figure out if an instance needs to be created
+    def _ensure_instance(self, service: Service) -> t.Tuple[GCPInstance, bool]:
+        """Create or start remote instance if needed.
+
+        Returns:
+            Tuple of the running instance and a flag that is true when the instance has just been created or started.
+        """
+        gcp: DictConfig = self.mlcube.runner
+        started = False
         try:
             instance = GCPInstance(service.get_instance(gcp.instance.name))
             if instance.name is None:
                 print("Creating GCP instance ...")
                 service.wait_for_operation(
                     service.create_instance(name=gcp.instance.name, machine_type=gcp.instance.machine_type,
-                                            disk_size_gb=gcp.instance.disk_size_gb)
+                                            disk_size_gb=gcp.instance.disk_size_gb,
+                                            image=OmegaConf.to_container(gcp.instance.image))
                 )
-                instance = GCPInstance(service.get_instance(gcp.instance.name))
+                instance, started = GCPInstance(service.get_instance(gcp.instance.name)), True
 
             # Check its running status
             if instance.status != GCPInstanceStatus.RUNNING:
                 print("Starting GCP instance ...")
                 service.wait_for_operation(service.start_instance(instance.name))
-                instance = GCPInstance(service.get_instance(gcp.instance.name))
+                instance, started = GCPInstance(service.get_instance(gcp.instance.name)), True
         except Exception as err:
             raise ExecutionError.mlcube_configure_error(
                 self.__class__.__name__,
@@ -122,51 +216,107 @@ class GCPRun(Runner):
                     'disk_size_gb': gcp.instance.disk_size_gb
                 }
             )
+        return instance, started
 
-        # Make sure SSH mlcube is up-to-date
-        if gcp_host.get('HostName', None) != instance.public_ip:
-            print(f"Updating SSH mlcube (prev={gcp_host.get('HostName')}, new={instance.public_ip}, "
-                  f"file={ssh_config_file})")
-            ssh_config.update(instance.name, {'HostName': instance.public_ip})
-            ssh_config.write(ssh_config_file)
-            # TODO: clean '.ssh/known_hosts'.
-
-        # Configure remote instance. This is specific for docker-based images now.
+    def _delegated_runner(self) -> t.Tuple[t.Type[Runner], DictConfig]:
+        """Return runner class and effective configuration of the platform this runner delegates to."""
+        gcp: DictConfig = self.mlcube.runner
         try:
-            Shell.ssh(
-                gcp.instance.name,
-                'sudo snap install docker && sudo addgroup --system docker && sudo adduser ${USER} docker && '
-                'sudo snap disable docker && sudo snap enable docker && '
-                'sudo apt update && yes | sudo apt install python3-pip virtualenv && sudo apt clean'
+            return parse_cli_args(
+                unparsed_args=[],
+                parsed_args={'mlcube': self.mlcube.runtime.root, 'platform': gcp.platform},
+                resolve=True
             )
-        except ExecutionError as err:
-            raise ExecutionError.mlcube_configure_error(
-                self.__class__.__name__,
-                "Failed to install system packages on a remote instance. See context for more details.",
+        except Exception as err:
+            raise ExecutionError(
+                f"{self.__class__.__name__} runner failed to load configuration of the delegated platform "
+                f"(platform={gcp.platform}).",
                 error=str(err)
             )
 
-        # Remote GCP instance has been configured
-        print(instance)
+    @staticmethod
+    def _wait_for_ssh(host: t.Text, timeout: float = 300, max_pause: float = 30) -> None:
+        """Wait until just started instance accepts SSH connections (with exponential backoff)."""
+        deadline, pause = time.monotonic() + timeout, 2.0
+        while Shell.ssh(host, 'true', on_error='ignore') != 0:
+            if time.monotonic() + pause > deadline:
+                logger.warning("GCPRun SSH on a remote instance (%s) is not available after %d seconds.", host, timeout)
+                return
+            time.sleep(pause)
+            pause = min(2 * pause, max_pause)
 
-        # Should be as simple as invoking SSH configure.
+    def _provision(self, service: Service, instance: GCPInstance) -> None:
+        """Install system packages on a remote instance unless this has already been done."""
+        gcp: DictConfig = self.mlcube.runner
+        if gcp.instance.get('preinstalled', False):
+            logger.info("GCPRun instance (%s) uses pre-baked image, provisioning skipped.", instance.name)
+            return
+        provision_key = hashlib.sha256(GCPRun.PROVISION_CMD.encode()).hexdigest()[:16]
+        if instance.metadata.get(GCPRun.PROVISION_METADATA_KEY, None) == provision_key:
+            logger.info("GCPRun instance (%s) has already been provisioned (%s).", instance.name, provision_key)
+            return
         try:
-            Shell.run(f"mlcube configure --mlcube={self.mlcube.root} --platform={gcp.platform}")
+            Shell.ssh(gcp.instance.name, GCPRun.PROVISION_CMD)
         except ExecutionError as err:
             raise ExecutionError.mlcube_configure_error(
                 self.__class__.__name__,
-                f"Error occurred while running mlcube configure with GCP platform (platform={gcp.platform}). See "
-                "context for more details.",
+                "Failed to install system packages on a remote instance. See context for more details.",
                 error=str(err)
             )
+        try:
+            service.wait_for_operation(
+                service.set_metadata(instance.instance, {GCPRun.PROVISION_METADATA_KEY: provision_key})
+            )
+        except Exception as err:
+            # Not critical - provisioning commands will run next time again.
+            logger.warning("GCPRun failed to mark instance (%s) as provisioned: %s", instance.name, str(err))
+
+    def _cancel_idle_shutdown(self) -> None:
+        """Cancel instance shutdown that previous task may have scheduled (idle policy `stop` with timeout)."""
+        idle_policy: DictConfig = self.mlcube.runner.idle_policy
+        if idle_policy.action == 'stop' and idle_policy.minutes > 0:
+            Shell.ssh(self.mlcube.runner.instance.name, GCPRun.IDLE_CANCEL_CMD, on_error='ignore')
+
+    def _apply_idle_policy(self) -> None:
+        """Stop or delete remote instance once MLCube task is done according to `idle_policy` configuration.
+
+        Errors are logged but not raised - they must not hide the task status.
+        """
+        gcp: DictConfig = self.mlcube.runner
+        action, minutes, name = gcp.idle_policy.action, gcp.idle_policy.minutes, gcp.instance.name
+        if action == 'none':
+            return
+        try:
+            if action == 'stop' and minutes > 0:
+                logger.info("GCPRun instance (%s) will stop in %d minutes unless new tasks start.", name, minutes)
+                Shell.ssh(name, GCPRun.IDLE_SHUTDOWN_CMD.format(minutes=minutes))
+                return
+            service = self._connect()
+            if action == 'stop':
+                print(f"Stopping GCP instance ({name}) ...")
+                service.wait_for_operation(service.stop_instance(name))
+            else:
+                print(f"Deleting GCP instance ({name}) ...")
+                service.wait_for_operation(service.delete_instance(name))
+        except Exception as err:
+            logger.error(
+                "GCPRun failed to apply idle policy (action=%s, minutes=%d) to instance (%s), the instance may still "
+                "be running - check GCP console. Error: %s", action, minutes, name, str(err)
+            )
 
     def run(self) -> None:
         gcp: DictConfig = self.mlcube.runner
+        platform_runner, platform_config = self._delegated_runner()
+        self._cancel_idle_shutdown()
         try:
-            Shell.run(f"mlcube run --mlcube={self.mlcube.root} --platform={gcp.platform} --task={self.task}")
+            platform_runner(platform_config, task=self.task).run()
         except ExecutionError as err:
             raise ExecutionError.mlcube_run_error(
                 self.__class__.__name__,
                 f"Error occurred while running MLCube task (platform={gcp.platform}, task={self.task}).",
                 **err.context
             )
+
+    def teardown(self) -> None:
+        """Apply idle policy once the last task of this run has completed or failed."""
+        self._apply_idle_policy()
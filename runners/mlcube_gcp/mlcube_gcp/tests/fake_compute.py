@@ -0,0 +1,133 @@
+"""Local in-memory stand-in for the subset of the GCP Compute Engine API used by the GCP runner.
+
+The fake mimics the `googleapiclient` resource interface (e.g. `compute.instances().get(...).execute()`), so it can be
+passed to `mlcube_gcp.gcp_client.service.Service` via its `compute` argument.
+"""
+import itertools
+import typing as t
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+
+class _Request(object):
+    def __init__(self, fn: t.Callable, *args, **kwargs) -> None:
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+
+    def execute(self) -> t.Any:
+        return self.fn(*self.args, **self.kwargs)
+
+
+class FakeCompute(object):
+    """Fake Compute Engine API.
+
+    Args:
+        pending_polls: Number of times `zoneOperations.wait` reports an operation as `RUNNING` before reporting it as
+            `DONE`.
+    """
+
+    def __init__(self, pending_polls: int = 0) -> None:
+        self.instances_db: t.Dict[str, t.Dict] = {}
+        self.operations: t.Dict[str, t.Dict] = {}
+        self.calls: t.List[t.Tuple[str, str]] = []
+        self.pending_polls = pending_polls
+        self._ids = itertools.count(1)
+
+    def add_instance(self, name: str, status: str = 'RUNNING', metadata: t.Optional[t.Dict] = None) -> t.Dict:
+        instance = {
+            'name': name,
+            'id': str(next(self._ids)),
+            'status': status,
+            'networkInterfaces': [{'accessConfigs': [{'name': 'External NAT', 'natIP': '10.0.0.1'}]}],
+            'metadata': {
+                'fingerprint': 'fp-0',
+                'items': [{'key': k, 'value': v} for k, v in (metadata or {}).items()]
+            }
+        }
+        self.instances_db[name] = instance
+        return instance
+
+    def instances(self) -> 'FakeCompute._Instances':
+        return FakeCompute._Instances(self)
+
+    def zoneOperations(self) -> 'FakeCompute._ZoneOperations':
+        return FakeCompute._ZoneOperations(self)
+
+    def images(self) -> 'FakeCompute._Images':
+        return FakeCompute._Images(self)
+
+    def _operation(self, kind: str, instance: str, action: t.Optional[t.Callable] = None) -> t.Dict:
+        self.calls.append((kind, instance))
+        name = f"operation-{next(self._ids)}"
+        self.operations[name] = {'name': name, 'operationType': kind, 'polls': 0, 'action': action}
+        return {'name': name, 'operationType': kind, 'status': 'RUNNING'}
+
+    @staticmethod
+    def _not_found(what: str) -> HttpError:
+        return HttpError(httplib2.Response({'status': 404}), f"{what} not found".encode())
+
+    class _Instances(object):
+        def __init__(self, compute: 'FakeCompute') -> None:
+            self.compute = compute
+
+        def list(self, project: str, zone: str) -> _Request:
+            return _Request(lambda: {'items': list(self.compute.instances_db.values())})
+
+        def get(self, project: str, zone: str, instance: str) -> _Request:
+            def _get() -> t.Dict:
+                if instance not in self.compute.instances_db:
+                    raise FakeCompute._not_found(instance)
+                return self.compute.instances_db[instance]
+            return _Request(_get)
+
+        def insert(self, project: str, zone: str, body: t.Dict) -> _Request:
+            def _action() -> None:
+                self.compute.add_instance(body['name'], status='RUNNING')
+            return _Request(self.compute._operation, 'insert', body['name'], _action)
+
+        def _set_status(self, instance: str, status: str) -> t.Callable:
+            def _action() -> None:
+                self.compute.instances_db[instance]['status'] = status
+            return _action
+
+        def start(self, project: str, zone: str, instance: str) -> _Request:
+            return _Request(self.compute._operation, 'start', instance, self._set_status(instance, 'RUNNING'))
+
+        def stop(self, project: str, zone: str, instance: str) -> _Request:
+            return _Request(self.compute._operation, 'stop', instance, self._set_status(instance, 'TERMINATED'))
+
+        def delete(self, project: str, zone: str, instance: str) -> _Request:
+            def _action() -> None:
+                self.compute.instances_db.pop(instance, None)
+            return _Request(self.compute._operation, 'delete', instance, _action)
+
+        def setMetadata(self, project: str, zone: str, instance: str, body: t.Dict) -> _Request:
+            def _action() -> None:
+                self.compute.instances_db[instance]['metadata'] = {'fingerprint': 'fp-1', 'items': body['items']}
+            return _Request(self.compute._operation, 'setMetadata', instance, _action)
+
+    class _ZoneOperations(object):
+        def __init__(self, compute: 'FakeCompute') -> None:
+            self.compute = compute
+
+        def wait(self, project: str, zone: str, operation: str) -> _Request:
+            def _wait() -> t.Dict:
+                op = self.compute.operations[operation]
+                op['polls'] += 1
+                if op['polls'] <= self.compute.pending_polls:
+                    return {'name': operation, 'status': 'RUNNING'}
+                if op['action'] is not None:
+                    op['action']()
+                    op['action'] = None
+                return {'name': operation, 'status': 'DONE'}
+            return _Request(_wait)
+
+    class _Images(object):
+        def __init__(self, compute: 'FakeCompute') -> None:
+            self.compute = compute
+
+        def getFromFamily(self, project: str, family: str) -> _Request:
+            return _Request(lambda: {'selfLink': f"projects/{project}/global/images/family/{family}"})
+
+        def get(self, project: str, image: str) -> _Request:
+            return _Request(lambda: {'selfLink': f"projects/{project}/global/images/{image}"})
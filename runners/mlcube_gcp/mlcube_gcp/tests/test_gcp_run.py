@@ -0,0 +1,175 @@
+import typing as t
+from unittest import TestCase
+from unittest.mock import patch
+
+from omegaconf import DictConfig, OmegaConf
+
+from mlcube_gcp.gcp_client.instance import Instance, Status
+from mlcube_gcp.gcp_client.service import Service
+from mlcube.errors import ExecutionError, IllegalParameterValueError
+from mlcube.executor import TaskExecutor
+from mlcube_gcp.gcp_run import Config, GCPRun
+from mlcube_gcp.tests.fake_compute import FakeCompute
+
+
+class _SSHConfig(object):
+    def __init__(self) -> None:
+        self.hosts = {'gcp-test': {'User': 'mlcube', 'IdentityFile': '~/.ssh/gcp', 'HostName': '10.0.0.1'}}
+
+    def get(self, name: str) -> t.Dict:
+        return self.hosts[name]
+
+    def update(self, name: str, values: t.Dict) -> None:
+        self.hosts[name].update(values)
+
+    def write(self, path: str) -> None:
+        ...
+
+
+class _DelegatedRunner(object):
+    calls: t.List[t.Tuple[str, t.Optional[str]]] = []
+
+    def __init__(self, mlcube: DictConfig, task: t.Optional[str]) -> None:
+        self.task = task
+
+    def configure(self) -> None:
+        _DelegatedRunner.calls.append(('configure', self.task))
+
+    def run(self) -> None:
+        _DelegatedRunner.calls.append(('run', self.task))
+
+
+def _mlcube_config(idle_policy: t.Optional[t.Dict] = None, **instance) -> DictConfig:
+    runner = OmegaConf.merge(Config.DEFAULT, {
+        'gcp': {'project_id': 'project', 'zone': 'us-central1-a'},
+        'instance': dict({'name': 'gcp-test', 'machine_type': 'f1-micro', 'disk_size_gb': 20}, **instance),
+        'idle_policy': idle_policy or {},
+        'platform': 'ssh'
+    })
+    return OmegaConf.create({'name': 'mnist', 'runtime': {'root': '/mlcube', 'workspace': '/mlcube/workspace'},
+                             'runner': runner, 'tasks': {'download': {}, 'train': {}}, 'logs': {'enabled': False}})
+
+
+class TestService(TestCase):
+    @patch('mlcube_gcp.gcp_client.service.time.sleep')
+    def test_wait_for_operation(self, sleep) -> None:
+        compute = FakeCompute(pending_polls=3)
+        compute.add_instance('gcp-test', status=Status.TERMINATED)
+        service = Service('project', 'zone', compute=compute)
+
+        result = service.wait_for_operation(service.start_instance('gcp-test'))
+        self.assertEqual(result['status'], 'DONE')
+        self.assertEqual(Instance(service.get_instance('gcp-test')).status, Status.RUNNING)
+        # Backoff between server-side waits that returned before the operation completed.
+        self.assertListEqual([call.args[0] for call in sleep.call_args_list], [1.0, 2.0, 4.0])
+
+    @patch('mlcube_gcp.gcp_client.service.time.sleep')
+    def test_wait_for_operation_timeout(self, _) -> None:
+        compute = FakeCompute(pending_polls=100)
+        compute.add_instance('gcp-test')
+        service = Service('project', 'zone', compute=compute)
+        with self.assertRaises(TimeoutError):
+            service.wait_for_operation(service.stop_instance('gcp-test'), timeout=0)
+
+    def test_get_instance(self) -> None:
+        compute = FakeCompute()
+        service = Service('project', 'zone', compute=compute)
+        self.assertIsNone(service.get_instance('gcp-test'))
+        compute.add_instance('gcp-test', metadata={'key': 'value'})
+        instance = Instance(service.get_instance('gcp-test'))
+        self.assertEqual(instance.name, 'gcp-test')
+        self.assertDictEqual(instance.metadata, {'key': 'value'})
+
+    def test_set_metadata(self) -> None:
+        compute = FakeCompute()
+        compute.add_instance('gcp-test', metadata={'a': '1'})
+        service = Service('project', 'zone', compute=compute)
+        service.wait_for_operation(service.set_metadata(service.get_instance('gcp-test'), {'b': '2'}))
+        self.assertDictEqual(Instance(service.get_instance('gcp-test')).metadata, {'a': '1', 'b': '2'})
+
+
+class TestGCPRun(TestCase):
+    def setUp(self) -> None:
+        self.compute = FakeCompute()
+        self.ssh_commands: t.List[str] = []
+        _DelegatedRunner.calls = []
+
+        def _ssh(_host: str, _command: str, on_error: str = 'raise') -> int:
+            self.ssh_commands.append(_command)
+            return 0
+
+        patches = [
+            patch('mlcube_gcp.gcp_run.SSHConfig.load', return_value=_SSHConfig()),
+            patch('mlcube_gcp.gcp_run.Shell.ssh', side_effect=_ssh),
+            patch.object(GCPRun, '_connect', lambda _self: Service('project', 'zone', compute=self.compute)),
+            patch.object(GCPRun, '_delegated_runner', lambda _self: (_DelegatedRunner, OmegaConf.create({}))),
+            patch('mlcube_gcp.gcp_client.service.time.sleep'),
+        ]
+        for _patch in patches:
+            _patch.start()
+            self.addCleanup(_patch.stop)
+
+    def test_configure_creates_and_provisions_once(self) -> None:
+        GCPRun(_mlcube_config(), task=None).configure()
+        self.assertListEqual([kind for kind, _ in self.compute.calls], ['insert', 'setMetadata'])
+        self.assertListEqual(self.ssh_commands, ['true', GCPRun.PROVISION_CMD])
+        self.assertListEqual(_DelegatedRunner.calls, [('configure', None)])
+
+        # Instance is running and has been provisioned - no GCP operations and no provisioning commands.
+        self.compute.calls, self.ssh_commands = [], []
+        GCPRun(_mlcube_config(), task=None).configure()
+        self.assertListEqual(self.compute.calls, [])
+        self.assertListEqual(self.ssh_commands, [])
+
+    def test_configure_starts_stopped_instance(self) -> None:
+        self.compute.add_instance('gcp-test', status=Status.TERMINATED)
+        GCPRun(_mlcube_config(preinstalled=True), task=None).configure()
+        self.assertListEqual(self.compute.calls, [('start', 'gcp-test')])
+        # Pre-baked image: only wait for SSH, no provisioning.
+        self.assertListEqual(self.ssh_commands, ['true'])
+
+    def test_run(self) -> None:
+        GCPRun(_mlcube_config(), task='train').run()
+        self.assertListEqual(_DelegatedRunner.calls, [('run', 'train')])
+        self.assertListEqual(self.compute.calls, [])
+
+    def test_idle_policy_validation(self) -> None:
+        Config.validate(_mlcube_config(idle_policy={'action': 'stop', 'minutes': 30}))
+        with self.assertRaises(IllegalParameterValueError):
+            Config.validate(_mlcube_config(idle_policy={'action': 'hibernate'}))
+        with self.assertRaises(IllegalParameterValueError):
+            Config.validate(_mlcube_config(idle_policy={'action': 'stop', 'minutes': -1}))
+
+    def test_idle_policy_delete(self) -> None:
+        self.compute.add_instance('gcp-test')
+        TaskExecutor(GCPRun, _mlcube_config(idle_policy={'action': 'delete'})).run(['download', 'train'])
+        # The instance is deleted once after the last task, not after each task.
+        self.assertListEqual(_DelegatedRunner.calls[-2:], [('run', 'download'), ('run', 'train')])
+        self.assertListEqual(self.compute.calls, [('delete', 'gcp-test')])
+        self.assertNotIn('gcp-test', self.compute.instances_db)
+
+    def test_idle_policy_stop_on_failure(self) -> None:
+        self.compute.add_instance('gcp-test')
+
+        class _FailingRunner(_DelegatedRunner):
+            def run(self) -> None:
+                raise ExecutionError('Task failed.')
+
+        with patch.object(GCPRun, '_delegated_runner', lambda _self: (_FailingRunner, OmegaConf.create({}))):
+            with self.assertRaises(ExecutionError):
+                TaskExecutor(GCPRun, _mlcube_config(idle_policy={'action': 'stop'})).run(['download', 'train'])
+        self.assertEqual(self.compute.instances_db['gcp-test']['status'], Status.TERMINATED)
+
+    def test_idle_policy_stop_after_timeout(self) -> None:
+        self.compute.add_instance('gcp-test', metadata={GCPRun.PROVISION_METADATA_KEY: 'x'})
+        mlcube = _mlcube_config(idle_policy={'action': 'stop', 'minutes': 15}, preinstalled=True)
+
+        GCPRun(mlcube, task=None).configure()
+        GCPRun(mlcube, task='train').run()
+        GCPRun(mlcube, task='train').teardown()
+        # Pending shutdown is cancelled by configure and run, and rescheduled when the run is done.
+        self.assertListEqual(
+            self.ssh_commands,
+            [GCPRun.IDLE_CANCEL_CMD, GCPRun.IDLE_CANCEL_CMD, GCPRun.IDLE_SHUTDOWN_CMD.format(minutes=15)]
+        )
+        self.assertListEqual(self.compute.calls, [])
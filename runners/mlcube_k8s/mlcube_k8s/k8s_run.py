@@ -1,11 +1,15 @@
+import asyncio
 import logging
+import math
 import urllib3
 import kubernetes
 import time
 import typing as t
 from omegaconf import (DictConfig, OmegaConf)
+from mlcube.config import TaskPolicy
 from mlcube.errors import ExecutionError
 from mlcube.runner import (RunnerConfig, Runner)
+from mlcube.shell import Shell
 from mlcube.validate import Validate
 
 logger = logging.getLogger(__name__)
@@ -32,6 +36,10 @@ class Config(RunnerConfig):
 class KubernetesRun(Runner):
 
     CONFIG = Config
+    NATIVE_TASK_POLICY = True
+
+    POLL_INTERVAL: float = 10.0
+    """Seconds between job status requests while waiting for a job to complete."""
 
     def __init__(self, mlcube: t.Union[DictConfig, t.Dict], task: t.Text) -> None:
         super().__init__(mlcube, task)
@@ -80,17 +88,21 @@ class KubernetesRun(Runner):
             name="mlcube-container", image=image, args=container_args,
             volume_mounts=list(container_volume_mounts.values())
         )
+        # Task timeout applies to each attempt (pod), and retries map to job's backoff limit (default is 4).
+        policy = TaskPolicy.from_config(self.mlcube.tasks[self.task], self.task)
         pod_template = kubernetes.client.V1PodTemplateSpec(
             metadata=kubernetes.client.V1ObjectMeta(labels={
                 "app": "mlcube",
                 "app-name": self.mlcube.name,
             }),
             spec=kubernetes.client.V1PodSpec(
-                restart_policy="Never", containers=[container], volumes=list(container_volumes.values()))
+                restart_policy="Never", containers=[container], volumes=list(container_volumes.values()),
+                active_deadline_seconds=int(math.ceil(policy.timeout)) if policy.timeout else None
+            )
         )
         job_spec = kubernetes.client.V1JobSpec(
             template=pod_template,
-            backoff_limit=4,
+            backoff_limit=policy.retries if self.mlcube.tasks[self.task].get('retries', None) is not None else 4,
         )
 
         mlcube_job_manifest = kubernetes.client.V1Job(
@@ -113,23 +125,98 @@ class KubernetesRun(Runner):
         return job_creation_response
 
     def wait_for_completion(self, job):
-        k8s_job_client = kubernetes.client.BatchV1Api()
         print("Waiting for Job to complete in the kubernetes cluster")
-        while(1):
-            job = k8s_job_client.read_namespaced_job_status(job.metadata.name, job.metadata.namespace)
-            status = job.status
-            logging.info("Current job status='%s'" % str(status))
-            if  status.conditions:
-                if status.conditions[0].status and status.conditions[0].type == "Complete":
-                    print("Job is successful")
-                else:
-                    print("Job has failed")
-                break
-            time.sleep(10)
+        while not self.job_finished(job):
+            time.sleep(self.POLL_INTERVAL)
+
+    def job_finished(self, job: t.Any) -> bool:
+        """Read job status once and return True if the job has completed.
+
+        Raises:
+            ExecutionError: If the job has failed. Jobs whose pods have exceeded their deadline (task timeout) are
+                reported with `timeout=True` in the error context.
+        """
+        k8s_job_client = kubernetes.client.BatchV1Api()
+        job = k8s_job_client.read_namespaced_job_status(job.metadata.name, job.metadata.namespace)
+        status = job.status
+        logging.info("Current job status='%s'" % str(status))
+        for condition in status.conditions or []:
+            if condition.status != "True":
+                continue
+            if condition.type == "Complete":
+                print("Job is successful")
+                return True
+            if condition.type == "Failed":
+                context = {"reason": condition.reason, "details": condition.message}
+                if condition.reason == "DeadlineExceeded" or self.job_timed_out(job):
+                    context.update(timeout=True, code=Shell.TIMEOUT_EXIT_CODE)
+                raise ExecutionError.mlcube_run_error(
+                    self.__class__.__name__,
+                    f"Kubernetes job has failed (name={job.metadata.name}, task={self.task}, "
+                    f"reason={condition.reason}).",
+                    **context
+                )
+        return False
+
+    def job_timed_out(self, job: t.Any) -> bool:
+        """Return True if a pod of this job has been stopped because of its deadline (task timeout).
+
+        Task timeout is the pod's `active_deadline_seconds`, so pods that exceed it fail with `DeadlineExceeded`
+        reason, and the job fails with `BackoffLimitExceeded` reason when no retries are left.
+        """
+        k8s_core_client = kubernetes.client.CoreV1Api()
+        try:
+            pods = k8s_core_client.list_namespaced_pod(
+                job.metadata.namespace, label_selector=f"job-name={job.metadata.name}"
+            )
+        except kubernetes.client.exceptions.ApiException as err:
+            logger.warning("Failed to list pods of k8s job (name=%s): %s", job.metadata.name, str(err))
+            return False
+        return any(getattr(pod.status, "reason", None) == "DeadlineExceeded" for pod in pods.items or [])
+
+    def delete_job(self, job: t.Any) -> None:
+        """Delete the job and its pods (e.g., when MLCube is interrupted) so that it does not keep running."""
+        k8s_job_client = kubernetes.client.BatchV1Api()
+        logger.warning("Deleting k8s job (name=%s, namespace=%s).", job.metadata.name, job.metadata.namespace)
+        try:
+            k8s_job_client.delete_namespaced_job(
+                job.metadata.name, job.metadata.namespace,
+                grace_period_seconds=int(Shell.STOP_GRACE_PERIOD), propagation_policy='Background'
+            )
+        except kubernetes.client.exceptions.ApiException as err:
+            if err.status != 404:
+                logger.error("Failed to delete k8s job (name=%s): %s", job.metadata.name, str(err))
 
     def configure(self) -> None:
         ...
 
+    async def arun(self) -> None:
+        """Run a cube polling the job status with `asyncio.sleep`, so that no thread waits while the job is running.
+
+        Kubernetes API calls are short and run in the default executor. The job is deleted if this coroutine is
+        cancelled.
+        """
+        try:
+            logging.info("Configuring MLCube as a Kubernetes Job...")
+            await Shell.in_thread(kubernetes.config.load_kube_config)
+
+            job = await Shell.in_thread(self.create_job, self.create_job_manifest())
+            try:
+                print("Waiting for Job to complete in the kubernetes cluster")
+                while not await Shell.in_thread(self.job_finished, job):
+                    await asyncio.sleep(self.POLL_INTERVAL)
+            except asyncio.CancelledError:
+                await Shell.in_thread(self.delete_job, job)
+                raise
+        except ExecutionError:
+            raise
+        except Exception as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                "See context for more details.",
+                error=str(err)
+            )
+
     def run(self) -> None:
         """Run a cube"""
         try:
@@ -138,7 +225,13 @@ class KubernetesRun(Runner):
 
             mlcube_job_manifest = self.create_job_manifest()
             job = self.create_job(mlcube_job_manifest)
-            self.wait_for_completion(job)
+            try:
+                self.wait_for_completion(job)
+            except KeyboardInterrupt:
+                self.delete_job(job)
+                raise
+        except ExecutionError:
+            raise
         except Exception as err:
             raise ExecutionError.mlcube_run_error(
                 self.__class__.__name__,
@@ -0,0 +1,117 @@
+import asyncio
+import typing as t
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from mlcube.errors import ExecutionError
+from mlcube.shell import Shell
+from mlcube_k8s.k8s_run import KubernetesRun
+from omegaconf import OmegaConf
+
+
+def _job_status(*conditions: t.Tuple[str, str, t.Optional[str]]) -> SimpleNamespace:
+    return SimpleNamespace(
+        metadata=SimpleNamespace(name='mnist-train', namespace='default'),
+        status=SimpleNamespace(conditions=[
+            SimpleNamespace(type=type_, status=status, reason=reason, message='')
+            for type_, status, reason in conditions
+        ] or None)
+    )
+
+
+class TestKubernetesRun(TestCase):
+    def test_job_deleted_on_interrupt(self) -> None:
+        runner = KubernetesRun(OmegaConf.create({'runner': {'namespace': 'default'}}), task='train')
+        job = SimpleNamespace(metadata=SimpleNamespace(name='mnist-train', namespace='default'))
+        batch_api = MagicMock()
+        with patch('mlcube_k8s.k8s_run.kubernetes.config.load_kube_config'), \
+                patch('mlcube_k8s.k8s_run.kubernetes.client.BatchV1Api', return_value=batch_api), \
+                patch.object(KubernetesRun, 'create_job_manifest'), \
+                patch.object(KubernetesRun, 'create_job', return_value=job), \
+                patch.object(KubernetesRun, 'wait_for_completion', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                runner.run()
+        batch_api.delete_namespaced_job.assert_called_once()
+        self.assertEqual(batch_api.delete_namespaced_job.call_args[0], ('mnist-train', 'default'))
+        self.assertEqual(batch_api.delete_namespaced_job.call_args[1]['propagation_policy'], 'Background')
+
+    def test_job_status(self) -> None:
+        runner = KubernetesRun(OmegaConf.create({'runner': {'namespace': 'default'}}), task='train')
+        batch_api, core_api = MagicMock(), MagicMock()
+        core_api.list_namespaced_pod.return_value = SimpleNamespace(items=[
+            SimpleNamespace(status=SimpleNamespace(phase='Failed', reason=None))
+        ])
+        with patch('mlcube_k8s.k8s_run.kubernetes.client.BatchV1Api', return_value=batch_api), \
+                patch('mlcube_k8s.k8s_run.kubernetes.client.CoreV1Api', return_value=core_api):
+            batch_api.read_namespaced_job_status.return_value = _job_status()
+            self.assertFalse(runner.job_finished(_job_status()))
+
+            batch_api.read_namespaced_job_status.return_value = _job_status(('Complete', 'True', None))
+            self.assertTrue(runner.job_finished(_job_status()))
+
+            batch_api.read_namespaced_job_status.return_value = _job_status(
+                ('Complete', 'False', None), ('Failed', 'True', 'BackoffLimitExceeded')
+            )
+            with self.assertRaises(ExecutionError) as ctx:
+                runner.job_finished(_job_status())
+            self.assertEqual(ctx.exception.context['reason'], 'BackoffLimitExceeded')
+            self.assertNotIn('timeout', ctx.exception.context)
+            self.assertEqual(core_api.list_namespaced_pod.call_args[0], ('default',))
+            self.assertEqual(core_api.list_namespaced_pod.call_args[1]['label_selector'], 'job-name=mnist-train')
+
+            # Pods that exceed task timeout (`active_deadline_seconds`) fail with `DeadlineExceeded` reason, and the
+            # job fails when no retries are left.
+            core_api.list_namespaced_pod.return_value = SimpleNamespace(items=[
+                SimpleNamespace(status=SimpleNamespace(phase='Failed', reason='DeadlineExceeded'))
+            ])
+            with patch('mlcube_k8s.k8s_run.kubernetes.config.load_kube_config'), \
+                    patch.object(KubernetesRun, 'create_job_manifest'), \
+                    patch.object(KubernetesRun, 'create_job', return_value=_job_status()):
+                with self.assertRaises(ExecutionError) as ctx:
+                    runner.run()
+            self.assertEqual(ctx.exception.context['reason'], 'BackoffLimitExceeded')
+            self.assertTrue(ctx.exception.context['timeout'])
+            self.assertEqual(ctx.exception.context['code'], Shell.TIMEOUT_EXIT_CODE)
+
+    def test_task_policy(self) -> None:
+        mlcube = OmegaConf.create({
+            'name': 'mnist', 'runner': {'image': 'mlcommons/mnist:0.0.1', 'pvc': 'mnist'},
+            'tasks': {
+                'download': {'parameters': {'inputs': {}, 'outputs': {}}},
+                'train': {'timeout': '2h', 'retries': 1, 'parameters': {'inputs': {}, 'outputs': {}}},
+            }
+        })
+        download = KubernetesRun(mlcube, task='download').create_job_manifest()
+        self.assertEqual(download.spec.backoff_limit, 4)
+        self.assertIsNone(download.spec.template.spec.active_deadline_seconds)
+
+        train = KubernetesRun(mlcube, task='train').create_job_manifest()
+        self.assertEqual(train.spec.backoff_limit, 1)
+        self.assertEqual(train.spec.template.spec.active_deadline_seconds, 7200)
+
+    def test_arun_job_deleted_on_cancel(self) -> None:
+        runner = KubernetesRun(OmegaConf.create({'runner': {'namespace': 'default'}}), task='train')
+        job = SimpleNamespace(metadata=SimpleNamespace(name='mnist-train', namespace='default'))
+        polls = []
+
+        def _job_finished(_job) -> bool:
+            polls.append(_job)
+            return False
+
+        async def _run_and_cancel() -> None:
+            task = asyncio.ensure_future(runner.arun())
+            while len(polls) < 3:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with patch('mlcube_k8s.k8s_run.kubernetes.config.load_kube_config'), \
+                patch.object(KubernetesRun, 'POLL_INTERVAL', 0.01), \
+                patch.object(KubernetesRun, 'create_job_manifest'), \
+                patch.object(KubernetesRun, 'create_job', return_value=job), \
+                patch.object(KubernetesRun, 'job_finished', side_effect=_job_finished), \
+                patch.object(KubernetesRun, 'delete_job') as delete_job:
+            asyncio.run(_run_and_cancel())
+        delete_job.assert_called_once_with(job)
@@ -1,10 +1,12 @@
 import logging
+import math
 import typing as t
 import kfp
 import kfp.compiler as compiler
 import kfp.dsl as dsl
 from datetime import datetime
 from omegaconf import (DictConfig, OmegaConf)
+from mlcube.config import TaskPolicy
 from mlcube.errors import ExecutionError
 from mlcube.runner import (RunnerConfig, Runner)
 from mlcube.validate import Validate
@@ -33,6 +35,7 @@ class Config(RunnerConfig):
 
 class KubeflowRun(Runner):
     CONFIG = Config
+    NATIVE_TASK_POLICY = True
 
     def __init__(self, mlcube: t.Union[DictConfig, t.Dict], task: t.Text) -> None:
         super().__init__(mlcube, task)
@@ -59,6 +62,11 @@ class KubeflowRun(Runner):
             arguments=container_args,
             pvolumes=container_volume_mounts
         )
+        policy = TaskPolicy.from_config(task, name)
+        if policy.timeout:
+            op.set_timeout(int(math.ceil(policy.timeout)))
+        if policy.retries > 0:
+            op.set_retry(policy.retries)
         return op
 
     @dsl.pipeline(
@@ -1,18 +1,26 @@
 import base64
+import copy
+import hashlib
 import json
 import logging
 import os
 import platform
+import threading
+import time
 import typing as t
+import uuid
 from enum import Enum
 from pathlib import Path
 from shlex import shlex
 
 import requests
 import semver
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from mlcube.errors import ExecutionError, MLCubeError
 from mlcube.shell import Shell
+from mlcube.store import ContentStore
 from mlcube.system_settings import SystemSettings
 
 __all__ = [
@@ -316,6 +324,45 @@ class Client:
             self.version = Version.from_version_string(version_string)
             logger.debug("Client.init version=%s", self.version)
 
+    BUILD_MANIFEST_SUFFIX = ".manifest.json"
+    """Build manifest file name suffix. Build manifest is stored next to the SIF file (`{image_name}.manifest.json`)."""
+
+    @staticmethod
+    def build_manifest_file(image_file: t.Union[str, Path]) -> Path:
+        """Return path to a build manifest of the given SIF file."""
+        image_file = Path(image_file)
+        return image_file.with_name(image_file.name + Client.BUILD_MANIFEST_SUFFIX)
+
+    def build_manifest(self, build_dir: str, recipe: str, build_args: str) -> t.Dict:
+        """Return build manifest - description of build inputs that SIF image depends on.
+
+        Two SIF images built from the same inputs are considered identical. The manifest contains the build source
+        (`recipe`), build arguments and source-specific content identifiers: sha256 of a singularity recipe file, image
+        ID (config digest) of a remote docker image, or size and modification time of a docker archive.
+
+        Args:
+            build_dir: Build context directory (MLCube root directory).
+            recipe: Build source - singularity recipe file relative to `build_dir`, or docker image (`docker://` or
+                `docker-archive:`).
+            build_args: Build arguments.
+        Returns:
+            Build manifest.
+        Raises:
+            MLCubeError if content identifier can not be computed (e.g., remote docker registry is not available).
+        """
+        manifest = {"recipe": recipe, "build_args": build_args}
+        if recipe.startswith("docker://"):
+            docker_manifest: t.Dict = DockerHubClient(self).get_manifest(recipe)
+            manifest["docker_digest"] = docker_manifest["config"]["digest"]
+        elif recipe.startswith("docker-archive:"):
+            archive = Path(build_dir, recipe[15:])
+            stat = archive.stat()
+            manifest["docker_archive"] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        else:
+            recipe_file = Path(build_dir, recipe)
+            manifest["recipe_sha256"] = hashlib.sha256(recipe_file.read_bytes()).hexdigest()
+        return manifest
+
     def build(
         self,
         build_dir: str,
@@ -323,18 +370,24 @@ class Client:
         image_dir: str,
         image_name: str,
         build_args: str,
-    ) -> None:
+        store: t.Optional[ContentStore] = None,
+    ) -> bool:
+        """Build SIF image unless an up-to-date image exists.
+
+        The image is up-to-date when its build manifest (see `build_manifest`) matches the manifest of current build
+        inputs. SIF images without build manifests (e.g., built by previous MLCube versions or provided by users) are
+        not rebuilt. The image is built into a temporary file that is then atomically renamed, so that concurrent
+        runs never observe a partially built image.
+
+        If image `store` is provided, SIF images are shared across workspaces: images are stored there under the keys
+        derived from their build manifests (see `build_key`) and are linked into `image_dir`.
+
+        Returns:
+            True if the image has been built (or linked from the image store), false if the existing image is used.
+        """
         # Get full path to a singularity image. By design, we compute it relative to {mlcube.root}/workspace.
         image_file = Path(image_dir, image_name)
-        if image_file.exists():
-            logger.info(
-                "Client.build won't build SIF image (file exists: %s).",
-                image_file,
-            )
-            return
-
-        # Make sure a directory to store image exists. If paths are like "/opt/...", the call may fail.
-        image_file.parent.mkdir(parents=True, exist_ok=True)
+        manifest_file = Client.build_manifest_file(image_file)
 
         build_dir = Path(
             build_dir
@@ -343,32 +396,133 @@ class Client:
             # https://sylabs.io/guides/3.0/user-guide/build_a_container.html
             # URI beginning with docker:// to build from Docker Hub
             logger.info(
-                "Client.build will build SIF image from docker image (image=%s).",
+                "Client.build SIF image source is docker image (image=%s).",
                 recipe,
             )
         else:
             # This must be a recipe file. Make sure it exists.
-            if not Path(build_dir, recipe).exists():
+            if not (recipe and Path(build_dir, recipe).is_file()):
+                if image_file.exists():
+                    logger.info(
+                        "Client.build SIF recipe file does not exist (path=%s, file=%s), using existing SIF image "
+                        "(%s).", build_dir, recipe, image_file
+                    )
+                    return False
                 raise IOError(
                     f"SIF recipe file does not exist (path={build_dir}, file={recipe})"
                 )
             logger.info(
-                "Client.build will build SIF image from recipe file (path=%s, file=%s).",
+                "Client.build SIF image source is recipe file (path=%s, file=%s).",
                 build_dir,
                 recipe,
             )
+
+        try:
+            manifest: t.Optional[t.Dict] = self.build_manifest(str(build_dir), recipe, build_args)
+        except Exception as err:
+            if image_file.exists():
+                logger.warning(
+                    "Client.build can't compute build manifest (%s), assuming existing SIF image (%s) is up-to-date.",
+                    str(err), image_file
+                )
+                return False
+            logger.warning("Client.build can't compute build manifest (%s), building SIF image anyway.", str(err))
+            manifest = None
+
+        store_key: t.Optional[str] = None
+        if store is not None and manifest is not None:
+            store_key = Client.build_key(manifest)
+            if store.contains(store_key):
+                logger.info(
+                    "Client.build won't build SIF image (found in image store: key=%s, path=%s).",
+                    store_key, store.path(store_key)
+                )
+                store.link(store_key, image_file)
+                Client._write_build_manifest(manifest_file, manifest)
+                return True
+
+        if image_file.exists():
+            if not manifest_file.exists():
+                logger.info(
+                    "Client.build won't build SIF image (file exists: %s, no build manifest). Remove this file to "
+                    "rebuild the image.", image_file
+                )
+                return False
+            try:
+                existing_manifest = json.loads(manifest_file.read_text())
+            except (OSError, ValueError) as err:
+                logger.warning("Client.build failed to read build manifest (%s): %s", manifest_file, str(err))
+                existing_manifest = None
+            if existing_manifest == manifest:
+                logger.info(
+                    "Client.build won't build SIF image (file exists: %s, build manifest is up-to-date).",
+                    image_file,
+                )
+                if store_key is not None:
+                    # Share this image with other workspaces.
+                    store.put(store_key, image_file, name=recipe)
+                return False
+            logger.info(
+                "Client.build will rebuild SIF image (file=%s) - build inputs have changed (old=%s, new=%s).",
+                image_file, existing_manifest, manifest
+            )
+
+        # Make sure a directory to store image exists. If paths are like "/opt/...", the call may fail.
+        image_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Singularity build does not overwrite existing files, so the temporary file must not exist.
+        tmp_image_file = image_file.with_name(f".{image_file.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
         try:
             Shell.run(
                 ["cd", str(build_dir), ";"]
                 + self.singularity
-                + ["build", build_args, str(image_file), recipe]
+                + ["build", build_args, str(tmp_image_file), recipe]
             )
+            if store_key is not None:
+                store.put(store_key, tmp_image_file, name=recipe, move=True)
+                store.link(store_key, image_file)
+            else:
+                os.replace(tmp_image_file, image_file)
         except ExecutionError as err:
             raise ExecutionError.mlcube_configure_error(
                 self.__class__.__name__,
                 "Error occurred while building SIF image. See context for more details.",
                 **err.context,
             )
+        finally:
+            if tmp_image_file.exists():
+                tmp_image_file.unlink()
+
+        if manifest is None:
+            if manifest_file.exists():
+                manifest_file.unlink()
+            return True
+        Client._write_build_manifest(manifest_file, manifest)
+        return True
+
+    @staticmethod
+    def build_key(manifest: t.Dict) -> str:
+        """Return image store key (sha256 of the build manifest) for a SIF image with this build manifest."""
+        return hashlib.sha256(json.dumps(manifest, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _write_build_manifest(manifest_file: Path, manifest: t.Dict) -> None:
+        tmp_manifest_file = manifest_file.with_name(f".{manifest_file.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp_manifest_file.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp_manifest_file, manifest_file)
+
+    def run_command(
+        self,
+        run_args: str,
+        volumes: str,
+        image_file: str,
+        args: t.List,
+        entrypoint: t.Optional[str] = None,
+    ) -> t.List[str]:
+        """Return singularity command that runs a task (`singularity exec` for custom entrypoints, else `run`)."""
+        if entrypoint:
+            return self.singularity + ["exec", run_args, volumes, image_file, entrypoint, " ".join(args)]
+        return self.singularity + ["run", run_args, volumes, image_file, " ".join(args)]
 
     def run(
         self,
@@ -379,23 +533,25 @@ class Client:
         entrypoint: t.Optional[str] = None,
     ) -> None:
         try:
-            if entrypoint:
-                Shell.run(
-                    self.singularity
-                    + [
-                        "exec",
-                        run_args,
-                        volumes,
-                        image_file,
-                        entrypoint,
-                        " ".join(args),
-                    ]
-                )
-            else:
-                Shell.run(
-                    self.singularity
-                    + ["run", run_args, volumes, image_file, " ".join(args)]
-                )
+            Shell.run(self.run_command(run_args, volumes, image_file, args, entrypoint))
+        except ExecutionError as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                f"Error occurred while running MLCube task. See context for more details.",
+                **err.context,
+            )
+
+    async def arun(
+        self,
+        run_args: str,
+        volumes: str,
+        image_file: str,
+        args: t.List,
+        entrypoint: t.Optional[str] = None,
+    ) -> None:
+        """Asyncio version of `run`: singularity runs as an asyncio subprocess."""
+        try:
+            await Shell.arun(self.run_command(run_args, volumes, image_file, args, entrypoint))
         except ExecutionError as err:
             raise ExecutionError.mlcube_run_error(
                 self.__class__.__name__,
@@ -424,46 +580,71 @@ class Client:
 
 
 class DockerHubClient:
-    """Ad-hoc implementation for interacting with remote docker registries."""
+    """Ad-hoc implementation for interacting with remote docker registries.
 
-    def __init__(self, singularity_: Client) -> None:
-        """
-        self.token: t.Optional[str] = None
+    All clients share one pooled HTTP session that retries failed requests (429 and 5xx responses, connection errors)
+    with exponential backoff. Authentication tokens and image manifests are cached in memory and on disk (in
+    `{cache_dir}/docker_registry`, see `SystemSettings.cache_dir`):
+    - Tokens are cached per registry, repository and user credentials until they expire (`expires_in`). The token
+      file is readable by its owner only.
+    - Manifests referenced by digest are immutable and are cached forever. Manifests referenced by tag are cached for
+      `MANIFEST_TAG_TTL` seconds.
 
-        if singularity.version.runtime == Runtime.APPTAINER:
-            config_paths = [
-                Path("~/.apptainer/docker-config.json").expanduser(),
-                Path("~/.singularity/docker-config.json").expanduser(),
-            ]
-        else:
-            config_paths = [
-                Path("~/.singularity/docker-config.json").expanduser(),
-                Path("~/.apptainer/docker-config.json").expanduser(),
-            ]
-        config_paths.append(Path("~/.docker/config.json").expanduser())
-
-        for config_path in config_paths:
-            if not config_path.is_file():
-                logger.debug("DockerHubClient.__init__ no such file: %s", config_path.as_posix())
-                continue
-            with open(config_path, 'rt') as file:
-                config = json.load(file)
-            if not isinstance(config, dict) or \
-                    "auths" not in config or \
-                    "https://index.docker.io/v1/" not in config["auths"] or \
-                    "auth" not in config["auths"]["https://index.docker.io/v1/"]:
-                logger.debug("DockerHubClient.__init__: no docker.io credentials in %s", config_path.as_posix())
-                continue
-            self.token = config["auths"]["https://index.docker.io/v1/"]["auth"]
-            logger.debug("DockerHubClient.__init__: found auth credentials in %s.", config_path.as_posix())
-            break
-        if not self.token:
-            logger.warning(
-                "DockerHubClient.__init__: could not credentials to authenticate in docker registry in %s",
-                [name.as_posix() for name in config_paths]
-            )
-        """
-        pass
+    Args:
+        singularity_: Singularity client (not used now).
+        cache_dir: Cache directory. If None, `docker_registry` in MLCube cache directory is used.
+    """
+
+    MANIFEST_TAG_TTL: int = 300
+    """Time in seconds to cache manifests of images referenced by tags (tags can be updated to point to new images)."""
+
+    RETRIES: int = 5
+    """Number of times to retry failed requests."""
+
+    BACKOFF_FACTOR: float = 0.5
+    """Exponential backoff factor between retries (0.5 -> 0.5, 1, 2, 4 ... seconds, or `Retry-After` if present)."""
+
+    TOKEN_EXPIRATION_MARGIN: int = 10
+    """Tokens that expire in less than this number of seconds are not used."""
+
+    _session: t.Optional[requests.Session] = None
+    _lock = threading.Lock()
+    _tokens: t.Dict[str, t.Dict[str, t.Dict]] = {}
+    """In-memory token caches (cache file -> token key -> {token, expires_at})."""
+    _manifests: t.Dict[str, t.Dict] = {}
+    """In-memory manifest cache (manifest URL -> {manifest, fetched_at})."""
+
+    def __init__(
+        self, singularity_: t.Optional[Client] = None, cache_dir: t.Optional[t.Union[str, Path]] = None
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else SystemSettings.cache_dir() / "docker_registry"
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Return HTTP session (with connection pooling and retries) shared by all clients."""
+        with cls._lock:
+            if cls._session is None:
+                retry = Retry(
+                    total=cls.RETRIES,
+                    backoff_factor=cls.BACKOFF_FACTOR,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(["GET", "HEAD"]),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(max_retries=retry, pool_connections=8, pool_maxsize=16)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                cls._session = session
+        return cls._session
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Clear in-memory caches (on-disk caches are not affected)."""
+        with cls._lock:
+            cls._tokens.clear()
+            cls._manifests.clear()
 
     def get_manifest(self, image: t.Union[str, DockerImage]) -> t.Dict:
         """Return image manifest pulled from a remote docker registry.
@@ -500,34 +681,11 @@ class DockerHubClient:
         reference: str = (image.digest or image.tag) or "latest"
 
         url = f"{registry_url}/v2/{name}/manifests/{reference}"
-        headers = {
-            "Accept": "application/vnd.docker.distribution.manifest.v2+json,"  # single-arch image
-            "application/vnd.oci.image.index.v1+json,"  # multi-arch image
-            "application/vnd.oci.image.manifest.v1+json"  # single-arch image
-        }
-        response = requests.get(url, headers=headers)
-        if response.status_code == 401:
-            logger.debug(
-                "DockerHubClient.get_manifest authentication requested (content=%s, headers=%s",
-                response.text.replace("\n", " "),
-                response.headers,
-            )
-            token = _get_authentication_token(
-                response.headers.get("www-authenticate", None), auth_key
-            )
-            headers["Authorization"] = f"Bearer {token}"
-            response = requests.get(url, headers=headers)
+        response: t.Optional[t.Dict] = self._get_cached_manifest(url, immutable=image.digest is not None)
+        if response is None:
+            response = self._fetch_manifest(url, auth_key, token_key=f"{registry_url}/{name}")
+            self._cache_manifest(url, response)
 
-        if response.status_code != 200:
-            raise MLCubeError(
-                "DockerHubClient.get_manifest failed to retrieve image manifest "
-                "(status_code=%d, content=%s, headers=%s)",
-                response.status_code,
-                response.text.replace("\n", " "),
-                response.headers,
-            )
-
-        response = response.json()
         media_type = response.get("mediaType", None)
         if media_type in (
             "application/vnd.docker.distribution.manifest.v2+json",
@@ -554,17 +712,149 @@ class DockerHubClient:
 
         return response
 
+    def _fetch_manifest(self, url: str, auth_key: str, token_key: str) -> t.Dict:
+        """Request image manifest from a docker registry (authenticating if required)."""
+        headers = {
+            "Accept": "application/vnd.docker.distribution.manifest.v2+json,"  # single-arch image
+            "application/vnd.oci.image.index.v1+json,"  # multi-arch image
+            "application/vnd.oci.image.manifest.v1+json"  # single-arch image
+        }
+        # Tokens are specific to user credentials.
+        token_key += "|" + hashlib.sha256(str(_get_credentials(auth_key)).encode()).hexdigest()
+        token: t.Optional[str] = self._get_cached_token(token_key)
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        session = DockerHubClient.session()
+        response = session.get(url, headers=headers)
+        if response.status_code == 401:
+            logger.debug(
+                "DockerHubClient.get_manifest authentication requested (content=%s, headers=%s",
+                response.text.replace("\n", " "),
+                response.headers,
+            )
+            token, expires_in = _get_authentication_token(
+                response.headers.get("www-authenticate", None), auth_key, session
+            )
+            self._cache_token(token_key, token, expires_in)
+            headers["Authorization"] = f"Bearer {token}"
+            response = session.get(url, headers=headers)
 
-def _get_authentication_token(www_authenticate: t.Optional[str], auth_key: str) -> str:
+        if response.status_code != 200:
+            content = response.text.replace("\n", " ")
+            raise MLCubeError(
+                "DockerHubClient.get_manifest failed to retrieve image manifest "
+                f"(url={url}, status_code={response.status_code}, content={content}, headers={response.headers})"
+            )
+        return response.json()
+
+    def _token_file(self) -> Path:
+        return self.cache_dir / "tokens.json"
+
+    def _get_cached_token(self, key: str) -> t.Optional[str]:
+        with DockerHubClient._lock:
+            tokens = self._load_tokens()
+            entry: t.Optional[t.Dict] = tokens.get(key, None)
+        if entry and entry["expires_at"] - DockerHubClient.TOKEN_EXPIRATION_MARGIN > time.time():
+            logger.debug("DockerHubClient using cached token for %s.", key.split("|")[0])
+            return entry["token"]
+        return None
+
+    def _cache_token(self, key: str, token: str, expires_in: int) -> None:
+        with DockerHubClient._lock:
+            tokens = self._load_tokens()
+            now = time.time()
+            for _key in [_key for _key, _entry in tokens.items() if _entry["expires_at"] <= now]:
+                del tokens[_key]
+            tokens[key] = {"token": token, "expires_at": now + expires_in}
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_file = self._token_file().with_name(f".tokens.{uuid.uuid4().hex}.tmp")
+                # Tokens grant access to (possibly private) images - make the file readable by its owner only.
+                fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(fd, "wt") as stream:
+                    json.dump(tokens, stream)
+                os.replace(tmp_file, self._token_file())
+            except OSError as err:
+                logger.warning("DockerHubClient failed to cache token (%s): %s", self._token_file(), str(err))
+
+    def _load_tokens(self) -> t.Dict[str, t.Dict]:
+        """Return token cache, loading it from disk on first access (must be called with the lock held)."""
+        token_file = self._token_file().as_posix()
+        if token_file not in DockerHubClient._tokens:
+            tokens: t.Dict = {}
+            if os.path.isfile(token_file):
+                try:
+                    with open(token_file, "rt") as stream:
+                        tokens = json.load(stream)
+                except (OSError, ValueError) as err:
+                    logger.debug("DockerHubClient ignoring invalid token cache (%s): %s", token_file, str(err))
+            DockerHubClient._tokens[token_file] = tokens
+        return DockerHubClient._tokens[token_file]
+
+    def _manifest_file(self, url: str) -> Path:
+        return self.cache_dir / "manifests" / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def _get_cached_manifest(self, url: str, immutable: bool) -> t.Optional[t.Dict]:
+        entry: t.Optional[t.Dict] = DockerHubClient._manifests.get(url, None)
+        if entry is None:
+            manifest_file = self._manifest_file(url)
+            if manifest_file.is_file():
+                try:
+                    entry = json.loads(manifest_file.read_text())
+                    DockerHubClient._manifests[url] = entry
+                except (OSError, ValueError) as err:
+                    logger.debug("DockerHubClient ignoring invalid manifest cache (%s): %s", manifest_file, str(err))
+        if entry is None:
+            return None
+        if not immutable and time.time() - entry["fetched_at"] > DockerHubClient.MANIFEST_TAG_TTL:
+            return None
+        logger.debug("DockerHubClient using cached manifest for %s.", url)
+        return copy.deepcopy(entry["manifest"])
+
+    def _cache_manifest(self, url: str, manifest: t.Dict) -> None:
+        entry = {"url": url, "fetched_at": time.time(), "manifest": manifest}
+        DockerHubClient._manifests[url] = copy.deepcopy(entry)
+        manifest_file = self._manifest_file(url)
+        try:
+            manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = manifest_file.with_name(f".{manifest_file.name}.{uuid.uuid4().hex}.tmp")
+            tmp_file.write_text(json.dumps(entry))
+            os.replace(tmp_file, manifest_file)
+        except OSError as err:
+            logger.warning("DockerHubClient failed to cache manifest (%s): %s", manifest_file, str(err))
+
+
+def _get_credentials(auth_key: str) -> t.Optional[t.Tuple[str, str]]:
+    """Return user name and password to authenticate in docker registry (or None for anonymous access).
+
+    Credentials are looked up in `SINGULARITY_DOCKER_USERNAME` / `SINGULARITY_DOCKER_PASSWORD` environment variables,
+    and then in docker config files (see `_get_auth_token`).
+    """
+    if os.environ.get("SINGULARITY_DOCKER_USERNAME", None) and os.environ.get(
+        "SINGULARITY_DOCKER_PASSWORD", None
+    ):
+        return os.environ["SINGULARITY_DOCKER_USERNAME"], os.environ["SINGULARITY_DOCKER_PASSWORD"]
+    auth_token: t.Optional[str] = _get_auth_token(auth_key)
+    if auth_token:
+        username, password = base64.b64decode(auth_token).decode().split(":", 1)
+        return username, password
+    return None
+
+
+def _get_authentication_token(
+    www_authenticate: t.Optional[str], auth_key: str, session: t.Optional[requests.Session] = None
+) -> t.Tuple[str, int]:
     """Retrieve bearer authentication token.
 
     Args:
         www_authenticate: A string that contains endpoint details where token must be requested. Must start with
             `Bearer`: `Bearer realm="https://nvcr.io/proxy_auth",scope="repository:nvidia/pytorch:pull,push"`.
         auth_key: Docker registry key in `auths` dictionary (for instance, in ~/.docker/config.json).
+        session: HTTP session to use.
 
     Returns:
-        Authentication token that can be used with docker registry API.
+        Authentication token that can be used with docker registry API and its lifetime in seconds.
     """
     if not (www_authenticate and www_authenticate.startswith("Bearer")):
         raise MLCubeError(
@@ -584,44 +874,23 @@ def _get_authentication_token(www_authenticate: t.Optional[str], auth_key: str)
             f"_get_authentication_token unrecognized www_authenticate format (www_authenticate={www_authenticate}, "
             f"parsed={parsed})."
         )
-    loggable_url: str = url
-
-    if url.startswith("https://"):
-        url = url[8:]
 
-    if os.environ.get("SINGULARITY_DOCKER_USERNAME", None) and os.environ.get(
-        "SINGULARITY_DOCKER_PASSWORD", None
-    ):
-        logger.info(
-            "_get_authentication_token found docker username (SINGULARITY_DOCKER_USERNAME) and "
-            "password (SINGULARITY_DOCKER_PASSWORD) environment variables."
-        )
-        loggable_url = f"https://***:***@{url}"
-        username, password = (
-            os.environ["SINGULARITY_DOCKER_USERNAME"],
-            os.environ["SINGULARITY_DOCKER_PASSWORD"],
-        )
-        url = f"{username}:{password}@{url}"
-    else:
-        auth_token: t.Optional[str] = _get_auth_token(auth_key)
-        if auth_token:
-            logger.info("_get_authentication_token using auth token from config file.")
-            loggable_url = f"https://***:***@{url}"
-            url = base64.b64decode(auth_token).decode() + "@" + url
-
-    url = f"https://{url}"
-    logger.debug(
-        "_get_authentication_token requesting token at %s for %s.", loggable_url, parsed
-    )
+    credentials: t.Optional[t.Tuple[str, str]] = _get_credentials(auth_key)
+    if credentials:
+        logger.info("_get_authentication_token using docker registry credentials.")
+    logger.debug("_get_authentication_token requesting token at %s for %s.", url, parsed)
 
-    response = requests.get(url, params=parsed)
+    response = (session or requests).get(url, params=parsed, auth=credentials)
     if response.status_code != 200:
         raise MLCubeError(
-            f"_get_authentication_token could not retrieve authentication token (url={loggable_url}, params={parsed}, "
-            f"status_code={response.status_code}, content={response.json()}, headers={response.headers})"
+            f"_get_authentication_token could not retrieve authentication token (url={url}, params={parsed}, "
+            f"status_code={response.status_code}, content={response.text}, headers={response.headers})"
         )
-    token = response.json()["token"]
-    return token
+    response = response.json()
+    # https://docs.docker.com/registry/spec/auth/token/ - `access_token` is an OAuth 2.0 compatible alias, tokens
+    # are valid for at least 60 seconds if `expires_in` is not present.
+    token = response.get("token", None) or response["access_token"]
+    return token, int(response.get("expires_in", 60))
 
 
 def _select_manifest(
@@ -1,13 +1,16 @@
 import logging
+import threading
 import typing as t
 from pathlib import Path
 
 from mlcube_singularity.singularity_client import Client, DockerHubClient
 from omegaconf import DictConfig, OmegaConf
 
+from mlcube import hooks, metrics
 from mlcube.errors import ConfigurationError, ExecutionError, MLCubeError
 from mlcube.runner import Runner, RunnerConfig
 from mlcube.shell import Shell
+from mlcube.store import ContentStore, file_sha256, parse_size
 from mlcube.validate import Validate
 
 __all__ = ["Config", "SingularityRun"]
@@ -29,6 +32,8 @@ class Config(RunnerConfig):
             # Sergey: there seems to be a better name for this parameter. Originally, the only source was a singularity
             # recipe (build file). Later, MLCube started to support other sources, such as docker images.
             "build_file": "Singularity.recipe",  # Source for the image build process.
+            "image_store": "",  # Host-wide content-addressed SIF image store shared by workspaces (empty - disabled).
+            "image_store_max_size": "",  # Max size of image store (e.g., 200G), least recently used images evicted.
             "--network": None,  # Networking options defined during MLCube container execution.
             "--security": None,  # Security options defined during MLCube container execution.
             "--nv": None,  # usage options defined during MLCube container execution.
@@ -183,6 +188,11 @@ class Config(RunnerConfig):
 class SingularityRun(Runner):
     CONFIG = Config
 
+    _build_locks: t.Dict[str, threading.Lock] = {}
+    """Locks that serialize builds of one image file in tasks and prefetches (see `prefetch`)."""
+
+    _build_locks_lock = threading.Lock()
+
     def _get_extra_args(self) -> str:
         """Temporary solution to take into account run arguments provided by users."""
         # Collect all parameters that start with '--' and have a non-None value.
@@ -216,21 +226,84 @@ class SingularityRun(Runner):
             )
 
     def configure(self) -> None:
-        """Build Singularity Image on a current host."""
+        """Build Singularity Image on a current host.
+
+        If image store is configured (`image_store`), the image is built only if it does not exist in the image store,
+        and is linked into the `image_dir` directory.
+        """
+        self._build_image()
+
+    def _build_image(self) -> bool:
+        """Build the image unless it is up-to-date (see `configure`).
+
+        Returns:
+            True if the image has been built (or linked from the image store), false if the existing image is used.
+        """
         s_cfg: DictConfig = self.mlcube.runner
-        self.client.build(
-            build_dir=self.mlcube.runtime.root,
-            recipe=s_cfg.build_file,
-            image_dir=s_cfg.image_dir,
-            image_name=s_cfg.image,
-            build_args=s_cfg.build_args or "",
-        )
+        store: t.Optional[ContentStore] = None
+        if s_cfg.get("image_store", None):
+            store = ContentStore(s_cfg.image_store, max_size=parse_size(s_cfg.get("image_store_max_size", None)))
+        image_file = Path(s_cfg.image_dir, s_cfg.image).resolve().as_posix()
+        with SingularityRun._build_locks_lock:
+            lock = SingularityRun._build_locks.setdefault(image_file, threading.Lock())
+        with lock, metrics.timed(metrics.CONFIGURE_DURATION, step="build"):
+            return self.client.build(
+                build_dir=self.mlcube.runtime.root,
+                recipe=s_cfg.build_file,
+                image_dir=s_cfg.image_dir,
+                image_name=s_cfg.image,
+                build_args=s_cfg.build_args or "",
+                store=store,
+            )
 
     def run(self) -> None:
         """ """
+        run_args = self._prepare_run()
+        with hooks.stage("container", self.mlcube, self.task, command=self.client.run_command(*run_args)):
+            self.client.run(*run_args)
+        self._upload_outputs()
+
+    async def arun(self) -> None:
+        """Run a task without blocking the event loop.
+
+        Singularity runs as an asyncio subprocess. Preparation steps (building the image if needed, syncing the
+        workspace) run in the default executor.
+        """
+        run_args = await Shell.in_thread(self._prepare_run)
+        with hooks.stage("container", self.mlcube, self.task, command=self.client.run_command(*run_args)):
+            await self.client.arun(*run_args)
+        await Shell.in_thread(self._upload_outputs)
+
+    def prefetch(self) -> t.Dict:
+        """Build the image if it does not exist or is outdated, and download task inputs from storages."""
         image_file = Path(self.mlcube.runner.image_dir) / self.mlcube.runner.image
-        if not image_file.exists():
-            self.configure()
+        fetched = self._build_image()
+        size = image_file.stat().st_size if image_file.is_file() else None
+        return {"image": image_file.as_posix(), "fetched": fetched, "size": size, **super().prefetch()}
+
+    def _upload_outputs(self) -> None:
+        """Upload task outputs with `storage:` URIs to their storages (see `Shell.upload_outputs`)."""
+        try:
+            Shell.upload_outputs(self.mlcube, self.task)
+        except Exception as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                f"Error occurred while uploading task outputs (task={self.task}). Actual error is {type(err)} - see "
+                "context for details.",
+                error=str(err),
+                workspace=self.mlcube.runtime.workspace,
+                task=self.task,
+            )
+
+    def _prepare_run(self) -> t.Tuple[str, str, str, t.List[str], t.Optional[str]]:
+        """Prepare to run the current task: configure MLCube, sync workspace and generate mounts.
+
+        Returns:
+            Arguments for `Client.run`: run arguments, volumes, image file, task arguments and entrypoint.
+        """
+        image_file = Path(self.mlcube.runner.image_dir) / self.mlcube.runner.image
+        # Build the image if it does not exist, or rebuild it if its build inputs have changed (see `Client.build`).
+        self.configure()
 
         # Deal with user-provided workspace
         try:
@@ -280,24 +353,29 @@ class SingularityRun(Runner):
             )
             # By contract, custom entry points do not accept task name as the first argument.
             task_args = task_args[1:]
-        self.client.run(run_args, volumes, str(image_file), task_args, entrypoint)
+        return run_args, volumes, str(image_file), task_args, entrypoint
 
     def inspect(self, force: bool = False) -> t.Dict:
         s_cfg: DictConfig = self.mlcube.runner
         image_file = Path(s_cfg.image_dir, s_cfg.image)
 
         def _local_file_sha256sum(file_path: Path) -> str:
-            """Compute sha256 hash sum of the local file."""
-            _exit_code, _output = Shell.run_and_capture_output(
-                ["sha256sum", file_path.as_posix()]
-            )
-            if _exit_code != 0:
-                _output = _output.replace("\n", " ")
+            """Compute sha256 hash sum of the local file (cached next to the file until the file changes)."""
+            reported = [0]
+
+            def _progress(num_bytes: int, total_bytes: int) -> None:
+                percent = 100 * num_bytes // max(total_bytes, 1)
+                if percent >= reported[0] + 10 or num_bytes == total_bytes:
+                    reported[0] = percent
+                    logger.info("SingularityRun.inspect hashing %s: %d%% (%d bytes).", file_path, percent, num_bytes)
+
+            try:
+                return file_sha256(file_path, progress=_progress)
+            except OSError as err:
                 raise MLCubeError(
                     f"SingularityRun.inspect failed to compute sha256 sum of the local file. File={file_path}, "
-                    f"sha256sum_exitcode={_exit_code}, sha256sum_output={_output}"
+                    f"error={err}"
                 )
-            return _output.split(" ")[0].strip()
 
         if not s_cfg.build_file:
             # The build specs do not exist. This probably means that the SIF file must exist.
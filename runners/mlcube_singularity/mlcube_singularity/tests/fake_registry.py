@@ -0,0 +1,111 @@
+"""Local fake docker registry (subset of Docker Registry HTTP API V2 used by `DockerHubClient`).
+
+The registry requires bearer token authentication (tokens are issued by the `/token` endpoint of this server), serves
+one single-arch image (`mlcommons/mnist:0.0.1`) and one multi-arch image (`mlcommons/mnist:multi`), and can be asked to
+fail next requests with given status codes (e.g., 429 or 503) to test retries.
+"""
+import json
+import threading
+import typing as t
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+IMAGE_MANIFEST = {
+    "schemaVersion": 2,
+    "mediaType": "application/vnd.docker.distribution.manifest.v2+json",
+    "config": {"mediaType": "application/vnd.docker.container.image.v1+json", "digest": "sha256:" + "c" * 64},
+    "layers": [],
+}
+
+IMAGE_INDEX = {
+    "schemaVersion": 2,
+    "mediaType": "application/vnd.oci.image.index.v1+json",
+    "manifests": [
+        {"digest": "sha256:" + "a" * 64, "platform": {"os": "linux", "architecture": "amd64"}},
+        {"digest": "sha256:" + "b" * 64, "platform": {"os": "linux", "architecture": "aarch64"}},
+        {"digest": "sha256:" + "b" * 64, "platform": {"os": "darwin", "architecture": "arm64"}},
+    ],
+}
+
+
+class FakeRegistry(object):
+    """Fake docker registry running in a background thread.
+
+    Attributes:
+        requests: List of (path, authorization header) tuples for all requests this server received.
+        failures: Status codes to respond with to next requests (consumed in order).
+    """
+
+    def __init__(self, expires_in: int = 300) -> None:
+        self.requests: t.List[t.Tuple[str, t.Optional[str]]] = []
+        self.failures: t.List[int] = []
+        self.expires_in = expires_in
+        self.tokens: t.Set[str] = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "FakeRegistry":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def manifest_requests(self) -> t.List[str]:
+        return [path for path, _ in self.requests if "/manifests/" in path]
+
+    def token_requests(self) -> t.List[str]:
+        return [path for path, _ in self.requests if path.startswith("/token")]
+
+    def _handler(self) -> t.Type[BaseHTTPRequestHandler]:
+        registry = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                ...
+
+            def _reply(self, status: int, body: t.Optional[t.Dict] = None, headers: t.Optional[t.Dict] = None) -> None:
+                data = json.dumps(body or {}).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                registry.requests.append((self.path, self.headers.get("Authorization", None)))
+                if registry.failures:
+                    self._reply(registry.failures.pop(0), headers={"Retry-After": "0"})
+                    return
+
+                url = urlparse(self.path)
+                if url.path == "/token":
+                    token = f"token-{len(registry.tokens)}"
+                    registry.tokens.add(token)
+                    query = parse_qs(url.query)
+                    self._reply(200, {"token": token, "expires_in": registry.expires_in, "scope": query["scope"]})
+                    return
+
+                name, _, reference = url.path[4:].partition("/manifests/")
+                if self.headers.get("Authorization", "")[7:] not in registry.tokens:
+                    self._reply(401, headers={
+                        "WWW-Authenticate": f'Bearer realm="{registry.url}/token",service="fake",'
+                                            f'scope="repository:{name}:pull"'
+                    })
+                    return
+
+                if name == "mlcommons/mnist" and reference in ("0.0.1", "sha256:" + "a" * 64, "sha256:" + "b" * 64):
+                    self._reply(200, IMAGE_MANIFEST)
+                elif name == "mlcommons/mnist" and reference == "multi":
+                    self._reply(200, IMAGE_INDEX)
+                else:
+                    self._reply(404, {"errors": [{"code": "MANIFEST_UNKNOWN"}]})
+
+        return _Handler
@@ -0,0 +1,93 @@
+import os
+import stat
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from mlcube_singularity.singularity_client import DockerHubClient, DockerImage
+from mlcube_singularity.tests.fake_registry import IMAGE_MANIFEST, FakeRegistry
+
+from mlcube.errors import MLCubeError
+
+
+class TestDockerHubClient(TestCase):
+    def setUp(self) -> None:
+        self.registry = FakeRegistry()
+        self.registry.__enter__()
+        self.addCleanup(self.registry.__exit__)
+
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.cache_dir = Path(tmp_dir.name)
+
+        patches = [
+            patch.object(DockerImage, "resolve_registry_url", lambda _self: self.registry.url),
+            patch.dict(os.environ, {"HOME": tmp_dir.name}),  # No docker credentials.
+            patch.object(DockerHubClient, "BACKOFF_FACTOR", 0),
+            patch.object(DockerHubClient, "_session", None),
+        ]
+        for _patch in patches:
+            _patch.start()
+            self.addCleanup(_patch.stop)
+        os.environ.pop("SINGULARITY_DOCKER_USERNAME", None)
+        DockerHubClient.clear_cache()
+        self.addCleanup(DockerHubClient.clear_cache)
+
+    def test_get_manifest(self) -> None:
+        client = DockerHubClient(cache_dir=self.cache_dir)
+        self.assertDictEqual(client.get_manifest("docker://mlcommons/mnist:0.0.1"), IMAGE_MANIFEST)
+        # Unauthorized request, token request and authorized request.
+        self.assertEqual(len(self.registry.requests), 3)
+
+        # Manifest is cached in memory and on disk.
+        self.assertDictEqual(client.get_manifest("docker://mlcommons/mnist:0.0.1"), IMAGE_MANIFEST)
+        DockerHubClient.clear_cache()
+        self.assertDictEqual(client.get_manifest("docker://mlcommons/mnist:0.0.1"), IMAGE_MANIFEST)
+        self.assertEqual(len(self.registry.requests), 3)
+
+    def test_token_cache(self) -> None:
+        DockerHubClient(cache_dir=self.cache_dir).get_manifest("docker://mlcommons/mnist:0.0.1")
+        token_file = self.cache_dir / "tokens.json"
+        self.assertEqual(stat.S_IMODE(token_file.stat().st_mode), 0o600)
+
+        # Manifest cache is expired, new process (no in-memory cache) - cached token is used right away.
+        DockerHubClient.clear_cache()
+        with patch.object(DockerHubClient, "MANIFEST_TAG_TTL", -1):
+            DockerHubClient(cache_dir=self.cache_dir).get_manifest("docker://mlcommons/mnist:0.0.1")
+        self.assertEqual(len(self.registry.token_requests()), 1)
+        self.assertEqual(len(self.registry.manifest_requests()), 3)
+        self.assertEqual(self.registry.requests[-1][1], "Bearer token-0")
+
+    def test_token_expiration(self) -> None:
+        self.registry.expires_in = 5  # Less than DockerHubClient.TOKEN_EXPIRATION_MARGIN
+        with patch.object(DockerHubClient, "MANIFEST_TAG_TTL", -1):
+            for _ in range(2):
+                DockerHubClient(cache_dir=self.cache_dir).get_manifest("docker://mlcommons/mnist:0.0.1")
+        self.assertEqual(len(self.registry.token_requests()), 2)
+
+    def test_multi_arch_manifest(self) -> None:
+        client = DockerHubClient(cache_dir=self.cache_dir)
+        with patch("mlcube_singularity.singularity_client.platform.uname") as uname:
+            uname.return_value.system, uname.return_value.machine = "Linux", "x86_64"
+            self.assertDictEqual(client.get_manifest("docker://mlcommons/mnist:multi"), IMAGE_MANIFEST)
+            num_requests = len(self.registry.manifest_requests())
+
+            # Tag manifest is expired, but image manifest (referenced by digest) is immutable.
+            with patch.object(DockerHubClient, "MANIFEST_TAG_TTL", -1):
+                self.assertDictEqual(client.get_manifest("docker://mlcommons/mnist:multi"), IMAGE_MANIFEST)
+        self.assertEqual(len(self.registry.manifest_requests()), num_requests + 1)
+        self.assertTrue(self.registry.manifest_requests()[-1].endswith("/manifests/multi"))
+
+    def test_retries(self) -> None:
+        self.registry.failures = [429, 503]
+        start = time.monotonic()
+        self.assertDictEqual(
+            DockerHubClient(cache_dir=self.cache_dir).get_manifest("docker://mlcommons/mnist:0.0.1"), IMAGE_MANIFEST
+        )
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(self.registry.requests), 5)
+
+        with self.assertRaises(MLCubeError):
+            DockerHubClient(cache_dir=self.cache_dir).get_manifest("docker://mlcommons/unknown:0.0.1")
@@ -1,15 +1,24 @@
+import json
+import os
+import tempfile
 import typing as t
+from pathlib import Path
 from unittest import TestCase
+from unittest.mock import patch
 
 import semver
 from mlcube_singularity.singularity_client import (
     Client,
+    DockerHubClient,
     DockerImage,
     Runtime,
     Version,
     parse_key_value_string,
 )
 
+from mlcube.errors import MLCubeError
+from mlcube.store import ContentStore
+
 
 class TestSingularityRunner(TestCase):
     def test___init__(self) -> None:
@@ -215,3 +224,101 @@ class TestSingularityRunner(TestCase):
                 "scope": "repository:mlcommons/mnist:pull",
             },
         )
+
+
+class TestSingularityBuild(TestCase):
+    def setUp(self) -> None:
+        self.client = Client(
+            "singularity", Version(Runtime.SINGULARITY, semver.VersionInfo(3, 7, 5))
+        )
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+        self.image_file = self.root / ".image" / "image.sif"
+        (self.root / "Singularity.recipe").write_text("Bootstrap: docker\nFrom: ubuntu:18.04\n")
+
+        self.builds: t.List[t.List[str]] = []
+
+        def _build(cmd: t.List[str], *args, **kwargs) -> int:
+            # The temporary output file is the second to last argument.
+            self.builds.append(cmd)
+            Path(cmd[-2]).write_text(f"SIF image #{len(self.builds)}")
+            return 0
+
+        build_patch = patch("mlcube_singularity.singularity_client.Shell.run", side_effect=_build)
+        build_patch.start()
+        self.addCleanup(build_patch.stop)
+
+    def build(self, recipe: str = "Singularity.recipe", build_args: str = "--fakeroot") -> bool:
+        return self.client.build(
+            self.root.as_posix(), recipe, self.image_file.parent.as_posix(), self.image_file.name, build_args
+        )
+
+    def test_build_recipe(self) -> None:
+        self.build()
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(self.image_file.read_text(), "SIF image #1")
+        manifest = json.loads(Client.build_manifest_file(self.image_file).read_text())
+        self.assertEqual(manifest["recipe"], "Singularity.recipe")
+        self.assertEqual(manifest["build_args"], "--fakeroot")
+        # Only the image and its build manifest, no temporary files.
+        self.assertListEqual(
+            sorted(p.name for p in self.image_file.parent.iterdir()), ["image.sif", "image.sif.manifest.json"]
+        )
+
+        # Same inputs - no rebuild.
+        self.assertFalse(self.build())
+        self.assertEqual(len(self.builds), 1)
+
+        # Build arguments or recipe file change - rebuild.
+        self.assertTrue(self.build(build_args=""))
+        self.assertEqual(len(self.builds), 2)
+        (self.root / "Singularity.recipe").write_text("Bootstrap: docker\nFrom: ubuntu:20.04\n")
+        self.build(build_args="")
+        self.assertEqual(len(self.builds), 3)
+        self.assertEqual(self.image_file.read_text(), "SIF image #3")
+
+    def test_build_existing_image_without_manifest(self) -> None:
+        self.image_file.parent.mkdir()
+        self.image_file.write_text("User-provided SIF image")
+        self.build()
+        self.assertEqual(len(self.builds), 0)
+        self.assertEqual(self.image_file.read_text(), "User-provided SIF image")
+
+    def test_build_docker_image(self) -> None:
+        digest = "sha256:1111"
+        with patch.object(
+            DockerHubClient, "get_manifest", side_effect=lambda _: {"config": {"digest": digest}}
+        ):
+            self.build("docker://mlcommons/mnist:0.0.1")
+            self.build("docker://mlcommons/mnist:0.0.1")
+            self.assertEqual(len(self.builds), 1)
+
+            # Tag now points to a new image.
+            digest = "sha256:2222"
+            self.build("docker://mlcommons/mnist:0.0.1")
+            self.assertEqual(len(self.builds), 2)
+
+        # Docker registry is not available - existing image is used.
+        with patch.object(DockerHubClient, "get_manifest", side_effect=MLCubeError("Registry not available.")):
+            self.build("docker://mlcommons/mnist:0.0.1")
+            self.assertEqual(len(self.builds), 2)
+
+    def test_build_with_image_store(self) -> None:
+        store = ContentStore(self.root / "store")
+        workspaces = [self.root / "workspace_1" / ".image", self.root / "workspace_2" / ".image"]
+        for workspace in workspaces:
+            self.client.build(self.root.as_posix(), "Singularity.recipe", workspace.as_posix(), "image.sif", "", store)
+        # Image has been built once, and both workspaces reference the same file.
+        self.assertEqual(len(self.builds), 1)
+        self.assertEqual(len(store.entries()), 1)
+        self.assertTrue(os.path.samefile(workspaces[0] / "image.sif", workspaces[1] / "image.sif"))
+        self.assertTrue(Client.build_manifest_file(workspaces[1] / "image.sif").is_file())
+
+        # Images in workspaces built without image store are added to the store.
+        self.build()
+        store = ContentStore(self.root / "store_2")
+        self.client.build(self.root.as_posix(), "Singularity.recipe", self.image_file.parent.as_posix(),
+                          self.image_file.name, "--fakeroot", store)
+        self.assertEqual(len(self.builds), 2)
+        self.assertTrue(os.path.samefile(self.image_file, store.path(store.entries()[0].key)))
@@ -10,6 +10,7 @@ mlcube.shell:shell.py:99 Command='singularity exec   /tmp/tmpljhf3drp/ubuntu-18.
 ```
 When custom entrypoints are not used, singularity uses `run` command instead of `exec`.
 """
+import asyncio
 import shutil
 import tempfile
 import typing as t
@@ -171,6 +172,7 @@ class TestSingularityRunner(TestCase):
         SingularityRun(mlcube, task=None).configure()
         SingularityRun(mlcube, task="ls").run()
         SingularityRun(mlcube, task="free").run()
+        asyncio.run(SingularityRun(mlcube, task="free").arun())
 
     @unittest.skipUnless(client is not None, reason="No singularity available.")
     def test_mlcube_no_singularity_section_config(self):
@@ -107,7 +107,7 @@ class SSHRun(Runner):
         # runner. So, the runner to be used on a remote host must configure itself.
         try:
             cmd = f"mlcube configure --mlcube=. --platform={self.mlcube.runner.platform}"
-            Shell.ssh(conn, f'{remote_env.activate_cmd(noop=":")} && cd {remote_path} && {cmd}')
+            Shell.ssh(conn, f'{remote_env.activate_cmd(noop=":")} && cd {remote_path} && {cmd}', tty=True)
         except ExecutionError as err:
             raise ExecutionError.mlcube_configure_error(
                 self.__class__.__name__,
@@ -116,15 +116,10 @@ class SSHRun(Runner):
             )
 
     def run(self) -> None:
-        conn: t.Text = self.get_connection_string()
-        remote_env: PythonInterpreter = PythonInterpreter.create(self.mlcube.runner.interpreter)
-
-        # The 'remote_path' variable points to the MLCube root directory on remote host.
-        remote_path: t.Text = os.path.join(self.mlcube.runner.remote_root, os.path.basename(self.mlcube.runtime.root))
-
+        conn, remote_path, cmd = self._remote_run_command()
         try:
-            cmd = f"mlcube run --mlcube=. --platform={self.mlcube.runner.platform} --task={self.task}"
-            Shell.ssh(conn, f'{remote_env.activate_cmd(noop=":")} && cd {remote_path} && {cmd}')
+            # With a pseudo-terminal, the remote task stops when the local ssh client is interrupted.
+            Shell.ssh(conn, cmd, tty=True)
         except ExecutionError as err:
             raise ExecutionError.mlcube_run_error(
                 self.__class__.__name__,
@@ -142,3 +137,37 @@ class SSHRun(Runner):
                 "Error occurred while syncing workspace.",
                 **err.context
             )
+
+    async def arun(self) -> None:
+        """Run MLCube task on a remote host with asyncio `ssh` and `rsync` subprocesses."""
+        conn, remote_path, cmd = self._remote_run_command()
+        try:
+            await Shell.assh(conn, cmd, tty=True)
+        except ExecutionError as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                f"Error occurred while running MLCube task (name={self.task}).",
+                **err.context
+            )
+
+        try:
+            await Shell.arsync_dirs(
+                source=f'{conn}:{remote_path}/workspace/', dest=f'{self.mlcube.runtime.root}/workspace/'
+            )
+        except ExecutionError as err:
+            raise ExecutionError.mlcube_run_error(
+                self.__class__.__name__,
+                "Error occurred while syncing workspace.",
+                **err.context
+            )
+
+    def _remote_run_command(self) -> t.Tuple[t.Text, t.Text, t.Text]:
+        """Return connection string, MLCube root directory on remote host and remote command that runs the task."""
+        conn: t.Text = self.get_connection_string()
+        remote_env: PythonInterpreter = PythonInterpreter.create(self.mlcube.runner.interpreter)
+
+        # The 'remote_path' variable points to the MLCube root directory on remote host.
+        remote_path: t.Text = os.path.join(self.mlcube.runner.remote_root, os.path.basename(self.mlcube.runtime.root))
+
+        cmd = f"mlcube run --mlcube=. --platform={self.mlcube.runner.platform} --task={self.task}"
+        return conn, remote_path, f'{remote_env.activate_cmd(noop=":")} && cd {remote_path} && {cmd}'
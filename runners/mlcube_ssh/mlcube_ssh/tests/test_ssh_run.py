@@ -0,0 +1,44 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from mlcube_ssh.ssh_run import SSHRun
+from omegaconf import OmegaConf
+
+from mlcube.shell import Shell
+
+
+class TestSSHRun(TestCase):
+    def setUp(self) -> None:
+        self.mlcube = OmegaConf.create({
+            'runtime': {'root': '/home/user/mnist'},
+            'runner': {
+                'host': 'node1', 'platform': 'docker', 'remote_root': '/opt/mlcube',
+                'interpreter': {'type': 'system', 'python': 'python3', 'requirements': ''},
+                'authentication': {'user': 'user'}
+            }
+        })
+
+    def test_arun(self) -> None:
+        with patch.object(Shell, 'assh') as assh, patch.object(Shell, 'arsync_dirs') as arsync_dirs:
+            asyncio.run(SSHRun(self.mlcube, task='train').arun())
+        conn, cmd = assh.call_args[0]
+        self.assertEqual(conn, 'user@node1')
+        self.assertTrue(assh.call_args[1]['tty'])
+        self.assertTrue(cmd.endswith('cd /opt/mlcube/mnist && mlcube run --mlcube=. --platform=docker --task=train'))
+        self.assertDictEqual(
+            arsync_dirs.call_args[1],
+            {'source': 'user@node1:/opt/mlcube/mnist/workspace/', 'dest': '/home/user/mnist/workspace/'}
+        )
+
+        with patch.object(Shell, 'ssh') as ssh, patch.object(Shell, 'rsync_dirs'):
+            SSHRun(self.mlcube, task='train').run()
+        self.assertEqual(ssh.call_args[0], (conn, cmd))
+        self.assertTrue(ssh.call_args[1]['tty'])
+
+    def test_ssh_tty(self) -> None:
+        with patch.object(Shell, 'run') as run:
+            Shell.ssh('user@node1', 'mlcube run', tty=True)
+            Shell.ssh('user@node1', 'mlcube configure')
+        self.assertEqual(run.call_args_list[0][0][0], "ssh -tt -o StrictHostKeyChecking=no user@node1 'mlcube run'")
+        self.assertEqual(run.call_args_list[1][0][0], "ssh -o StrictHostKeyChecking=no user@node1 'mlcube configure'")